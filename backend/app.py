@@ -1,28 +1,52 @@
 """Main FastAPI application with real PSA data integration."""
 import asyncio
+import math
 import os
-from datetime import datetime
-from typing import Optional
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
 
 from predict import (
     players,
+    draw,
     fetch,
     features,
+    feature_store,
+    live,
     model,
-    schemas
+    opponents,
+    pairwise,
+    params,
+    ratings,
+    resample,
+    schemas,
+    scoreline,
+    splits
 )
 from predict import rankings as rank_module
 try:
     from predict import (
         players,
+        draw,
         fetch,
         features,
+        feature_store,
+        live,
         model,
-        schemas
+        opponents,
+        pairwise,
+        params,
+        ratings,
+        resample,
+        schemas,
+        scoreline,
+        splits
     )
     from predict import rankings as rank_module
     print("✅ All predict modules imported successfully")
@@ -32,10 +56,20 @@ except ImportError as e:
     traceback.print_exc()
     # Fallback to simple mode if imports fail
     players = None
+    draw = None
     fetch = None
     features = None
+    feature_store = None
+    live = None
     model = None
+    opponents = None
+    pairwise = None
+    params = None
+    ratings = None
+    resample = None
     schemas = None
+    scoreline = None
+    splits = None
     rank_module = None
 # Create FastAPI app
 app = FastAPI(
@@ -56,8 +90,92 @@ app.add_middleware(
 
 @app.get("/api/health")
 async def health_check():
-    """Health check endpoint."""
-    return {"status": "ok"}
+    """Health check endpoint, with the versions of the model parameters and trained model loaded at startup."""
+    return {
+        "status": "ok",
+        "model_params": params.params_version(params.ACTIVE) if params else None,
+        "learned_model": model.LEARNED.version if model and model.LEARNED else None,
+    }
+
+
+_recording = threading.Lock()
+
+
+def record_top20(ranked_players, histories, reference_date):
+    """
+    Store the ranking snapshots, fold each player's history (with opponent
+    ranks as of each match) into the split cube and return their records
+    vs the top 20. Blocking disk I/O: run it in the threadpool.
+    """
+    with _recording:
+        for gender, ranked in ranked_players.items():
+            if ranked:
+                opponents.store_snapshot(ranked, gender)
+        ranking_index = opponents.load_index()
+        cube = splits.default_cube()
+        added = sum(cube.ingest(player_id, opponents.attach_opponent_ranks(hist, ranking_index))
+                    for player_id, hist in histories.items())
+        if added:
+            cube.save()
+        return {player_id: cube.vs_top20(player_id, reference_date) for player_id in histories}
+
+
+def refresh_stores(histories, ranked_players) -> bool:
+    """
+    Fold fetched histories and rankings into every store the pairwise matrix
+    is rebuilt from (rating graph, feature store, ranking snapshots, split
+    cube); returns whether any of them changed. Blocking: run it in the
+    threadpool.
+    """
+    reference_date = datetime.now(timezone.utc)
+    store = feature_store.default_store()
+    stored = {player_id: store.history(player_id) for player_id in histories}
+    snapshots = opponents.snapshot_version()
+    changed = ratings.ingest_histories(histories, ratings.default_engine()) > 0
+    for player_id, hist in histories.items():
+        store.player_features(player_id, hist, reference_date)
+        before = stored[player_id]
+        changed |= before is None or (feature_store.history_version(before)
+                                      != feature_store.history_version(store.history(player_id)))
+    record_top20(ranked_players, histories, reference_date)
+    return changed or opponents.snapshot_version() != snapshots
+
+
+# Matrix hits skip the fetches, so each one refreshes its players' data in
+# the background (at most once per REFRESH_SECONDS per player)
+REFRESH_SECONDS = 3600.0
+_refreshed: Dict[str, float] = {}
+_refreshing = set()
+
+
+async def refresh_players(names: Dict[str, str]) -> None:
+    """Fetch the histories and rankings of players (id -> name) and rebuild the matrix if anything changed."""
+    try:
+        async with asyncio.timeout(90):
+            histories = {player_id: await fetch.get_extended_match_history(name, player_id, months_back=24)
+                         for player_id, name in names.items()}
+            ranked_players = {gender: await rank_module.get_all_ranked_players(gender)
+                              for gender in ("male", "female")}
+        histories = {player_id: hist for player_id, hist in histories.items()
+                     if hist is not None and not hist.empty}
+        if histories and await run_in_threadpool(refresh_stores, histories, ranked_players):
+            pairwise.rebuild_in_background()
+    except (asyncio.TimeoutError, Exception) as e:
+        print(f"⚠️  Background refresh failed: {e}")
+
+
+def refresh_in_background(names: Dict[str, str]) -> None:
+    """Schedule ``refresh_players`` for the players not refreshed in the last ``REFRESH_SECONDS``."""
+    now = time.monotonic()
+    due = {player_id: name for player_id, name in names.items()
+           if now - _refreshed.get(player_id, -math.inf) >= REFRESH_SECONDS}
+    if not due:
+        return
+    _refreshed.update(dict.fromkeys(due, now))
+    task = asyncio.create_task(refresh_players(due))
+    # The loop only keeps weak references to tasks
+    _refreshing.add(task)
+    task.add_done_callback(_refreshing.discard)
 
 
 # ... existing imports ...
@@ -68,7 +186,8 @@ async def predict_match(
         playerB: str = Query(..., description="Player B name"),
         event_date: Optional[str] = Query(None, description="Event date (YYYY-MM-DD)"),
         no_cache: bool = Query(False, description="Bypass cache"),
-        seed: int = Query(42, description="Random seed for reproducibility")
+        seed: int = Query(42, description="Random seed for reproducibility"),
+        scorelines: bool = Query(False, description="Include 3-0/3-1/3-2 scoreline probabilities")
 ):
     """
     Predict squash match outcome using real PSA data.
@@ -79,8 +198,11 @@ async def predict_match(
     3. Retrieves match history for both players (last 24 months) from multiple sources
     4. Calculates head-to-head record
     5. Extracts features (Elo, form, fatigue, H2H)
-    6. Runs ranking-aware prediction model
-    7. Returns probabilities with 95% confidence intervals
+    6. Runs ranking-aware prediction model (matchups among the top-ranked
+       players are answered from the precomputed pairwise matrix instead of
+       steps 2-6 when it is current; their data is refreshed in the background)
+    7. Returns probabilities with 95% confidence intervals (and, with
+       ``scorelines``, the PAR-11 scoreline distribution)
 
     Returns 400 if player not found with suggestions.
     Returns 503 if PSA data unavailable.
@@ -116,6 +238,47 @@ async def predict_match(
                 detail["suggestions"] = e.suggestions
             raise HTTPException(status_code=400, detail=detail)
 
+        # ================================================================
+        # Top-ranked matchups: a lookup in the precomputed matrix
+        # ================================================================
+        if use_cache and not event_date:
+            cached = None
+            try:
+                matrix = pairwise.current_matrix(ratings.default_engine())
+                if matrix is None:
+                    # Missing or built from older data: never served, rebuilt in the background
+                    pairwise.rebuild_in_background()
+                else:
+                    cached = matrix.prediction(player_a_id, player_b_id)
+            except Exception as e:
+                print(f"⚠️  Pairwise matrix unavailable: {e}")
+
+            if cached is not None:
+                refresh_in_background({player_a_id: player_a_canonical, player_b_id: player_b_canonical})
+                response = {
+                    "playerA": player_a_canonical,
+                    "playerB": player_b_canonical,
+                    "resolved": {
+                        side: {"canonical": resolved[side]["canonical"],
+                               "profile_url": resolved[side]["profile_url"],
+                               "id": resolved[side]["id"]}
+                        for side in ("A", "B")
+                    },
+                    "event": None,
+                    "ranking": {"A": matrix.ranking(player_a_id), "B": matrix.ranking(player_b_id)},
+                    "match_data_quality": {"sources_used": ["pairwise_matrix"], "matrix_version": matrix.version},
+                    "summary": {"winner": cached["winner"], "proba": cached["proba"], "ci95": cached["ci95"],
+                                "interval": "beta"},
+                    "explain": cached["explain"],
+                    "sources": list(set(sources)),
+                    "warnings": [f"Served from the precomputed top-{pairwise.TOP_N} matrix "
+                                 f"(version {matrix.version}); ci95 is the Beta interval, "
+                                 f"not resampled from match histories"],
+                }
+                if scorelines:
+                    response["scorelines"] = scoreline.scoreline_distribution(cached["proba"]["A"])
+                return response
+
         # ================================================================
         # STEP 2: Fetch current rankings from PSA API
         # ================================================================
@@ -221,7 +384,35 @@ async def predict_match(
         # ================================================================
         # STEP 5: Extract features from data
         # ================================================================
+        # Past events are predicted as of their date, from earlier matches only
+        reference_date = datetime.now(timezone.utc)
+        if event_date:
+            try:
+                event_day = datetime.strptime(event_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+                reference_date = min(reference_date, event_day)
+            except ValueError:
+                warnings.append(f"Ignoring malformed event date {event_date}")
+
         if hist_a is not None and hist_b is not None and not hist_a.empty and not hist_b.empty:
+            # Fold any new matches into the global rating graph
+            elo_engine = None
+            strengths = None
+            try:
+                elo_engine = ratings.default_engine()
+                # Ingest and save block, so they run on a worker thread; late
+                # matches are replayed in the background
+                added = await run_in_threadpool(
+                    ratings.ingest_histories, {player_a_id: hist_a, player_b_id: hist_b}, elo_engine)
+                if added:
+                    print(f"✅ Rating graph: {added} new matches ({len(elo_engine)} total, "
+                          f"{elo_engine.pending} queued for replay)")
+                    # The top-N matrix is now stale; rebuild it off the request path
+                    pairwise.rebuild_in_background()
+                # The last fit; a refit runs in the background when the graph has grown
+                strengths = ratings.current_strengths(elo_engine)
+            except Exception as e:
+                print(f"⚠️  Rating graph update failed: {e}")
+
             # Use real match history for feature extraction
             try:
                 feature_dict = features.extract_all_features(
@@ -231,9 +422,27 @@ async def predict_match(
                     rank_a,
                     rank_b,
                     player_a_canonical,
-                    reference_date=datetime.now()
+                    reference_date=reference_date,
+                    elo_engine=elo_engine,
+                    player_a_id=player_a_id,
+                    player_b_id=player_b_id,
+                    strengths=strengths,
+                    feature_store=feature_store.default_store()
                 )
 
+                # Records vs top-20 for the underdog override, from the opponents'
+                # rankings as of each match (the lists step 2 already fetched)
+                try:
+                    async with asyncio.timeout(10):
+                        ranked_players = {gender: await rank_module.get_all_ranked_players(gender, use_cache)
+                                          for gender in ("male", "female")}
+                    top20 = await run_in_threadpool(
+                        record_top20, ranked_players, {player_a_id: hist_a, player_b_id: hist_b}, reference_date)
+                    feature_dict["vs_top20_a"] = top20[player_a_id]
+                    feature_dict["vs_top20_b"] = top20[player_b_id]
+                except (asyncio.TimeoutError, Exception) as e:
+                    print(f"⚠️  Opponent rankings unavailable: {e}")
+
                 # Add info about data quality
                 data_quality = "comprehensive" if len(hist_a) > 10 and len(hist_b) > 10 else "limited"
                 warnings.append(f"Using {data_quality} match data for prediction")
@@ -296,6 +505,18 @@ async def predict_match(
         # STEP 6: Run prediction model
         # ================================================================
         prediction = model.predict_match(feature_dict, rank_a, rank_b, seed=seed)
+        interval = "beta"
+
+        # With features from the match histories, the interval comes from
+        # resampling them (a few ms of numpy, so on a worker thread)
+        if "elo_source" in feature_dict:
+            try:
+                prediction["ci95"] = await run_in_threadpool(
+                    resample.bootstrap_interval,
+                    hist_a, hist_b, h2h_df, feature_dict, rank_a, rank_b, reference_date, seed=seed)
+                interval = "bootstrap"
+            except Exception as e:
+                warnings.append(f"Bootstrap interval unavailable: {str(e)}")
         print(
             f"✅ Prediction complete: {player_a_canonical} {prediction['proba']['A']:.1%} vs {player_b_canonical} {prediction['proba']['B']:.1%}")
 
@@ -372,13 +593,17 @@ async def predict_match(
             "summary": {
                 "winner": prediction["winner"],
                 "proba": prediction["proba"],
-                "ci95": prediction["ci95"]
+                "ci95": prediction["ci95"],
+                "interval": interval
             },
             "explain": prediction["explain"],
             "sources": list(set(sources)),  # Deduplicate
             "warnings": warnings
         }
 
+        if scorelines:
+            response["scorelines"] = scoreline.scoreline_distribution(prediction["proba"]["A"])
+
         return response
 
     except HTTPException:
@@ -400,6 +625,111 @@ async def predict_match(
         )
 
 
+@app.post("/api/draw", response_model=schemas.DrawResponse)
+def draw_odds(request: schemas.DrawRequest):
+    """
+    Simulate a knockout draw.
+
+    Takes player ids in seed order (32, 48 or 64 players; any size up to
+    128, with byes for the top seeds when it is not a power of two). Every
+    pairing is scored once by the batch model from stored data (rating
+    graph, fitted strengths, top-20 records, ranking snapshots), then the
+    bracket is played ``n_simulations`` times.
+
+    Returns each player's chance of reaching every round and of winning the
+    title. A plain ``def`` on purpose: FastAPI runs it in the threadpool, so
+    scoring and simulating a large draw does not block the event loop.
+    """
+    if len(set(request.players)) != len(request.players):
+        raise HTTPException(status_code=400, detail={
+            "code": "INVALID_DRAW", "message": "Players must not repeat."})
+    if request.ranks is not None and len(request.ranks) != len(request.players):
+        raise HTTPException(status_code=400, detail={
+            "code": "INVALID_DRAW", "message": "Give one rank per player."})
+
+    warnings = []
+    reference_date = datetime.now(timezone.utc)
+    if request.event_date:
+        reference_date = min(reference_date, datetime.combine(request.event_date, datetime.min.time(), timezone.utc))
+
+    if request.ranks is not None:
+        ranks = request.ranks
+    else:
+        stored = opponents.load_index().ranks_as_of(request.players, reference_date)
+        unranked = [p for p, rank in zip(request.players, stored) if math.isnan(rank)]
+        if unranked:
+            warnings.append(f"No stored ranking for {', '.join(unranked)}; treated as #{opponents.MAX_RANK}")
+        ranks = [opponents.MAX_RANK if math.isnan(rank) else int(rank) for rank in stored]
+
+    try:
+        elo_engine = ratings.default_engine()
+        strengths = ratings.current_strengths(elo_engine)
+    except Exception as e:
+        elo_engine = strengths = None
+        warnings.append(f"Rating graph unavailable: {str(e)}")
+    unrated = [p for p in request.players if elo_engine is None or p not in elo_engine]
+    if unrated:
+        warnings.append(f"{len(unrated)} players have no matches in the rating graph")
+
+    try:
+        matrix = pairwise.pairwise_probabilities(
+            request.players, ranks, reference_date,
+            elo_engine=elo_engine, strengths=strengths, cube=splits.default_cube())
+        reach = draw.simulate_draw(matrix, request.n_simulations, seed=request.seed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail={"code": "INVALID_DRAW", "message": str(e)})
+
+    size = len(draw.bracket(len(request.players)))
+    return {
+        "size": size,
+        "rounds": draw.round_labels(size),
+        "n_simulations": request.n_simulations,
+        "players": draw.draw_summary(request.players, ranks, reach),
+        "warnings": warnings,
+    }
+
+
+@app.websocket("/api/live")
+async def live_updates(websocket: WebSocket):
+    """
+    In-play win probability, point by point.
+
+    One socket can carry any number of matches. Start each with its pre-match
+    prediction (the ``summary`` block of /api/predict), then send score
+    updates; every message gets one reply:
+
+        {"type": "start", "match_id": "m1", "prediction": {"proba": {"A": 0.62, "B": 0.38}}}
+        {"type": "score", "match_id": "m1", "games": [1, 0], "points": [7, 5]}
+        {"type": "end", "match_id": "m1"}
+
+    Replies carry the current ``proba`` from precomputed PAR-11 state tables
+    (see predict/live.py). Match ids belong to the socket that started them
+    and are forgotten when it closes; each socket holds at most
+    ``live.MAX_MATCHES`` matches, and idle ones expire after
+    ``live.MATCH_TTL_SECONDS``.
+    """
+    if live is None:
+        await websocket.close(code=1011, reason="Live predictions unavailable")
+        return
+    registry = live.LiveMatches()
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await websocket.send_json({"type": "error", "message": "Messages must be JSON objects"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"type": "error", "message": "Messages must be JSON objects"})
+                continue
+            await websocket.send_json(registry.handle(message))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        registry.clear()
+
+
 # ... rest of your app.py remains the same ...
 
 
@@ -0,0 +1,32 @@
+"""Shared timing helpers for the benchmark scripts."""
+import contextlib
+import io
+import time
+from typing import Callable, Dict
+
+
+def best_of(fn: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """Best wall time in seconds for ``number`` calls of ``fn`` over ``repeat`` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the progress prints of scraper/fetch code while timing."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def report(title: str, timings: Dict[str, float]) -> None:
+    """Print timings (seconds) with the speedup relative to the first entry."""
+    print(f"\n{title}")
+    baseline = next(iter(timings.values()))
+    for name, seconds in timings.items():
+        speedup = baseline / seconds if seconds > 0 else float("inf")
+        print(f"  {name:<32} {seconds * 1000:9.3f} ms   x{speedup:6.1f}")
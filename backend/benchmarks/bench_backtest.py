@@ -0,0 +1,68 @@
+"""
+Walk-forward backtest: features rebuilt from the graph for every match
+(``pairwise.player_sides`` and ``graph_h2h`` as of its date) vs
+``backtest.run_backtest``'s prefix-sum lookups, serial and over a pool.
+
+The per-match path is timed on a sample and scaled up.
+
+Run from backend/:
+    python -m benchmarks.bench_backtest [--matches 300000] [--workers 4]
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._timing import best_of, report
+from predict import backtest, history, model, pairwise
+from predict.ratings import EloEngine, RatedMatch
+
+SAMPLE = 20
+
+
+def synthetic_engine(n_matches, n_players, seed=0):
+    rng = np.random.default_rng(seed)
+    start = history.timestamp_ns(pd.Timestamp("2005-01-01", tz="UTC"))
+    days = np.sort(rng.integers(0, 20 * 365, n_matches))
+    pairs = rng.integers(0, n_players, (n_matches, 2))
+    pairs[:, 1] = (pairs[:, 0] + 1 + pairs[:, 1] % (n_players - 1)) % n_players
+    engine = EloEngine()
+    engine.ingest(RatedMatch(f"m{k}", int(start + day * history.NS_PER_DAY), f"p{a}", f"p{b}")
+                  for k, (day, (a, b)) in enumerate(zip(days.tolist(), pairs.tolist())))
+    return engine
+
+
+def per_match(engine, replay, indices):
+    for i in indices:
+        reference = pd.Timestamp(int(replay.date_ns[i]), tz="UTC")
+        pair = [replay.player_ids[replay.a[i]], replay.player_ids[replay.b[i]]]
+        sides = pairwise.player_sides(pair, reference, elo_engine=engine)
+        columns = pairwise.pair_columns(sides, pairwise.graph_h2h(engine, pair, reference), [0], [1])
+        model.predict_batch(columns, replay.rank_a[i:i + 1], replay.rank_b[i:i + 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--matches", type=int, default=300_000)
+    parser.add_argument("--players", type=int, default=3_000)
+    parser.add_argument("--workers", type=int, default=backtest.N_WORKERS)
+    args = parser.parse_args()
+
+    engine = synthetic_engine(args.matches, args.players)
+    replay = backtest.replay_log(engine)
+    sample = np.linspace(len(replay) // 2, len(replay) - 1, SAMPLE).astype(int)
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "results.parquet"
+        report(f"{args.matches} matches, {args.players} players", {
+            "per-match features (scaled)": best_of(
+                lambda: per_match(engine, replay, sample), repeat=1) * len(replay) / SAMPLE,
+            "run_backtest, 1 worker": best_of(lambda: backtest.run_backtest(engine, path=out, workers=1), repeat=1),
+            f"run_backtest, {args.workers} workers": best_of(
+                lambda: backtest.run_backtest(engine, path=out, workers=args.workers), repeat=1),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Draw odds: one ``predict_match`` per pairing and a Python loop over
+simulated brackets vs ``pairwise.pairwise_probabilities`` and the vectorized
+``draw.simulate_draw``.
+
+The scalar loops are timed on a sample and scaled up.
+
+Run from backend/:
+    python -m benchmarks.bench_draw [--simulations 100000]
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks._timing import best_of, report
+from predict import draw, features, model, pairwise
+from predict.feature_matrix import feature_matrix
+from tests.test_features import REFERENCE_DATE, make_history
+
+LOOP_SIMULATIONS = 2_000
+
+
+def scalar_matrix(ids, ranks, histories):
+    n = len(ids)
+    matrix = np.full((n, n), 0.5)
+    for i in range(n):
+        for j in range(i + 1, n):
+            feats = features.extract_all_features(histories[ids[i]], histories[ids[j]], None,
+                                                  ranks[i], ranks[j], "A", REFERENCE_DATE)
+            matrix[i, j] = model.predict_match(feats, ranks[i], ranks[j])["proba"]["A"]
+            matrix[j, i] = 1 - matrix[i, j]
+    return matrix
+
+
+def loop_simulation(probabilities, n_simulations, seed=0):
+    rng = np.random.default_rng(seed)
+    slots = draw.bracket(len(probabilities)).tolist()
+    n = len(probabilities)
+    titles = np.zeros(n)
+    for _ in range(n_simulations):
+        field = slots
+        while len(field) > 1:
+            field = [a if b == n or (a != n and rng.random() < probabilities[a][b]) else b
+                     for a, b in zip(field[0::2], field[1::2])]
+        titles[field[0]] += 1
+    return titles / n_simulations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--simulations", type=int, default=draw.N_SIMULATIONS)
+    args = parser.parse_args()
+
+    for n in (32, 48, 64):
+        ids = [f"p{i}" for i in range(n)]
+        ranks = list(range(1, n + 1))
+        histories = {pid: make_history(60, seed=i) for i, pid in enumerate(ids)}
+        matrix = pairwise.pairwise_probabilities(ids, ranks, REFERENCE_DATE, feature_matrix(histories, REFERENCE_DATE))
+        as_lists = matrix.tolist()
+        report(f"{n} draw, {args.simulations} simulations", {
+            "predict_match per pairing": best_of(lambda: scalar_matrix(ids, ranks, histories), repeat=1),
+            "pairwise_probabilities": best_of(lambda: pairwise.pairwise_probabilities(
+                ids, ranks, REFERENCE_DATE, feature_matrix(histories, REFERENCE_DATE)), repeat=3),
+        })
+        report("  bracket simulation", {
+            "Python loop (scaled)": best_of(
+                lambda: loop_simulation(as_lists, LOOP_SIMULATIONS), repeat=1) * args.simulations / LOOP_SIMULATIONS,
+            "simulate_draw": best_of(lambda: draw.simulate_draw(matrix, args.simulations, seed=0), repeat=3),
+        })
+
+
+if __name__ == "__main__":
+    main()
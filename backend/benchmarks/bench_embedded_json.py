@@ -0,0 +1,71 @@
+"""
+Embedded-JSON benchmark: legacy DOTALL regex scan vs bracket-balanced locator.
+
+Script blobs mimic large inline bundles: minified code with many brackets,
+string literals containing ``];`` and a ``var matches = [...]`` payload built
+from the recorded API matches (``predict/psa_matches_2778.json``).
+
+Run from backend/:
+    python -m benchmarks.bench_embedded_json
+"""
+import json
+import re
+from pathlib import Path
+
+from predict import embedded_json
+from benchmarks._timing import best_of, report
+
+PREDICT_DIR = Path(__file__).resolve().parent.parent / "predict"
+
+LEGACY_PATTERNS = [
+    r'var\s+matches\s*=\s*(\[.*?\]);',
+    r'const\s+results\s*=\s*(\[.*?\]);',
+    r'data:\s*(\[.*?\]),',
+    r'"matches":\s*(\[.*?\])',
+]
+
+BUNDLE_CHUNK = (
+    'function f(a){var b=[1,2,[3,4]];for(var i=0;i<a.length;i++){b.push({k:a[i],v:"x];y"})}'
+    "return b}/* comment with [brackets] */var s='it\\'s {not} json';"
+)
+
+
+def legacy_extract(script_text):
+    """The pre-existing regex scan from PSAScraper._extract_matches_from_scripts."""
+    lists = []
+    for pattern in LEGACY_PATTERNS:
+        found = re.search(pattern, script_text, re.DOTALL)
+        if found:
+            try:
+                lists.append(json.loads(found.group(1)))
+            except ValueError:
+                continue
+    return lists
+
+
+def build_blob(n_chunks):
+    matches = json.loads((PREDICT_DIR / "psa_matches_2778.json").read_text(encoding="utf-8"))
+    # Round names with "];" are what truncate the legacy lazy patterns
+    for m in matches:
+        m["round"] = m["round"] + " [QF];"
+    payload = json.dumps(matches, separators=(",", ":"))
+    return BUNDLE_CHUNK * n_chunks + f"var matches = {payload};" + BUNDLE_CHUNK * n_chunks
+
+
+def main():
+    n_records = len(json.loads((PREDICT_DIR / "psa_matches_2778.json").read_text(encoding="utf-8")))
+    print(f"JSON parser: {'orjson' if embedded_json.orjson else 'json (stdlib)'}")
+    for n_chunks in (100, 1000, 5000):
+        blob = build_blob(n_chunks)
+        legacy_found = sum(len(x) for x in legacy_extract(blob))
+        new_found = sum(len(x) for x in embedded_json.extract_match_lists(blob))
+        print(f"\nBlob {len(blob) / 1024:.0f} KiB: records legacy={legacy_found}, "
+              f"locator={new_found} (expected {n_records})")
+        report("Script scan", {
+            "legacy DOTALL regex": best_of(lambda: legacy_extract(blob), repeat=3),
+            "bracket-balanced locator": best_of(lambda: embedded_json.extract_match_lists(blob), repeat=3),
+        })
+
+
+if __name__ == "__main__":
+    main()
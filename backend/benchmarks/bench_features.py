@@ -0,0 +1,288 @@
+"""
+Feature microbenchmarks: row-by-row (``iterrows``) vs array implementations.
+
+Histories are synthetic: random dates over two years (most recent first),
+results and game counts, and score strings drawn from a small realistic set,
+so each distinct string is parsed once like in production.
+
+Run from backend/:
+    python -m benchmarks.bench_features
+"""
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from predict import feature_matrix, feature_store, features
+from predict.history import MatchHistory
+from benchmarks._timing import best_of, report
+
+REFERENCE_DATE = datetime(2025, 11, 1, tzinfo=timezone.utc)
+SIZES = [20, 150, 1000, 5000]
+
+SCORES = [
+    "11-8, 11-9, 5-11, 11-7",
+    "11-3, 11-4, 11-2",
+    "12-14, 11-9, 9-11, 11-13",
+    "11-6, 8-11, 11-9, 9-11, 11-5",
+    "3-1",
+]
+
+
+def synthetic_history(n, seed=0):
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(0, 730, n))
+    games_won = rng.integers(0, 4, n)
+    games_lost = np.where(games_won == 3, rng.integers(0, 3, n), 3)
+    return pd.DataFrame({
+        "date": pd.Timestamp(REFERENCE_DATE) - pd.to_timedelta(days, unit="D"),
+        "result": np.where(games_won > games_lost, "W", "L"),
+        "games_won": games_won,
+        "games_lost": games_lost,
+        "score": [SCORES[i] for i in rng.integers(0, len(SCORES), n)],
+    })
+
+
+def legacy_elo(hist, reference_date, base_elo=1500):
+    """The pre-existing ``iterrows`` implementation of calculate_enhanced_elo."""
+    elo = base_elo
+    opponent_quality_scores = []
+    for _, match in hist.iterrows():
+        match_date = match['date']
+        if match_date.tzinfo is None:
+            match_date = match_date.replace(tzinfo=timezone.utc)
+        days_ago = (reference_date - match_date).days
+        weight = 0.5 ** (days_ago / 180)
+        opponent_strength = features.estimate_opponent_strength(match)
+        opponent_quality_scores.append(opponent_strength * weight)
+        adjusted_K = 32 * (1 + 0.5 * opponent_strength)
+        if match['result'] == 'W':
+            elo += adjusted_K * weight
+        else:
+            elo -= adjusted_K * weight * 0.5
+    avg_opponent_quality = np.mean(opponent_quality_scores) if opponent_quality_scores else 0.0
+    return float(max(1000, min(2500, elo))), float(avg_opponent_quality)
+
+
+def legacy_form(hist, n_matches=20):
+    """The pre-existing implementation of calculate_enhanced_form (``iterrows`` quality loop)."""
+    recent = hist.head(n_matches)
+    wins = (recent['result'] == 'W').sum()
+    total = len(recent)
+    win_rate = wins / total if total > 0 else 0.5
+    game_diffs = recent['games_won'] - recent['games_lost']
+    avg_game_diff = float(game_diffs.mean()) if not game_diffs.empty else 0.0
+    quality_scores = []
+    for _, match in recent.iterrows():
+        strength = features.estimate_opponent_strength(match)
+        if match['result'] == 'W':
+            quality_scores.append(1.0 * (1 + strength))
+        else:
+            quality_scores.append(0.0)
+    quality_win_rate = np.mean(quality_scores) / 1.5 if quality_scores else 0.5
+    momentum_matches = min(5, len(recent))
+    recent_wins = (recent.head(momentum_matches)['result'] == 'W').sum()
+    momentum = (recent_wins / momentum_matches) - 0.5
+    return {
+        "win_rate": float(win_rate),
+        "avg_game_diff": avg_game_diff,
+        "matches_played": int(total),
+        "quality_adjusted_win_rate": float(quality_win_rate),
+        "recent_momentum": float(momentum),
+    }
+
+
+def legacy_trend(hist, reference_date, weeks=12):
+    """The pre-existing mask-per-period implementation of calculate_performance_trend."""
+    cutoff = reference_date - timedelta(weeks=weeks)
+    recent_matches = hist[hist['date'] >= cutoff]
+    if len(recent_matches) < 3:
+        return {"trend": 0.0, "consistency": 0.5}
+    periods = []
+    for i in range(weeks // 2):
+        period_start = cutoff + timedelta(weeks=i * 2)
+        period_end = period_start + timedelta(weeks=2)
+        period_matches = recent_matches[
+            (recent_matches['date'] >= period_start) &
+            (recent_matches['date'] < period_end)
+        ]
+        if len(period_matches) > 0:
+            periods.append((period_matches['result'] == 'W').mean())
+    if len(periods) >= 2:
+        y = np.array(periods)
+        trend = float(np.polyfit(np.arange(len(periods)), y, 1)[0])
+        consistency = 1.0 - float(np.var(y))
+    else:
+        trend = 0.0
+        consistency = 0.5
+    return {"trend": trend, "consistency": max(0.0, min(1.0, consistency))}
+
+
+def legacy_fatigue(hist, reference_date):
+    """The pre-existing implementation of calculate_fatigue."""
+    dates = hist['date'].copy()
+    if dates.dt.tz is None:
+        dates = dates.dt.tz_localize(timezone.utc)
+    return {
+        "matches_last_14d": int((dates >= reference_date - timedelta(days=14)).sum()),
+        "matches_last_30d": int((dates >= reference_date - timedelta(days=30)).sum()),
+    }
+
+
+def legacy_h2h(h2h_df, reference_date):
+    """The pre-existing implementation of calculate_h2h."""
+    if h2h_df['date'].dt.tz is None:
+        h2h_df = h2h_df.copy()
+        h2h_df['date'] = h2h_df['date'].dt.tz_localize(timezone.utc)
+    n_matches = len(h2h_df)
+    recent_h2h = h2h_df[h2h_df['date'] >= reference_date - timedelta(days=730)]
+    if not recent_h2h.empty:
+        days_ago = (reference_date - recent_h2h['date']).dt.days
+        n_effective = float((0.5 ** (days_ago / 365)).sum())
+    else:
+        n_effective = 0.0
+    a_win_rate = (h2h_df['winner'] == 'A').sum() / n_matches
+    game_diffs = h2h_df['games_won'] - h2h_df['games_lost']
+    game_diffs = game_diffs * h2h_df['winner'].apply(lambda x: 1 if x == 'A' else -1)
+    return {
+        "n_matches": int(n_matches),
+        "n_effective": float(n_effective),
+        "a_win_rate": float(a_win_rate),
+        "avg_game_diff_a": float(game_diffs.mean()),
+        "days_since_last": int((reference_date - h2h_df['date'].max()).days),
+    }
+
+
+def legacy_extract_all(hist_a, hist_b, h2h_df, reference_date):
+    """The pre-existing per-request pipeline: tz-normalising copies, then every feature on DataFrames."""
+    hist_a = features.ensure_timezone_aware(hist_a)
+    hist_b = features.ensure_timezone_aware(hist_b)
+    return (
+        legacy_elo(hist_a, reference_date), legacy_elo(hist_b, reference_date),
+        legacy_form(hist_a), legacy_form(hist_b),
+        legacy_fatigue(hist_a, reference_date), legacy_fatigue(hist_b, reference_date),
+        legacy_h2h(h2h_df, reference_date),
+        legacy_trend(hist_a, reference_date), legacy_trend(hist_b, reference_date),
+    )
+
+
+def bench_elo():
+    for n in SIZES:
+        hist = synthetic_history(n, seed=n)
+        assert legacy_elo(hist, REFERENCE_DATE) == features.calculate_enhanced_elo(hist, REFERENCE_DATE)
+        repeat = 3 if n >= 1000 else 10
+        report(f"calculate_enhanced_elo, {n} matches (identical results)", {
+            "iterrows": best_of(lambda: legacy_elo(hist, REFERENCE_DATE), repeat=repeat),
+            "vectorized": best_of(lambda: features.calculate_enhanced_elo(hist, REFERENCE_DATE), repeat=repeat),
+        })
+
+
+def bench_form():
+    for n in (20, 150):
+        hist = synthetic_history(n, seed=n)
+        assert legacy_form(hist) == features.calculate_enhanced_form(hist, n_matches=20)
+        report(f"calculate_enhanced_form, {n} matches (identical results)", {
+            "iterrows": best_of(lambda: legacy_form(hist), repeat=10, number=5),
+            "vectorized": best_of(lambda: features.calculate_enhanced_form(hist, n_matches=20), repeat=10, number=5),
+        })
+
+
+def bench_trend():
+    for n in (20, 150, 1000):
+        # Squeeze the history into the last 16 weeks so every period is populated
+        hist = synthetic_history(n, seed=n)
+        hist["date"] = pd.Timestamp(REFERENCE_DATE) - pd.to_timedelta(np.sort(
+            np.random.default_rng(n).integers(0, 16 * 7 * 24, n)), unit="h")
+        legacy, fast = legacy_trend(hist, REFERENCE_DATE), features.calculate_performance_trend(hist, REFERENCE_DATE)
+        assert legacy["consistency"] == fast["consistency"]
+        assert abs(legacy["trend"] - fast["trend"]) < 1e-12
+        report(f"calculate_performance_trend, {n} matches (slope within 1e-12)", {
+            "period masks + polyfit": best_of(lambda: legacy_trend(hist, REFERENCE_DATE), repeat=10, number=5),
+            "bincount + closed form": best_of(
+                lambda: features.calculate_performance_trend(hist, REFERENCE_DATE), repeat=10, number=5),
+        })
+
+
+def bench_extract_all():
+    for n in (20, 150):
+        hist_a, hist_b = synthetic_history(n, seed=n), synthetic_history(n, seed=n + 1)
+        h2h_df = hist_a.head(6).copy()
+        h2h_df["winner"] = np.where(h2h_df["result"] == "W", "A", "B")
+        arrays = (MatchHistory.from_frame(hist_a), MatchHistory.from_frame(hist_b),
+                  MatchHistory.from_frame(h2h_df, won_column="winner", won_value="A"))
+
+        def from_frames():
+            return features.extract_all_features(hist_a, hist_b, h2h_df, 5, 40, "A", REFERENCE_DATE)
+
+        def from_arrays():
+            return features.extract_all_features(*arrays, 5, 40, "A", REFERENCE_DATE)
+
+        store = feature_store.FeatureStore(tempfile.mkdtemp())
+
+        def from_store():
+            return features.extract_all_features(*arrays, 5, 40, "A", REFERENCE_DATE,
+                                                 player_a_id=1, player_b_id=2, feature_store=store)
+
+        assert from_frames() == from_arrays()
+        from_store()
+        report(f"extract_all_features, 2 x {n} matches + 6 H2H", {
+            "pandas (pre-vectorization)": best_of(
+                lambda: legacy_extract_all(hist_a, hist_b, h2h_df, REFERENCE_DATE), repeat=5, number=5),
+            "DataFrames, converted once": best_of(from_frames, repeat=10, number=20),
+            "MatchHistory arrays": best_of(from_arrays, repeat=10, number=20),
+            "MatchHistory + feature store hit": best_of(from_store, repeat=10, number=20),
+        })
+
+
+def bench_as_of():
+    n_dates = 250
+    for n in (150, 1000, 5000):
+        hist = synthetic_history(n, seed=n)
+        arrays = MatchHistory.from_frame(hist)
+        moments = [REFERENCE_DATE - timedelta(days=int(d)) for d in np.linspace(0, 700, n_dates)]
+
+        def direct():
+            for moment in moments:
+                before = arrays.before(moment)
+                features.calculate_enhanced_elo(before, moment)
+                features.calculate_enhanced_form(before, n_matches=20)
+                features.calculate_fatigue(before, moment)
+                features.calculate_performance_trend(before, moment, weeks=12)
+
+        def as_of():
+            table = features.AsOfFeatures(arrays)
+            for moment in moments:
+                table.player_features(moment)
+
+        report(f"per-player features at {n_dates} reference dates, {n} matches", {
+            "slice + recompute per date": best_of(direct, repeat=3),
+            "AsOfFeatures (prefix sums)": best_of(as_of, repeat=3),
+        })
+
+
+def bench_feature_matrix():
+    for n_players, n in ((50, 150), (300, 150), (1000, 40)):
+        histories = {pid: MatchHistory.from_frame(synthetic_history(n, seed=pid)) for pid in range(n_players)}
+
+        def per_player():
+            return [features.player_features(hist, REFERENCE_DATE) for hist in histories.values()]
+
+        report(f"per-player features, {n_players} players x {n} matches", {
+            "player_features per player": best_of(per_player, repeat=3),
+            "feature_matrix (one pass)": best_of(
+                lambda: feature_matrix.feature_matrix(histories, REFERENCE_DATE), repeat=5),
+        })
+
+
+def main():
+    bench_elo()
+    bench_form()
+    bench_trend()
+    bench_extract_all()
+    bench_as_of()
+    bench_feature_matrix()
+
+
+if __name__ == "__main__":
+    main()
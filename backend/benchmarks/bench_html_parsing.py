@@ -0,0 +1,74 @@
+"""
+Parser microbenchmark: full ``html.parser`` soup vs lxml targeted extraction.
+
+The page under test is the recorded PSA site chrome
+(``predict/psa_rankings_sample.html``) with a results table rendered from the
+recorded API matches (``predict/psa_matches_2778.json``).
+
+Run from backend/:
+    python -m benchmarks.bench_html_parsing
+"""
+import json
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from predict import html_parsing
+from predict.scraper import PSAScraper
+from benchmarks._timing import best_of, quiet, report
+
+PREDICT_DIR = Path(__file__).resolve().parent.parent / "predict"
+
+
+def build_profile_page():
+    """Return (html, player_name) for a recorded-chrome profile page."""
+    chrome = (PREDICT_DIR / "psa_rankings_sample.html").read_text(encoding="utf-8")
+    matches = json.loads((PREDICT_DIR / "psa_matches_2778.json").read_text(encoding="utf-8"))
+    player_name = "Paul Coll"
+
+    # Render every recorded match from the profile owner's point of view
+    rows = []
+    for m in matches:
+        p1, p2 = m["players"]
+        score = ", ".join(f"{a}-{b}" for a, b in zip(p1["scores"], p2["scores"]))
+        rows.append(
+            f"<tr><td>{m['date'][:10]}</td><td>{m['tournament']}</td><td>{m['round']}</td>"
+            f"<td>{player_name} vs {p2.get('name', 'Unknown')}</td><td>{score}</td></tr>"
+        )
+    table = (
+        '<div class="matches-table"><table><thead><tr><th>Date</th><th>Event</th>'
+        "<th>Round</th><th>Players</th><th>Score</th></tr></thead>"
+        f"<tbody>{''.join(rows)}</tbody></table></div>"
+    )
+    return chrome.replace("</body>", table + "</body>"), player_name
+
+
+def main():
+    page, player_name = build_profile_page()
+    scraper = PSAScraper()
+
+    def legacy():
+        soup = BeautifulSoup(page, "html.parser")
+        return scraper._extract_matches_from_profile(soup, player_name, 24)
+
+    def fast_path():
+        soup = html_parsing.extract_subtrees(page, html_parsing.PSA_PROFILE_XPATH)
+        return scraper._extract_matches_from_profile(soup, player_name, 24)
+
+    with quiet():
+        n_legacy = len(legacy())
+        n_fast = len(fast_path())
+        timings = {
+            "html.parser full page": best_of(legacy, repeat=5),
+            "lxml full page": best_of(lambda: scraper._extract_matches_from_profile(
+                html_parsing.make_soup(page), player_name, 24), repeat=5),
+            "lxml targeted subtree": best_of(fast_path, repeat=5),
+        }
+
+    print(f"Page size: {len(page) / 1024:.0f} KiB, player: {player_name}")
+    print(f"Matches extracted: legacy={n_legacy}, fast path={n_fast}")
+    report("Profile parse + extraction", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Scoring many matchups: ``model.predict_match`` in a loop vs ``model.predict_batch``.
+
+The scalar loop is timed on a sample and scaled up to the batch size; it
+includes the per-call interval and explanation that the batch path leaves
+out, so the probability-only steps are timed separately too. Interval
+estimation is compared on its own: sampled vs exact Beta quantiles, and the
+history bootstrap against materialising every replicate.
+
+Run from backend/:
+    python -m benchmarks.bench_model [--matchups 100000]
+"""
+import argparse
+
+import numpy as np
+from scipy.special import expit, logit
+
+from benchmarks._timing import best_of, report
+from predict import features, history, model, resample
+from tests.test_features import REFERENCE_DATE, make_h2h, make_history
+
+SCALAR_SAMPLE = 2_000
+
+
+def random_matchups(n, seed=0):
+    rng = np.random.default_rng(seed)
+    matchups = []
+    for _ in range(n):
+        h2h_n = int(rng.integers(0, 8))
+        matchups.append({
+            "elo_diff": float(rng.normal(0, 250)),
+            "form_a": {"win_rate": rng.random(), "quality_adjusted_win_rate": rng.random(),
+                       "recent_momentum": rng.random() - 0.5, "matches_played": int(rng.integers(0, 25))},
+            "form_b": {"win_rate": rng.random(), "matches_played": int(rng.integers(0, 25))},
+            "trend_a": {"trend": rng.normal(0, 0.1)},
+            "strength": {"diff": float(rng.normal(0, 200)), "deviation": float(rng.uniform(20, 300))},
+            "h2h": {"n_matches": h2h_n, "n_effective": h2h_n * rng.random(), "a_win_rate": rng.random()},
+        })
+    return matchups, rng.integers(1, 400, n), rng.integers(1, 400, n)
+
+
+def scalar_probabilities(matchups, rank_a, rank_b):
+    """Steps 1-5 of ``predict_match`` without the interval and explanation."""
+    out = []
+    for features, a, b in zip(matchups, rank_a.tolist(), rank_b.tolist()):
+        p_prior, _ = model.ranking_prior(a, b)
+        w = model.calculate_evidence_weight(features)
+        blend = w * logit(model.evidence_probability(features)) + (1 - w) * logit(p_prior)
+        out.append(expit(blend + model.h2h_adjustment(features, a, b)))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--matchups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    matchups, rank_a, rank_b = random_matchups(args.matchups)
+    sample = slice(0, min(SCALAR_SAMPLE, args.matchups))
+    scale = args.matchups / len(matchups[sample])
+    columns = model.batch_columns(matchups)
+
+    timings = {
+        "predict_match loop (scaled)": best_of(lambda: [
+            model.predict_match(f, int(a), int(b)) for f, a, b in
+            zip(matchups[sample], rank_a[sample], rank_b[sample])], repeat=1) * scale,
+        "scalar steps only (scaled)": best_of(
+            lambda: scalar_probabilities(matchups[sample], rank_a[sample], rank_b[sample]), repeat=3) * scale,
+        "batch_columns + predict_batch": best_of(
+            lambda: model.predict_batch(model.batch_columns(matchups), rank_a, rank_b), repeat=3),
+        "predict_batch": best_of(lambda: model.predict_batch(columns, rank_a, rank_b), repeat=5),
+        "predict_batch + intervals": best_of(
+            lambda: model.predict_batch(columns, rank_a, rank_b, intervals=True), repeat=3),
+    }
+    report(f"{args.matchups} matchups", timings)
+
+    # Intervals alone: 500 Beta draws + percentiles per call vs the exact quantiles
+    probabilities = np.random.default_rng(1).random(SCALAR_SAMPLE)
+    report(f"95% intervals, {SCALAR_SAMPLE} distinct probabilities", {
+        "sampled (500 draws each)": best_of(lambda: [
+            model._sampled_quantiles.__wrapped__(p, 500, 42) for p in probabilities.tolist()], repeat=3),
+        "exact Beta quantiles": best_of(lambda: [
+            model._beta_quantiles.__wrapped__(p, 0.95) for p in probabilities.tolist()], repeat=3),
+        "beta_intervals (one call)": best_of(lambda: model.beta_intervals(probabilities), repeat=5),
+    })
+
+    bench_bootstrap()
+    bench_bootstrap(40, 30)
+
+
+def naive_bootstrap(hist_a, hist_b, h2h, rank_a, rank_b, n_replicates, seed=0):
+    """Materialise every replicate's histories and rerun the scalar pipeline."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n_replicates):
+        replicate = [h.take(np.sort(rng.integers(0, len(h), len(h)))) for h in (hist_a, hist_b, h2h)]
+        feats = features.extract_all_features(*replicate, rank_a, rank_b, "A", REFERENCE_DATE)
+        out.append(model.predict_match(feats, rank_a, rank_b)["proba"]["A"])
+    return out
+
+
+def bench_bootstrap(n_a=150, n_b=80, naive_replicates=50):
+    hist_a = history.as_history(make_history(n_a, seed=1)).before(REFERENCE_DATE)
+    hist_b = history.as_history(make_history(n_b, seed=2)).before(REFERENCE_DATE)
+    h2h = features._as_h2h_history(make_h2h(6, seed=3)).before(REFERENCE_DATE)
+    feats = features.extract_all_features(hist_a, hist_b, h2h, 10, 40, "A", REFERENCE_DATE)
+    scale = resample.N_REPLICATES / naive_replicates
+    report(f"History bootstrap, {resample.N_REPLICATES} replicates ({n_a} + {n_b} matches)", {
+        "replicate loop (scaled)": best_of(
+            lambda: naive_bootstrap(hist_a, hist_b, h2h, 10, 40, naive_replicates), repeat=1) * scale,
+        "resample.bootstrap_interval": best_of(
+            lambda: resample.bootstrap_interval(hist_a, hist_b, h2h, feats, 10, 40, REFERENCE_DATE), repeat=10),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Offline scraper benchmark on the replayed HTTP fixture corpus.
+
+Two views, both without network access:
+  * per page: parse time and matches extracted for every fixture, using the
+    parser of the site it came from
+  * per source: the public fetch functions end to end through
+    ``ReplayTransport``, with optional injected latency per request
+
+Run from backend/:
+    python -m benchmarks.bench_scrapers [--latency 0.05] [--jitter 0.02] [--version v1]
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from predict import embedded_json, fetch, html_parsing, rankings, transport
+from predict.scraper import PSAScraper, get_psa_website_match_history, scrape_player_match_history
+from predict.squashinfo import SquashInfoEnhanced, get_squashinfo_match_history
+from predict.squashlevels import SquashLevelsEnhanced, get_squashlevels_match_history
+from benchmarks._timing import best_of, quiet
+
+PLAYER_NAME = "Paul Coll"
+PLAYER_ID = "2778"
+# Wide enough that recorded matches never age out of the window
+MONTHS_BACK = 600
+
+
+def _parse_psa_page(text):
+    soup = html_parsing.extract_subtrees(text, html_parsing.PSA_PROFILE_XPATH)
+    return len(PSAScraper()._extract_matches_from_profile(soup, PLAYER_NAME, MONTHS_BACK))
+
+
+def _parse_squashinfo_page(text):
+    soup = html_parsing.extract_subtrees(text, html_parsing.SQUASHINFO_PROFILE_XPATH)
+    return len(SquashInfoEnhanced()._parse_squashinfo_matches(soup, PLAYER_NAME, MONTHS_BACK))
+
+
+def _parse_squashlevels_payload(text):
+    payload = embedded_json.loads(text)
+    if not isinstance(payload, dict):
+        return 0
+    return len(SquashLevelsEnhanced()._parse_squashlevels_matches(payload, PLAYER_NAME))
+
+
+def _count_records(text):
+    payload = embedded_json.loads(text)
+    return len(payload) if isinstance(payload, list) else 0
+
+
+# Page parser per host; each returns the number of matches (or records) extracted
+PAGE_PARSERS = {
+    "www.psasquashtour.com": _parse_psa_page,
+    "www.squashinfo.com": _parse_squashinfo_page,
+    "www.squashlevels.com": _parse_squashlevels_payload,
+    "psa-api.ptsportsuite.com": _count_records,
+}
+
+SOURCES = {
+    "PSA website (search)": lambda: get_psa_website_match_history(PLAYER_NAME, MONTHS_BACK),
+    "PSA website (by id)": lambda: scrape_player_match_history(PLAYER_ID, PLAYER_NAME, MONTHS_BACK),
+    "PSA API results": lambda: fetch._get_api_match_history(PLAYER_NAME, PLAYER_ID, False, MONTHS_BACK),
+    "PSA rankings (male)": lambda: rankings.get_all_ranked_players("male", use_cache=False),
+    "SquashInfo": lambda: get_squashinfo_match_history(PLAYER_NAME, MONTHS_BACK),
+    "SquashLevels": lambda: get_squashlevels_match_history(PLAYER_NAME, MONTHS_BACK),
+}
+
+
+def bench_pages(corpus):
+    print(f"\nPer page (corpus {corpus.version}, {len(corpus)} fixtures)")
+    print(f"  {'origin':<10} {'KiB':>6} {'parse ms':>9} {'matches':>8}  url")
+    synthetic = 0
+    for fixture in corpus:
+        parser = PAGE_PARSERS.get(httpx.URL(fixture.url).host)
+        if parser is None:
+            continue
+        text = fixture.body.decode("utf-8")
+        with quiet():
+            n_matches = parser(text)
+            seconds = best_of(lambda: parser(text), repeat=3)
+        synthetic += fixture.origin == "synthetic"
+        print(f"  {fixture.origin:<10} {len(fixture.body) / 1024:6.0f} {seconds * 1000:9.2f} "
+              f"{n_matches:8d}  {fixture.url}")
+    if synthetic:
+        print(f"  {synthetic} synthetic pages: match counts are not evidence of real-page coverage")
+
+
+async def _run_source(make_coro):
+    start = time.perf_counter()
+    with quiet():
+        result = await make_coro()
+    return time.perf_counter() - start, len(result)
+
+
+def bench_sources(version, latency, jitter):
+    print(f"\nPer source (replayed, latency {latency * 1000:.0f} ms + jitter up to {jitter * 1000:.0f} ms)")
+    print(f"  {'source':<24} {'requests':>8} {'misses':>6} {'total ms':>9} {'matches':>8}  origins")
+    for name, make_coro in SOURCES.items():
+        with transport.replaying(version, latency=latency, jitter=jitter) as replay:
+            seconds, n_matches = asyncio.run(_run_source(make_coro))
+        origins = sorted({replay.corpus.entries[key].get("origin", "recorded")
+                          for key in replay.requests if key in replay.corpus.entries})
+        print(f"  {name:<24} {len(replay.requests):8d} {len(replay.misses):6d} "
+              f"{seconds * 1000:9.1f} {n_matches:8d}  {','.join(origins) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark.")
+    parser.add_argument("--version", default=transport.CORPUS_VERSION)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="max extra seconds per request")
+    args = parser.parse_args()
+
+    bench_pages(transport.FixtureCorpus(args.version))
+    bench_sources(args.version, args.latency, args.jitter)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Seed the offline HTTP fixture corpus (``predict/fixtures/http/<version>``).
+
+Recorded sources:
+  * PSA API responses kept in the 24-hour HTTP cache (``predict/.cache/psa``)
+  * the recorded PSA site page (``predict/psa_rankings_sample.html``)
+
+The player search and profile pages of the scraped sites were never captured,
+so they are rendered from the recorded PSA API results
+(``predict/psa_matches_2778.json``) in each site's table layout and marked
+``origin: synthetic`` in the manifest. Replace them with
+``python -m predict.transport record <url>`` when online.
+
+Run from backend/:
+    python -m benchmarks.build_corpus [--version v1]
+"""
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+
+from predict import transport
+from benchmarks.bench_html_parsing import build_profile_page
+
+PREDICT_DIR = Path(__file__).resolve().parent.parent / "predict"
+
+PSA_API = "https://psa-api.ptsportsuite.com"
+PSA_SITE = "https://www.psasquashtour.com"
+SQUASHINFO = "https://www.squashinfo.com"
+SQUASHLEVELS = "https://www.squashlevels.com"
+
+PLAYER_NAME = "Paul Coll"
+PLAYER_ID = "2778"
+PLAYER_SLUG = "paul-coll"
+
+HTML = {"content-type": "text/html; charset=utf-8"}
+JSON = {"content-type": "application/json; charset=utf-8"}
+SYNTHETIC_NOTE = "rendered from recorded PSA API results"
+
+
+def _recorded_matches():
+    """(date, tournament, round, opponent, [(for, against), ...]) per recorded match."""
+    matches = json.loads((PREDICT_DIR / "psa_matches_2778.json").read_text(encoding="utf-8"))
+    for m in matches:
+        p1, p2 = m["players"]
+        yield (
+            datetime.fromisoformat(m["date"].replace("Z", "+00:00")),
+            m["tournament"].strip(),
+            m["round"],
+            p2.get("name", "Unknown"),
+            list(zip(p1["scores"], p2["scores"])),
+        )
+
+
+def psa_search_page(chrome: str) -> str:
+    link = f'<div class="search-results"><a href="/player/{PLAYER_SLUG}/">{PLAYER_NAME}</a></div>'
+    return chrome.replace("</body>", link + "</body>")
+
+
+def squashinfo_pages():
+    """(directory page, profile page) in SquashInfo's table layout."""
+    directory = (
+        "<html><body><ul class=\"players\">"
+        f'<li><a href="/player/{PLAYER_ID}">{PLAYER_NAME}</a></li>'
+        "</ul></body></html>"
+    )
+    rows = []
+    for date, tournament, round_name, opponent, games in _recorded_matches():
+        score = ", ".join(f"{a}-{b}" for a, b in games)
+        rows.append(
+            f"<tr><td>{date:%d %b %Y}</td><td>{tournament}</td><td>{round_name}</td>"
+            f"<td>{PLAYER_NAME} vs {opponent}</td><td>{score}</td></tr>"
+        )
+    profile = (
+        f"<html><body><h1>{PLAYER_NAME}</h1><table class=\"results\"><thead><tr>"
+        "<th>Date</th><th>Event</th><th>Round</th><th>Match</th><th>Score</th></tr></thead>"
+        f"<tbody>{''.join(rows)}</tbody></table></body></html>"
+    )
+    return directory, profile
+
+
+def squashlevels_payloads():
+    """(search response, matches response) in SquashLevels' API shape."""
+    search = [{"id": int(PLAYER_ID), "name": PLAYER_NAME}]
+    matches = []
+    for date, tournament, round_name, opponent, games in _recorded_matches():
+        won = sum(1 for a, b in games if a > b) > sum(1 for a, b in games if b > a)
+        matches.append({
+            "date": f"{date:%Y-%m-%d}",
+            "player1": {"name": PLAYER_NAME},
+            "player2": {"name": opponent},
+            "winner": 1 if won else 2,
+            "score": ", ".join(f"{a}-{b}" for a, b in games),
+            "event": {"name": tournament},
+            "round": round_name,
+        })
+    return search, {"matches": matches}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--version", default=transport.CORPUS_VERSION)
+    args = parser.parse_args()
+
+    corpus = transport.FixtureCorpus(args.version)
+
+    # Recorded responses
+    for path in ("/results", "/rankedplayers/male", "/rankedplayers/female"):
+        if transport.import_cached(corpus, f"{PSA_API}{path}") is None:
+            print(f"not in HTTP cache: {PSA_API}{path}")
+    chrome = (PREDICT_DIR / "psa_rankings_sample.html").read_text(encoding="utf-8")
+    corpus.add("GET", f"{PSA_SITE}/tournaments/men-39-s-rally-of-the-decade-winner-revealed/",
+               200, HTML, chrome.encode("utf-8"), origin="recorded")
+
+    # Synthetic pages in the layouts the scrapers parse
+    def synthetic(url, headers, body, body_path=None):
+        return corpus.add("GET", url, 200, headers, body, origin="synthetic",
+                          note=SYNTHETIC_NOTE, body_path=body_path)
+
+    profile, _ = build_profile_page()
+    synthetic(f"{PSA_SITE}/search?query={PLAYER_NAME}", HTML, psa_search_page(chrome).encode("utf-8"))
+    synthetic(f"{PSA_SITE}/player/{PLAYER_SLUG}/", HTML, profile.encode("utf-8"))
+    profile_body = corpus.entries[corpus.key("GET", f"{PSA_SITE}/player/{PLAYER_SLUG}/")]["body"]
+    synthetic(f"{PSA_SITE}/players/{PLAYER_ID}", HTML, b"", body_path=profile_body)
+
+    directory, si_profile = squashinfo_pages()
+    synthetic(f"{SQUASHINFO}/players", HTML, directory.encode("utf-8"))
+    synthetic(f"{SQUASHINFO}/player/{PLAYER_ID}", HTML, si_profile.encode("utf-8"))
+
+    search, matches = squashlevels_payloads()
+    synthetic(f"{SQUASHLEVELS}/api/search/players?q={PLAYER_NAME}&limit=10", JSON, json.dumps(search).encode())
+    synthetic(f"{SQUASHLEVELS}/api/player/{PLAYER_ID}/matches?limit=200", JSON,
+              json.dumps(matches, indent=1).encode())
+
+    corpus.save()
+    print(f"Corpus {corpus.version}: {len(corpus)} fixtures in {corpus.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,545 @@
+"""Walk-forward backtest of the model over the stored match log.
+
+Every match in the rating graph is replayed in date order and predicted
+from what was known before its day: form, momentum and trend as
+``feature_matrix`` computes them, graph Elo, H2H over the previous
+``pairwise.H2H_DAYS`` and ranks from the latest stored snapshot. History
+Elo is only needed for tuning (``elo_step_sums``).
+
+Nothing is recomputed per match. ``replay_log`` lays every player's matches
+out once, oldest first, with prefix sums of wins and quality wins, and
+decay-scaled prefix sums over every pair's meetings (the decay factorises
+into a per-row and a per-reference term). A feature as
+of a date is then a difference of two prefix sums found by ``searchsorted``,
+so scoring a match costs the same whatever the history length. Dates are
+counted in whole days, like ``features``; a match sees nothing from its own
+day.
+
+``run_backtest`` splits the matches into date chunks scored by a process
+pool. Each chunk's predictions are streamed to a columnar file (Parquet row
+groups when pyarrow is installed, else a ``.npz`` of columns) and its metric
+totals merged into Brier score, log loss, accuracy, a calibration curve and
+accuracy by tier gap.
+
+Fitted strengths and top-20 records are left out: strengths are fitted on
+the whole graph and would leak later results into earlier predictions.
+
+Run from backend/:
+    python -m predict.backtest [--workers 8] [--start 2024-01-01]
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import history, model, opponents, ratings, scores
+from .feature_matrix import FORM_MATCHES, MOMENTUM_MATCHES, TREND_WEEKS, period_trend
+from .features import TREND_PERIOD_WEEKS
+from .history import NS_PER_DAY
+from .opponents import RankingIndex
+from .pairwise import H2H_DAYS
+from .ratings import EloEngine
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+    parquet = None
+
+BACKTEST_DIR = Path(__file__).parent / ".cache" / "backtest"
+RESULTS_STORE = BACKTEST_DIR / "results.parquet"
+
+N_WORKERS = os.cpu_count() or 1
+# Matches per chunk, rounded up to the end of the chunk's last day
+CHUNK_MATCHES = 20_000
+CALIBRATION_BINS = 10
+N_TIER_GAPS = 6
+# Probabilities are clipped to [EPSILON, 1 - EPSILON] for the log loss
+EPSILON = 1e-15
+# H2H decay half-life, as in features.calculate_h2h
+H2H_HALF_LIFE_DAYS = 365
+
+RESULT_COLUMNS = ["date", "player_a", "player_b", "rank_a", "rank_b", "tier_gap", "proba_a", "a_won"]
+
+
+# ---------------------------------------------------------------------------
+# As-of lookups
+# ---------------------------------------------------------------------------
+
+class Replay:
+    """
+    The match log laid out for as-of lookups. Players are coded in id order
+    and every match is oriented with the lower id as player A, so the
+    orientation never depends on the result.
+    """
+
+    __slots__ = (
+        "player_ids", "day0", "span",
+        # Matches in date order
+        "date_ns", "day", "a", "b", "a_won", "rank_a", "rank_b",
+        # Player rows, grouped by player and oldest first, with prefix sums
+        "side_key", "side_day", "side_step", "side_won", "side_quality",
+        "trail_start", "trail_rating", "base_rating",
+        # Meetings grouped by pair, oldest first, with prefix sums
+        "pair_key", "pair_a_won", "pair_decay",
+    )
+
+    def __init__(self, **arrays):
+        for name in self.__slots__:
+            setattr(self, name, arrays[name])
+
+    def __len__(self) -> int:
+        return len(self.date_ns)
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    """Sums of ``values`` before each position (length n + 1)."""
+    return np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+
+
+def replay_log(engine: EloEngine, rankings: Optional[RankingIndex] = None) -> Replay:
+    """
+    Prepare ``engine``'s match log for ``score_chunk``. Ranks come from
+    ``rankings`` as of each match date (``opponents.MAX_RANK`` when a player
+    had no ranking yet: later snapshots are never used).
+    """
+    dates, winners, losers = engine.match_arrays()
+    ids = np.array(engine.player_ids, dtype=object)
+    # Codes in id order
+    by_id = np.argsort(ids.astype(str), kind="stable")
+    code = np.empty(len(ids), dtype=np.int64)
+    code[by_id] = np.arange(len(ids))
+    player_ids = ids[by_id]
+    winners, losers = code[winners], code[losers]
+
+    day = dates // NS_PER_DAY
+    day0 = int(day.min()) if len(day) else 0
+    offset = day - day0
+    span = int(offset.max()) + 1 if len(day) else 1
+    n_matches, n_players = len(dates), len(player_ids)
+
+    # Player rows, oldest first. Ties within a day are ordered as the reverse
+    # of graph_match_table's most-recent-first order (wins first, latest match
+    # first), so form windows cut at the same rows.
+    side_code = np.concatenate((winners, losers))
+    side_won = np.concatenate((np.ones(n_matches, dtype=bool), np.zeros(n_matches, dtype=bool)))
+    side_date = np.concatenate((dates, dates))
+    match_index = np.tile(np.arange(n_matches), 2)
+    order = np.lexsort((match_index, side_won, side_date, side_code))
+    side_code, side_won, side_day = side_code[order], side_won[order], np.tile(offset, 2)[order]
+    # Game scores are not in the graph
+    no_games = np.full(len(order), np.nan)
+    strength = history.opponent_strengths(no_games, no_games,
+                                          np.full(len(order), scores.parse_score("").close_share))
+    # History Elo steps per unit of K, before decay
+    step = 1 + 0.5 * strength
+    side_step = np.where(side_won, step, -(step * 0.5))
+
+    # Rating trails, re-indexed by code
+    offsets, trail_rating = engine.trail_arrays()
+    trail_start = np.empty(n_players, dtype=np.int64)
+    trail_start[code] = offsets[:-1]
+
+    # Meetings by pair
+    a, b = np.minimum(winners, losers), np.maximum(winners, losers)
+    pair_key = (a * n_players + b) * span + offset
+    pair_order = np.argsort(pair_key, kind="stable")
+    a_won = winners == a
+
+    rank_a = rank_b = np.full(n_matches, float(opponents.MAX_RANK))
+    if rankings is not None and len(rankings):
+        ranked = rankings.ranks_at(np.concatenate((player_ids[a], player_ids[b])), np.concatenate((dates, dates)),
+                                   fallback=False)
+        ranked = np.where(np.isnan(ranked), opponents.MAX_RANK, ranked)
+        rank_a, rank_b = ranked[:n_matches], ranked[n_matches:]
+
+    return Replay(
+        player_ids=player_ids, day0=day0, span=span,
+        date_ns=dates, day=day, a=a, b=b, a_won=a_won, rank_a=rank_a, rank_b=rank_b,
+        side_key=side_code * span + side_day,
+        side_day=side_day,
+        side_step=side_step,
+        side_won=_prefix(side_won),
+        side_quality=_prefix(np.where(side_won, 1 + strength, 0.0)),
+        trail_start=trail_start, trail_rating=trail_rating, base_rating=engine.base_rating,
+        pair_key=pair_key[pair_order],
+        pair_a_won=_prefix(a_won[pair_order]),
+        pair_decay=_prefix(0.5 ** (-offset[pair_order] / H2H_HALF_LIFE_DAYS)),
+    )
+
+
+def side_features(replay: Replay, codes: np.ndarray, days: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    ``feature_matrix`` columns (bar history Elo, see ``elo_step_sums``) and
+    graph Elo of players ``codes``, each from their matches before the
+    matching entry of ``days``.
+    """
+    base = codes * replay.span
+    reference = days - replay.day0
+    start = np.searchsorted(replay.side_key, base)
+    # Row positions at the start of each trend period, and at the reference day
+    edges = reference[:, None] - TREND_WEEKS * 7 + TREND_PERIOD_WEEKS * 7 * np.arange(TREND_WEEKS // TREND_PERIOD_WEEKS + 1)
+    positions = np.searchsorted(replay.side_key, base[:, None] + np.clip(edges, 0, None))
+    end = positions[:, -1]
+    played = end - start
+    recent_days = np.searchsorted(replay.side_key, base[:, None] + np.clip(reference[:, None] - [14, 30], 0, None))
+    has_matches = played > 0
+
+    won = replay.side_won
+    recent = np.minimum(played, FORM_MATCHES)
+    wins = won[end] - won[end - recent]
+    quality_wins = replay.side_quality[end] - replay.side_quality[end - recent]
+    momentum = np.minimum(played, MOMENTUM_MATCHES)
+    momentum_wins = won[end] - won[end - momentum]
+    safe_recent, safe_momentum = np.maximum(recent, 1), np.maximum(momentum, 1)
+    trend, _ = period_trend(np.diff(positions, axis=1), np.diff(won[positions], axis=1),
+                            positions[:, -1] - positions[:, 0])
+
+    last = replay.trail_start[codes] + played - 1
+    return {
+        "graph_elo": np.where(has_matches, replay.trail_rating[np.maximum(last, 0)], replay.base_rating),
+        "win_rate": np.where(has_matches, wins / safe_recent, 0.5),
+        "quality_adjusted_win_rate": np.where(has_matches, quality_wins / safe_recent / 1.5, 0.5),
+        "recent_momentum": np.where(has_matches, momentum_wins / safe_momentum - 0.5, 0.0),
+        "trend": trend,
+        "matches_played": recent.astype(float),
+        "matches_last_14d": (end - recent_days[:, 0]).astype(float),
+        "matches_last_30d": (end - recent_days[:, 1]).astype(float),
+    }
+
+
+def _player_prefix(replay: Replay, values: np.ndarray) -> np.ndarray:
+    """
+    Running sums of ``values`` within each player's rows (inclusive), so a
+    player's sum never passes through other players' magnitudes.
+    """
+    return pd.Series(values).groupby(replay.side_key // replay.span, sort=False).cumsum().to_numpy()
+
+
+def elo_step_sums(replay: Replay, codes: np.ndarray, days: np.ndarray, half_life_days: float) -> np.ndarray:
+    """
+    Decayed history Elo steps per unit of K of players ``codes`` before
+    ``days``, with another half-life: their history Elo is ``feature_matrix.BASE_ELO`` plus
+    K times this (clipped), as long as they have matches.
+
+    The growth factor of each row is counted from its player's first day and
+    summed per player: with one origin for the whole log, long logs and
+    short half-lives lose a player's own steps in the prefix differences.
+    """
+    if not len(replay.side_key):
+        return np.zeros(len(codes))
+    first_row = np.searchsorted(replay.side_key, (replay.side_key // replay.span) * replay.span)
+    growth = 2.0 ** ((replay.side_day - replay.side_day[first_row]) / half_life_days)
+    running = _player_prefix(replay, replay.side_step * growth)
+    base = codes * replay.span
+    reference = days - replay.day0
+    start = np.searchsorted(replay.side_key, base)
+    end = np.searchsorted(replay.side_key, base + reference)
+    # Rows read for players without matches are arbitrary; their sum is zero
+    last = np.clip(end - 1, 0, len(running) - 1)
+    origin = replay.side_day[np.minimum(start, len(running) - 1)]
+    return np.where(end > start, running[last] * 0.5 ** ((reference - origin) / half_life_days), 0.0)
+
+
+def pair_h2h(replay: Replay, a: np.ndarray, b: np.ndarray, days: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    ``graph_h2h``'s n_matches, n_effective and A's wins for pairs (a < b)
+    over the ``H2H_DAYS`` before each entry of ``days``.
+    """
+    base = (a * len(replay.player_ids) + b) * replay.span
+    reference = days - replay.day0
+    first = np.searchsorted(replay.pair_key, base + np.maximum(reference - H2H_DAYS, 0))
+    end = np.searchsorted(replay.pair_key, base + reference)
+    return {
+        "n_matches": (end - first).astype(float),
+        "n_effective": (replay.pair_decay[end] - replay.pair_decay[first]) * 0.5 ** (reference / H2H_HALF_LIFE_DAYS),
+        "wins": replay.pair_a_won[end] - replay.pair_a_won[first],
+    }
+
+
+def match_columns(replay: Replay, start: int, stop: int) -> Dict[str, np.ndarray]:
+    """``model.BATCH_COLUMNS`` for matches ``start:stop`` of the replay."""
+    a, b, days = replay.a[start:stop], replay.b[start:stop], replay.day[start:stop]
+    side_a, side_b = side_features(replay, a, days), side_features(replay, b, days)
+    h2h = pair_h2h(replay, a, b, days)
+    n_h2h = h2h["n_matches"]
+    no_data = np.full(len(a), np.nan)
+    return {
+        # Every player is in the graph, so graph Elo always applies
+        "elo_diff": side_a["graph_elo"] - side_b["graph_elo"],
+        "strength_diff": no_data,
+        "strength_deviation": no_data,
+        "win_rate_a": side_a["quality_adjusted_win_rate"],
+        "win_rate_b": side_b["quality_adjusted_win_rate"],
+        "momentum_a": side_a["recent_momentum"],
+        "momentum_b": side_b["recent_momentum"],
+        "trend_a": side_a["trend"],
+        "trend_b": side_b["trend"],
+        "matches_played_a": side_a["matches_played"],
+        "matches_played_b": side_b["matches_played"],
+        "h2h_matches": n_h2h,
+        "h2h_effective": h2h["n_effective"],
+        "h2h_a_win_rate": np.where(n_h2h > 0, h2h["wins"] / np.maximum(n_h2h, 1), 0.5),
+        "top20_matches_a": no_data,
+        "top20_win_rate_a": no_data,
+        "top20_matches_b": no_data,
+        "top20_win_rate_b": no_data,
+        "fatigue_14d_a": side_a["matches_last_14d"],
+        "fatigue_14d_b": side_b["matches_last_14d"],
+        "fatigue_30d_a": side_a["matches_last_30d"],
+        "fatigue_30d_b": side_b["matches_last_30d"],
+    }
+
+
+def score_chunk(replay: Replay, start: int, stop: int) -> pd.DataFrame:
+    """Predictions for matches ``start:stop``, one ``RESULT_COLUMNS`` row each."""
+    rank_a, rank_b = replay.rank_a[start:stop], replay.rank_b[start:stop]
+    batch = model.predict_batch(match_columns(replay, start, stop), rank_a, rank_b)
+    return pd.DataFrame({
+        "date": pd.to_datetime(replay.date_ns[start:stop], utc=True),
+        "player_a": replay.player_ids[replay.a[start:stop]],
+        "player_b": replay.player_ids[replay.b[start:stop]],
+        "rank_a": rank_a,
+        "rank_b": rank_b,
+        "tier_gap": batch["tier_gap"],
+        "proba_a": batch["proba_a"],
+        "a_won": replay.a_won[start:stop],
+    }, columns=RESULT_COLUMNS)
+
+
+def date_chunks(days: np.ndarray, start: int, stop: int, size: int = CHUNK_MATCHES) -> List[Tuple[int, int]]:
+    """(start, stop) ranges of about ``size`` matches that never split a day."""
+    bounds = []
+    while start < stop:
+        end = min(start + size, stop)
+        end = min(int(np.searchsorted(days, days[end - 1], side="right")), stop)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def metric_totals(proba_a: np.ndarray, a_won: np.ndarray, tier_gap: np.ndarray) -> Dict[str, np.ndarray]:
+    """Sums behind every metric, so chunks can be merged by adding them."""
+    proba_a = np.asarray(proba_a, dtype=float)
+    outcome = np.asarray(a_won, dtype=float)
+    tier_gap = np.minimum(np.asarray(tier_gap, dtype=np.int64), N_TIER_GAPS - 1)
+    squared = (proba_a - outcome) ** 2
+    clipped = np.clip(proba_a, EPSILON, 1 - EPSILON)
+    correct = (proba_a > 0.5) == (outcome == 1)
+    bins = np.minimum((proba_a * CALIBRATION_BINS).astype(np.int64), CALIBRATION_BINS - 1)
+    return {
+        "matches": np.array(float(len(proba_a))),
+        "squared_error": squared.sum(),
+        "log_loss": -(outcome * np.log(clipped) + (1 - outcome) * np.log(1 - clipped)).sum(),
+        "correct": correct.sum(dtype=float),
+        "bin_matches": np.bincount(bins, minlength=CALIBRATION_BINS).astype(float),
+        "bin_predicted": np.bincount(bins, proba_a, minlength=CALIBRATION_BINS),
+        "bin_observed": np.bincount(bins, outcome, minlength=CALIBRATION_BINS),
+        "gap_matches": np.bincount(tier_gap, minlength=N_TIER_GAPS).astype(float),
+        "gap_correct": np.bincount(tier_gap, correct, minlength=N_TIER_GAPS),
+        "gap_squared_error": np.bincount(tier_gap, squared, minlength=N_TIER_GAPS),
+    }
+
+
+def merge_totals(totals: Sequence[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {name: sum(t[name] for t in totals) for name in totals[0]}
+
+
+def summarise(totals: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Brier score, log loss, accuracy, calibration curve and accuracy by tier gap."""
+    n = float(totals["matches"])
+    if n == 0:
+        return {"matches": 0, "brier": None, "log_loss": None, "accuracy": None,
+                "calibration": [], "by_tier_gap": []}
+    calibration = [
+        {
+            "bin": [i / CALIBRATION_BINS, (i + 1) / CALIBRATION_BINS],
+            "matches": int(count),
+            "mean_predicted": round(float(totals["bin_predicted"][i] / count), 4),
+            "observed": round(float(totals["bin_observed"][i] / count), 4),
+        }
+        for i, count in enumerate(totals["bin_matches"]) if count
+    ]
+    by_tier_gap = [
+        {
+            "tier_gap": gap,
+            "matches": int(count),
+            "accuracy": round(float(totals["gap_correct"][gap] / count), 4),
+            "brier": round(float(totals["gap_squared_error"][gap] / count), 4),
+        }
+        for gap, count in enumerate(totals["gap_matches"]) if count
+    ]
+    return {
+        "matches": int(n),
+        "brier": round(float(totals["squared_error"]) / n, 4),
+        "log_loss": round(float(totals["log_loss"]) / n, 4),
+        "accuracy": round(float(totals["correct"]) / n, 4),
+        "calibration": calibration,
+        "by_tier_gap": by_tier_gap,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Results file
+# ---------------------------------------------------------------------------
+
+class ResultWriter:
+    """
+    Streams result chunks to a Parquet file, one row group per chunk. Without
+    pyarrow the chunks are kept and written as a ``.npz`` of columns on close.
+    """
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        self.path = path if parquet is not None else path.with_suffix(".npz")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._partial = self.path.with_name(self.path.name + ".partial")
+        self._writer = None
+        self._chunks: List[pd.DataFrame] = []
+        self.rows = 0
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        self.rows += len(chunk)
+        if parquet is None:
+            self._chunks.append(chunk)
+            return
+        table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is None:
+            self._writer = parquet.ParquetWriter(self._partial, table.schema)
+        self._writer.write_table(table)
+
+    def close(self) -> Path:
+        if parquet is None:
+            frame = pd.concat(self._chunks) if self._chunks else _no_results()
+            columns = {name: frame[name].to_numpy() for name in RESULT_COLUMNS}
+            columns.update(date=history.utc_ns(frame["date"]),
+                           player_a=columns["player_a"].astype(str), player_b=columns["player_b"].astype(str))
+            with open(self._partial, "wb") as f:
+                np.savez(f, **columns)
+            self._chunks = []
+        elif self._writer is not None:
+            self._writer.close()
+        else:
+            parquet.write_table(pyarrow.Table.from_pandas(_no_results(), preserve_index=False), self._partial)
+        self._partial.replace(self.path)
+        return self.path
+
+
+def _no_results() -> pd.DataFrame:
+    empty = np.empty(0)
+    return pd.DataFrame({
+        "date": pd.to_datetime(empty.astype(np.int64), utc=True),
+        "player_a": empty.astype(object), "player_b": empty.astype(object),
+        "rank_a": empty, "rank_b": empty, "tier_gap": empty.astype(np.int64),
+        "proba_a": empty, "a_won": empty.astype(bool),
+    })
+
+
+def read_results(path: Path) -> pd.DataFrame:
+    """A results file written by ``ResultWriter``."""
+    path = Path(path)
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            frame = pd.DataFrame({name: data[name] for name in RESULT_COLUMNS})
+        frame["date"] = pd.to_datetime(frame["date"], utc=True)
+        return frame
+    return pd.read_parquet(path)
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+# Set in each pool worker by _init_worker
+_worker_replay: Optional[Replay] = None
+
+
+def _init_worker(replay: Replay) -> None:
+    global _worker_replay
+    _worker_replay = replay
+
+
+def _score_in_worker(bounds: Tuple[int, int]) -> pd.DataFrame:
+    return score_chunk(_worker_replay, *bounds)
+
+
+def _scored_chunks(replay: Replay, bounds: List[Tuple[int, int]], workers: int) -> Iterator[pd.DataFrame]:
+    """Chunks in date order; the pool ships the replay to each worker once."""
+    if workers <= 1 or len(bounds) <= 1:
+        for start, stop in bounds:
+            yield score_chunk(replay, start, stop)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(bounds)), initializer=_init_worker,
+                             initargs=(replay,)) as pool:
+        yield from pool.map(_score_in_worker, bounds)
+
+
+def run_backtest(
+    engine: EloEngine,
+    rankings: Optional[RankingIndex] = None,
+    path: Optional[Path] = RESULTS_STORE,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    workers: int = N_WORKERS,
+    chunk_matches: int = CHUNK_MATCHES,
+) -> Dict[str, Any]:
+    """
+    Predict every match from ``start`` (inclusive) to ``end`` (exclusive),
+    each from the full history before its day, streaming the predictions to
+    ``path`` (None to skip the file). Returns the ``summarise`` metrics plus
+    the file written and the elapsed seconds.
+    """
+    started = time.perf_counter()
+    replay = replay_log(engine, rankings)
+    first = 0 if start is None else int(np.searchsorted(replay.date_ns, history.timestamp_ns(start)))
+    stop = len(replay) if end is None else int(np.searchsorted(replay.date_ns, history.timestamp_ns(end)))
+    bounds = date_chunks(replay.day, first, max(stop, first), chunk_matches)
+
+    writer = ResultWriter(path) if path is not None else None
+    totals = [metric_totals(np.empty(0), np.empty(0), np.empty(0))]
+    for chunk in _scored_chunks(replay, bounds, workers):
+        totals.append(metric_totals(chunk["proba_a"].to_numpy(), chunk["a_won"].to_numpy(),
+                                    chunk["tier_gap"].to_numpy()))
+        if writer is not None:
+            writer.write(chunk)
+    summary = summarise(merge_totals(totals))
+    summary["results"] = str(writer.close()) if writer is not None else None
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Walk-forward backtest over the stored match log.")
+    parser.add_argument("--out", type=Path, default=RESULTS_STORE, help="results file (Parquet, or .npz without pyarrow)")
+    parser.add_argument("--start", type=pd.Timestamp, default=None, help="first match date to score")
+    parser.add_argument("--end", type=pd.Timestamp, default=None, help="score matches before this date")
+    parser.add_argument("--workers", type=int, default=N_WORKERS)
+    parser.add_argument("--chunk", type=int, default=CHUNK_MATCHES, help="matches per date chunk")
+    args = parser.parse_args(argv)
+
+    summary = run_backtest(ratings.default_engine(), opponents.load_index(), args.out,
+                           args.start, args.end, args.workers, args.chunk)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Memoized multi-format date parsing for scraped pages.
+
+A results page uses one date format throughout, so rather than trying every
+``strptime`` format on every row, ``DateParser`` detects the format once per
+page (or column), parses whole columns with a single vectorized
+``pd.to_datetime`` call and caches every distinct string it has seen.
+Unparseable rows come back as None (scalar) or NaT (column).
+"""
+import re
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Common PSA website date formats, in order of preference
+PSA_DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%d %b %Y",
+    "%b %d, %Y",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%d-%m-%Y",
+    "%Y/%m/%d",
+]
+
+SQUASHINFO_DATE_FORMATS = [
+    "%d %b %Y",
+    "%Y-%m-%d",
+    "%b %d, %Y",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%d-%m-%Y",
+]
+
+# Formats from the provided scraper interface (PSAScraper._parse_date)
+GENERIC_DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%d-%m-%Y",
+    "%b %d, %Y",
+    "%d %b %Y",
+]
+
+# Distinct strings sampled when detecting a column's format
+DETECT_SAMPLE_SIZE = 20
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_DAY_MONTH_YEAR_RE = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})')
+
+DateFallback = Callable[[str], Optional[datetime]]
+
+
+def day_month_year(date_text: str) -> Optional[datetime]:
+    """Extract a d/m/Y or d-m-Y date embedded in surrounding text."""
+    date_match = _DAY_MONTH_YEAR_RE.search(date_text)
+    if date_match:
+        day, month, year = date_match.groups()
+        try:
+            return datetime(int(year), int(month), int(day))
+        except ValueError:
+            return None
+    return None
+
+
+def year_start(pattern: str = r'(\d{4})') -> DateFallback:
+    """Fallback returning a rough 1 January date for a bare year in 2000-2030."""
+    year_re = re.compile(pattern)
+
+    def fallback(date_text: str) -> Optional[datetime]:
+        year_match = year_re.search(date_text)
+        if year_match:
+            year = int(year_match.group(1))
+            if 2000 <= year <= 2030:
+                return datetime(year, 1, 1)
+        return None
+
+    return fallback
+
+
+def _strptime(date_text: str, fmt: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(date_text, fmt)
+    except ValueError:
+        return None
+
+
+class DateParser:
+    """
+    Date parser for one page or column.
+
+    The detected (or first working) format is tried first for every later
+    string; each distinct string is parsed at most once.
+    """
+
+    def __init__(self, formats: Sequence[str], fallback: Optional[DateFallback] = None):
+        self.formats = list(formats)
+        self.fallback = fallback
+        self.format: Optional[str] = None
+        self._cache: Dict[str, Optional[datetime]] = {}
+
+    def _parse_uncached(self, date_text: str) -> Optional[datetime]:
+        date_clean = _WHITESPACE_RE.sub(' ', date_text.strip())
+
+        if self.format is not None:
+            parsed = _strptime(date_clean, self.format)
+            if parsed is not None:
+                return parsed
+
+        for fmt in self.formats:
+            if fmt == self.format:
+                continue
+            parsed = _strptime(date_clean, fmt)
+            if parsed is not None:
+                if self.format is None:
+                    self.format = fmt
+                return parsed
+
+        if self.fallback is not None:
+            return self.fallback(date_text)
+        return None
+
+    def parse(self, date_text: str) -> Optional[datetime]:
+        """Parse one date string; None when no format or fallback applies."""
+        if not isinstance(date_text, str):
+            return None
+        if date_text not in self._cache:
+            self._cache[date_text] = self._parse_uncached(date_text)
+        return self._cache[date_text]
+
+    def detect(self, date_texts: Iterable[str]) -> Optional[str]:
+        """Pick the format that parses the most sampled strings (earliest wins ties)."""
+        samples: List[str] = []
+        for text in date_texts:
+            if isinstance(text, str) and text.strip():
+                samples.append(_WHITESPACE_RE.sub(' ', text.strip()))
+                if len(samples) >= DETECT_SAMPLE_SIZE:
+                    break
+
+        best_format, best_hits = None, 0
+        for fmt in self.formats:
+            hits = sum(1 for sample in samples if _strptime(sample, fmt) is not None)
+            if hits > best_hits:
+                best_format, best_hits = fmt, hits
+            if best_hits == len(samples):
+                break
+
+        if best_format is not None:
+            self.format = best_format
+        return best_format
+
+    def parse_column(self, date_texts: Iterable[str]) -> pd.Series:
+        """
+        Parse a whole column of date strings; bad rows become NaT.
+
+        Distinct strings are parsed once: vectorized with the detected
+        format first, then per string (other formats, fallback) for the rest.
+        The results also fill the cache used by ``parse``.
+        """
+        # Code each row by its distinct string
+        positions: Dict[object, int] = {}
+        codes = [positions.setdefault(text, len(positions)) for text in date_texts]
+        uniques = list(positions)
+
+        fresh = [text for text in uniques if isinstance(text, str) and text not in self._cache]
+        if fresh:
+            if self.format is None:
+                self.detect(fresh)
+            if self.format is not None:
+                cleaned = [_WHITESPACE_RE.sub(' ', text.strip()) for text in fresh]
+                vectorized = pd.to_datetime(cleaned, format=self.format, errors="coerce")
+                for text, value in zip(fresh, vectorized):
+                    if value is not pd.NaT:
+                        self._cache[text] = value.to_pydatetime()
+            for text in fresh:
+                if text not in self._cache:
+                    self._cache[text] = self._parse_uncached(text)
+
+        parsed = np.array(
+            [self._cache.get(text) if isinstance(text, str) else None for text in uniques],
+            dtype="datetime64[ns]",
+        )
+        return pd.Series(parsed[np.asarray(codes, dtype=np.intp)], dtype="datetime64[ns]")
@@ -0,0 +1,174 @@
+"""Locate and decode JSON payloads embedded in page scripts.
+
+Assignments of interest (``var matches = [...]``, ``"results": [...]``,
+``window.__INITIAL_STATE__ = {...}``) are located in one linear pass over the
+script. Each literal's extent is then found by pairing brackets on a stack
+while skipping string literals and comments, and the slice is decoded with
+the fastest available JSON parser (orjson when installed). Framework
+payload scripts such as ``<script id="__NEXT_DATA__" type="application/json">`` are decoded whole.
+"""
+import json
+import re
+from typing import Any, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+
+    def loads(text: str) -> Any:
+        """Decode JSON text with orjson."""
+        return orjson.loads(text)
+
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    orjson = None
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+
+# Names whose literal values may hold match data
+MATCH_ANCHORS = {"matches", "results", "data"}
+
+# Globals and script ids used by common frameworks to ship page state
+FRAMEWORK_ANCHORS = {
+    "__NEXT_DATA__",
+    "__NUXT_DATA__",
+    "__INITIAL_STATE__",
+    "__PRELOADED_STATE__",
+    "__APOLLO_STATE__",
+}
+
+JSON_SCRIPT_TYPES = {"application/json", "application/ld+json"}
+
+# Strings and comments are consumed whole so brackets inside them are ignored.
+# JS strings cannot span lines, which bounds the damage of a stray apostrophe.
+_TOKEN_RE = re.compile(
+    r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+    r"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+    r"|//[^\n]*"
+    r"|/\*.*?\*/"
+    r"|[\[\]{}]",
+    re.DOTALL,
+)
+
+_OPENERS = {"]": "[", "}": "{"}
+
+# What must follow an anchor name: `matches = [`, `"results": [`, `__NEXT_DATA__ = {`
+_ANCHOR_TAIL_RE = re.compile(r'["\']?\s*[:=]\s*(?=[\[{])')
+_IDENT_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$")
+
+
+def literal_end(text: str, start: int) -> Optional[int]:
+    """
+    End offset of the array/object literal opening at ``start``.
+
+    Brackets are paired on a stack while string literals and comments are
+    skipped, so ``"];"`` inside a string does not end the literal. Returns
+    None for unbalanced input.
+    """
+    stack: List[str] = []
+    for token in _TOKEN_RE.finditer(text, start):
+        char = token.group()
+        if char == "[" or char == "{":
+            stack.append(char)
+        elif char == "]" or char == "}":
+            if not stack or stack[-1] != _OPENERS[char]:
+                return None
+            stack.pop()
+            if not stack:
+                return token.end()
+    return None
+
+
+def _iter_anchors(text: str) -> Iterator[Tuple[str, int]]:
+    """Yield (name, literal start) for each assignment of interest, in order."""
+    found = []
+    for name in MATCH_ANCHORS | FRAMEWORK_ANCHORS:
+        pos = text.find(name)
+        while pos != -1:
+            after = pos + len(name)
+            if pos == 0 or text[pos - 1] not in _IDENT_CHARS:
+                tail = _ANCHOR_TAIL_RE.match(text, after)
+                if tail:
+                    found.append((tail.end(), name))
+            pos = text.find(name, after)
+    for start, name in sorted(found):
+        yield name, start
+
+
+def iter_anchored_literals(text: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yield (name, start, end) for every literal assigned to a name of interest.
+
+    Anchor names are located with substring search, which runs at memchr
+    speed over large bundles; only the literals themselves are
+    bracket-scanned, never the surrounding code.
+    """
+    for name, start in _iter_anchors(text):
+        end = literal_end(text, start)
+        if end is not None:
+            yield name, start, end
+
+
+def decode_payloads(
+    script_text: str,
+    script_id: Optional[str] = None,
+    script_type: Optional[str] = None,
+) -> List[Any]:
+    """Decode every JSON payload of interest embedded in one script."""
+    if not script_text:
+        return []
+
+    if script_id in FRAMEWORK_ANCHORS or (script_type or "").lower() in JSON_SCRIPT_TYPES:
+        try:
+            return [loads(script_text)]
+        except (JSONDecodeError, ValueError):
+            pass
+
+    payloads = []
+    decoded_until = -1
+    for _, start, end in iter_anchored_literals(script_text):
+        # Anything inside an already decoded literal is part of that payload
+        if start < decoded_until:
+            continue
+        try:
+            payloads.append(loads(script_text[start:end]))
+        except (JSONDecodeError, ValueError):
+            # Not JSON (e.g. a JS object literal) - inner anchors get their turn
+            continue
+        decoded_until = end
+
+    return payloads
+
+
+def _looks_like_match(item: Any) -> bool:
+    return isinstance(item, dict) and isinstance(item.get("players"), list) and (
+        "date" in item or "matchDate" in item or "startDate" in item
+    )
+
+
+def find_match_lists(payload: Any) -> List[List[dict]]:
+    """Walk a decoded payload and return every list of match-like records."""
+    found = []
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            if node and any(_looks_like_match(item) for item in node):
+                found.append(node)
+                continue
+            stack.extend(item for item in node if isinstance(item, (list, dict)))
+        elif isinstance(node, dict):
+            stack.extend(value for value in node.values() if isinstance(value, (list, dict)))
+    return found
+
+
+def extract_match_lists(
+    script_text: str,
+    script_id: Optional[str] = None,
+    script_type: Optional[str] = None,
+) -> List[List[dict]]:
+    """Match record lists found in any payload embedded in one script."""
+    lists = []
+    for payload in decode_payloads(script_text, script_id, script_type):
+        lists.extend(find_match_lists(payload))
+    return lists
@@ -0,0 +1,190 @@
+"""Per-player features for many players in one vectorized pass.
+
+All histories are concatenated into one match table with a player code per
+row (rows of a player stay contiguous and most recent first). Every feature
+of ``features.player_features`` is then a handful of ``bincount`` passes
+over that table, grouped by player code, instead of one call per player.
+"""
+from datetime import datetime
+from typing import Hashable, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import history
+from .features import (ELO_HALF_LIFE_DAYS, ELO_K, TREND_PERIOD_WEEKS, History, decay_weights)
+from .history import MatchHistory, NS_PER_DAY
+
+FEATURE_COLUMNS = [
+    "elo",
+    "elo_quality",
+    "win_rate",
+    "avg_game_diff",
+    "matches_played",
+    "quality_adjusted_win_rate",
+    "recent_momentum",
+    "matches_last_14d",
+    "matches_last_30d",
+    "trend",
+    "consistency",
+]
+
+BASE_ELO = 1500.0
+FORM_MATCHES = 20
+MOMENTUM_MATCHES = 5
+TREND_WEEKS = 12
+
+
+def feature_matrix(histories: Mapping[Hashable, History], reference_date: datetime) -> pd.DataFrame:
+    """
+    ``features.player_features`` for every player in ``histories``, as one
+    DataFrame indexed by player id with ``FEATURE_COLUMNS``.
+    """
+    player_ids = list(histories)
+    converted = [history.as_history(histories[player_id]) for player_id in player_ids]
+    codes = np.repeat(np.arange(len(converted)), [len(h) for h in converted])
+    table = _concat(converted)
+    return _matrix(codes, table, player_ids, history.timestamp_ns(reference_date))
+
+
+def feature_matrix_from_table(
+    matches: pd.DataFrame,
+    reference_date: datetime,
+    player_column: str = "player_id",
+    player_ids: Optional[Iterable[Hashable]] = None,
+) -> pd.DataFrame:
+    """
+    Like ``feature_matrix`` for a long match table with one ``player_column``
+    value per row (each player's rows most recent first).
+
+    ``player_ids`` fixes the rows of the result, including players without
+    matches; by default every player in the table is returned.
+    """
+    if player_ids is None:
+        player_ids = pd.unique(matches[player_column])
+    player_ids = list(player_ids)
+    codes = pd.Index(player_ids).get_indexer(matches[player_column])
+    known = codes >= 0
+    # Stable: keeps each player's own row order
+    order = np.argsort(codes[known], kind="stable")
+    rows = matches[known].iloc[order]
+    return _matrix(codes[known][order], MatchHistory.from_frame(rows), player_ids,
+                   history.timestamp_ns(reference_date))
+
+
+def _concat(histories) -> MatchHistory:
+    if not histories:
+        return MatchHistory.empty_history()
+    return MatchHistory(*(np.concatenate([getattr(h, name) for h in histories])
+                          for name in MatchHistory.__slots__))
+
+
+def _per_player(codes: np.ndarray, n_players: int, weights=None) -> np.ndarray:
+    return np.bincount(codes, weights, minlength=n_players)
+
+
+def _matrix(codes: np.ndarray, table: MatchHistory, player_ids: list, reference: int) -> pd.DataFrame:
+    """Features from a table whose rows are grouped by (sorted) player code."""
+    n_players = len(player_ids)
+
+    # Only matches strictly before the reference date
+    keep = table.date_ns < reference
+    codes, table = codes[keep], table.take(keep)
+    played = _per_player(codes, n_players)
+    has_matches = played > 0
+    # Position of each row within its player's history (0 = most recent)
+    position = np.arange(len(codes)) - np.searchsorted(codes, np.arange(n_players))[codes]
+
+    # Elo: a base row per player ahead of the deltas, so bincount adds them in the
+    # same order as the sequential update
+    days = (reference - table.date_ns) // NS_PER_DAY
+    weight = decay_weights(days, ELO_HALF_LIFE_DAYS)
+    step = ELO_K * (1 + 0.5 * table.strength) * weight
+    deltas = np.where(table.won, step, -(step * 0.5))
+    elo = np.bincount(np.concatenate((np.arange(n_players), codes)),
+                      np.concatenate((np.full(n_players, BASE_ELO), deltas)), minlength=n_players)
+    elo = np.clip(elo, 1000, 2500)
+    elo_quality = _ratio(_per_player(codes, n_players, table.strength * weight), played, 0.0)
+
+    # Form over each player's most recent matches
+    recent = position < FORM_MATCHES
+    recent_codes = codes[recent]
+    total = _per_player(recent_codes, n_players)
+    wins = _per_player(recent_codes, n_players, table.won[recent])
+    game_diff = (table.games_won - table.games_lost)[recent]
+    has_diff = ~np.isnan(game_diff)
+    avg_game_diff = _ratio(_per_player(recent_codes[has_diff], n_players, game_diff[has_diff]),
+                           _per_player(recent_codes[has_diff], n_players), np.nan)
+    quality_wins = _per_player(recent_codes, n_players,
+                               np.where(table.won[recent], 1 + table.strength[recent], 0.0))
+    momentum_matches = np.minimum(MOMENTUM_MATCHES, total)
+    momentum_wins = _per_player(codes[position < MOMENTUM_MATCHES], n_players,
+                                table.won[position < MOMENTUM_MATCHES])
+
+    # Fatigue
+    matches_14d = _per_player(codes, n_players, table.date_ns >= reference - 14 * NS_PER_DAY)
+    matches_30d = _per_player(codes, n_players, table.date_ns >= reference - 30 * NS_PER_DAY)
+
+    trend, consistency = _trend(codes, table, n_players, reference)
+
+    frame = pd.DataFrame({
+        "elo": np.where(has_matches, elo, BASE_ELO),
+        "elo_quality": elo_quality,
+        "win_rate": _ratio(wins, total, 0.5),
+        "avg_game_diff": np.where(has_matches, avg_game_diff, 0.0),
+        "matches_played": total.astype(np.int64),
+        "quality_adjusted_win_rate": np.where(has_matches, _ratio(quality_wins, total, 0.0) / 1.5, 0.5),
+        "recent_momentum": np.where(has_matches, _ratio(momentum_wins, momentum_matches, 0.0) - 0.5, 0.0),
+        "matches_last_14d": matches_14d.astype(np.int64),
+        "matches_last_30d": matches_30d.astype(np.int64),
+        "trend": trend,
+        "consistency": consistency,
+    }, index=pd.Index(player_ids, name="player_id"))
+    return frame[FEATURE_COLUMNS]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, empty: float) -> np.ndarray:
+    """``numerator / denominator`` with ``empty`` where the denominator is 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), empty)
+
+
+def _trend(codes, table, n_players, reference):
+    """Slope and consistency of 2-week win rates, for every player at once."""
+    n_periods = TREND_WEEKS // TREND_PERIOD_WEEKS
+    cutoff = reference - TREND_WEEKS * 7 * NS_PER_DAY
+    in_window = table.date_ns >= cutoff
+    window_matches = _per_player(codes[in_window], n_players)
+
+    period = (table.date_ns[in_window] - cutoff) // (TREND_PERIOD_WEEKS * 7 * NS_PER_DAY)
+    in_period = period < n_periods
+    cell = codes[in_window][in_period] * n_periods + period[in_period]
+    played = np.bincount(cell, minlength=n_players * n_periods).reshape(n_players, n_periods)
+    wins = np.bincount(cell, table.won[in_window][in_period],
+                       minlength=n_players * n_periods).reshape(n_players, n_periods)
+    return period_trend(played, wins, window_matches)
+
+
+def period_trend(played: np.ndarray, wins: np.ndarray, window_matches: np.ndarray):
+    """
+    Trend and consistency per row of (rows, periods) match and win counts,
+    as ``features.calculate_performance_trend`` computes them for one player.
+    """
+    # Least squares over each row's populated periods, numbered 0, 1, 2, ...
+    populated = played > 0
+    count = populated.sum(axis=1)
+    rate = np.where(populated, wins / np.where(populated, played, 1), 0.0)
+    x = np.cumsum(populated, axis=1) - 1.0
+    safe_count = np.maximum(count, 1)
+    x_mean = (x * populated).sum(axis=1) / safe_count
+    y_mean = rate.sum(axis=1) / safe_count
+    dx = np.where(populated, x - x_mean[:, None], 0.0)
+    dy = np.where(populated, rate - y_mean[:, None], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+    variance = (dy * dy).sum(axis=1) / safe_count
+
+    valid = (window_matches >= 3) & (count >= 2)
+    trend = np.where(valid, slope, 0.0)
+    consistency = np.where(valid, np.clip(1.0 - variance, 0.0, 1.0), 0.5)
+    return trend, consistency
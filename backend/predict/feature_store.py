@@ -0,0 +1,175 @@
+"""On-disk store for the per-player half of the features.
+
+Elo, form, fatigue and trend depend only on one player's history and the
+reference date, so two requests involving the same player share them. The
+store keys them by (player id, reference-date bucket, history version):
+
+  * the bucket is the UTC day plus the number of that day's matches before
+    the reference date. As in ``features.player_features``, every match
+    strictly before the reference date counts; the features are computed as
+    of the day's start, or just after the last same-day match, so every
+    request that sees the same matches reads the same values
+  * the history version is a hash of the player's match arrays, so any new,
+    removed or corrected match invalidates that player's entries
+
+One JSON file per player under ``predict/.cache/features`` holds the
+entries for the current history version; older versions are dropped when
+the player's history changes. The history itself is kept beside it (an
+``.npz`` of the match arrays), so offline builds such as the pairwise
+matrix compute features from the same fetched matches as /api/predict.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import features, history
+from .history import MatchHistory
+
+FEATURE_DIR = Path(__file__).parent / ".cache" / "features"
+
+# Days of entries kept per player (oldest buckets are evicted first)
+MAX_BUCKETS = 64
+
+
+def history_version(hist: history.MatchHistory) -> str:
+    """Content hash of a player's match arrays."""
+    digest = hashlib.sha256()
+    for values in (hist.date_ns, hist.won, hist.games_won, hist.games_lost, hist.strength):
+        digest.update(values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def date_bucket(reference_date: datetime) -> pd.Timestamp:
+    """Start (UTC midnight) of the day containing ``reference_date``."""
+    moment = pd.Timestamp(reference_date)
+    if moment.tzinfo is None:
+        moment = moment.tz_localize(timezone.utc)
+    return moment.tz_convert(timezone.utc).floor("D")
+
+
+class FeatureStore:
+    """Per-player features keyed by (player id, date bucket, history version)."""
+
+    def __init__(self, root: Path = FEATURE_DIR, max_buckets: int = MAX_BUCKETS):
+        self.root = Path(root)
+        self.max_buckets = max_buckets
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # Requests and background builds share the store
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, player_id: str) -> Path:
+        return self.root / f"{player_id}.json"
+
+    def _load(self, player_id: str) -> Dict[str, Any]:
+        entry = self._entries.get(player_id)
+        if entry is None:
+            path = self._path(player_id)
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                entry = {"version": None, "buckets": {}}
+            self._entries[player_id] = entry
+        return entry
+
+    def _save(self, player_id: str, entry: Dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(player_id)
+        partial = path.with_name(path.stem + ".partial.json")
+        partial.write_text(json.dumps(entry), encoding="utf-8")
+        partial.replace(path)
+
+    def _history_path(self, player_id: str) -> Path:
+        return self.root / f"{player_id}.npz"
+
+    def _save_history(self, player_id: str, hist: MatchHistory) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._history_path(player_id)
+        partial = path.with_name(path.stem + ".partial.npz")
+        np.savez(partial, **{name: getattr(hist, name) for name in MatchHistory.__slots__})
+        partial.replace(path)
+
+    def history(self, player_id) -> Optional[MatchHistory]:
+        """The last history ``player_features`` was given for a player; None if never."""
+        try:
+            with np.load(self._history_path(str(player_id))) as stored:
+                return MatchHistory(*(stored[name] for name in MatchHistory.__slots__))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def player_features(self, player_id, hist: features.History, reference_date: datetime) -> Dict[str, Any]:
+        """
+        ``features.player_features`` from the matches strictly before
+        ``reference_date``, as of the start of its day or just after the
+        latest of them played that day; computed at most once per player,
+        bucket and history version.
+
+        Players without an id are computed without the store.
+        """
+        hist = history.as_history(hist)
+        bucket = date_bucket(reference_date)
+        earlier = hist.before(reference_date)
+        same_day = int((earlier.date_ns >= bucket.value).sum())
+        as_of = bucket if not same_day else pd.Timestamp(int(earlier.date_ns.max()) + 1, tz=timezone.utc)
+        if player_id is None:
+            return features.player_features(earlier, as_of)
+
+        player_id = str(player_id)
+        version = history_version(hist)
+        key = bucket.strftime("%Y-%m-%d") + (f"+{same_day}" if same_day else "")
+
+        with self._lock:
+            entry = self._load(player_id)
+            if entry["version"] != version:
+                # History changed: everything stored for this player is stale
+                entry = {"version": version, "buckets": {}}
+                self._entries[player_id] = entry
+                self._save_history(player_id, hist)
+            elif key in entry["buckets"]:
+                self.hits += 1
+                return entry["buckets"][key]
+            elif not self._history_path(player_id).exists():
+                # Entries stored before histories were kept
+                self._save_history(player_id, hist)
+
+            self.misses += 1
+            result = features.player_features(earlier, as_of)
+            entry["buckets"][key] = result
+            for stale in sorted(entry["buckets"])[:-self.max_buckets]:
+                del entry["buckets"][stale]
+            self._save(player_id, entry)
+            return result
+
+    def invalidate(self, player_id) -> None:
+        """Forget everything stored for a player."""
+        player_id = str(player_id)
+        with self._lock:
+            self._entries.pop(player_id, None)
+            self._path(player_id).unlink(missing_ok=True)
+            self._history_path(player_id).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Forget every player."""
+        with self._lock:
+            self._entries.clear()
+            if self.root.exists():
+                for path in [*self.root.glob("*.json"), *self.root.glob("*.npz")]:
+                    path.unlink()
+
+
+_default_store: Optional[FeatureStore] = None
+
+
+def default_store() -> FeatureStore:
+    """The process-wide store under ``FEATURE_DIR``."""
+    global _default_store
+    if _default_store is None:
+        _default_store = FeatureStore()
+    return _default_store
@@ -1,66 +1,122 @@
 """Enhanced feature extraction with backward compatibility."""
 import numpy as np
 import pandas as pd
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta, timezone
-import re
+
+from . import history, scores
+from .params import ACTIVE as PARAMS
+from .history import MatchHistory, NS_PER_DAY
+from .ratings import EloEngine, StrengthTable
+
+# Histories can be passed as DataFrames or as pre-converted MatchHistory arrays
+History = Union[pd.DataFrame, MatchHistory]
 
 
 def extract_all_features(
-    hist_a: pd.DataFrame,
-    hist_b: pd.DataFrame,
-    h2h_df: Optional[pd.DataFrame],
+    hist_a: History,
+    hist_b: History,
+    h2h_df: Optional[History],
     rank_a: int,
     rank_b: int,
     player_a_name: str,
-    reference_date: datetime = None
+    reference_date: datetime = None,
+    elo_engine: Optional[EloEngine] = None,
+    player_a_id=None,
+    player_b_id=None,
+    strengths: Optional[StrengthTable] = None,
+    feature_store=None,
 ) -> Dict[str, any]:
     """
     Enhanced feature extraction with backward compatibility.
+
+    DataFrames are converted to ``MatchHistory`` arrays once (dates normalised
+    to UTC); every feature is then computed from the arrays.
+
+    When ``elo_engine`` rates both players, ``elo_a``/``elo_b`` are their
+    match-graph ratings as of ``reference_date`` (a lookup); otherwise they
+    are estimated from each player's own history. ``strengths`` adds the
+    batch-fitted strength difference and its deviation as ``strength``.
+
+    Only matches strictly before ``reference_date`` are used, so features for
+    a past date do not see later results. ``AsOfFeatures`` answers the
+    per-player half for many dates without rescanning the history.
+
+    With a ``feature_store`` (``feature_store.FeatureStore``), the per-player
+    half (see ``player_features``) is read from the store, which computes it
+    once per player, history version and reference-date bucket; only the
+    pairwise features are computed here.
     """
     if reference_date is None:
         reference_date = datetime.now(timezone.utc)
     elif reference_date.tzinfo is None:
         reference_date = reference_date.replace(tzinfo=timezone.utc)
 
-    # Ensure timezone-aware dates
-    hist_a = ensure_timezone_aware(hist_a)
-    hist_b = ensure_timezone_aware(hist_b)
-
-    # Calculate enhanced Elo with opponent quality
-    elo_a, elo_quality_a = calculate_enhanced_elo(hist_a, reference_date)
-    elo_b, elo_quality_b = calculate_enhanced_elo(hist_b, reference_date)
-
-    # Calculate form with backward compatibility
-    form_a = calculate_enhanced_form(hist_a, n_matches=20)
-    form_b = calculate_enhanced_form(hist_b, n_matches=20)
+    # Convert once, normalising dates to UTC; matches on or after the reference date are dropped
+    hist_a = history.as_history(hist_a)
+    hist_b = history.as_history(hist_b)
+    h2h_hist = _as_h2h_history(h2h_df).before(reference_date)
 
-    # Calculate fatigue
-    fatigue_a = calculate_fatigue(hist_a, reference_date)
-    fatigue_b = calculate_fatigue(hist_b, reference_date)
+    # Per-player Elo, form, fatigue and trend
+    if feature_store is not None:
+        side_a = feature_store.player_features(player_a_id, hist_a, reference_date)
+        side_b = feature_store.player_features(player_b_id, hist_b, reference_date)
+    else:
+        side_a = player_features(hist_a, reference_date)
+        side_b = player_features(hist_b, reference_date)
+
+    elo_a, elo_b = side_a["elo"], side_b["elo"]
+    elo_source = "history"
+    if elo_engine is not None and player_a_id in elo_engine and player_b_id in elo_engine:
+        elo_a = elo_engine.rating(player_a_id, as_of=reference_date)
+        elo_b = elo_engine.rating(player_b_id, as_of=reference_date)
+        elo_source = "graph"
+    # The batch fit saw every stored match; only use it for dates after its last one
+    strength = None
+    if strengths is not None and (strengths.fitted_at_ns or 0) < history.timestamp_ns(reference_date):
+        strength = strengths.difference(player_a_id, player_b_id)
 
     # Calculate H2H
-    h2h = calculate_h2h(h2h_df, player_a_name, reference_date)
-
-    # Additional features: recent performance trends
-    trend_a = calculate_performance_trend(hist_a, reference_date, weeks=12)
-    trend_b = calculate_performance_trend(hist_b, reference_date, weeks=12)
+    h2h = calculate_h2h(h2h_hist, player_a_name, reference_date)
 
     return {
         "elo_a": elo_a,
         "elo_b": elo_b,
         "elo_diff": elo_a - elo_b,
-        "elo_quality_a": elo_quality_a,
-        "elo_quality_b": elo_quality_b,
+        "elo_source": elo_source,
+        "strength": strength,
+        "elo_quality_a": side_a["elo_quality"],
+        "elo_quality_b": side_b["elo_quality"],
         "rank_a": rank_a,
         "rank_b": rank_b,
-        "form_a": form_a,
-        "form_b": form_b,
-        "fatigue_a": fatigue_a,
-        "fatigue_b": fatigue_b,
+        "form_a": side_a["form"],
+        "form_b": side_b["form"],
+        "fatigue_a": side_a["fatigue"],
+        "fatigue_b": side_b["fatigue"],
         "h2h": h2h,
-        "trend_a": trend_a,
-        "trend_b": trend_b
+        "trend_a": side_a["trend"],
+        "trend_b": side_b["trend"]
+    }
+
+
+def player_features(hist: History, reference_date: datetime) -> Dict[str, any]:
+    """
+    The per-player half of ``extract_all_features``: Elo, form, fatigue and
+    trend from the matches strictly before ``reference_date``.
+    """
+    hist = history.as_history(hist).before(reference_date)
+
+    # Calculate enhanced Elo with opponent quality
+    elo, elo_quality = calculate_enhanced_elo(hist, reference_date)
+
+    return {
+        "elo": elo,
+        "elo_quality": elo_quality,
+        # Calculate form with backward compatibility
+        "form": calculate_enhanced_form(hist, n_matches=20),
+        "fatigue": calculate_fatigue(hist, reference_date),
+        # Additional features: recent performance trends
+        "trend": calculate_performance_trend(hist, reference_date, weeks=12),
     }
 
 
@@ -76,39 +132,96 @@ def ensure_timezone_aware(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def calculate_enhanced_elo(hist: pd.DataFrame, reference_date: datetime, base_elo: int = 1500) -> Tuple[float, float]:
-    """Calculate Elo with opponent quality weighting."""
-    if hist.empty:
-        return float(base_elo), 0.0
+ELO_K = PARAMS.elo_k
+ELO_HALF_LIFE_DAYS = PARAMS.elo_half_life_days
+# Decayed prefix sums restart their growth factor every this many half-lives
+ELO_REBASE_HALF_LIVES = 32
+TREND_PERIOD_WEEKS = 2
 
-    elo = base_elo
-    K = 32
-    HALF_LIFE_DAYS = 180
 
-    # Track opponent quality
-    opponent_quality_scores = []
+def days_ago(dates: pd.Series, reference_date: datetime) -> np.ndarray:
+    """
+    Whole days from each date to ``reference_date`` (``timedelta.days`` semantics).
 
-    for _, match in hist.iterrows():
-        match_date = match['date']
-        if match_date.tzinfo is None:
-            match_date = match_date.replace(tzinfo=timezone.utc)
+    Naive dates are read as UTC.
+    """
+    return (history.timestamp_ns(reference_date) - history.utc_ns(dates)) // NS_PER_DAY
 
-        days_ago = (reference_date - match_date).days
-        weight = 0.5 ** (days_ago / HALF_LIFE_DAYS)
 
-        # Estimate opponent strength from match score
-        opponent_strength = estimate_opponent_strength(match)
-        opponent_quality_scores.append(opponent_strength * weight)
+def decay_weights(days: np.ndarray, half_life_days: float) -> np.ndarray:
+    """``0.5 ** (days / half_life_days)``, evaluated once per distinct day count."""
+    distinct, codes = np.unique(days, return_inverse=True)
+    table = np.array([0.5 ** (d / half_life_days) for d in distinct.tolist()], dtype=float)
+    return table[codes]
 
-        # Adjust K-factor based on opponent strength
-        adjusted_K = K * (1 + 0.5 * opponent_strength)  # Stronger opponents matter more
 
-        if match['result'] == 'W':
-            elo += adjusted_K * weight
-        else:
-            elo -= adjusted_K * weight * 0.5
+def decayed_prefixes(
+    day: np.ndarray,
+    columns: List[np.ndarray],
+    half_life_days: float,
+) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Prefix sums of exponentially decayed values over ascending ``day``:
+    returns (anchor, prefixes) such that
+    ``prefix[k] * 0.5 ** ((d - anchor[k]) / half_life_days)`` is the sum of
+    ``column[:k]`` decayed to day ``d`` (for ``d`` on or after the k-th day).
+
+    Rows are scaled by ``2 ** ((day - anchor) / half_life_days)`` from the
+    start of their window of ``ELO_REBASE_HALF_LIVES`` half-lives, so the
+    factors never exceed ``2 ** ELO_REBASE_HALF_LIVES``; each window's sums
+    carry on from the previous window's total decayed to the new anchor.
+    """
+    window_days = ELO_REBASE_HALF_LIVES * half_life_days
+    origin = float(day[0]) if len(day) else 0.0
+    row_anchor = origin + np.floor((day - origin) / window_days) * window_days
+    growth = 2.0 ** ((day - row_anchor) / half_life_days)
+    bounds = np.append(np.flatnonzero(np.diff(row_anchor, prepend=np.nan) != 0), len(day))
+
+    prefixes = []
+    for values in columns:
+        running = np.empty(len(day))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            carried = 0.0
+            if start:
+                carried = running[start - 1] * 0.5 ** ((row_anchor[start] - row_anchor[start - 1]) / half_life_days)
+            running[start:end] = carried + np.cumsum(values[start:end] * growth[start:end])
+        prefixes.append(np.concatenate(([0.0], running)))
+    return np.concatenate(([origin], row_anchor)), prefixes
+
+
+def opponent_strengths(hist: pd.DataFrame) -> np.ndarray:
+    """``estimate_opponent_strength`` for every row at once."""
+    games_won = hist['games_won'].to_numpy(dtype=float)
+    games_lost = hist['games_lost'].to_numpy(dtype=float)
+
+    if 'score' in hist.columns:
+        score_quality = scores.close_shares(hist['score'])
+    else:
+        score_quality = np.full(len(hist), analyze_score_quality(''))
+
+    return history.opponent_strengths(games_won, games_lost, score_quality)
+
+
+def calculate_enhanced_elo(hist: History, reference_date: datetime, base_elo: int = 1500) -> Tuple[float, float]:
+    """Calculate Elo with opponent quality weighting."""
+    hist = history.as_history(hist)
+    if hist.empty:
+        return float(base_elo), 0.0
 
-    avg_opponent_quality = np.mean(opponent_quality_scores) if opponent_quality_scores else 0.0
+    days = (history.timestamp_ns(reference_date) - hist.date_ns) // NS_PER_DAY
+    weight = decay_weights(days, ELO_HALF_LIFE_DAYS)
+
+    # Opponent strength estimated from match score
+    opponent_quality_scores = hist.strength * weight
+
+    # Adjust K-factor based on opponent strength - stronger opponents matter more
+    step = ELO_K * (1 + 0.5 * hist.strength) * weight
+    deltas = np.where(hist.won, step, -(step * 0.5))
+
+    # Accumulate in match order, exactly as the sequential updates would
+    elo = np.cumsum(np.concatenate(([float(base_elo)], deltas)))[-1]
+
+    avg_opponent_quality = np.mean(opponent_quality_scores)
 
     return float(max(1000, min(2500, elo))), float(avg_opponent_quality)
 
@@ -136,29 +249,13 @@ def estimate_opponent_strength(match: pd.Series) -> float:
 
 def analyze_score_quality(score_str: str) -> float:
     """Analyze score string for match competitiveness."""
-    if not score_str:
-        return 0.5
-
-    try:
-        # Parse scores like "11-8, 11-9, 5-11, 11-7"
-        games = score_str.split(', ')
-        close_games = 0
-        total_games = len(games)
-
-        for game in games:
-            if '-' in game:
-                p1_score, p2_score = map(int, game.split('-'))
-                score_diff = abs(p1_score - p2_score)
-                if score_diff <= 3:  # Close game
-                    close_games += 1
-
-        return close_games / total_games if total_games > 0 else 0.5
-    except:
-        return 0.5
+    # Parses like "11-8, 11-9, 5-11, 11-7" - share of games decided by <= 3 points
+    return scores.parse_score(score_str).close_share
 
 
-def calculate_enhanced_form(hist: pd.DataFrame, n_matches: int = 20) -> Dict[str, float]:
+def calculate_enhanced_form(hist: History, n_matches: int = 20) -> Dict[str, float]:
     """Calculate form with backward compatibility."""
+    hist = history.as_history(hist)
     if hist.empty:
         return {
             "win_rate": 0.5,
@@ -171,29 +268,22 @@ def calculate_enhanced_form(hist: pd.DataFrame, n_matches: int = 20) -> Dict[str
     recent = hist.head(n_matches)
 
     # Basic stats (backward compatible)
-    wins = (recent['result'] == 'W').sum()
+    wins = recent.won.sum()
     total = len(recent)
     win_rate = wins / total if total > 0 else 0.5
 
     # Game differential
-    game_diffs = recent['games_won'] - recent['games_lost']
-    avg_game_diff = float(game_diffs.mean()) if not game_diffs.empty else 0.0
+    avg_game_diff = _nanmean(recent.games_won - recent.games_lost)
 
-    # Quality-adjusted win rate (new enhanced feature)
-    quality_scores = []
-    for _, match in recent.iterrows():
-        strength = estimate_opponent_strength(match)
-        if match['result'] == 'W':
-            quality_scores.append(1.0 * (1 + strength))
-        else:
-            quality_scores.append(0.0)
+    # Quality-adjusted win rate (new enhanced feature): wins weighted by opponent strength
+    quality_scores = np.where(recent.won, 1.0 * (1 + recent.strength), 0.0)
 
-    quality_win_rate = np.mean(quality_scores) / 1.5 if quality_scores else 0.5  # Normalize
+    quality_win_rate = np.mean(quality_scores) / 1.5  # Normalize
 
     # Recent momentum (new enhanced feature)
     momentum_matches = min(5, len(recent))
     if momentum_matches > 0:
-        recent_wins = (recent.head(momentum_matches)['result'] == 'W').sum()
+        recent_wins = recent.won[:momentum_matches].sum()
         momentum = (recent_wins / momentum_matches) - 0.5
     else:
         momentum = 0.0
@@ -207,40 +297,47 @@ def calculate_enhanced_form(hist: pd.DataFrame, n_matches: int = 20) -> Dict[str
     }
 
 
-def calculate_performance_trend(hist: pd.DataFrame, reference_date: datetime, weeks: int = 12) -> Dict[str, float]:
+def _nanmean(values: np.ndarray) -> float:
+    """Mean skipping NaN (``Series.mean`` semantics); NaN when nothing is left."""
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) else float("nan")
+
+
+def _slope(y: np.ndarray) -> float:
+    """Least-squares slope of ``y`` against 0, 1, 2, ..."""
+    x = np.arange(len(y), dtype=float)
+    x -= x.mean()
+    return float(np.dot(x, y - y.mean()) / np.dot(x, x))
+
+
+def calculate_performance_trend(hist: History, reference_date: datetime, weeks: int = 12) -> Dict[str, float]:
     """Calculate performance trend over recent weeks."""
+    hist = history.as_history(hist)
     if hist.empty:
         return {"trend": 0.0, "consistency": 0.5}
 
-    cutoff = reference_date - timedelta(weeks=weeks)
-    recent_matches = hist[hist['date'] >= cutoff]
+    cutoff = history.timestamp_ns(reference_date - timedelta(weeks=weeks))
+    in_window = hist.date_ns >= cutoff
 
-    if len(recent_matches) < 3:
+    if in_window.sum() < 3:
         return {"trend": 0.0, "consistency": 0.5}
 
-    # Calculate win rate by 2-week periods
-    periods = []
-    for i in range(weeks // 2):
-        period_start = cutoff + timedelta(weeks=i*2)
-        period_end = period_start + timedelta(weeks=2)
+    # Win rate by 2-week periods: bucket = whole periods since the cutoff
+    n_periods = weeks // 2
+    period = (hist.date_ns[in_window] - cutoff) // (TREND_PERIOD_WEEKS * 7 * NS_PER_DAY)
+    won = hist.won[in_window]
+    in_period = period < n_periods
 
-        period_matches = recent_matches[
-            (recent_matches['date'] >= period_start) &
-            (recent_matches['date'] < period_end)
-        ]
-
-        if len(period_matches) > 0:
-            win_rate = (period_matches['result'] == 'W').mean()
-            periods.append(win_rate)
+    played = np.bincount(period[in_period], minlength=n_periods)
+    wins = np.bincount(period[in_period], weights=won[in_period], minlength=n_periods)
+    periods = wins[played > 0] / played[played > 0]
 
     if len(periods) >= 2:
         # Calculate trend (slope of win rates over time)
-        x = np.arange(len(periods))
-        y = np.array(periods)
-        trend = float(np.polyfit(x, y, 1)[0])  # Slope of linear fit
+        trend = _slope(periods)
 
         # Calculate consistency (inverse of variance)
-        consistency = 1.0 - float(np.var(y))
+        consistency = 1.0 - float(np.var(periods))
     else:
         trend = 0.0
         consistency = 0.5
@@ -251,28 +348,20 @@ def calculate_performance_trend(hist: pd.DataFrame, reference_date: datetime, we
     }
 
 
-def calculate_fatigue(hist: pd.DataFrame, reference_date: datetime) -> Dict[str, int]:
+def calculate_fatigue(hist: History, reference_date: datetime) -> Dict[str, int]:
     """Calculate fatigue from recent match density."""
+    hist = history.as_history(hist)
     if hist.empty:
         return {
             "matches_last_14d": 0,
             "matches_last_30d": 0
         }
 
-    # Ensure reference_date is timezone-aware
-    if reference_date.tzinfo is None:
-        reference_date = reference_date.replace(tzinfo=timezone.utc)
-
-    # Ensure date column is timezone-aware
-    dates = hist['date'].copy()
-    if dates.dt.tz is None:
-        dates = dates.dt.tz_localize(timezone.utc)
-
-    cutoff_14d = reference_date - timedelta(days=14)
-    cutoff_30d = reference_date - timedelta(days=30)
+    # Naive dates (and reference dates) are read as UTC
+    reference = history.timestamp_ns(reference_date)
 
-    matches_14d = (dates >= cutoff_14d).sum()
-    matches_30d = (dates >= cutoff_30d).sum()
+    matches_14d = (hist.date_ns >= reference - 14 * NS_PER_DAY).sum()
+    matches_30d = (hist.date_ns >= reference - 30 * NS_PER_DAY).sum()
 
     return {
         "matches_last_14d": int(matches_14d),
@@ -280,13 +369,19 @@ def calculate_fatigue(hist: pd.DataFrame, reference_date: datetime) -> Dict[str,
     }
 
 
+def _as_h2h_history(h2h_df: Optional[History]) -> MatchHistory:
+    """H2H frames flag player A's wins in the ``winner`` column."""
+    return history.as_history(h2h_df, won_column='winner', won_value='A')
+
+
 def calculate_h2h(
-    h2h_df: Optional[pd.DataFrame],
+    h2h_df: Optional[History],
     player_a_name: str,
     reference_date: datetime
 ) -> Dict[str, float]:
     """Calculate head-to-head statistics."""
-    if h2h_df is None or h2h_df.empty:
+    h2h = _as_h2h_history(h2h_df)
+    if h2h.empty:
         return {
             "n_matches": 0,
             "n_effective": 0.0,
@@ -295,43 +390,34 @@ def calculate_h2h(
             "days_since_last": 9999
         }
 
-    # Ensure reference_date is timezone-aware
-    if reference_date.tzinfo is None:
-        reference_date = reference_date.replace(tzinfo=timezone.utc)
-
-    # Ensure date column is timezone-aware
-    if h2h_df['date'].dt.tz is None:
-        h2h_df = h2h_df.copy()
-        h2h_df['date'] = h2h_df['date'].dt.tz_localize(timezone.utc)
+    # Naive dates (and reference dates) are read as UTC
+    reference = history.timestamp_ns(reference_date)
 
-    n_matches = len(h2h_df)
+    n_matches = len(h2h)
 
     # Time-weighted effective sample size (last 24 months most relevant)
-    cutoff = reference_date - timedelta(days=730)
-    recent_h2h = h2h_df[h2h_df['date'] >= cutoff]
+    recent = h2h.date_ns >= reference - 730 * NS_PER_DAY
 
     # Calculate time decay weights
-    if not recent_h2h.empty:
-        days_ago = (reference_date - recent_h2h['date']).dt.days
+    if recent.any():
+        days_ago = (reference - h2h.date_ns[recent]) // NS_PER_DAY
         weights = 0.5 ** (days_ago / 365)
         n_effective = float(weights.sum())
     else:
         n_effective = 0.0
 
     # Win rate for player A
-    a_wins = (h2h_df['winner'] == 'A').sum()
+    a_wins = h2h.won.sum()
     a_win_rate = a_wins / n_matches if n_matches > 0 else 0.5
 
-    # Average game differential
-    game_diffs = h2h_df['games_won'] - h2h_df['games_lost']
-    # Flip sign for B wins
-    game_diffs = game_diffs * h2h_df['winner'].apply(lambda x: 1 if x == 'A' else -1)
-    avg_game_diff = float(game_diffs.mean()) if not game_diffs.empty else 0.0
+    # Average game differential, sign flipped for B wins
+    game_diffs = (h2h.games_won - h2h.games_lost) * np.where(h2h.won, 1, -1)
+    avg_game_diff = _nanmean(game_diffs)
 
     # Days since last H2H
-    most_recent = h2h_df['date'].max()
-    if pd.notna(most_recent):
-        days_since = (reference_date - most_recent).days
+    dated = h2h.date_ns[h2h.date_ns != history.NAT_NS]
+    if len(dated):
+        days_since = (reference - dated.max()) // NS_PER_DAY
     else:
         days_since = 9999
 
@@ -341,4 +427,132 @@ def calculate_h2h(
         "a_win_rate": float(a_win_rate),
         "avg_game_diff_a": avg_game_diff,
         "days_since_last": int(days_since)
-    }
\ No newline at end of file
+    }
+
+
+class AsOfFeatures:
+    """
+    Per-player features as of any date, from matches strictly before it.
+
+    The history is sorted once and turned into prefix sums; each query is a
+    few binary searches on the date array plus O(1) arithmetic, so features
+    for many reference dates cost O(log n) each instead of a pass over the
+    history per date.
+
+    Results equal the ``calculate_*`` functions run on ``hist.before(date)``.
+    One difference: Elo decay counts calendar days (reference day minus
+    match day) so the decay factors out of the prefix sums. The two agree
+    whenever a match's time of day is not later than the reference's,
+    e.g. for date-only sources. The decayed sums are re-based every
+    ``ELO_REBASE_HALF_LIVES`` half-lives (see ``decayed_prefixes``), so they
+    stay bounded however long the history.
+    """
+
+    def __init__(self, hist: History):
+        hist = history.as_history(hist)
+        # Ascending by date; reversing first keeps the source order of same-day matches
+        hist = hist.take(slice(None, None, -1))
+        hist = hist.take(np.argsort(hist.date_ns, kind='stable'))
+        hist = hist.take(hist.date_ns != history.NAT_NS)
+
+        self.date_ns = hist.date_ns
+        day = hist.date_ns // NS_PER_DAY
+
+        step = ELO_K * (1 + 0.5 * hist.strength)
+        signed_step = np.where(hist.won, step, -(step * 0.5))
+        game_diff = hist.games_won - hist.games_lost
+        has_diff = ~np.isnan(game_diff)
+
+        def prefix(values):
+            return np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+
+        self._anchor_day, (self._elo, self._quality) = decayed_prefixes(
+            day, [signed_step, hist.strength], ELO_HALF_LIFE_DAYS)
+        self._won = prefix(hist.won)
+        self._quality_won = prefix(np.where(hist.won, 1 + hist.strength, 0.0))
+        self._game_diff = prefix(np.where(has_diff, game_diff, 0.0))
+        self._has_diff = prefix(has_diff)
+
+    def __len__(self) -> int:
+        return len(self.date_ns)
+
+    def _before(self, moment_ns: int) -> int:
+        """Number of matches strictly before ``moment_ns``."""
+        return int(np.searchsorted(self.date_ns, moment_ns, side='left'))
+
+    def elo(self, reference_date: datetime, base_elo: int = 1500) -> Tuple[float, float]:
+        """``calculate_enhanced_elo`` as of ``reference_date``."""
+        return self._elo_at(history.timestamp_ns(reference_date), base_elo)
+
+    def form(self, reference_date: datetime, n_matches: int = 20) -> Dict[str, float]:
+        """``calculate_enhanced_form`` over the last ``n_matches`` before ``reference_date``."""
+        return self._form_at(history.timestamp_ns(reference_date), n_matches)
+
+    def trend(self, reference_date: datetime, weeks: int = 12) -> Dict[str, float]:
+        """``calculate_performance_trend`` from period boundaries found by binary search."""
+        return self._trend_at(history.timestamp_ns(reference_date), weeks)
+
+    def fatigue(self, reference_date: datetime) -> Dict[str, int]:
+        """``calculate_fatigue`` counting only matches before ``reference_date``."""
+        return self._fatigue_at(history.timestamp_ns(reference_date))
+
+    def player_features(self, reference_date: datetime) -> Dict[str, any]:
+        """The per-player half of ``extract_all_features`` as of ``reference_date``."""
+        reference = history.timestamp_ns(reference_date)
+        elo, elo_quality = self._elo_at(reference)
+        return {
+            "elo": elo,
+            "elo_quality": elo_quality,
+            "form": self._form_at(reference, 20),
+            "fatigue": self._fatigue_at(reference),
+            "trend": self._trend_at(reference, 12),
+        }
+
+    def _elo_at(self, reference: int, base_elo: int = 1500) -> Tuple[float, float]:
+        k = self._before(reference)
+        if k == 0:
+            return float(base_elo), 0.0
+        decay = 0.5 ** ((reference // NS_PER_DAY - self._anchor_day[k]) / ELO_HALF_LIFE_DAYS)
+        elo = base_elo + self._elo[k] * decay
+        return float(max(1000, min(2500, elo))), float(self._quality[k] * decay / k)
+
+    def _form_at(self, reference: int, n_matches: int) -> Dict[str, float]:
+        k = self._before(reference)
+        start = max(0, k - n_matches)
+        total = k - start
+        if total == 0:
+            return calculate_enhanced_form(MatchHistory.empty_history())
+
+        n_diffs = self._has_diff[k] - self._has_diff[start]
+        momentum_matches = min(5, total)
+        return {
+            "win_rate": float((self._won[k] - self._won[start]) / total),
+            "avg_game_diff": float((self._game_diff[k] - self._game_diff[start]) / n_diffs) if n_diffs else float("nan"),
+            "matches_played": int(total),
+            "quality_adjusted_win_rate": float((self._quality_won[k] - self._quality_won[start]) / total / 1.5),
+            "recent_momentum": float((self._won[k] - self._won[k - momentum_matches]) / momentum_matches - 0.5),
+        }
+
+    def _trend_at(self, reference: int, weeks: int) -> Dict[str, float]:
+        cutoff = reference - weeks * 7 * NS_PER_DAY
+        k = self._before(reference)
+        if k - self._before(cutoff) < 3:
+            return {"trend": 0.0, "consistency": 0.5}
+
+        edges = cutoff + np.arange(weeks // 2 + 1) * (TREND_PERIOD_WEEKS * 7 * NS_PER_DAY)
+        positions = np.minimum(np.searchsorted(self.date_ns, edges, side='left'), k)
+        played = np.diff(positions)
+        wins = np.diff(self._won[positions])
+        periods = wins[played > 0] / played[played > 0]
+
+        if len(periods) < 2:
+            return {"trend": 0.0, "consistency": 0.5}
+        consistency = 1.0 - float(np.var(periods))
+        return {"trend": _slope(periods), "consistency": max(0.0, min(1.0, consistency))}
+
+    def _fatigue_at(self, reference: int) -> Dict[str, int]:
+        k = self._before(reference)
+        return {
+            "matches_last_14d": k - self._before(reference - 14 * NS_PER_DAY),
+            "matches_last_30d": k - self._before(reference - 30 * NS_PER_DAY),
+        }
@@ -1,5 +1,6 @@
 """Enhanced match history fetching with multiple data sources."""
 import asyncio
+import os
 import random
 import time
 import json
@@ -10,32 +11,19 @@ from datetime import datetime, timedelta, timezone
 import httpx
 import pandas as pd
 
-# Import modules directly - no relative imports
 try:
+    from . import cache, transport
+    from .squashinfo import get_squashinfo_match_history
+    from .squashlevels import get_squashlevels_match_history
+    # Import the PSA website scraper
+    from .scraper import get_psa_website_match_history, scrape_player_match_history
+except ImportError:
+    # For direct execution
     import cache
+    import transport
     from squashinfo import get_squashinfo_match_history
     from squashlevels import get_squashlevels_match_history
-    # Import the PSA website scraper
     from scraper import get_psa_website_match_history, scrape_player_match_history
-except ImportError as e:
-    print(f"Import warning: {e}")
-
-
-    # Create dummy functions if imports fail
-    async def get_squashinfo_match_history(*args, **kwargs):
-        return pd.DataFrame()
-
-
-    async def get_squashlevels_match_history(*args, **kwargs):
-        return pd.DataFrame()
-
-
-    async def get_psa_website_match_history(*args, **kwargs):
-        return pd.DataFrame()
-
-
-    async def scrape_player_match_history(*args, **kwargs):
-        return pd.DataFrame()
 
 # Rate limiting
 _last_request_time = 0
@@ -48,11 +36,16 @@ RETRY_BACKOFF = [0.5, 1.0, 2.0]
 
 PSA_API_BASE = "https://psa-api.ptsportsuite.com"
 
+# Live scraping of the PSA website, SquashLevels and SquashInfo is opt-in.
+# Until the scraper imports were fixed these sources always fell back to
+# empty dummies, so production served PSA API results only.
+SCRAPED_SOURCES = os.environ.get("PSA_SCRAPED_SOURCES", "") == "1"
+
 
 @asynccontextmanager
 async def get_http_client():
     """Get configured HTTP client."""
-    async with httpx.AsyncClient(
+    async with transport.async_client(
         headers={"User-Agent": USER_AGENT},
         timeout=TIMEOUT,
         follow_redirects=True
@@ -122,16 +115,17 @@ async def get_match_history(
     print(f"\n=== Fetching match history for {player_canonical} ===")
 
     # Try PSA Website scraper first (direct URL approach)
-    print("🔄 Trying PSA Website Scraper (direct URL)...")
-    try:
-        psa_website_history = await get_psa_website_match_history(player_canonical, months_back)
-        if not psa_website_history.empty:
-            print(f"✅ Using {len(psa_website_history)} matches from PSA Website")
-            return psa_website_history
-        else:
-            print("❌ PSA Website: No matches found")
-    except Exception as e:
-        print(f"❌ PSA Website error: {e}")
+    if SCRAPED_SOURCES:
+        print("🔄 Trying PSA Website Scraper (direct URL)...")
+        try:
+            psa_website_history = await get_psa_website_match_history(player_canonical, months_back)
+            if not psa_website_history.empty:
+                print(f"✅ Using {len(psa_website_history)} matches from PSA Website")
+                return psa_website_history
+            else:
+                print("❌ PSA Website: No matches found")
+        except Exception as e:
+            print(f"❌ PSA Website error: {e}")
 
     # Rest of your existing code remains the same...
     # Try PSA API, SquashLevels, SquashInfo...
@@ -152,20 +146,24 @@ async def get_extended_match_history(
 
     # Get from all sources - PSA Website first
     sources = [
-        ("PSA Website", get_psa_website_match_history(player_canonical, months_back)),
-        ("PSA Direct ID", scrape_player_match_history(player_id, player_canonical, months_back)),
-        ("PSA API", _get_api_match_history(player_canonical, player_id, use_cache, months_back)),
-        ("SquashLevels", get_squashlevels_match_history(player_canonical, months_back)),
-        ("SquashInfo", get_squashinfo_match_history(player_canonical, months_back)),
+        ("PSA Website", lambda: get_psa_website_match_history(player_canonical, months_back)),
+        ("PSA Direct ID", lambda: scrape_player_match_history(player_id, player_canonical, months_back)),
+        ("PSA API", lambda: _get_api_match_history(player_canonical, player_id, use_cache, months_back)),
+        ("SquashLevels", lambda: get_squashlevels_match_history(player_canonical, months_back)),
+        ("SquashInfo", lambda: get_squashinfo_match_history(player_canonical, months_back)),
     ]
+    if not SCRAPED_SOURCES:
+        sources = [source for source in sources if source[0] == "PSA API"]
 
-    for source_name, source_coro in sources:
+    for source_name, make_coro in sources:
         try:
-            matches = await source_coro
+            matches = await make_coro()
             if not matches.empty:
                 print(f"✅ {source_name}: {len(matches)} matches")
                 # Add source identifier
                 matches['source'] = source_name.lower().replace(' ', '_')
+                # Scraped sources give naive dates; the PSA API gives UTC
+                matches['date'] = pd.to_datetime(matches['date'], utc=True)
                 all_matches.append(matches)
             else:
                 print(f"❌ {source_name}: No matches")
@@ -0,0 +1,135 @@
+"""Struct-of-arrays match histories for the feature fast path.
+
+A history DataFrame is converted once with ``MatchHistory.from_frame``: dates
+become int64 UTC nanoseconds (naive dates are read as UTC), results a bool
+mask, and score strings are reduced to per-match opponent strengths. The
+feature functions in ``features`` then run on these arrays without copying
+or re-normalising DataFrames.
+"""
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from . import scores
+
+NS_PER_DAY = 86_400_000_000_000
+
+# int64 value of NaT; compares below every real date
+NAT_NS = np.iinfo(np.int64).min
+
+
+def utc_ns(dates) -> np.ndarray:
+    """Dates as int64 UTC nanoseconds; naive dates are read as UTC, NaT is ``NAT_NS``."""
+    values = getattr(dates, "array", dates)
+    if not isinstance(values, pd.arrays.DatetimeArray):
+        values = pd.DatetimeIndex(dates).array
+    return values.as_unit("ns").asi8
+
+
+def timestamp_ns(moment) -> int:
+    """A single datetime as UTC nanoseconds; naive datetimes are read as UTC."""
+    moment = pd.Timestamp(moment)
+    if moment.tzinfo is None:
+        moment = moment.tz_localize("UTC")
+    return moment.as_unit("ns").value
+
+
+def opponent_strengths(games_won: np.ndarray, games_lost: np.ndarray, close_share: np.ndarray) -> np.ndarray:
+    """
+    Opponent strength per match: 70% game ratio, 30% share of close games.
+
+    Matches without games count as 0.5; the result is clipped to [0, 1] with
+    NaN mapped to 0, like ``features.estimate_opponent_strength``.
+    """
+    total_games = games_won + games_lost
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strength = (games_won / total_games * 0.7) + (close_share * 0.3)
+    strength = np.where(np.isnan(strength), 0.0, np.clip(strength, 0.0, 1.0))
+    return np.where(total_games == 0, 0.5, strength)
+
+
+class MatchHistory:
+    """
+    One player's matches as parallel arrays, in the order of the source frame
+    (most recent first).
+    """
+
+    __slots__ = ("date_ns", "won", "games_won", "games_lost", "strength")
+
+    def __init__(self, date_ns: np.ndarray, won: np.ndarray, games_won: np.ndarray,
+                 games_lost: np.ndarray, strength: np.ndarray):
+        self.date_ns = date_ns
+        self.won = won
+        self.games_won = games_won
+        self.games_lost = games_lost
+        self.strength = strength
+
+    def __len__(self) -> int:
+        return len(self.date_ns)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.date_ns) == 0
+
+    @classmethod
+    def from_frame(cls, df: Optional[pd.DataFrame], won_column: str = 'result',
+                   won_value: str = 'W') -> "MatchHistory":
+        """
+        Convert a history DataFrame (date, result, games_won, games_lost, score).
+
+        ``won_column``/``won_value`` select the win flag, e.g. ``'winner'``/``'A'``
+        for head-to-head frames.
+        """
+        if df is None or df.empty:
+            return cls.empty_history()
+
+        games_won = df['games_won'].to_numpy(dtype=float)
+        games_lost = df['games_lost'].to_numpy(dtype=float)
+        if 'score' in df.columns:
+            close_share = scores.close_shares(df['score'])
+        else:
+            close_share = np.full(len(df), scores.parse_score('').close_share)
+
+        return cls(
+            date_ns=utc_ns(df['date']),
+            won=df[won_column].to_numpy() == won_value,
+            games_won=games_won,
+            games_lost=games_lost,
+            strength=opponent_strengths(games_won, games_lost, close_share),
+        )
+
+    @classmethod
+    def empty_history(cls) -> "MatchHistory":
+        no_floats = np.empty(0, dtype=float)
+        return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=bool), no_floats, no_floats, no_floats)
+
+    def before(self, moment) -> "MatchHistory":
+        """
+        Matches strictly before ``moment``.
+
+        Histories are most recent first, so these are a suffix: one binary
+        search and views when the dates are sorted, a mask otherwise.
+        """
+        cutoff = timestamp_ns(moment)
+        ascending = self.date_ns[::-1]
+        if np.all(ascending[:-1] <= ascending[1:]):
+            start = len(self) - int(np.searchsorted(ascending, cutoff, side='left'))
+            return self.take(slice(start, None))
+        return self.take(self.date_ns < cutoff)
+
+    def take(self, index) -> "MatchHistory":
+        """Rows selected by a slice, mask or index array."""
+        return MatchHistory(self.date_ns[index], self.won[index], self.games_won[index],
+                            self.games_lost[index], self.strength[index])
+
+    def head(self, n: int) -> "MatchHistory":
+        """The first ``n`` matches (views, no copies)."""
+        return self.take(slice(None, n))
+
+
+def as_history(hist: Union[pd.DataFrame, MatchHistory, None], **kwargs) -> MatchHistory:
+    """Pass a ``MatchHistory`` through; convert a DataFrame (or None)."""
+    if isinstance(hist, MatchHistory):
+        return hist
+    return MatchHistory.from_frame(hist, **kwargs)
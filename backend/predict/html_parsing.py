@@ -0,0 +1,124 @@
+"""Fast-path HTML parsing backend shared by the scrapers.
+
+Scraped pages are mostly site chrome: navigation, inline bundles, footers.
+Rather than building a full BeautifulSoup tree with ``html.parser``, pages are
+parsed once with lxml, the results containers are located with precompiled
+XPath, and only those subtrees are handed to BeautifulSoup for row parsing.
+Falls back to a full ``html.parser`` soup when lxml is not installed.
+"""
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HAVE_LXML = True
+except ImportError:
+    etree = None
+    lxml_html = None
+    HAVE_LXML = False
+
+DEFAULT_PARSER = "lxml" if HAVE_LXML else "html.parser"
+
+_REGEX_NS = {"re": "http://exslt.org/regular-expressions"}
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching a whole class token (CSS ``.name`` semantics)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Subtrees that can hold match results on PSA player profiles
+PSA_PROFILE_XPATH = " | ".join([
+    f"//*[{_has_class('matches-table')}]",
+    f"//*[{_has_class('results')}]",
+    f"//*[{_has_class('player-results')}]",
+    f"//table[{_has_class('tournament-results')}]",
+    f"//*[{_has_class('match-history')}]",
+    "//div[contains(@class, 'match')]",
+    "//script[re:test(., 'matches|results|tournaments', 'i')]",
+    "//script[@id='__NEXT_DATA__']",
+])
+
+# Subtrees that can hold match results on SquashInfo player pages
+SQUASHINFO_PROFILE_XPATH = " | ".join([
+    "//table",
+    f"//*[{_has_class('results-table')}]",
+    f"//*[{_has_class('match-history')}]",
+])
+
+# Player links on search/directory pages
+PLAYER_LINKS_XPATH = "//a[contains(@href, '/player/')]"
+
+_compiled_xpaths: Dict[str, "etree.XPath"] = {}
+
+
+def _compile_xpath(expression: str):
+    """Compile an XPath expression once and reuse it for every page."""
+    compiled = _compiled_xpaths.get(expression)
+    if compiled is None:
+        compiled = etree.XPath(expression, namespaces=_REGEX_NS)
+        _compiled_xpaths[expression] = compiled
+    return compiled
+
+
+def make_soup(markup: str) -> BeautifulSoup:
+    """Build a full soup with the fastest available parser."""
+    return BeautifulSoup(markup, DEFAULT_PARSER)
+
+
+def extract_subtrees(markup: str, xpath: str) -> BeautifulSoup:
+    """
+    Build a soup containing only the subtrees matched by ``xpath``.
+
+    Nested matches are collapsed into their outermost ancestor so no row is
+    seen twice. Without lxml the full page is parsed instead.
+    """
+    if not HAVE_LXML:
+        return make_soup(markup)
+
+    try:
+        root = lxml_html.document_fromstring(markup)
+    except (etree.ParserError, ValueError):
+        return make_soup(markup)
+
+    selected = set()
+    fragments = []
+    for node in _compile_xpath(xpath)(root):
+        if any(ancestor in selected for ancestor in node.iterancestors()):
+            continue
+        selected.add(node)
+        fragments.append(etree.tostring(node, method="html", encoding="unicode", with_tail=False))
+
+    return BeautifulSoup("".join(fragments), DEFAULT_PARSER)
+
+
+class SelectorCascade:
+    """
+    Ordered CSS selector fallbacks, compiled once.
+
+    Selectors are always tried in the given order, so a broad fallback never
+    pre-empts a specific one; the cascade holds no per-page state and can be
+    shared across scrapers and concurrent requests.
+    """
+
+    def __init__(self, selectors: Sequence[str]):
+        self.selectors = list(selectors)
+        self._compiled = [soupsieve.compile(selector) for selector in self.selectors]
+
+    def select(self, soup: BeautifulSoup) -> Tuple[Optional[str], List[Tag]]:
+        """Return (selector, elements) for the first selector with matches."""
+        for selector, compiled in zip(self.selectors, self._compiled):
+            elements = compiled.select(soup)
+            if elements:
+                return selector, elements
+        return None, []
+
+
+def find_player_links(markup: str, href_pattern: str = r'/player/') -> List[Tag]:
+    """Find player links on a search or directory page."""
+    soup = extract_subtrees(markup, PLAYER_LINKS_XPATH)
+    return soup.find_all('a', href=re.compile(href_pattern))
@@ -0,0 +1,136 @@
+"""Trained logistic evidence component and its serialized artifact.
+
+``training`` fits a regularised logistic regression on ``LEARNED_FEATURES``
+(the model's features, ranks and fatigue, each as an A-minus-B difference)
+and folds the feature scaling into one weight per feature. With no
+intercept, swapping the players flips the probability exactly.
+
+The artifact is JSON at ``ARTIFACT_STORE``: the feature names, weights, the
+``blend`` with the hand-built evidence and a version hash of those, checked
+on load. ``ACTIVE`` is read once at import (service startup); None without
+an artifact. When set, ``model`` mixes ``blend`` of its probability into the
+evidence probability, in ``predict_match`` through ``LearnedModel.probability``
+(plain float arithmetic, no arrays) and in ``predict_batch`` through
+``probabilities``. It is trained on graph Elo, so only matchups whose
+``elo_diff`` is graph Elo use it; history Elo fallbacks keep the hand-built
+evidence. Serving needs no scikit-learn.
+"""
+import hashlib
+import json
+import math
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy.special import expit as sigmoid
+
+LEARNED_DIR = Path(__file__).parent / ".cache" / "learned"
+ARTIFACT_STORE = LEARNED_DIR / "logistic.json"
+
+LEARNED_FEATURES = (
+    "elo_diff",
+    "form_diff",
+    "momentum_diff",
+    "trend_diff",
+    "experience_diff",
+    "h2h_edge",
+    "log_rank_ratio",
+    "fatigue_14d_diff",
+    "fatigue_30d_diff",
+)
+
+
+def feature_table(columns: Dict[str, np.ndarray], rank_a, rank_b) -> np.ndarray:
+    """(n, len(LEARNED_FEATURES)) values from ``model.BATCH_COLUMNS`` arrays and ranks."""
+    c = columns
+    rank_a = np.maximum(np.asarray(rank_a, dtype=float), 1.0)
+    rank_b = np.maximum(np.asarray(rank_b, dtype=float), 1.0)
+    return np.column_stack((
+        c["elo_diff"],
+        c["win_rate_a"] - c["win_rate_b"],
+        c["momentum_a"] - c["momentum_b"],
+        c["trend_a"] - c["trend_b"],
+        np.log1p(c["matches_played_a"]) - np.log1p(c["matches_played_b"]),
+        (c["h2h_a_win_rate"] - 0.5) * c["h2h_effective"],
+        np.log(rank_b) - np.log(rank_a),
+        c["fatigue_14d_a"] - c["fatigue_14d_b"],
+        c["fatigue_30d_a"] - c["fatigue_30d_b"],
+    ))
+
+
+class LearnedModel(NamedTuple):
+    weights: Tuple[float, ...]
+    # Share of the evidence probability taken from this model
+    blend: float = 0.5
+
+    @property
+    def version(self) -> str:
+        text = json.dumps([LEARNED_FEATURES, self.weights, self.blend])
+        return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+    def probability(self, features: Dict[str, Any], rank_a: float, rank_b: float) -> float:
+        """P(A wins) for one ``extract_all_features`` dict, with ``batch_columns``' defaults."""
+        w_elo, w_form, w_momentum, w_trend, w_experience, w_h2h, w_rank, w_14d, w_30d = self.weights
+        form_a, form_b = features["form_a"], features["form_b"]
+        fatigue_a = features.get("fatigue_a") or {}
+        fatigue_b = features.get("fatigue_b") or {}
+        h2h = features["h2h"]
+        z = (
+            w_elo * features["elo_diff"]
+            + w_form * (form_a.get("quality_adjusted_win_rate", form_a["win_rate"])
+                        - form_b.get("quality_adjusted_win_rate", form_b["win_rate"]))
+            + w_momentum * (form_a.get("recent_momentum", 0.0) - form_b.get("recent_momentum", 0.0))
+            + w_trend * (features.get("trend_a", {}).get("trend", 0.0) - features.get("trend_b", {}).get("trend", 0.0))
+            + w_experience * (math.log1p(form_a["matches_played"]) - math.log1p(form_b["matches_played"]))
+            + w_h2h * (h2h["a_win_rate"] - 0.5) * h2h["n_effective"]
+            + w_rank * (math.log(max(rank_b, 1.0)) - math.log(max(rank_a, 1.0)))
+            + w_14d * (fatigue_a.get("matches_last_14d", 0) - fatigue_b.get("matches_last_14d", 0))
+            + w_30d * (fatigue_a.get("matches_last_30d", 0) - fatigue_b.get("matches_last_30d", 0))
+        )
+        # expit saturates at 0 and 1 instead of overflowing for large |z|
+        return float(sigmoid(z))
+
+    def probabilities(self, columns: Dict[str, np.ndarray], rank_a, rank_b) -> np.ndarray:
+        """``probability`` for ``model.BATCH_COLUMNS`` arrays."""
+        z = feature_table(columns, rank_a, rank_b) @ np.asarray(self.weights)
+        return sigmoid(z)
+
+
+def save_model(learned: LearnedModel, path: Path = ARTIFACT_STORE, **metadata) -> str:
+    """Write ``learned`` (and ``metadata``) with its version; returns the version."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {
+        "version": learned.version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "features": list(LEARNED_FEATURES),
+        "weights": list(learned.weights),
+        "blend": learned.blend,
+        **metadata,
+    }
+    partial = path.with_name(path.name + ".partial")
+    partial.write_text(json.dumps(record, indent=2))
+    partial.replace(path)
+    return learned.version
+
+
+def load_model(path: Optional[Path] = None) -> Optional[LearnedModel]:
+    """
+    The artifact at ``path`` (``ARTIFACT_STORE`` by default); None when there
+    is none. Artifacts for other features, or whose version does not match
+    their contents, raise ValueError.
+    """
+    path = Path(ARTIFACT_STORE if path is None else path)
+    if not path.exists():
+        return None
+    record = json.loads(path.read_text())
+    if tuple(record.get("features", ())) != LEARNED_FEATURES:
+        raise ValueError(f"{path} was trained on other features: {record.get('features')}")
+    learned = LearnedModel(tuple(float(w) for w in record["weights"]), float(record["blend"]))
+    if record.get("version") != learned.version:
+        raise ValueError(f"Trained model in {path} does not match its version {record.get('version')}")
+    return learned
+
+
+ACTIVE = load_model()
@@ -0,0 +1,287 @@
+"""In-play win probability from the live score.
+
+A pre-match prediction fixes player A's rally-win probability: the one whose
+PAR-11 match-win probability equals the prediction (``scoreline.interpolate``).
+With it, the chance A wins the match from any live state (games A, games B,
+points A, points B) is a lookup in a (3, 3, 11, 11) table built from
+``scoreline.game_table`` and ``scoreline.match_table``; scores past 10-10 map
+onto 10-10, 10-9 or 9-10 by the lead, as in ``scoreline.game_probability``.
+
+Predictions are rounded to three decimals, so there are at most 1001
+distinct tables. They are cached and shared by every live match with the
+same pre-match probability: a live match costs one table reference, and a
+score update one index into it.
+
+``LiveMatches`` is the registry of one ``/api/live`` connection: match ids
+are scoped to the socket that started them and dropped when it closes, and
+each registry holds at most ``MAX_MATCHES`` matches, forgetting any left
+without an update for ``MATCH_TTL_SECONDS``. ``simulate_match`` and
+``feed_messages`` stand in for a live feed.
+"""
+import argparse
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import scoreline
+from .scoreline import GAMES_TO_WIN, POINTS_TO_WIN
+
+LiveState = Tuple[int, int, int, int]
+
+# Per connection: matches in play at once, and idle time before one is forgotten
+MAX_MATCHES = 64
+MATCH_TTL_SECONDS = 4 * 3600.0
+
+
+@lru_cache(maxsize=1024)
+def state_table(proba_a: float) -> np.ndarray:
+    """
+    Chance A wins the match from each (games A, games B, points A, points B)
+    with games in 0..2 and points in 0..10, for a match A wins before it
+    starts with probability ``proba_a``.
+    """
+    rally = float(scoreline.interpolate(proba_a)[0])
+    game = scoreline.game_table(rally)
+    n = GAMES_TO_WIN
+    # Games scores one game past the table: A or B has won the match
+    match = np.zeros((n + 1, n + 1))
+    match[:n, :n] = scoreline.match_table(game[0, 0])
+    match[n, :n] = 1.0
+    table = (game * match[1:, :n, None, None] + (1 - game) * match[:n, 1:, None, None])
+    table.flags.writeable = False
+    return table
+
+
+def normalise_state(games_a: int, games_b: int, points_a: int, points_b: int) -> LiveState:
+    """
+    Validate a live score and move a finished game onto the games score (feeds
+    show e.g. 1-0, 11-7 before the next game starts at 2-0, 0-0). Scores past
+    10-10 are kept; ``match_probability`` maps them by the lead.
+    """
+    invalid = ValueError(f"Invalid score {games_a}-{games_b}, {points_a}-{points_b}")
+    if min(games_a, games_b, points_a, points_b) < 0:
+        raise invalid
+    lead = points_a - points_b
+    if max(points_a, points_b) >= POINTS_TO_WIN and abs(lead) >= 2:
+        # Only 11-x (x <= 9) or two clear after 10-10 end a game
+        if max(points_a, points_b) > POINTS_TO_WIN and abs(lead) > 2:
+            raise invalid
+        games_a, games_b = (games_a + 1, games_b) if lead > 0 else (games_a, games_b + 1)
+        points_a = points_b = 0
+    decided = max(games_a, games_b) == GAMES_TO_WIN
+    if max(games_a, games_b) > GAMES_TO_WIN or min(games_a, games_b) == GAMES_TO_WIN or (
+            decided and points_a + points_b > 0):
+        raise invalid
+    return games_a, games_b, points_a, points_b
+
+
+def match_probability(table: np.ndarray, games_a: int, games_b: int, points_a: int, points_b: int) -> float:
+    """Chance A wins the match from a normalised live state, read off ``state_table``."""
+    if games_a == GAMES_TO_WIN or games_b == GAMES_TO_WIN:
+        return 1.0 if games_a > games_b else 0.0
+    n = POINTS_TO_WIN
+    if min(points_a, points_b) >= n - 1:
+        lead = points_a - points_b
+        points_a, points_b = n - 1 + min(lead, 0), n - 1 - max(lead, 0)
+    return float(table[games_a, games_b, points_a, points_b])
+
+
+class LiveMatch:
+    """One match in play: its pre-match probability, state table, last score and when it was last touched."""
+    __slots__ = ("match_id", "pre_match", "table", "state", "touched")
+
+    def __init__(self, match_id: str, pre_match: float):
+        self.match_id = match_id
+        self.pre_match = pre_match
+        self.table = state_table(pre_match)
+        self.state: LiveState = (0, 0, 0, 0)
+        self.touched = time.monotonic()
+
+    @property
+    def finished(self) -> bool:
+        return max(self.state[:2]) == GAMES_TO_WIN
+
+    def update(self, games: Sequence[int], points: Sequence[int]) -> Dict[str, Any]:
+        """Apply a live score and return the update message."""
+        self.state = normalise_state(int(games[0]), int(games[1]), int(points[0]), int(points[1]))
+        self.touched = time.monotonic()
+        return self.message()
+
+    def message(self) -> Dict[str, Any]:
+        p_a = match_probability(self.table, *self.state)
+        return {
+            "type": "update",
+            "match_id": self.match_id,
+            "games": list(self.state[:2]),
+            "points": list(self.state[2:]),
+            "proba": {"A": round(p_a, 3), "B": round(1 - p_a, 3)},
+            "pre_match": {"A": self.pre_match, "B": round(1 - self.pre_match, 3)},
+            "finished": self.finished,
+        }
+
+
+def pre_match_probability(prediction: Dict[str, Any]) -> float:
+    """
+    Player A's probability from a ``model.predict_match`` result or the
+    ``summary`` block of ``/api/predict``, rounded to the table key.
+    """
+    proba = prediction.get("proba", prediction)
+    p_a = float(proba["A"] if isinstance(proba, dict) else proba)
+    if not 0.0 <= p_a <= 1.0:
+        raise ValueError(f"Pre-match probability {p_a} outside [0, 1]")
+    return round(p_a, 3)
+
+
+class LiveMatches:
+    """
+    Registry of matches in play. Finished matches are dropped on their
+    final update and idle ones after ``ttl_seconds``, so the registry only
+    holds matches still being played, at most ``max_matches`` of them.
+    """
+
+    def __init__(self, max_matches: int = MAX_MATCHES, ttl_seconds: float = MATCH_TTL_SECONDS):
+        self.matches: Dict[str, LiveMatch] = {}
+        self.max_matches = max_matches
+        self.ttl_seconds = ttl_seconds
+
+    def __len__(self) -> int:
+        return len(self.matches)
+
+    def expire(self) -> int:
+        """Forget matches idle for longer than ``ttl_seconds``; returns how many."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        idle = [match_id for match_id, match in self.matches.items() if match.touched < cutoff]
+        for match_id in idle:
+            del self.matches[match_id]
+        return len(idle)
+
+    def start(self, match_id: str, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        """Register (or restart) a match from its pre-match prediction."""
+        match = LiveMatch(match_id, pre_match_probability(prediction))
+        if match_id not in self.matches and len(self.matches) >= self.max_matches and not self.expire():
+            raise ValueError(f"At most {self.max_matches} live matches per connection")
+        self.matches[match_id] = match
+        return match.message()
+
+    def update(self, match_id: str, games: Sequence[int], points: Sequence[int]) -> Dict[str, Any]:
+        """Current win probability for a live score; ``KeyError`` for unknown or expired matches."""
+        match = self.matches[match_id]
+        if match.touched < time.monotonic() - self.ttl_seconds:
+            del self.matches[match_id]
+            raise KeyError(match_id)
+        message = match.update(games, points)
+        if match.finished:
+            del self.matches[match_id]
+        return message
+
+    def end(self, match_id: str) -> None:
+        self.matches.pop(match_id, None)
+
+    def clear(self) -> None:
+        self.matches.clear()
+
+    def handle(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Dispatch one client message::
+
+            {"type": "start", "match_id": "m1", "prediction": {"proba": {"A": 0.62, "B": 0.38}}}
+            {"type": "score", "match_id": "m1", "games": [1, 0], "points": [7, 5]}
+            {"type": "end", "match_id": "m1"}
+
+        Returns the reply, or an ``error`` message for bad input.
+        """
+        kind, match_id = message.get("type"), message.get("match_id")
+        try:
+            if kind == "start":
+                return self.start(match_id, message["prediction"])
+            if kind == "score":
+                return self.update(match_id, message["games"], message["points"])
+            if kind == "end":
+                self.end(match_id)
+                return {"type": "ended", "match_id": match_id}
+            raise ValueError(f"Unknown message type {kind!r}")
+        except KeyError as e:
+            error = f"Unknown match {match_id!r}" if match_id not in self.matches else f"Missing field {e}"
+        except (TypeError, ValueError, IndexError) as e:
+            error = str(e)
+        return {"type": "error", "match_id": match_id, "message": error}
+
+
+# ---------------------------------------------------------------------------
+# Stand-in feed
+# ---------------------------------------------------------------------------
+
+def simulate_match(proba_a: float, rng: Optional[np.random.Generator] = None) -> Iterator[LiveState]:
+    """
+    Score after every rally of a match simulated at the rally probability
+    calibrated to ``proba_a``, in the shape a live feed reports it: a game's
+    final points are shown before the games score moves on.
+    """
+    rng = rng or np.random.default_rng()
+    rally = float(scoreline.interpolate(proba_a)[0])
+    games = [0, 0]
+    while max(games) < GAMES_TO_WIN:
+        points = [0, 0]
+        while max(points) < POINTS_TO_WIN or abs(points[0] - points[1]) < 2:
+            points[0 if rng.random() < rally else 1] += 1
+            yield games[0], games[1], points[0], points[1]
+        games[0 if points[0] > points[1] else 1] += 1
+
+
+async def feed_messages(
+    predictions: Dict[str, float],
+    seed: Optional[int] = None,
+    interval: float = 0.0,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Client messages for the matches in ``predictions`` (match id -> A's
+    pre-match probability): a ``start`` for each, then their rallies
+    interleaved at random, ``interval`` seconds apart.
+    """
+    rng = np.random.default_rng(seed)
+    feeds = {match_id: simulate_match(p_a, rng) for match_id, p_a in predictions.items()}
+    for match_id, p_a in predictions.items():
+        yield {"type": "start", "match_id": match_id, "prediction": {"proba": {"A": p_a, "B": 1 - p_a}}}
+    playing: List[str] = list(feeds)
+    while playing:
+        i = int(rng.integers(len(playing)))
+        state = next(feeds[playing[i]], None)
+        if state is None:
+            playing[i] = playing[-1]
+            playing.pop()
+            continue
+        yield {"type": "score", "match_id": playing[i], "games": list(state[:2]), "points": list(state[2:])}
+        if interval:
+            await asyncio.sleep(interval)
+
+
+async def _replay(n_matches: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    predictions = {f"m{i}": round(float(rng.uniform(0.05, 0.95)), 3) for i in range(n_matches)}
+    registry = LiveMatches(max_matches=n_matches)
+    updates = peak = 0
+    started = time.perf_counter()
+    async for message in feed_messages(predictions, seed=seed):
+        reply = registry.handle(message)
+        if reply["type"] == "error":
+            raise RuntimeError(reply["message"])
+        updates += 1
+        peak = max(peak, len(registry))
+    elapsed = time.perf_counter() - started
+    print(f"{n_matches} matches, {updates} messages in {elapsed:.2f}s "
+          f"({updates / elapsed:,.0f}/s, peak {peak} live, {state_table.cache_info().currsize} tables)")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay simulated live matches through the registry.")
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    asyncio.run(_replay(args.matches, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
 """Ranking-aware prediction model with strict guardrails (no 50/50 fallback)."""
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from scipy.special import betaincinv
 from scipy.special import expit as sigmoid
 from scipy.special import logit
 
+from .learned import ACTIVE as LEARNED, LearnedModel
+from .params import ACTIVE as PARAMS, ModelParams
+
 
 # Ranking tiers
 TIERS = [
@@ -16,12 +21,19 @@ TIERS = [
 ]
 
 
+_TIER_HIGH = np.array([high for _, high in TIERS], dtype=float)
+
+
+def tier_index(ranks) -> np.ndarray:
+    """Tier index (0-5) per rank; ranks outside every tier go to the lowest tier."""
+    ranks = np.asarray(ranks, dtype=float)
+    inside = (ranks >= TIERS[0][0]) & (ranks <= TIERS[-1][1])
+    return np.where(inside, np.searchsorted(_TIER_HIGH, ranks, side="left"), len(TIERS) - 1)
+
+
 def get_tier(rank: int) -> int:
     """Get tier index (0-5) for a given rank."""
-    for i, (low, high) in enumerate(TIERS):
-        if low <= rank <= high:
-            return i
-    return 5  # Default to lowest tier
+    return int(tier_index(rank))
 
 
 def ranking_prior(rank_a: int, rank_b: int) -> Tuple[float, float]:
@@ -50,17 +62,13 @@ def ranking_prior(rank_a: int, rank_b: int) -> Tuple[float, float]:
         # Default to 0.52/0.48 to avoid exact 50/50
         return (0.52, 0.48)
     
-    tier_gap = underdog_tier - favorite_tier
+    # Unranked-looking ranks (0) sit in the lowest tier, so the favourite's
+    # tier can be the lower one; that is no gap, not a negative index
+    tier_gap = max(0, underdog_tier - favorite_tier)
     
-    # Underdog cap based on tier gap
-    underdog_caps = {
-        0: 0.45,  # Same tier
-        1: 0.40,
-        2: 0.35,
-        3: 0.25,
-        4: 0.15,
-    }
-    underdog_cap = underdog_caps.get(tier_gap, 0.10)  # 5+ gaps
+    # Underdog cap based on tier gap (the last cap covers 5+ gaps)
+    underdog_caps = PARAMS.underdog_caps
+    underdog_cap = underdog_caps[min(tier_gap, len(underdog_caps) - 1)]
     
     p_fav = 1 - underdog_cap
     p_und = underdog_cap
@@ -77,8 +85,17 @@ def evidence_probability(features: Dict[str, Any]) -> float:
     """
     elo_diff = features["elo_diff"]
 
-    # Base Elo probability
-    p_elo = 1 / (1 + 10 ** (-elo_diff / 400))
+    # Base Elo probability (np.power, the same kernel as predict_batch)
+    p_elo = 1 / (1 + np.power(10.0, -elo_diff / 400))
+
+    # Average in the batch-fitted strengths when both players were rated,
+    # shrinking the difference by its deviation (Glicko's g factor)
+    strength = features.get("strength")
+    if strength:
+        q = np.log(10) / 400
+        g = 1 / np.sqrt(1 + 3 * (q * strength["deviation"]) ** 2 / np.pi ** 2)
+        p_strength = 1 / (1 + np.power(10.0, -g * strength["diff"] / 400))
+        p_elo = (p_elo + p_strength) / 2
 
     # Enhanced form adjustment with backward compatibility
     form_a = features["form_a"]
@@ -87,17 +104,17 @@ def evidence_probability(features: Dict[str, Any]) -> float:
     # Use quality-adjusted win rate if available, otherwise fall back to regular win rate
     form_a_win_rate = form_a.get("quality_adjusted_win_rate", form_a["win_rate"])
     form_b_win_rate = form_b.get("quality_adjusted_win_rate", form_b["win_rate"])
-    form_factor = (form_a_win_rate - form_b_win_rate) * 0.15
+    form_factor = (form_a_win_rate - form_b_win_rate) * PARAMS.form_factor
 
     # Momentum adjustment (if available)
     momentum_a = form_a.get("recent_momentum", 0.0)
     momentum_b = form_b.get("recent_momentum", 0.0)
-    momentum_factor = (momentum_a - momentum_b) * 0.1
+    momentum_factor = (momentum_a - momentum_b) * PARAMS.momentum_factor
 
     # Trend adjustment (if available)
     trend_a = features.get("trend_a", {}).get("trend", 0.0)
     trend_b = features.get("trend_b", {}).get("trend", 0.0)
-    trend_factor = (trend_a - trend_b) * 0.1
+    trend_factor = (trend_a - trend_b) * PARAMS.trend_factor
 
     # Combine all factors
     p_evidence = p_elo + form_factor + momentum_factor + trend_factor
@@ -121,7 +138,7 @@ def calculate_evidence_weight(features: Dict[str, Any]) -> float:
     n_evidence = (n_a + n_b) / 2
     
     # Weight increases with sqrt(n_evidence)
-    w = np.sqrt(n_evidence) / 10
+    w = np.sqrt(n_evidence) / PARAMS.evidence_scale
     w = np.clip(w, 0.2, 1.0)
     
     return w
@@ -143,14 +160,15 @@ def h2h_adjustment(features: Dict[str, Any], rank_a: int, rank_b: int) -> float:
         return 0.0
     
     # Time-decayed adjustment strength
+    very_weak, weak, medium, moderate = PARAMS.h2h_strength
     if n_eff < 2:
-        strength = 0.05  # Very weak
+        strength = very_weak
     elif n_eff < 3:
-        strength = 0.10
+        strength = weak
     elif n_eff < 5:
-        strength = 0.20
+        strength = medium
     else:
-        strength = 0.30  # Cap at moderate
+        strength = moderate  # Cap at moderate
     
     # Direction: positive if A wins more
     direction = (a_win_rate - 0.5) * 2  # Scale from [-1, 1]
@@ -182,8 +200,10 @@ def check_override_conditions(
             conditions_met += 1
     
     # Condition 2: Underdog >= 70% vs top-20 in last 12m with N>=10
-    # (Simplified - would need additional data)
-    # For now, skip this condition in basic implementation
+    # (records from splits.SplitCube.vs_top20, when available)
+    top20 = features.get("vs_top20_a" if rank_a > rank_b else "vs_top20_b")
+    if top20 and top20["matches"] >= 10 and top20["win_rate"] >= 0.70:
+        conditions_met += 1
     
     # Condition 3: H2H N>=5 and underdog win-share >= 70%
     h2h = features["h2h"]
@@ -212,15 +232,20 @@ def predict_match(
             "ci95": {"A": [low, high], "B": [low, high]},
             "explain": {...}
         }
+
+    ``seed`` only matters for sampled intervals; ``ci95`` uses exact Beta
+    quantiles, and no global random state is touched.
     """
-    np.random.seed(seed)
-    
     # Step 1: Ranking prior
     p_prior_a, p_prior_b = ranking_prior(rank_a, rank_b)
     logit_prior = logit(p_prior_a)
     
-    # Step 2: Evidence probability
+    # Step 2: Evidence probability, with the trained component when one is
+    # loaded; it was trained on graph Elo, so history Elo fallbacks skip it
     p_elo = evidence_probability(features)
+    if LEARNED is not None and features.get("elo_source") == "graph":
+        p_learned = LEARNED.probability(features, rank_a, rank_b)
+        p_elo = np.clip((1 - LEARNED.blend) * p_elo + LEARNED.blend * p_learned, 0.01, 0.99)
     logit_elo = logit(p_elo)
     
     # Step 3: Blend with evidence weight
@@ -262,8 +287,8 @@ def predict_match(
     
     p_final_b = 1 - p_final_a
     
-    # Step 6: Bootstrap confidence intervals
-    ci_a, ci_b = bootstrap_ci(p_final_a, p_final_b, n_bootstrap=500, seed=seed)
+    # Step 6: Confidence intervals
+    ci_a, ci_b = beta_ci(p_final_a)
     
     # Step 7: Determine winner
     winner = "A" if p_final_a > p_final_b else "B"
@@ -279,6 +304,245 @@ def predict_match(
     }
 
 
+# Columns of the batch predictor, one array per column (see ``batch_columns``).
+# Optional features are NaN where a matchup does not have them.
+BATCH_COLUMNS = [
+    "elo_diff",
+    "strength_diff",
+    "strength_deviation",
+    "win_rate_a",
+    "win_rate_b",
+    "momentum_a",
+    "momentum_b",
+    "trend_a",
+    "trend_b",
+    "matches_played_a",
+    "matches_played_b",
+    "h2h_matches",
+    "h2h_effective",
+    "h2h_a_win_rate",
+    "top20_matches_a",
+    "top20_win_rate_a",
+    "top20_matches_b",
+    "top20_win_rate_b",
+    "fatigue_14d_a",
+    "fatigue_14d_b",
+    "fatigue_30d_a",
+    "fatigue_30d_b",
+]
+
+# Guardrail caps by tier gap (index 5 covers gaps of 5+)
+_GUARDRAIL_CAPS = np.array([0.10, 0.10, 0.10, 0.25, 0.15, 0.10])
+
+
+def batch_columns(features_list: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Flatten feature dicts (as from ``features.extract_all_features``) into
+    ``BATCH_COLUMNS`` arrays, applying the same defaults as the scalar path.
+    """
+    rows = []
+    for f in features_list:
+        strength = f.get("strength") or {}
+        form_a, form_b = f["form_a"], f["form_b"]
+        top20_a = f.get("vs_top20_a") or {}
+        top20_b = f.get("vs_top20_b") or {}
+        fatigue_a = f.get("fatigue_a") or {}
+        fatigue_b = f.get("fatigue_b") or {}
+        rows.append((
+            f["elo_diff"],
+            strength.get("diff", np.nan),
+            strength.get("deviation", np.nan),
+            form_a.get("quality_adjusted_win_rate", form_a["win_rate"]),
+            form_b.get("quality_adjusted_win_rate", form_b["win_rate"]),
+            form_a.get("recent_momentum", 0.0),
+            form_b.get("recent_momentum", 0.0),
+            f.get("trend_a", {}).get("trend", 0.0),
+            f.get("trend_b", {}).get("trend", 0.0),
+            form_a["matches_played"],
+            form_b["matches_played"],
+            f["h2h"]["n_matches"],
+            f["h2h"]["n_effective"],
+            f["h2h"]["a_win_rate"],
+            top20_a.get("matches", np.nan),
+            np.nan if top20_a.get("win_rate") is None else top20_a["win_rate"],
+            top20_b.get("matches", np.nan),
+            np.nan if top20_b.get("win_rate") is None else top20_b["win_rate"],
+            fatigue_a.get("matches_last_14d", 0),
+            fatigue_b.get("matches_last_14d", 0),
+            fatigue_a.get("matches_last_30d", 0),
+            fatigue_b.get("matches_last_30d", 0),
+        ))
+    table = np.array(rows, dtype=float).reshape(len(rows), len(BATCH_COLUMNS))
+    return {name: table[:, i] for i, name in enumerate(BATCH_COLUMNS)}
+
+
+def batch_override_conditions(columns: Dict[str, np.ndarray], rank_a, rank_b) -> np.ndarray:
+    """``check_override_conditions`` for ``BATCH_COLUMNS`` arrays: True where 2 of 3 hold."""
+    c = columns
+    rank_a = np.asarray(rank_a, dtype=float)
+    rank_b = np.asarray(rank_b, dtype=float)
+    a_underdog = rank_a > rank_b
+    elo_lead = np.where(a_underdog, c["elo_diff"] >= 180, c["elo_diff"] <= -180)
+    top20_matches = np.where(a_underdog, c["top20_matches_a"], c["top20_matches_b"])
+    top20_win_rate = np.where(a_underdog, c["top20_win_rate_a"], c["top20_win_rate_b"])
+    top20_record = (top20_matches >= 10) & (top20_win_rate >= 0.70)
+    h2h_share = (c["h2h_matches"] >= 5) & ((a_underdog & (c["h2h_a_win_rate"] >= 0.70))
+                                          | ((rank_a < rank_b) & (c["h2h_a_win_rate"] <= 0.30)))
+    return (elo_lead.astype(int) + top20_record + h2h_share) >= 2
+
+
+def predict_batch(
+    columns: Dict[str, np.ndarray],
+    rank_a,
+    rank_b,
+    intervals: bool = False,
+    params: Optional[ModelParams] = None,
+    learned: Optional[LearnedModel] = None,
+    graph_elo=None
+) -> Dict[str, np.ndarray]:
+    """
+    ``predict_match`` probabilities for many matchups at once.
+
+    ``columns`` holds ``BATCH_COLUMNS`` arrays and ``rank_a``/``rank_b`` the
+    ranks, all of one length. Every step (prior, evidence, blend, H2H,
+    guardrails, monotonicity clamp) follows the scalar functions above
+    operation for operation, so ``proba_a`` equals ``predict_match``'s before
+    rounding. With ``intervals``, ``ci95_a``/``ci95_b`` hold ``beta_ci``
+    for every matchup as (n, 2) arrays. Explanations are not computed.
+    ``params`` and ``learned`` replace the active ``ModelParams`` and
+    trained evidence model (as ``tuning`` and ``training`` do).
+    ``graph_elo`` marks the matchups whose ``elo_diff`` is graph Elo
+    (``elo_source == "graph"``); the trained model only applies to those.
+    By default every matchup is, as in backtest columns.
+
+    Returns ``{"proba_a", "proba_b", "winner_a", "tier_gap"}`` arrays.
+    """
+    if params is None:
+        params = PARAMS
+    if learned is None:
+        learned = LEARNED
+    c = {name: np.asarray(values, dtype=float) for name, values in columns.items()}
+    rank_a = np.asarray(rank_a, dtype=float)
+    rank_b = np.asarray(rank_b, dtype=float)
+    tier_a = tier_index(rank_a)
+    tier_b = tier_index(rank_b)
+    a_better = rank_a < rank_b
+    b_better = rank_b < rank_a
+    tier_gap = np.abs(tier_a - tier_b)
+
+    # Step 1: Ranking prior (0.52 for equal ranks); the gap is the underdog's
+    # tier below the favourite's, none when it is not below (as ranking_prior)
+    prior_caps = np.asarray(params.underdog_caps)
+    prior_gap = np.maximum(0, np.where(a_better, tier_b - tier_a, tier_a - tier_b))
+    underdog_cap = prior_caps[np.minimum(prior_gap, len(prior_caps) - 1)]
+    p_prior_a = np.where(a_better, 1 - underdog_cap, np.where(b_better, underdog_cap, 0.52))
+    logit_prior = logit(p_prior_a)
+
+    # Step 2: Evidence probability
+    p_elo = 1 / (1 + np.power(10.0, -c["elo_diff"] / 400))
+    has_strength = ~np.isnan(c["strength_diff"])
+    q = np.log(10) / 400
+    g = 1 / np.sqrt(1 + 3 * (q * c["strength_deviation"]) ** 2 / np.pi ** 2)
+    p_strength = 1 / (1 + np.power(10.0, -g * c["strength_diff"] / 400))
+    p_elo = np.where(has_strength, (p_elo + p_strength) / 2, p_elo)
+    form_factor = (c["win_rate_a"] - c["win_rate_b"]) * params.form_factor
+    momentum_factor = (c["momentum_a"] - c["momentum_b"]) * params.momentum_factor
+    trend_factor = (c["trend_a"] - c["trend_b"]) * params.trend_factor
+    p_evidence = np.clip(p_elo + form_factor + momentum_factor + trend_factor, 0.01, 0.99)
+    if learned is not None:
+        p_learned = learned.probabilities(c, rank_a, rank_b)
+        p_blended = np.clip((1 - learned.blend) * p_evidence + learned.blend * p_learned, 0.01, 0.99)
+        p_evidence = p_blended if graph_elo is None else np.where(graph_elo, p_blended, p_evidence)
+    logit_elo = logit(p_evidence)
+
+    # Step 3: Blend with evidence weight
+    w = np.clip(np.sqrt((c["matches_played_a"] + c["matches_played_b"]) / 2) / params.evidence_scale, 0.2, 1.0)
+    logit_blend = w * logit_elo + (1 - w) * logit_prior
+
+    # Step 4: H2H adjustment
+    n_h2h = c["h2h_matches"]
+    n_eff = c["h2h_effective"]
+    *weaker, moderate = params.h2h_strength
+    h2h_strength = np.select([n_eff < 2, n_eff < 3, n_eff < 5], weaker, moderate)
+    delta_h2h = np.where(n_h2h == 0, 0.0, (c["h2h_a_win_rate"] - 0.5) * 2 * h2h_strength)
+    p_final_a = sigmoid(logit_blend + delta_h2h)
+
+    # Step 5: Guardrails for large tier gaps with weak evidence
+    a_underdog = rank_a > rank_b
+    override = batch_override_conditions(c, rank_a, rank_b)
+    capped = (tier_gap >= 3) & (n_h2h < 3) & ~override
+    cap = _GUARDRAIL_CAPS[np.minimum(tier_gap, 5)]
+    p_final_a = np.where(capped & a_underdog, np.minimum(p_final_a, cap), p_final_a)
+    p_final_a = np.where(capped & ~a_underdog, np.maximum(p_final_a, 1 - cap), p_final_a)
+
+    # Monotonicity: better rank should be favorite
+    p_final_a = np.where(a_better, np.maximum(p_final_a, 0.52),
+                         np.where(b_better, np.minimum(p_final_a, 0.48), p_final_a))
+    p_final_b = 1 - p_final_a
+
+    result = {
+        "proba_a": p_final_a,
+        "proba_b": p_final_b,
+        "winner_a": p_final_a > p_final_b,
+        "tier_gap": tier_gap,
+    }
+    if intervals:
+        result["ci95_a"], result["ci95_b"] = beta_intervals(p_final_a)
+    return result
+
+
+# Intervals come from a Beta centred on the final probability with this concentration
+CI_CONCENTRATION = 50
+
+
+def _beta_parameters(p_a):
+    return np.maximum(1, p_a * CI_CONCENTRATION), np.maximum(1, (1 - p_a) * CI_CONCENTRATION)
+
+
+@lru_cache(maxsize=4096)
+def _beta_quantiles(p_a: float, level: float) -> Tuple[float, float, float, float]:
+    alpha, beta = _beta_parameters(p_a)
+    tail = (1 - level) / 2
+    low, high = betaincinv(alpha, beta, [tail, 1 - tail])
+    return tuple(float(round(q, 3)) for q in (low, high, 1 - high, 1 - low))
+
+
+def beta_ci(p_a: float, level: float = 0.95) -> Tuple[List[float], List[float]]:
+    """
+    Exact ``level`` intervals for A and B from the Beta quantiles (cached).
+
+    Returns:
+        ([low_a, high_a], [low_b, high_b])
+    """
+    low_a, high_a, low_b, high_b = _beta_quantiles(float(p_a), level)
+    return [low_a, high_a], [low_b, high_b]
+
+
+def beta_intervals(p_a, level: float = 0.95) -> Tuple[np.ndarray, np.ndarray]:
+    """``beta_ci`` for an array of probabilities: two (n, 2) arrays for A and B."""
+    alpha, beta = _beta_parameters(np.asarray(p_a, dtype=float))
+    tail = (1 - level) / 2
+    low = betaincinv(alpha, beta, tail)
+    high = betaincinv(alpha, beta, 1 - tail)
+    ci_a = np.round(np.column_stack((low, high)), 3)
+    ci_b = np.round(np.column_stack((1 - high, 1 - low)), 3)
+    return ci_a, ci_b
+
+
+@lru_cache(maxsize=4096)
+def _sampled_quantiles(p_a: float, n_bootstrap: int, seed: int) -> Tuple[float, float, float, float]:
+    rng = np.random.default_rng(seed)
+    alpha, beta = _beta_parameters(p_a)
+    samples_a = rng.beta(alpha, beta, size=n_bootstrap)
+    samples_b = 1 - samples_a
+    return (
+        float(round(np.percentile(samples_a, 2.5), 3)),
+        float(round(np.percentile(samples_a, 97.5), 3)),
+        float(round(np.percentile(samples_b, 2.5), 3)),
+        float(round(np.percentile(samples_b, 97.5), 3)),
+    )
+
+
 def bootstrap_ci(
     p_a: float,
     p_b: float,
@@ -286,32 +550,16 @@ def bootstrap_ci(
     seed: int = 42
 ) -> Tuple[List[float], List[float]]:
     """
-    Bootstrap 95% confidence intervals.
-    
+    Sampled 95% confidence intervals from the same Beta as ``beta_ci``.
+
+    Draws come from a local generator, so concurrent calls do not share
+    random state; results are cached per (p_a, n_bootstrap, seed).
+
     Returns:
         ([low_a, high_a], [low_b, high_b])
     """
-    np.random.seed(seed)
-    
-    # Simple bootstrapping with small perturbations
-    samples_a = np.random.beta(
-        max(1, p_a * 50),
-        max(1, (1 - p_a) * 50),
-        size=n_bootstrap
-    )
-    
-    ci_a = [
-        round(np.percentile(samples_a, 2.5), 3),
-        round(np.percentile(samples_a, 97.5), 3)
-    ]
-    
-    samples_b = 1 - samples_a
-    ci_b = [
-        round(np.percentile(samples_b, 2.5), 3),
-        round(np.percentile(samples_b, 97.5), 3)
-    ]
-    
-    return ci_a, ci_b
+    low_a, high_a, low_b, high_b = _sampled_quantiles(float(p_a), n_bootstrap, seed)
+    return [low_a, high_a], [low_b, high_b]
 
 
 def generate_explanation(
@@ -0,0 +1,328 @@
+"""Opponent quality from the PSA rankings, joined onto match tables in bulk.
+
+``RankingIndex`` holds one or more ranking snapshots (player id, normalised
+name, rank, points, snapshot date). ``attach_opponent_ranks`` resolves every
+match's opponent - by id when the row has one, else by name - and joins the
+rank in force on the match date with one ``merge_asof``. With a single
+(current) snapshot every match gets the current rank; matches older than the
+first snapshot fall back to it and are flagged in ``rank_as_of``.
+
+``schedule_matrix`` turns the joined ranks into strength-of-schedule and
+opponent-weighted form per player, grouped like ``feature_matrix``.
+
+Snapshots are kept under ``predict/.cache/rankings`` (one JSON file per
+gender and day) so the ranking history grows as rankings are fetched.
+``load_index`` parses them once per process; ``store_snapshot`` drops the
+cached index when it changes a file.
+"""
+import hashlib
+import json
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import history
+from .players import normalize_name
+
+RANKINGS_DIR = Path(__file__).parent / ".cache" / "rankings"
+
+# Ranks run 1..MAX_RANK; quality is 1 for the world number one, 0 at MAX_RANK
+MAX_RANK = 500
+SCHEDULE_MATCHES = 20
+
+RANK_COLUMNS = ["opponent_rank", "opponent_points", "opponent_quality", "rank_as_of"]
+SCHEDULE_COLUMNS = ["avg_opponent_rank", "schedule_strength", "opponent_weighted_win_rate", "ranked_opponents"]
+
+
+def rank_quality(rank) -> np.ndarray:
+    """Opponent quality in [0, 1] on a log scale of rank; NaN for unranked."""
+    rank = np.asarray(rank, dtype=float)
+    return np.clip(1.0 - np.log(rank) / np.log(MAX_RANK), 0.0, 1.0)
+
+
+class RankingIndex:
+    """Ranking snapshots, one row per (player, snapshot date)."""
+
+    def __init__(self, table: pd.DataFrame):
+        self.table = table.sort_values("snapshot_date", kind="stable").reset_index(drop=True)
+        latest = self.table.drop_duplicates("player_id", keep="last")
+        self._id_by_name = pd.Series(latest["player_id"].to_numpy(), index=latest["name_key"].to_numpy())
+        self._id_by_name = self._id_by_name[~self._id_by_name.index.duplicated(keep="first")]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @classmethod
+    def from_snapshots(cls, snapshots: Dict[date, List[dict]]) -> "RankingIndex":
+        """Build from PSA ``rankedplayers`` records keyed by snapshot date."""
+        frames = []
+        for snapshot_date, records in snapshots.items():
+            frame = pd.DataFrame.from_records(
+                [(str(r.get("Id")), r.get("Name", ""), r.get("World Ranking"), r.get("Total Points"))
+                 for r in records if r.get("Id") is not None and r.get("World Ranking")],
+                columns=["player_id", "name", "rank", "points"],
+            )
+            frame["snapshot_date"] = pd.Timestamp(snapshot_date, tz="UTC")
+            frames.append(frame)
+        if not frames:
+            frames = [pd.DataFrame(columns=["player_id", "name", "rank", "points", "snapshot_date"])]
+        table = pd.concat(frames, ignore_index=True)
+        names = table["name"].astype(str)
+        codes, uniques = pd.factorize(names)
+        table["name_key"] = np.array([normalize_name(n) for n in uniques], dtype=object)[codes] if len(uniques) else []
+        table["rank"] = table["rank"].astype(float)
+        table["points"] = table["points"].astype(float)
+        table["snapshot_date"] = pd.to_datetime(table["snapshot_date"], utc=True).dt.as_unit("ns")
+        return cls(table)
+
+    @classmethod
+    def from_ranked_players(cls, records: List[dict], snapshot_date: Optional[date] = None) -> "RankingIndex":
+        """A single snapshot (today by default)."""
+        return cls.from_snapshots({snapshot_date or date.today(): records})
+
+    def ranks_as_of(self, player_ids, as_of, fallback: bool = True) -> np.ndarray:
+        """
+        Each player's rank in the latest snapshot on or before ``as_of``
+        (their earliest one if all are later, unless ``fallback`` is False);
+        NaN for unranked players.
+        """
+        ids = pd.Series([_id_text(p) for p in player_ids], dtype=object)
+        known = self.table[self.table["snapshot_date"] <= pd.Timestamp(history.timestamp_ns(as_of), tz="UTC")]
+        latest = ids.map(known.drop_duplicates("player_id", keep="last").set_index("player_id")["rank"])
+        if fallback:
+            first = self.table.drop_duplicates("player_id", keep="first").set_index("player_id")["rank"]
+            latest = latest.fillna(ids.map(first))
+        return latest.to_numpy(dtype=float)
+
+    def ranks_at(self, player_ids, dates_ns, fallback: bool = True) -> np.ndarray:
+        """
+        ``ranks_as_of`` with a date (int64 UTC ns) per row, for many rows at
+        once: one ``merge_asof`` instead of a lookup per date. Backtests pass
+        ``fallback=False``, so a match never sees a rank from a later snapshot.
+        """
+        rows = pd.DataFrame({
+            "player_id": [_id_text(p) for p in player_ids],
+            "snapshot_date": pd.to_datetime(np.asarray(dates_ns, dtype=np.int64), utc=True),
+            "row": np.arange(len(player_ids)),
+        }).sort_values("snapshot_date", kind="stable")
+        matched = pd.merge_asof(rows, self.table[["snapshot_date", "player_id", "rank"]],
+                                on="snapshot_date", by="player_id")
+        ranked = matched["rank"]
+        if fallback:
+            first = self.table.drop_duplicates("player_id", keep="first").set_index("player_id")["rank"]
+            ranked = ranked.fillna(matched["player_id"].map(first))
+        ranks = np.empty(len(rows))
+        ranks[matched["row"].to_numpy()] = ranked.to_numpy(dtype=float)
+        return ranks
+
+    def resolve(self, opponent_ids: pd.Series, opponent_names: pd.Series) -> np.ndarray:
+        """
+        Ranked player id per row: the row's own id when it is ranked, else the
+        id of the ranked player with the same normalised name; None if neither.
+        """
+        known_ids = pd.Index(self.table["player_id"].unique())
+        ids = opponent_ids.map(_id_text).to_numpy(dtype=object)
+        by_id = known_ids.get_indexer(ids)
+
+        codes, uniques = pd.factorize(opponent_names.fillna("").astype(str))
+        name_keys = pd.Index([normalize_name(n) for n in uniques])
+        id_for_name = self._id_by_name.reindex(name_keys).astype(object)
+        id_for_name = id_for_name.where(id_for_name.notna(), None).to_numpy(dtype=object)
+        by_name = id_for_name[codes] if len(uniques) else np.full(len(codes), None, dtype=object)
+
+        return np.where(by_id >= 0, ids, by_name)
+
+
+def _id_text(value) -> Optional[str]:
+    """Ids arrive as ints, floats (after a concat with missing values) or strings."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (float, np.floating)):
+        return str(int(value))
+    return str(value)
+
+
+def attach_opponent_ranks(
+    matches: pd.DataFrame,
+    index: RankingIndex,
+    id_column: str = "opponent_id",
+    name_column: str = "opponent",
+    date_column: str = "date",
+) -> pd.DataFrame:
+    """
+    Copy of ``matches`` with ``RANK_COLUMNS`` added, in one vectorized join.
+
+    Each match gets its opponent's rank from the latest snapshot on or before
+    the match date; matches before the first snapshot of that player use the
+    first one (``rank_as_of`` is False for those).
+    """
+    out = matches.copy()
+    if matches.empty:
+        for column in RANK_COLUMNS:
+            out[column] = pd.Series(dtype=bool if column == "rank_as_of" else float)
+        return out
+
+    ids = matches[id_column] if id_column in matches.columns else pd.Series(None, index=matches.index, dtype=object)
+    names = matches[name_column] if name_column in matches.columns else pd.Series("", index=matches.index)
+    player_id = index.resolve(ids, names)
+    date_ns = history.utc_ns(matches[date_column])
+
+    rank = np.full(len(matches), np.nan)
+    points = np.full(len(matches), np.nan)
+    as_of = np.zeros(len(matches), dtype=bool)
+
+    # merge_asof needs dated rows; undated matches only get the fallback
+    dated = date_ns != history.NAT_NS
+    left = pd.DataFrame({
+        "row": np.flatnonzero(dated),
+        "player_id": player_id[dated],
+        "snapshot_date": pd.to_datetime(date_ns[dated], utc=True).as_unit("ns"),
+    }).sort_values("snapshot_date", kind="stable")
+    right = index.table[["player_id", "rank", "points", "snapshot_date"]]
+    joined = pd.merge_asof(left, right, on="snapshot_date", by="player_id", direction="backward")
+    rows = joined["row"].to_numpy()
+    rank[rows] = joined["rank"].to_numpy(dtype=float)
+    points[rows] = joined["points"].to_numpy(dtype=float)
+    as_of[rows] = ~np.isnan(rank[rows])
+
+    # Before a player's first snapshot (or undated): the earliest rank we have
+    first = right.drop_duplicates("player_id", keep="first").set_index("player_id")
+    missing = np.isnan(rank)
+    resolved = pd.Series(player_id[missing], dtype=object)
+    rank[missing] = resolved.map(first["rank"]).to_numpy(dtype=float)
+    points[missing] = resolved.map(first["points"]).to_numpy(dtype=float)
+
+    out["opponent_rank"] = rank
+    out["opponent_points"] = points
+    out["opponent_quality"] = rank_quality(rank)
+    out["rank_as_of"] = as_of
+    return out
+
+
+def schedule_matrix(
+    matches: pd.DataFrame,
+    reference_date: datetime,
+    player_column: str = "player_id",
+    player_ids: Optional[Iterable[Hashable]] = None,
+    n_matches: int = SCHEDULE_MATCHES,
+) -> pd.DataFrame:
+    """
+    Strength of schedule per player over their last ``n_matches`` before
+    ``reference_date``, from a match table with ranks attached:
+
+      * ``avg_opponent_rank`` and ``schedule_strength`` (mean opponent
+        quality) over ranked opponents
+      * ``opponent_weighted_win_rate``: wins weighted by opponent quality
+      * ``ranked_opponents``: how many of those matches had a ranked opponent
+
+    Rows are each player's matches most recent first; unranked opponents are
+    left out of the averages.
+    """
+    if player_ids is None:
+        player_ids = pd.unique(matches[player_column])
+    player_ids = list(player_ids)
+    n_players = len(player_ids)
+
+    codes = pd.Index(player_ids).get_indexer(matches[player_column])
+    keep = (codes >= 0) & (history.utc_ns(matches["date"]) < history.timestamp_ns(reference_date))
+    order = np.argsort(codes[keep], kind="stable")
+    codes = codes[keep][order]
+    rows = matches[keep].iloc[order]
+
+    position = np.arange(len(codes)) - np.searchsorted(codes, np.arange(n_players))[codes]
+    rank = rows["opponent_rank"].to_numpy(dtype=float)
+    recent = (position < n_matches) & ~np.isnan(rank)
+    recent_codes = codes[recent]
+    quality = rank_quality(rank[recent])
+    won = (rows["result"].to_numpy() == "W")[recent]
+
+    ranked = np.bincount(recent_codes, minlength=n_players)
+    quality_sum = np.bincount(recent_codes, quality, minlength=n_players)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frame = pd.DataFrame({
+            "avg_opponent_rank": np.bincount(recent_codes, rank[recent], minlength=n_players) / ranked,
+            "schedule_strength": quality_sum / ranked,
+            "opponent_weighted_win_rate": np.where(
+                quality_sum > 0, np.bincount(recent_codes, quality * won, minlength=n_players) / quality_sum, 0.5),
+            "ranked_opponents": ranked.astype(np.int64),
+        }, index=pd.Index(player_ids, name="player_id"))
+    return frame[SCHEDULE_COLUMNS]
+
+
+def schedule_features(hist: pd.DataFrame, reference_date: datetime) -> Dict[str, Optional[float]]:
+    """``schedule_matrix`` for one player's ranked history, JSON-safe (None for no data)."""
+    if hist is None or hist.empty or "opponent_rank" not in hist.columns:
+        return {"avg_opponent_rank": None, "schedule_strength": None,
+                "opponent_weighted_win_rate": 0.5, "ranked_opponents": 0}
+    row = schedule_matrix(hist.assign(player_id=0), reference_date, player_ids=[0]).iloc[0]
+    return {
+        "avg_opponent_rank": None if np.isnan(row["avg_opponent_rank"]) else float(row["avg_opponent_rank"]),
+        "schedule_strength": None if np.isnan(row["schedule_strength"]) else float(row["schedule_strength"]),
+        "opponent_weighted_win_rate": float(row["opponent_weighted_win_rate"]),
+        "ranked_opponents": int(row["ranked_opponents"]),
+    }
+
+
+# In-process caches: the parsed index per root, and each snapshot file's
+# last written contents; store_snapshot keeps both current
+_indexes: Dict[Path, RankingIndex] = {}
+_stored: Dict[Path, str] = {}
+_versions: Dict[Path, str] = {}
+
+
+def store_snapshot(records: List[dict], gender: str, snapshot_date: Optional[date] = None,
+                   root: Optional[Path] = None) -> Path:
+    """
+    Keep one day's ranking records (only the fields the index uses). An
+    unchanged snapshot is not rewritten, so the file's mtime marks the last
+    real change; a changed one drops the cached ``load_index`` and
+    ``snapshot_version``.
+    """
+    snapshot_date = snapshot_date or date.today()
+    root = Path(RANKINGS_DIR if root is None else root)
+    path = root / f"{gender}-{snapshot_date.isoformat()}.json"
+    slim = json.dumps([{k: r.get(k) for k in ("Id", "Name", "World Ranking", "Total Points")} for r in records])
+    if _stored.get(path) == slim:
+        return path
+    root.mkdir(parents=True, exist_ok=True)
+    if not path.exists() or path.read_text(encoding="utf-8") != slim:
+        path.write_text(slim, encoding="utf-8")
+        _indexes.pop(root, None)
+        _versions.pop(root, None)
+    _stored[path] = slim
+    return path
+
+
+def load_index(root: Optional[Path] = None) -> RankingIndex:
+    """
+    Every stored snapshot (both genders) as one index, parsed once per
+    process and reused until ``store_snapshot`` changes a file.
+    """
+    root = Path(RANKINGS_DIR if root is None else root)
+    index = _indexes.get(root)
+    if index is None:
+        snapshots: Dict[date, List[dict]] = {}
+        for path in sorted(root.glob("*-*.json")):
+            gender, _, day = path.stem.partition("-")
+            snapshots.setdefault(date.fromisoformat(day), []).extend(json.loads(path.read_text(encoding="utf-8")))
+        index = _indexes[root] = RankingIndex.from_snapshots(snapshots)
+    return index
+
+
+def snapshot_version(root: Optional[Path] = None) -> str:
+    """
+    Fingerprint of the stored snapshots (names, sizes, mtimes), taken once
+    per process and retaken after ``store_snapshot`` changes a file.
+    """
+    root = Path(RANKINGS_DIR if root is None else root)
+    version = _versions.get(root)
+    if version is None:
+        digest = hashlib.sha256()
+        for path in sorted(root.glob("*-*.json")):
+            stat = path.stat()
+            digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        version = _versions[root] = digest.hexdigest()[:16]
+    return version
@@ -0,0 +1,532 @@
+"""Pairwise predictions for many players at once, and the precomputed matrix.
+
+``pairwise_probabilities`` scores every pairing of a set of players in one
+``model.predict_batch`` call, with the feature sources /api/predict uses
+(graph Elo, fitted strengths, H2H and top-20 records) and per-player form
+from ``feature_matrix`` (by default over the rating graph's match log, so no
+fetches are needed).
+
+``PairwiseMatrix`` keeps those probabilities for the top ``TOP_N`` players
+of each ranking as a float32 (n, n) array with a player-id index, plus the
+few per-player and H2H arrays an explanation reads, so /api/predict can
+answer a top-100 matchup with a lookup and build the explanation only for
+the pair asked about. Its per-player features come from the feature store,
+on the histories /api/predict last fetched, so a lookup equals the full
+path; players never fetched are left out and take the full path.
+
+The matrix is rebuilt in the background (from a snapshot of the rating
+graph) after a rankings or history refresh. It carries the
+``data_version`` it was built from, which includes the build day; a matrix
+whose version is not current is never served.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import feature_store, history, model, opponents, params, ratings, splits
+from .feature_matrix import feature_matrix_from_table
+from .feature_store import FeatureStore
+from .history import NS_PER_DAY
+from .ratings import EloEngine, StrengthTable
+from .splits import SplitCube
+
+PAIRWISE_DIR = Path(__file__).parent / ".cache" / "pairwise"
+MATRIX_STORE = PAIRWISE_DIR / "matrix.npz"
+
+TOP_N = 100
+MATCH_COLUMNS = ["player_id", "date", "result", "games_won", "games_lost"]
+
+# H2H as /api/predict sees it: the fetched last 24 months
+H2H_DAYS = 730
+
+
+# ---------------------------------------------------------------------------
+# Features and probabilities
+# ---------------------------------------------------------------------------
+
+def graph_match_table(engine: EloEngine, player_ids: Sequence[str], reference_date: datetime) -> pd.DataFrame:
+    """
+    The players' matches from the rating graph as a long history table
+    (player_id, date, result; most recent first). Game scores are not in the
+    graph, so games columns are NaN.
+    """
+    dates, winners, losers = engine.match_arrays()
+    graph_ids = np.array(engine.player_ids, dtype=object)
+    keep = dates < history.timestamp_ns(reference_date)
+    dates, winners, losers = dates[keep][::-1], winners[keep][::-1], losers[keep][::-1]
+    wanted = np.isin(graph_ids, [str(p) for p in player_ids])
+    rows = [pd.DataFrame(columns=MATCH_COLUMNS)]
+    for side, result in ((winners, "W"), (losers, "L")):
+        mine = wanted[side]
+        rows.append(pd.DataFrame({
+            "player_id": graph_ids[side[mine]],
+            "date": pd.to_datetime(dates[mine], utc=True),
+            "result": result,
+            "games_won": np.nan,
+            "games_lost": np.nan,
+        }))
+    table = pd.concat(rows, ignore_index=True)
+    return table.sort_values("date", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def graph_h2h(engine: EloEngine, player_ids: Sequence[str], reference_date: datetime) -> Dict[str, np.ndarray]:
+    """
+    ``features.calculate_h2h``'s n_matches, n_effective and wins for every
+    ordered pair of ``player_ids`` from the rating graph's last 24 months:
+    (n, n) arrays, ``wins[i, j]`` counting i's wins over j.
+    """
+    n = len(player_ids)
+    dates, winners, losers = engine.match_arrays()
+    reference = history.timestamp_ns(reference_date)
+    graph_index = {player_id: i for i, player_id in enumerate(engine.player_ids)}
+    local = np.full(engine.n_players, -1)
+    for i, player_id in enumerate(player_ids):
+        if str(player_id) in graph_index:
+            local[graph_index[str(player_id)]] = i
+    winner, loser = local[winners], local[losers]
+    keep = (winner >= 0) & (loser >= 0) & (dates < reference) & (dates >= reference - H2H_DAYS * NS_PER_DAY)
+    winner, loser, days = winner[keep], loser[keep], (reference - dates[keep]) // NS_PER_DAY
+
+    wins = np.zeros((n, n))
+    np.add.at(wins, (winner, loser), 1)
+    n_effective = np.zeros((n, n))
+    np.add.at(n_effective, (winner, loser), 0.5 ** (days / 365))
+    return {"n_matches": wins + wins.T, "n_effective": n_effective + n_effective.T, "wins": wins}
+
+
+def player_sides(
+    player_ids: Sequence[str],
+    reference_date: datetime,
+    player_features: Optional[pd.DataFrame] = None,
+    elo_engine: Optional[EloEngine] = None,
+    strengths: Optional[StrengthTable] = None,
+    cube: Optional[SplitCube] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Per-player arrays (in ``player_ids`` order) of everything the pairwise
+    columns are built from. ``player_features`` holds ``feature_matrix`` rows
+    by player id; players missing from it get the no-history defaults.
+    """
+    ids = [str(p) for p in player_ids]
+    n = len(ids)
+    if player_features is None:
+        table = (graph_match_table(elo_engine, ids, reference_date) if elo_engine is not None
+                 else pd.DataFrame(columns=MATCH_COLUMNS))
+        player_features = feature_matrix_from_table(table, reference_date, player_ids=ids)
+    missing = [p for p in ids if p not in player_features.index]
+    if missing:
+        no_history = feature_matrix_from_table(pd.DataFrame(columns=MATCH_COLUMNS), reference_date,
+                                               player_ids=missing)
+        player_features = pd.concat([player_features, no_history])
+    side = player_features.loc[ids]
+
+    graph_elo = np.full(n, np.nan)
+    if elo_engine is not None:
+        graph_elo = np.array([elo_engine.rating(p, as_of=reference_date) if p in elo_engine else np.nan
+                              for p in ids], dtype=float)
+    strength = np.full((n, 2), np.nan)
+    if strengths is not None and (strengths.fitted_at_ns or 0) < history.timestamp_ns(reference_date):
+        strength = np.array([strengths.rating(p) or (np.nan, np.nan) for p in ids], dtype=float)
+    top20 = np.full((n, 2), np.nan)
+    if cube is not None:
+        records = [cube.vs_top20(p, reference_date) for p in ids]
+        top20 = np.array([(r["matches"], np.nan if r["win_rate"] is None else r["win_rate"])
+                          for r in records], dtype=float)
+    return {
+        "elo": side["elo"].to_numpy(dtype=float),
+        "graph_elo": graph_elo,
+        "strength": strength[:, 0],
+        "strength_deviation": strength[:, 1],
+        "win_rate": side["win_rate"].to_numpy(dtype=float),
+        "quality_adjusted_win_rate": side["quality_adjusted_win_rate"].to_numpy(dtype=float),
+        "recent_momentum": side["recent_momentum"].to_numpy(dtype=float),
+        "trend": side["trend"].to_numpy(dtype=float),
+        "matches_played": side["matches_played"].to_numpy(dtype=float),
+        "matches_last_14d": side["matches_last_14d"].to_numpy(dtype=float),
+        "matches_last_30d": side["matches_last_30d"].to_numpy(dtype=float),
+        "top20_matches": top20[:, 0],
+        "top20_win_rate": top20[:, 1],
+    }
+
+
+_STORED_COLUMNS = ["elo", "win_rate", "quality_adjusted_win_rate", "recent_momentum", "trend",
+                   "matches_played", "matches_last_14d", "matches_last_30d"]
+
+
+def stored_player_features(store: FeatureStore, player_ids: Sequence[str], reference_date: datetime) -> pd.DataFrame:
+    """
+    ``player_sides`` rows computed as /api/predict computes them:
+    ``store.player_features`` on each player's last fetched history. Players
+    the store has no history for are left out.
+    """
+    rows = {}
+    for player_id in player_ids:
+        hist = store.history(player_id)
+        if hist is None:
+            continue
+        side = store.player_features(player_id, hist, reference_date)
+        form, fatigue = side["form"], side["fatigue"] or {}
+        rows[str(player_id)] = {
+            "elo": side["elo"],
+            "win_rate": form["win_rate"],
+            "quality_adjusted_win_rate": form.get("quality_adjusted_win_rate", form["win_rate"]),
+            "recent_momentum": form.get("recent_momentum", 0.0),
+            "trend": side["trend"].get("trend", 0.0),
+            "matches_played": form["matches_played"],
+            "matches_last_14d": fatigue.get("matches_last_14d", 0),
+            "matches_last_30d": fatigue.get("matches_last_30d", 0),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index", columns=_STORED_COLUMNS)
+
+
+def no_h2h(n: int) -> Dict[str, np.ndarray]:
+    return {"n_matches": np.zeros((n, n)), "n_effective": np.zeros((n, n)), "wins": np.zeros((n, n))}
+
+
+def pair_columns(sides: Dict[str, np.ndarray], h2h: Dict[str, np.ndarray], a, b) -> Dict[str, np.ndarray]:
+    """``model.BATCH_COLUMNS`` for the pairings (a[k], b[k]) of ``player_sides`` rows."""
+    graph_elo, elo = sides["graph_elo"], sides["elo"]
+    # As in extract_all_features, graph Elo is used when the graph rates both players
+    graph_pair = ~np.isnan(graph_elo[a]) & ~np.isnan(graph_elo[b])
+    n_h2h = h2h["n_matches"][a, b]
+    return {
+        "elo_diff": np.where(graph_pair, graph_elo[a] - graph_elo[b], elo[a] - elo[b]),
+        "strength_diff": sides["strength"][a] - sides["strength"][b],
+        "strength_deviation": np.hypot(sides["strength_deviation"][a], sides["strength_deviation"][b]),
+        "win_rate_a": sides["quality_adjusted_win_rate"][a],
+        "win_rate_b": sides["quality_adjusted_win_rate"][b],
+        "momentum_a": sides["recent_momentum"][a],
+        "momentum_b": sides["recent_momentum"][b],
+        "trend_a": sides["trend"][a],
+        "trend_b": sides["trend"][b],
+        "matches_played_a": sides["matches_played"][a],
+        "matches_played_b": sides["matches_played"][b],
+        "h2h_matches": n_h2h,
+        "h2h_effective": h2h["n_effective"][a, b],
+        "h2h_a_win_rate": np.where(n_h2h > 0, h2h["wins"][a, b] / np.maximum(n_h2h, 1), 0.5),
+        "top20_matches_a": sides["top20_matches"][a],
+        "top20_win_rate_a": sides["top20_win_rate"][a],
+        "top20_matches_b": sides["top20_matches"][b],
+        "top20_win_rate_b": sides["top20_win_rate"][b],
+        "fatigue_14d_a": sides["matches_last_14d"][a],
+        "fatigue_14d_b": sides["matches_last_14d"][b],
+        "fatigue_30d_a": sides["matches_last_30d"][a],
+        "fatigue_30d_b": sides["matches_last_30d"][b],
+    }
+
+
+def pairwise_probabilities(
+    player_ids: Sequence[str],
+    ranks: Sequence[int],
+    reference_date: datetime,
+    player_features: Optional[pd.DataFrame] = None,
+    elo_engine: Optional[EloEngine] = None,
+    strengths: Optional[StrengthTable] = None,
+    cube: Optional[SplitCube] = None,
+    h2h: Optional[Dict[str, np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    (n, n) matrix of ``predict_match`` probabilities that player i beats
+    player j, from one ``predict_batch`` call over the n(n-1)/2 pairings.
+
+    See ``player_sides`` for ``player_features``; ``strengths`` only applies
+    when fitted before ``reference_date``, as in ``extract_all_features``.
+    ``h2h`` is a ``graph_h2h`` result (taken from ``elo_engine`` by default).
+    """
+    sides = player_sides(player_ids, reference_date, player_features, elo_engine, strengths, cube)
+    n = len(player_ids)
+    if h2h is None:
+        h2h = graph_h2h(elo_engine, player_ids, reference_date) if elo_engine is not None else no_h2h(n)
+    return _probability_matrix(sides, h2h, ranks)
+
+
+def _probability_matrix(sides, h2h, ranks) -> np.ndarray:
+    n = len(ranks)
+    a, b = np.triu_indices(n, k=1)
+    ranks = np.asarray(ranks, dtype=float)
+    graph_pair = ~np.isnan(sides["graph_elo"][a]) & ~np.isnan(sides["graph_elo"][b])
+    proba = model.predict_batch(pair_columns(sides, h2h, a, b), ranks[a], ranks[b], graph_elo=graph_pair)["proba_a"]
+    matrix = np.full((n, n), 0.5)
+    matrix[a, b] = proba
+    matrix[b, a] = 1 - proba
+    return matrix
+
+
+# ---------------------------------------------------------------------------
+# Precomputed matrix
+# ---------------------------------------------------------------------------
+
+# Per-player arrays kept for explanations, and the H2H arrays
+_EXPLAIN_SIDES = ["elo", "graph_elo", "win_rate", "matches_played"]
+_H2H_KEYS = ["n_matches", "n_effective", "wins"]
+
+
+def data_version(
+    engine: EloEngine,
+    rankings_dir: Optional[Path] = None,
+    reference_date: Optional[datetime] = None,
+) -> str:
+    """
+    Fingerprint of the data a matrix is built from: the UTC day it is built
+    for (features age with the reference date, so a matrix is served on its
+    build day only), the rating graph's size and last match, the stored
+    ranking snapshots (``opponents.snapshot_version``, cached until a
+    snapshot changes) and the model parameters and trained model loaded at
+    startup. Cheap enough to check on every request.
+    """
+    day = feature_store.date_bucket(reference_date or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+    learned_version = model.LEARNED.version if model.LEARNED is not None else None
+    digest = hashlib.sha256(f"{TOP_N}:{day}:{len(engine)}:{engine.last_date_ns}:"
+                            f"{params.params_version(model.PARAMS)}:{learned_version}:"
+                            f"{opponents.snapshot_version(rankings_dir)}".encode())
+    return digest.hexdigest()[:16]
+
+
+def top_ranked(top_n: int = TOP_N, rankings_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    The top ``top_n`` of each gender's latest stored snapshot, as
+    (player_id, rank, points, gender, snapshot_date) rows.
+    """
+    rankings_dir = rankings_dir or opponents.RANKINGS_DIR
+    frames = []
+    for gender in ("male", "female"):
+        paths = sorted(Path(rankings_dir).glob(f"{gender}-*.json"))
+        if not paths:
+            continue
+        records = json.loads(paths[-1].read_text(encoding="utf-8"))
+        frame = pd.DataFrame.from_records(
+            [(str(r["Id"]), r["World Ranking"], r.get("Total Points") or 0) for r in records
+             if r.get("Id") is not None and r.get("World Ranking")],
+            columns=["player_id", "rank", "points"])
+        frame = frame[frame["rank"] <= top_n].sort_values("rank", kind="stable")
+        frame["gender"] = gender
+        frame["snapshot_date"] = paths[-1].stem.partition("-")[2]
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["player_id", "rank", "points", "gender", "snapshot_date"])
+    return pd.concat(frames, ignore_index=True).drop_duplicates("player_id")
+
+
+class PairwiseMatrix:
+    """
+    Precomputed win probabilities for a fixed set of players.
+
+    ``proba[i, j]`` is the chance player i beats player j as of
+    ``reference_ns``. The matrix spans both rankings; cross-gender entries are
+    computed with the rest and never looked up.
+    """
+
+    def __init__(self, players: pd.DataFrame, proba: np.ndarray, sides: Dict[str, np.ndarray],
+                 h2h: Dict[str, np.ndarray], version: str, reference_ns: int):
+        self.players = players.reset_index(drop=True)
+        self.proba = np.asarray(proba, dtype=np.float32)
+        self.sides = {name: np.asarray(sides[name], dtype=np.float32) for name in _EXPLAIN_SIDES}
+        self.h2h = {name: np.asarray(h2h[name], dtype=np.float32) for name in _H2H_KEYS}
+        self.version = version
+        self.reference_ns = reference_ns
+        self._index = {player_id: i for i, player_id in enumerate(self.players["player_id"])}
+        self._ranks = self.players["rank"].to_numpy(dtype=int)
+        self._tiers = model.tier_index(self._ranks)
+        self._genders = self.players["gender"].to_numpy(dtype=object)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, player_id) -> bool:
+        return str(player_id) in self._index
+
+    @classmethod
+    def build(
+        cls,
+        players: pd.DataFrame,
+        reference_date: datetime,
+        version: str,
+        elo_engine: Optional[EloEngine] = None,
+        strengths: Optional[StrengthTable] = None,
+        cube: Optional[SplitCube] = None,
+        store: Optional[FeatureStore] = None,
+    ) -> "PairwiseMatrix":
+        """
+        Score every pairing of ``players`` (a ``top_ranked`` frame). With a
+        feature ``store``, only players it has a history for are kept (see
+        ``stored_player_features``); without, form comes from the rating graph.
+        """
+        player_features = None
+        if store is not None:
+            player_features = stored_player_features(store, players["player_id"].astype(str), reference_date)
+            players = players[players["player_id"].astype(str).isin(player_features.index)]
+        ids = players["player_id"].astype(str).tolist()
+        sides = player_sides(ids, reference_date, player_features, elo_engine, strengths, cube)
+        h2h = graph_h2h(elo_engine, ids, reference_date) if elo_engine is not None else no_h2h(len(ids))
+        proba = _probability_matrix(sides, h2h, players["rank"].to_numpy(dtype=float))
+        return cls(players, proba, sides, h2h, version, history.timestamp_ns(reference_date))
+
+    def _pair(self, player_a, player_b) -> Optional[Tuple[int, int]]:
+        i, j = self._index.get(str(player_a)), self._index.get(str(player_b))
+        if i is None or j is None or i == j:
+            return None
+        if self._genders[i] != self._genders[j]:
+            return None
+        return i, j
+
+    def lookup(self, player_a, player_b) -> Optional[float]:
+        """Chance A beats B; None unless both are in the matrix (same ranking)."""
+        pair = self._pair(player_a, player_b)
+        return None if pair is None else float(self.proba[pair])
+
+    def pair_features(self, i: int, j: int) -> Dict[str, Any]:
+        """The parts of an ``extract_all_features`` dict the explanation reads."""
+        graph_elo, elo = self.sides["graph_elo"], self.sides["elo"]
+        graph = not (np.isnan(graph_elo[i]) or np.isnan(graph_elo[j]))
+        n_h2h = int(self.h2h["n_matches"][i, j])
+        return {
+            "elo_diff": float(graph_elo[i] - graph_elo[j] if graph else elo[i] - elo[j]),
+            "elo_source": "graph" if graph else "history",
+            "form_a": {"win_rate": float(self.sides["win_rate"][i]),
+                       "matches_played": int(self.sides["matches_played"][i])},
+            "form_b": {"win_rate": float(self.sides["win_rate"][j]),
+                       "matches_played": int(self.sides["matches_played"][j])},
+            "h2h": {"n_matches": n_h2h, "n_effective": float(self.h2h["n_effective"][i, j]),
+                    "a_win_rate": float(self.h2h["wins"][i, j]) / n_h2h if n_h2h else 0.5},
+        }
+
+    def prediction(self, player_a, player_b) -> Optional[Dict[str, Any]]:
+        """
+        A ``predict_match``-shaped result from the matrix (None on a miss).
+        The interval and explanation are computed for this pair only.
+        """
+        pair = self._pair(player_a, player_b)
+        if pair is None:
+            return None
+        i, j = pair
+        p_a = float(self.proba[i, j])
+        rank_a, rank_b = int(self._ranks[i]), int(self._ranks[j])
+        tier_gap = abs(int(self._tiers[i]) - int(self._tiers[j]))
+        ci_a, ci_b = model.beta_ci(p_a)
+        return {
+            "winner": "A" if p_a > 1 - p_a else "B",
+            "proba": {"A": round(p_a, 3), "B": round(1 - p_a, 3)},
+            "ci95": {"A": ci_a, "B": ci_b},
+            "explain": model.generate_explanation(self.pair_features(i, j), rank_a, rank_b, p_a, tier_gap),
+        }
+
+    def ranking(self, player_id) -> Dict[str, Any]:
+        """The matrix's ranking entry for a player: rank, points, snapshot date."""
+        row = self.players.iloc[self._index[str(player_id)]]
+        return {"rank": int(row["rank"]), "points": int(row["points"]), "snapshot": str(row["snapshot_date"])}
+
+    def save(self, path: Path = MATRIX_STORE) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        partial = path.with_name(path.stem + ".partial.npz")
+        np.savez(
+            partial,
+            player_ids=self.players["player_id"].to_numpy(dtype=str),
+            ranks=self.players["rank"].to_numpy(dtype=np.int64),
+            points=self.players["points"].to_numpy(dtype=np.int64),
+            genders=self.players["gender"].to_numpy(dtype=str),
+            snapshot_dates=self.players["snapshot_date"].to_numpy(dtype=str),
+            proba=self.proba,
+            meta=np.array([self.version, str(self.reference_ns)]),
+            **{f"side_{name}": values for name, values in self.sides.items()},
+            **{f"h2h_{name}": values for name, values in self.h2h.items()},
+        )
+        partial.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = MATRIX_STORE) -> Optional["PairwiseMatrix"]:
+        """Restore a saved matrix; None when nothing was saved."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as store:
+            players = pd.DataFrame({
+                "player_id": store["player_ids"].tolist(),
+                "rank": store["ranks"],
+                "points": store["points"],
+                "gender": store["genders"].tolist(),
+                "snapshot_date": store["snapshot_dates"].tolist(),
+            })
+            version, reference_ns = store["meta"].tolist()
+            sides = {name: store[f"side_{name}"] for name in _EXPLAIN_SIDES}
+            h2h = {name: store[f"h2h_{name}"] for name in _H2H_KEYS}
+            return cls(players, store["proba"], sides, h2h, version, int(reference_ns))
+
+
+def rebuild(path: Path = MATRIX_STORE, reference_date: Optional[datetime] = None) -> PairwiseMatrix:
+    """Build the top-``TOP_N`` matrix from the stored data, save it and make it current."""
+    global _current
+    reference_date = reference_date or datetime.now(timezone.utc)
+    live = ratings.default_engine()
+    # The last strength fit (refits are serialised in ratings), and a snapshot
+    # of the graph: requests keep ingesting into the live engine meanwhile
+    strengths = ratings.current_strengths(live)
+    engine = live.copy()
+    with _building:
+        version = data_version(engine, reference_date=reference_date)
+        matrix = PairwiseMatrix.build(top_ranked(), reference_date, version, elo_engine=engine,
+                                      strengths=strengths, cube=splits.default_cube(),
+                                      store=feature_store.default_store())
+        matrix.save(path)
+        _current = matrix
+    return matrix
+
+
+_current: Optional[PairwiseMatrix] = None
+_rebuilding = threading.Lock()
+_building = threading.Lock()
+
+
+def current_matrix(engine: EloEngine) -> Optional[PairwiseMatrix]:
+    """
+    The saved matrix if it was built from the current data (see
+    ``data_version``); None when there is none or it is stale.
+    """
+    global _current
+    if _current is None:
+        _current = PairwiseMatrix.load()
+    if _current is None or _current.version != data_version(engine):
+        return None
+    return _current
+
+
+def rebuild_in_background() -> bool:
+    """
+    Start ``rebuild`` on a daemon thread unless one is already running;
+    returns whether one was started.
+    """
+    if not _rebuilding.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            rebuild()
+        except Exception as e:
+            print(f"⚠️  Pairwise matrix rebuild failed: {e}")
+        finally:
+            _rebuilding.release()
+
+    threading.Thread(target=run, name="pairwise-rebuild", daemon=True).start()
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the top-N pairwise probability matrix.")
+    parser.parse_args(argv)
+    started = time.perf_counter()
+    matrix = rebuild()
+    print(f"{len(matrix)} players, version {matrix.version}, "
+          f"{matrix.proba.nbytes / 1024:.0f} KiB in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Tunable model constants and the versioned parameter file.
+
+``ModelParams`` holds the constants ``model`` and ``features`` apply: the
+underdog caps of the ranking prior, the H2H adjustment strengths, the form,
+momentum and trend factors, the evidence-weight scale and the history Elo
+K and half-life. ``DEFAULT_PARAMS`` are the hand-set values.
+
+``ACTIVE`` is read from ``PARAMS_STORE`` once, at import (service startup);
+without a file it is ``DEFAULT_PARAMS``. ``tuning`` writes the file: the
+parameters plus a version hash of them, checked on load, and how they were
+found.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+PARAMS_DIR = Path(__file__).parent / ".cache" / "params"
+PARAMS_STORE = PARAMS_DIR / "model_params.json"
+
+
+class ModelParams(NamedTuple):
+    # Underdog prior by tier gap; the last entry covers gaps of 5+
+    underdog_caps: Tuple[float, ...] = (0.45, 0.40, 0.35, 0.25, 0.15, 0.10)
+    # H2H logit strength for n_effective < 2, < 3, < 5 and above
+    h2h_strength: Tuple[float, ...] = (0.05, 0.10, 0.20, 0.30)
+    form_factor: float = 0.15
+    momentum_factor: float = 0.1
+    trend_factor: float = 0.1
+    # Evidence weight is sqrt(mean matches played) / evidence_scale, in [0.2, 1]
+    evidence_scale: float = 10.0
+    elo_k: float = 32.0
+    elo_half_life_days: float = 180.0
+
+
+DEFAULT_PARAMS = ModelParams()
+
+
+def params_version(params: ModelParams) -> str:
+    """Hash of the parameter values."""
+    text = json.dumps(params._asdict(), sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def from_dict(values: Dict[str, Any]) -> ModelParams:
+    """``ModelParams`` from JSON values; unknown names or wrong lengths raise ValueError."""
+    unknown = set(values) - set(ModelParams._fields)
+    if unknown:
+        raise ValueError(f"Unknown model parameters: {sorted(unknown)}")
+    params = DEFAULT_PARAMS._replace(**{
+        name: tuple(float(v) for v in value) if isinstance(value, (list, tuple)) else float(value)
+        for name, value in values.items()
+    })
+    for name in ("underdog_caps", "h2h_strength"):
+        if len(getattr(params, name)) != len(getattr(DEFAULT_PARAMS, name)):
+            raise ValueError(f"{name} needs {len(getattr(DEFAULT_PARAMS, name))} values")
+    return params
+
+
+def save_params(params: ModelParams, path: Path = PARAMS_STORE, **metadata) -> str:
+    """Write ``params`` (and ``metadata``) with their version; returns the version."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = params_version(params)
+    record = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "params": params._asdict(),
+        **metadata,
+    }
+    partial = path.with_name(path.name + ".partial")
+    partial.write_text(json.dumps(record, indent=2))
+    partial.replace(path)
+    return version
+
+
+def load_params(path: Optional[Path] = None) -> ModelParams:
+    """
+    The parameters stored at ``path`` (``PARAMS_STORE`` by default);
+    ``DEFAULT_PARAMS`` when there is no file. A file whose version does not
+    match its values raises ValueError.
+    """
+    path = Path(PARAMS_STORE if path is None else path)
+    if not path.exists():
+        return DEFAULT_PARAMS
+    record = json.loads(path.read_text())
+    params = from_dict(record["params"])
+    if record.get("version") != params_version(params):
+        raise ValueError(f"Model parameters in {path} do not match their version {record.get('version')}")
+    return params
+
+
+ACTIVE = load_params()
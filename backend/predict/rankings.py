@@ -1,22 +1,30 @@
 """PSA rankings data fetching with proper imports."""
 import asyncio
 import json
+import time
 from datetime import datetime, date
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 # Fix imports
 try:
     from . import cache
     from . import schemas
+    from . import transport
 except ImportError:
     # For direct execution
     import cache
     import schemas
+    import transport
 
 import httpx
 
 PSA_API_BASE = "https://psa-api.ptsportsuite.com"
 
+# Ranked players per gender, kept in-process: one prediction resolves,
+# ranks and snapshots from the same lists
+RANKINGS_TTL_SECONDS = 3600.0
+_ranked: Dict[str, Tuple[float, List[Dict]]] = {}
+
 
 async def get_all_ranked_players(gender: str = "male", use_cache: bool = True) -> List[Dict]:
     """
@@ -27,15 +35,21 @@ async def get_all_ranked_players(gender: str = "male", use_cache: bool = True) -
         use_cache: Whether to use cached data
 
     Returns:
-        List of player dictionaries
+        List of player dictionaries (fetched at most once per
+        ``RANKINGS_TTL_SECONDS`` per gender unless ``use_cache`` is False)
     """
+    cached = _ranked.get(gender)
+    if use_cache and cached is not None and time.monotonic() - cached[0] < RANKINGS_TTL_SECONDS:
+        return cached[1]
+
     url = f"{PSA_API_BASE}/rankedplayers/{gender}"
 
-    async with httpx.AsyncClient() as client:
+    async with transport.async_client() as client:
         try:
             response = await client.get(url, timeout=10.0)
             response.raise_for_status()
             players = response.json()
+            _ranked[gender] = (time.monotonic(), players)
             return players
         except Exception as e:
             print(f"Error fetching {gender} rankings: {e}")
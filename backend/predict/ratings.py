@@ -0,0 +1,657 @@
+"""Global ratings over the stored match graph.
+
+``EloEngine`` keeps every ingested match (both player ids known) in a
+chronological log and rates players against their actual opponents' ratings.
+New matches are applied incrementally when they are newer than everything
+seen so far; an out-of-order batch triggers a replay of the log, or with
+``replay=False`` is queued for ``replay_pending`` on a background thread (the
+service never replays on the request path). Each player keeps a dated rating
+trail, so the current rating is an O(1) lookup and a rating as of any date is
+a binary search.
+
+The engine persists to ``predict/.cache/ratings/elo.npz``; changes hold its
+``lock``, and readers off the request path work on a ``copy()``.
+
+``fit_bradley_terry`` is the batch counterpart: a time-weighted
+Bradley-Terry fit over the whole log by minorization-maximization, with a
+rating deviation per player from the fit's curvature. ``StrengthTable``
+holds the result (Elo scale) and persists to
+``predict/.cache/ratings/bradley_terry.npz``. The service serves the last
+fit and refits in the background, debounced (``current_strengths``).
+"""
+import argparse
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import history
+
+RATINGS_DIR = Path(__file__).parent / ".cache" / "ratings"
+ELO_STORE = RATINGS_DIR / "elo.npz"
+STRENGTH_STORE = RATINGS_DIR / "bradley_terry.npz"
+
+BASE_RATING = 1500.0
+K_FACTOR = 32.0
+SCALE = 400.0
+
+# Bradley-Terry fit: match weight halves every BT_HALF_LIFE_DAYS; every player
+# also drew BT_PRIOR_GAMES virtual games against a 1500-rated reference
+BT_HALF_LIFE_DAYS = 365.0
+BT_PRIOR_GAMES = 2.0
+# Natural-log strengths to Elo points
+ELO_PER_LOG = SCALE / np.log(10.0)
+
+
+class RatedMatch(NamedTuple):
+    """One edge of the match graph."""
+    key: str
+    date_ns: int
+    winner_id: str
+    loser_id: str
+
+
+def _match_key(match_id, date_ns: int, player_1: str, player_2: str) -> str:
+    """The source's match id when there is one, else date and (sorted) players."""
+    if isinstance(match_id, (int, np.integer)) or (isinstance(match_id, float) and not np.isnan(match_id)):
+        return f"id:{int(match_id)}"
+    if isinstance(match_id, str) and match_id:
+        return f"id:{match_id}"
+    low, high = sorted((player_1, player_2))
+    return f"{date_ns}:{low}:{high}"
+
+
+def matches_from_api_results(results: Iterable[dict]) -> List[RatedMatch]:
+    """Graph edges from PSA API ``/results`` records (both players need ids and games)."""
+    matches = []
+    for result in results:
+        players = result.get("players") or []
+        if len(players) != 2 or not result.get("date"):
+            continue
+        p1, p2 = players
+        if p1.get("id") is None or p2.get("id") is None or p1.get("games") == p2.get("games"):
+            continue
+        date_ns = history.timestamp_ns(result["date"])
+        winner, loser = (p1, p2) if p1.get("games", 0) > p2.get("games", 0) else (p2, p1)
+        matches.append(RatedMatch(
+            _match_key(result.get("matchId"), date_ns, str(p1["id"]), str(p2["id"])),
+            date_ns, str(winner["id"]), str(loser["id"]),
+        ))
+    return matches
+
+
+def matches_from_history(player_id: str, hist: pd.DataFrame) -> List[RatedMatch]:
+    """Graph edges from one player's history rows that carry an ``opponent_id``."""
+    if hist is None or hist.empty or 'opponent_id' not in hist.columns:
+        return []
+    rows = hist[hist['opponent_id'].notna()]
+    if rows.empty:
+        return []
+
+    player_id = str(player_id)
+    date_ns = history.utc_ns(rows['date'])
+    match_ids = rows['match_id'] if 'match_id' in rows.columns else [None] * len(rows)
+    matches = []
+    for when, opponent, result, match_id in zip(date_ns, rows['opponent_id'], rows['result'], match_ids):
+        opponent = str(int(opponent)) if isinstance(opponent, (int, float, np.number)) else str(opponent)
+        winner, loser = (player_id, opponent) if result == 'W' else (opponent, player_id)
+        matches.append(RatedMatch(_match_key(match_id, int(when), player_id, opponent),
+                                  int(when), winner, loser))
+    return matches
+
+
+class EloEngine:
+    """
+    Chronological Elo over every stored match.
+
+    Ratings start at ``BASE_RATING``; each match moves both players by
+    ``k * (1 - expected)`` with the standard logistic expectation.
+    """
+
+    def __init__(self, k: float = K_FACTOR, base_rating: float = BASE_RATING):
+        self.k = k
+        self.base_rating = base_rating
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._ratings: List[float] = []
+        self._trail_dates: List[List[int]] = []
+        self._trail_ratings: List[List[float]] = []
+        self._log: List[RatedMatch] = []
+        self._keys = set()
+        # Late matches queued by ingest(..., replay=False) for replay_pending
+        self._pending: List[RatedMatch] = []
+        self.last_date_ns: Optional[int] = None
+        # Bumped on every change; feature caches can key on it
+        self.version = 0
+        self.lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._log)
+
+    @property
+    def n_players(self) -> int:
+        return len(self._ids)
+
+    def _player(self, player_id: str) -> int:
+        index = self._index.get(player_id)
+        if index is None:
+            index = len(self._ids)
+            self._index[player_id] = index
+            self._ids.append(player_id)
+            self._ratings.append(self.base_rating)
+            self._trail_dates.append([])
+            self._trail_ratings.append([])
+        return index
+
+    def _apply(self, match: RatedMatch) -> None:
+        winner = self._player(match.winner_id)
+        loser = self._player(match.loser_id)
+        r_winner, r_loser = self._ratings[winner], self._ratings[loser]
+        expected = 1.0 / (1.0 + 10.0 ** ((r_loser - r_winner) / SCALE))
+        delta = self.k * (1.0 - expected)
+        self._ratings[winner] = r_winner + delta
+        self._ratings[loser] = r_loser - delta
+        for index in (winner, loser):
+            self._trail_dates[index].append(match.date_ns)
+            self._trail_ratings[index].append(self._ratings[index])
+
+    def _replay(self) -> None:
+        # Replayed on a scratch engine and swapped in; readers take the lock,
+        # so they see the trails either before or after the replay
+        scratch = EloEngine(k=self.k, base_rating=self.base_rating)
+        for player_id in self._ids:
+            scratch._player(player_id)
+        for match in self._log:
+            scratch._apply(match)
+        self._ratings, self._trail_dates, self._trail_ratings = (
+            scratch._ratings, scratch._trail_dates, scratch._trail_ratings)
+
+    def ingest(self, matches: Iterable[RatedMatch], replay: bool = True) -> int:
+        """
+        Add matches to the graph; returns how many were new.
+
+        Matches already seen (same key) are skipped. Matches no older than the
+        last rated match are applied incrementally. Older ones are replayed
+        into place in date order, or with ``replay=False`` queued (see
+        ``pending``) until ``replay_pending``.
+        """
+        with self.lock:
+            fresh = []
+            for match in matches:
+                if match.key not in self._keys:
+                    self._keys.add(match.key)
+                    fresh.append(match)
+            if not fresh:
+                return 0
+
+            fresh.sort(key=lambda m: (m.date_ns, m.key))
+            late = 0 if self.last_date_ns is None else bisect_left([m.date_ns for m in fresh], self.last_date_ns)
+            if late and replay:
+                self._log.extend(fresh)
+                self._log.sort(key=lambda m: (m.date_ns, m.key))
+                for match in fresh:
+                    self._player(match.winner_id)
+                    self._player(match.loser_id)
+                self._replay()
+            else:
+                self._pending.extend(fresh[:late])
+                for match in fresh[late:]:
+                    self._apply(match)
+                self._log.extend(fresh[late:])
+
+            if self._log:
+                self.last_date_ns = self._log[-1].date_ns
+            self.version += 1
+            return len(fresh)
+
+    @property
+    def pending(self) -> int:
+        """Late matches waiting for ``replay_pending``."""
+        return len(self._pending)
+
+    def replay_pending(self) -> int:
+        """Replay the queued late matches into place; returns how many there were."""
+        with self.lock:
+            if not self._pending:
+                return 0
+            late, self._pending = self._pending, []
+            self._log.extend(late)
+            self._log.sort(key=lambda m: (m.date_ns, m.key))
+            for match in late:
+                self._player(match.winner_id)
+                self._player(match.loser_id)
+            self._replay()
+            self.last_date_ns = self._log[-1].date_ns
+            self.version += 1
+            return len(late)
+
+    def copy(self) -> "EloEngine":
+        """A consistent snapshot, for fits and builds running beside the service."""
+        with self.lock:
+            engine = EloEngine(k=self.k, base_rating=self.base_rating)
+            engine._index = dict(self._index)
+            engine._ids = list(self._ids)
+            engine._ratings = list(self._ratings)
+            engine._trail_dates = [list(dates) for dates in self._trail_dates]
+            engine._trail_ratings = [list(trail) for trail in self._trail_ratings]
+            engine._log = list(self._log)
+            engine._keys = set(self._keys)
+            engine._pending = list(self._pending)
+            engine.last_date_ns = self.last_date_ns
+            engine.version = self.version
+            return engine
+
+    def __contains__(self, player_id) -> bool:
+        return str(player_id) in self._index
+
+    def rating(self, player_id, as_of=None) -> Optional[float]:
+        """
+        Current rating (O(1)), or the rating from matches strictly before
+        ``as_of``. None for players not in the graph.
+        """
+        as_of_ns = None if as_of is None else history.timestamp_ns(as_of)
+        # Ingests append a match's date and rating to the trails one after the
+        # other, and replays swap all three lists: read them under the lock
+        with self.lock:
+            index = self._index.get(str(player_id))
+            if index is None:
+                return None
+            if as_of_ns is None:
+                return self._ratings[index]
+            dates = self._trail_dates[index]
+            if not dates or as_of_ns > dates[-1]:
+                return self._ratings[index]
+            position = bisect_left(dates, as_of_ns)
+            return self._trail_ratings[index][position - 1] if position else self.base_rating
+
+    def snapshots(self, player_id) -> pd.DataFrame:
+        """A player's rating after each of their matches."""
+        with self.lock:
+            index = self._index.get(str(player_id))
+            if index is None:
+                return pd.DataFrame(columns=["date", "rating"])
+            dates = np.asarray(self._trail_dates[index], dtype=np.int64)
+            trail = list(self._trail_ratings[index])
+        return pd.DataFrame({"date": pd.to_datetime(dates, utc=True), "rating": trail})
+
+    def match_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The match log as (dates ns, winner index, loser index) arrays."""
+        with self.lock:
+            return (
+                np.array([m.date_ns for m in self._log], dtype=np.int64),
+                np.array([self._index[m.winner_id] for m in self._log], dtype=np.int64),
+                np.array([self._index[m.loser_id] for m in self._log], dtype=np.int64),
+            )
+
+    def trail_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Every rating trail concatenated in player index order, as (offsets,
+        ratings): player i's rating after each of their matches is
+        ``ratings[offsets[i]:offsets[i + 1]]``.
+        """
+        with self.lock:
+            lengths = [len(trail) for trail in self._trail_ratings]
+            offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+            ratings = np.fromiter((r for trail in self._trail_ratings for r in trail), dtype=float,
+                                  count=offsets[-1])
+            return offsets, ratings
+
+    @property
+    def player_ids(self) -> List[str]:
+        return list(self._ids)
+
+    def top(self, n: int = 10) -> List[Tuple[str, float]]:
+        """The ``n`` highest-rated players as (player id, rating)."""
+        with self.lock:
+            order = np.argsort(self._ratings)[::-1][:n]
+            return [(self._ids[i], self._ratings[i]) for i in order]
+
+    def save(self, path: Path = ELO_STORE) -> None:
+        """Persist the match log, queued late matches and rating trails."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            trail_lengths = np.array([len(dates) for dates in self._trail_dates], dtype=np.int64)
+            log_dates, log_winners, log_losers = self.match_arrays()
+            # Write then rename, so readers never see a partial file
+            partial = path.with_name(path.stem + ".partial.npz")
+            np.savez(
+                partial,
+                params=np.array([self.k, self.base_rating]),
+                player_ids=np.array(self._ids, dtype=str),
+                ratings=np.array(self._ratings, dtype=float),
+                trail_lengths=trail_lengths,
+                trail_dates=np.array([d for dates in self._trail_dates for d in dates], dtype=np.int64),
+                trail_ratings=np.array([r for ratings in self._trail_ratings for r in ratings], dtype=float),
+                log_keys=np.array([m.key for m in self._log], dtype=str),
+                log_dates=log_dates,
+                log_winners=log_winners,
+                log_losers=log_losers,
+                pending_keys=np.array([m.key for m in self._pending], dtype=str),
+                pending_dates=np.array([m.date_ns for m in self._pending], dtype=np.int64),
+                pending_winners=np.array([m.winner_id for m in self._pending], dtype=str),
+                pending_losers=np.array([m.loser_id for m in self._pending], dtype=str),
+            )
+            partial.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = ELO_STORE) -> "EloEngine":
+        """Restore a saved engine; an empty engine when nothing was saved."""
+        path = Path(path)
+        if not path.exists():
+            return cls()
+        with np.load(path) as store:
+            k, base_rating = store["params"].tolist()
+            engine = cls(k=k, base_rating=base_rating)
+            engine._ids = store["player_ids"].tolist()
+            engine._index = {player_id: i for i, player_id in enumerate(engine._ids)}
+            engine._ratings = store["ratings"].tolist()
+            bounds = np.cumsum(store["trail_lengths"])[:-1]
+            if engine._ids:
+                engine._trail_dates = [part.tolist() for part in np.split(store["trail_dates"], bounds)]
+                engine._trail_ratings = [part.tolist() for part in np.split(store["trail_ratings"], bounds)]
+            ids = engine._ids
+            engine._log = [
+                RatedMatch(key, date_ns, ids[winner], ids[loser])
+                for key, date_ns, winner, loser in zip(
+                    store["log_keys"].tolist(), store["log_dates"].tolist(),
+                    store["log_winners"].tolist(), store["log_losers"].tolist())
+            ]
+            if "pending_keys" in store.files:
+                engine._pending = [
+                    RatedMatch(*fields) for fields in zip(
+                        store["pending_keys"].tolist(), store["pending_dates"].tolist(),
+                        store["pending_winners"].tolist(), store["pending_losers"].tolist())
+                ]
+        engine._keys = {m.key for m in engine._log} | {m.key for m in engine._pending}
+        engine.last_date_ns = engine._log[-1].date_ns if engine._log else None
+        return engine
+
+
+_default_engine: Optional[EloEngine] = None
+
+
+def default_engine() -> EloEngine:
+    """The process-wide engine, loaded from ``ELO_STORE`` on first use."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = EloEngine.load()
+    return _default_engine
+
+
+def ingest_histories(histories: Dict[str, pd.DataFrame], engine: Optional[EloEngine] = None,
+                     path: Path = ELO_STORE) -> int:
+    """
+    Fold fetched histories (by player id) into the graph and save it when
+    anything was new; returns how many matches were. Late matches are queued
+    and replayed by ``replay_in_background``. Blocking: callers on an event
+    loop run it in a worker thread.
+    """
+    engine = engine if engine is not None else default_engine()
+    added = sum(engine.ingest(matches_from_history(player_id, hist), replay=False)
+                for player_id, hist in histories.items())
+    if added:
+        engine.save(path)
+        if engine.pending:
+            replay_in_background(engine, path)
+    return added
+
+
+_replaying = threading.Lock()
+
+
+def replay_in_background(engine: Optional[EloEngine] = None, path: Path = ELO_STORE) -> bool:
+    """
+    Start ``replay_pending`` and a save on a daemon thread unless one is
+    already running; returns whether one was started.
+    """
+    if not _replaying.acquire(blocking=False):
+        return False
+    engine = engine if engine is not None else default_engine()
+
+    def run():
+        try:
+            if engine.replay_pending():
+                engine.save(path)
+        except Exception as e:
+            print(f"⚠️  Rating graph replay failed: {e}")
+        finally:
+            _replaying.release()
+
+    threading.Thread(target=run, name="elo-replay", daemon=True).start()
+    return True
+
+
+class BradleyTerryFit(NamedTuple):
+    """Raw fit output: natural-log strengths and their standard errors."""
+    strength: np.ndarray
+    std_error: np.ndarray
+    games: np.ndarray
+    iterations: int
+
+
+def fit_bradley_terry(
+    winners: np.ndarray,
+    losers: np.ndarray,
+    n_players: int,
+    weights: Optional[np.ndarray] = None,
+    prior_games: float = BT_PRIOR_GAMES,
+    tol: float = 1e-6,
+    max_iter: int = 500,
+) -> BradleyTerryFit:
+    """
+    Weighted Bradley-Terry fit by minorization-maximization (Hunter, 2004).
+
+    ``winners``/``losers`` are player indices per match. One MM step is a
+    few gathers and ``bincount`` passes over the match arrays, so its cost
+    is linear in the number of matches. Plain MM converges slowly on large
+    sparse graphs, so steps are accelerated with SQUAREM (Varadhan & Roland,
+    2008) on the log-strengths. The virtual games against a reference
+    player of strength 1 keep unbeaten or winless players finite and pin
+    the scale.
+
+    ``std_error`` is the inverse square root of the diagonal of the Fisher
+    information at the fit. ``iterations`` counts MM steps.
+    """
+    winners = np.asarray(winners, dtype=np.int64)
+    losers = np.asarray(losers, dtype=np.int64)
+    weights = np.ones(len(winners)) if weights is None else np.asarray(weights, dtype=float)
+
+    won = np.bincount(winners, weights, minlength=n_players)
+    games = won + np.bincount(losers, weights, minlength=n_players)
+    log_wins = np.log(won + prior_games / 2.0)
+
+    def mm_step(theta):
+        gamma = np.exp(theta)
+        per_match = weights / (gamma[winners] + gamma[losers])
+        denominator = (np.bincount(winners, per_match, minlength=n_players)
+                       + np.bincount(losers, per_match, minlength=n_players)
+                       + prior_games / (gamma + 1.0))
+        return log_wins - np.log(denominator)
+
+    theta = np.zeros(n_players)
+    iterations = 0
+    while n_players and iterations < max_iter:
+        theta_1 = mm_step(theta)
+        theta_2 = mm_step(theta_1)
+        r = theta_1 - theta
+        v = theta_2 - theta_1 - r
+        v_norm = np.sqrt(v @ v)
+        alpha = min(-np.sqrt(r @ r) / v_norm, -1.0) if v_norm > 0 else -1.0
+        # Extrapolate, then take one MM step from there to stay stable
+        updated = mm_step(theta - 2.0 * alpha * r + alpha * alpha * v)
+        iterations += 3
+        change = np.max(np.abs(updated - theta))
+        theta = updated
+        if change < tol:
+            break
+
+    # Fisher information of the log-strengths: sum of w * p * (1 - p) per player
+    gamma = np.exp(theta)
+    p_winner = gamma[winners] / (gamma[winners] + gamma[losers])
+    per_match = weights * p_winner * (1.0 - p_winner)
+    p_reference = gamma / (gamma + 1.0)
+    information = (np.bincount(winners, per_match, minlength=n_players)
+                   + np.bincount(losers, per_match, minlength=n_players)
+                   + prior_games * p_reference * (1.0 - p_reference))
+    return BradleyTerryFit(theta, 1.0 / np.sqrt(information), games, iterations)
+
+
+class StrengthTable:
+    """
+    Batch-fitted strengths on the Elo scale, with a deviation per player.
+
+    ``n_matches`` is the size of the match log the table was fitted on, so
+    callers can tell when it is stale.
+    """
+
+    def __init__(self, player_ids: List[str], ratings: np.ndarray, deviations: np.ndarray,
+                 games: np.ndarray, n_matches: int = 0, fitted_at_ns: Optional[int] = None):
+        self.player_ids = list(player_ids)
+        self.ratings = np.asarray(ratings, dtype=float)
+        self.deviations = np.asarray(deviations, dtype=float)
+        self.games = np.asarray(games, dtype=float)
+        self.n_matches = n_matches
+        self.fitted_at_ns = fitted_at_ns
+        self._index = {player_id: i for i, player_id in enumerate(self.player_ids)}
+
+    def __len__(self) -> int:
+        return len(self.player_ids)
+
+    def __contains__(self, player_id) -> bool:
+        return str(player_id) in self._index
+
+    def rating(self, player_id) -> Optional[Tuple[float, float]]:
+        """(rating, deviation) for a player, None when not in the fit."""
+        index = self._index.get(str(player_id))
+        if index is None:
+            return None
+        return float(self.ratings[index]), float(self.deviations[index])
+
+    def difference(self, player_a, player_b) -> Optional[Dict[str, float]]:
+        """Rating difference A - B and its deviation (independent errors)."""
+        a, b = self.rating(player_a), self.rating(player_b)
+        if a is None or b is None:
+            return None
+        return {"diff": a[0] - b[0], "deviation": float(np.hypot(a[1], b[1]))}
+
+    @classmethod
+    def fit(cls, engine: EloEngine, reference_date=None,
+            half_life_days: float = BT_HALF_LIFE_DAYS, **kwargs) -> "StrengthTable":
+        """Fit on an engine's match log, weighting matches by age at ``reference_date``."""
+        dates, winners, losers = engine.match_arrays()
+        reference_ns = (history.timestamp_ns(reference_date) if reference_date is not None
+                        else (int(dates.max()) if len(dates) else 0))
+        age_days = np.maximum(reference_ns - dates, 0) / history.NS_PER_DAY
+        weights = 0.5 ** (age_days / half_life_days)
+        fit = fit_bradley_terry(winners, losers, engine.n_players, weights, **kwargs)
+        return cls(engine.player_ids, BASE_RATING + fit.strength * ELO_PER_LOG,
+                   fit.std_error * ELO_PER_LOG, fit.games, len(engine), reference_ns)
+
+    def save(self, path: Path = STRENGTH_STORE) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so readers never see a partial file
+        partial = path.with_name(path.stem + ".partial.npz")
+        np.savez(
+            partial,
+            player_ids=np.array(self.player_ids, dtype=str),
+            ratings=self.ratings,
+            deviations=self.deviations,
+            games=self.games,
+            meta=np.array([self.n_matches, self.fitted_at_ns or 0], dtype=np.int64),
+        )
+        partial.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = STRENGTH_STORE) -> Optional["StrengthTable"]:
+        """Restore a saved table; None when nothing was saved."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as store:
+            n_matches, fitted_at_ns = store["meta"].tolist()
+            return cls(store["player_ids"].tolist(), store["ratings"], store["deviations"],
+                       store["games"], n_matches, fitted_at_ns)
+
+
+# A background refit waits until this long after the previous fit, so a
+# burst of requests that each add a match costs one fit
+REFIT_INTERVAL_SECONDS = 300.0
+
+_default_strengths: Optional[StrengthTable] = None
+_fitting = threading.Lock()
+_refitting = threading.Lock()
+_last_fit = float("-inf")
+
+
+def current_strengths(engine: Optional[EloEngine] = None) -> Optional[StrengthTable]:
+    """
+    The last fitted strength table (None before the first fit). When the
+    engine's log has grown since, a refit is scheduled in the background
+    (``refit_in_background``); callers never wait for one.
+    """
+    global _default_strengths
+    engine = engine if engine is not None else default_engine()
+    if _default_strengths is None:
+        _default_strengths = StrengthTable.load()
+    if _default_strengths is None or _default_strengths.n_matches != len(engine):
+        refit_in_background(engine)
+    return _default_strengths
+
+
+def refit_strengths(engine: Optional[EloEngine] = None, path: Optional[Path] = None) -> StrengthTable:
+    """
+    Fit on a snapshot of the engine, save and make the table current.
+    Blocking; one fit (and save) runs at a time.
+    """
+    global _default_strengths, _last_fit
+    engine = engine if engine is not None else default_engine()
+    with _fitting:
+        table = StrengthTable.fit(engine.copy())
+        table.save(STRENGTH_STORE if path is None else path)
+        _default_strengths = table
+        _last_fit = time.monotonic()
+        return table
+
+
+def refit_in_background(engine: Optional[EloEngine] = None) -> bool:
+    """
+    Start ``refit_strengths`` on a daemon thread, no sooner than
+    ``REFIT_INTERVAL_SECONDS`` after the previous fit, unless one is already
+    scheduled; returns whether one was.
+    """
+    if not _refitting.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            time.sleep(max(0.0, _last_fit + REFIT_INTERVAL_SECONDS - time.monotonic()))
+            refit_strengths(engine)
+        except Exception as e:
+            print(f"⚠️  Strength refit failed: {e}")
+        finally:
+            _refitting.release()
+
+    threading.Thread(target=run, name="strength-refit", daemon=True).start()
+    return True
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay late matches into the stored rating graph and refit the strengths.")
+    parser.parse_args(argv)
+    engine = default_engine()
+    replayed = engine.replay_pending()
+    engine.save()
+    table = refit_strengths(engine)
+    print(f"{replayed} late matches replayed; {len(engine)} matches, {engine.n_players} players, "
+          f"{len(table)} strengths")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Bootstrap intervals from resampled match histories.
+
+Each replicate redraws every player's matches (and the H2H matches) with
+replacement, recomputes the evidence features from the redrawn rows and runs
+the result through ``model.predict_batch``. The spread of the replicate
+probabilities is the interval, so a player with five matches gets a wide one
+and a player with two hundred a narrow one.
+
+Replicates are never materialised as histories. A replicate is a sorted
+row of drawn row indices, so its draws keep the history's recency order and
+its "last 20" matches are simply its first 20 draws. Every feature is then a
+gather and a sum (or a grouped ``bincount``) over the (replicates, matches)
+index matrix. Index matrices depend only on the history length, replicate
+count and seed, so they are drawn once and reused across requests.
+"""
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import history, model
+from .feature_matrix import period_trend
+from .features import (ELO_HALF_LIFE_DAYS, ELO_K, TREND_PERIOD_WEEKS, History, _as_h2h_history,
+                       decay_weights)
+from .history import NS_PER_DAY
+
+N_REPLICATES = 500
+FORM_MATCHES = 20
+MOMENTUM_MATCHES = 5
+TREND_WEEKS = 12
+
+
+def resample_draws(rng: np.random.Generator, n_rows: int, n_replicates: int) -> np.ndarray:
+    """
+    (n_replicates, n_rows) row indices drawn with replacement, one replicate
+    per row, each sorted so its draws come in history (recency) order.
+    """
+    dtype = np.int16 if n_rows <= np.iinfo(np.int16).max else np.int64
+    draws = rng.integers(0, max(n_rows, 1), size=(n_replicates, n_rows), dtype=dtype)
+    draws.sort(axis=1)
+    return draws
+
+
+@lru_cache(maxsize=64)
+def cached_draws(n_rows: int, n_replicates: int, seed: int, stream: int) -> np.ndarray:
+    """
+    ``resample_draws`` from its own (seed, stream) generator, kept read-only
+    and reused: histories of the same length share one index matrix.
+    """
+    draws = resample_draws(np.random.default_rng([seed, stream]), n_rows, n_replicates)
+    draws.flags.writeable = False
+    return draws
+
+
+def player_replicates(hist: History, reference_date: datetime, draws: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Elo and form/trend features of ``features.player_features`` for every
+    replicate, given the history before ``reference_date`` and the replicates'
+    sorted draws of its rows (see ``resample_draws``).
+    """
+    hist = history.as_history(hist).before(reference_date)
+    n_replicates, n_rows = draws.shape
+    if n_rows == 0:
+        empty = np.zeros(n_replicates)
+        return {"elo": empty + 1500.0, "win_rate": empty + 0.5, "quality_adjusted_win_rate": empty + 0.5,
+                "recent_momentum": empty, "matches_played": empty, "trend": empty}
+    reference = history.timestamp_ns(reference_date)
+
+    # Elo: the decayed step of each drawn match
+    weight = decay_weights((reference - hist.date_ns) // NS_PER_DAY, ELO_HALF_LIFE_DAYS)
+    step = ELO_K * (1 + 0.5 * hist.strength) * weight
+    elo = np.clip(1500.0 + np.where(hist.won, step, -(step * 0.5))[draws].sum(axis=1), 1000, 2500)
+
+    # Form over the first 20 draws, momentum over the first 5
+    total = min(FORM_MATCHES, n_rows)
+    recent = draws[:, :total]
+    win_rate = hist.won[recent].sum(axis=1) / total
+    quality = np.where(hist.won, 1 + hist.strength, 0.0)[recent].sum(axis=1) / total / 1.5
+    momentum_matches = min(MOMENTUM_MATCHES, n_rows)
+    momentum = hist.won[draws[:, :momentum_matches]].sum(axis=1) / momentum_matches - 0.5
+
+    # Trend from 2-week win rates over the last 12 weeks; period -1 is outside
+    # the window. Window rows are the recent ones, so only the leading draws
+    # (up to the last window row) are looked at.
+    n_periods = TREND_WEEKS // TREND_PERIOD_WEEKS
+    cutoff = history.timestamp_ns(reference_date - timedelta(weeks=TREND_WEEKS))
+    in_window = hist.date_ns >= cutoff
+    period = np.where(in_window, (hist.date_ns - cutoff) // (TREND_PERIOD_WEEKS * 7 * NS_PER_DAY), -1)
+    period = np.where(period < n_periods, period, n_periods)
+    last_row = int(np.flatnonzero(in_window).max(initial=-1))
+    if last_row < 0:
+        trend = np.zeros(n_replicates)
+    else:
+        leading = draws[:, :int((draws <= last_row).sum(axis=1).max())]
+        cells = (np.arange(n_replicates)[:, None] * (n_periods + 2) + period[leading] + 1).ravel()
+        n_cells = n_replicates * (n_periods + 2)
+        played = np.bincount(cells, minlength=n_cells).reshape(n_replicates, -1)
+        wins = np.bincount(cells, hist.won[leading].ravel(), minlength=n_cells).reshape(n_replicates, -1)
+        trend, _ = period_trend(played[:, 1:-1], wins[:, 1:-1], played[:, 1:].sum(axis=1))
+
+    return {"elo": elo, "win_rate": win_rate, "quality_adjusted_win_rate": quality,
+            "recent_momentum": momentum, "matches_played": np.full(n_replicates, float(total)),
+            "trend": trend}
+
+
+def h2h_replicates(h2h_df: Optional[History], reference_date: datetime, draws: np.ndarray) -> Dict[str, np.ndarray]:
+    """``features.calculate_h2h``'s n_matches, n_effective and a_win_rate per replicate."""
+    h2h = _as_h2h_history(h2h_df).before(reference_date)
+    n_replicates, n_rows = draws.shape
+    if n_rows == 0:
+        return {"n_matches": np.zeros(n_replicates), "n_effective": np.zeros(n_replicates),
+                "a_win_rate": np.full(n_replicates, 0.5)}
+    reference = history.timestamp_ns(reference_date)
+    recent = h2h.date_ns >= reference - 730 * NS_PER_DAY
+    days = (reference - h2h.date_ns) // NS_PER_DAY
+    weights = np.where(recent, 0.5 ** (days / 365), 0.0)
+    return {"n_matches": np.full(n_replicates, float(n_rows)),
+            "n_effective": weights[draws].sum(axis=1),
+            "a_win_rate": h2h.won[draws].sum(axis=1) / n_rows}
+
+
+def bootstrap_probabilities(
+    hist_a: History,
+    hist_b: History,
+    h2h_df: Optional[History],
+    features: Dict[str, Any],
+    rank_a: int,
+    rank_b: int,
+    reference_date: datetime,
+    n_replicates: int = N_REPLICATES,
+    seed: int = 42,
+) -> np.ndarray:
+    """
+    Player A's win probability in each of ``n_replicates`` resampled worlds.
+
+    ``features`` is the ``extract_all_features`` result the point prediction
+    used. Parts that do not come from these histories stay fixed: graph Elo
+    (``elo_source == "graph"``), the fitted strength and the top-20 records.
+    """
+    # Convert and cut once; the helpers get MatchHistory arrays
+    hist_a = history.as_history(hist_a).before(reference_date)
+    hist_b = history.as_history(hist_b).before(reference_date)
+    h2h_hist = _as_h2h_history(h2h_df).before(reference_date)
+
+    side_a = player_replicates(hist_a, reference_date, cached_draws(len(hist_a), n_replicates, seed, 0))
+    side_b = player_replicates(hist_b, reference_date, cached_draws(len(hist_b), n_replicates, seed, 1))
+    h2h = h2h_replicates(h2h_hist, reference_date, cached_draws(len(h2h_hist), n_replicates, seed, 2))
+
+    fixed = model.batch_columns([features])
+    columns = {name: np.repeat(values, n_replicates) for name, values in fixed.items()}
+    if features.get("elo_source", "history") == "history":
+        columns["elo_diff"] = side_a["elo"] - side_b["elo"]
+    columns.update({
+        "win_rate_a": side_a["quality_adjusted_win_rate"],
+        "win_rate_b": side_b["quality_adjusted_win_rate"],
+        "momentum_a": side_a["recent_momentum"],
+        "momentum_b": side_b["recent_momentum"],
+        "trend_a": side_a["trend"],
+        "trend_b": side_b["trend"],
+        "matches_played_a": side_a["matches_played"],
+        "matches_played_b": side_b["matches_played"],
+        "h2h_matches": h2h["n_matches"],
+        "h2h_effective": h2h["n_effective"],
+        "h2h_a_win_rate": h2h["a_win_rate"],
+    })
+    ranks_a = np.full(n_replicates, rank_a)
+    ranks_b = np.full(n_replicates, rank_b)
+    graph_elo = np.full(n_replicates, features.get("elo_source") == "graph")
+    return model.predict_batch(columns, ranks_a, ranks_b, graph_elo=graph_elo)["proba_a"]
+
+
+def bootstrap_interval(*args, level: float = 0.95, **kwargs) -> Dict[str, List[float]]:
+    """
+    ``ci95``-shaped percentile interval of ``bootstrap_probabilities``
+    (same arguments): ``{"A": [low, high], "B": [low, high]}``.
+    """
+    samples = bootstrap_probabilities(*args, **kwargs)
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(samples, [tail, 100 - tail])
+    return {"A": [round(float(low), 3), round(float(high), 3)],
+            "B": [round(float(1 - high), 3), round(float(1 - low), 3)]}
@@ -59,6 +59,16 @@ class PredictionSummary(BaseModel):
     winner: str = Field(pattern="^[AB]$")
     proba: ProbabilityPair
     ci95: ConfidenceInterval
+    # "bootstrap" (resampled match histories) or "beta" (around the point estimate)
+    interval: str = Field("beta", pattern="^(bootstrap|beta)$")
+
+
+class ScorelineDistribution(BaseModel):
+    """Scoreline probabilities under PAR-11 scoring, calibrated to the match probability."""
+    rally_win_a: float = Field(ge=0, le=1)
+    game_win_a: float = Field(ge=0, le=1)
+    scorelines: Dict[str, float]
+    expected_games: float = Field(ge=3, le=5)
 
 
 class ExplanationDriver(BaseModel):
@@ -81,11 +91,38 @@ class PredictionResponse(BaseModel):
     event: Optional[EventInfo] = None
     ranking: Dict[str, RankingSnapshot]
     summary: PredictionSummary
+    scorelines: Optional[ScorelineDistribution] = None
     explain: PredictionExplanation
     sources: List[str]
     warnings: List[str] = Field(default_factory=list)
 
 
+class DrawRequest(BaseModel):
+    """A draw to simulate: player ids in seed order."""
+    players: List[str] = Field(min_length=2, max_length=128, description="Player ids, top seed first")
+    ranks: Optional[List[conint(ge=1)]] = Field(None, description="Ranks per player (default: stored rankings)")
+    event_date: Optional[date] = Field(None, description="Simulate as of this date")
+    n_simulations: conint(ge=1_000, le=200_000) = 100_000
+    seed: int = 42
+
+
+class DrawPlayerOdds(BaseModel):
+    """One player's chances of reaching each round (and ``title``)."""
+    player_id: str
+    seed: int = Field(ge=1)
+    rank: int = Field(ge=1)
+    reach: Dict[str, float]
+
+
+class DrawResponse(BaseModel):
+    """Draw simulation result."""
+    size: int
+    rounds: List[str]
+    n_simulations: int
+    players: List[DrawPlayerOdds]
+    warnings: List[str] = Field(default_factory=list)
+
+
 class ErrorDetail(BaseModel):
     """Error detail."""
     code: str
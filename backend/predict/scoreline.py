@@ -0,0 +1,139 @@
+"""Scoreline probabilities from PAR-11 scoring.
+
+A game is point-a-rally to 11, won by two clear points from 10-10; a match
+is best of five games. With a constant probability ``p`` that A wins a rally,
+the chance of winning a game from any score follows from a DP over game
+states, and the match and its scoreline (3-0, 3-1, 3-2, ...) from a DP over
+games won.
+
+The model predicts the match, not rallies, so each prediction is calibrated:
+the rally probability is the one whose match-win probability equals the
+prediction. Both DPs are run once over a grid of rally probabilities
+(``RALLY_GRID`` points in [0, 1]); since the match-win probability rises
+monotonically with ``p``, every other column is then interpolated against it,
+so a request costs one ``np.interp`` per column.
+"""
+from functools import lru_cache
+from typing import Dict
+
+import numpy as np
+
+POINTS_TO_WIN = 11
+GAMES_TO_WIN = 3
+RALLY_GRID = 4001
+
+SCORELINES = ["3-0", "3-1", "3-2", "2-3", "1-3", "0-3"]
+_GAMES_PLAYED = np.array([3, 4, 5, 5, 4, 3])
+
+
+def deuce_probability(p) -> np.ndarray:
+    """Chance of winning a game from 10-10 (and any tie after it): two points in a row first."""
+    p = np.asarray(p, dtype=float)
+    q = 1 - p
+    with np.errstate(invalid="ignore"):
+        return np.where(p * p + q * q > 0, p * p / (p * p + q * q), 0.5)
+
+
+def game_table(p) -> np.ndarray:
+    """
+    Chance A wins the game from each score (a, b), a and b in 0..10, for
+    rally probabilities ``p``: shape ``p.shape + (11, 11)``.
+    """
+    p = np.asarray(p, dtype=float)
+    q = 1 - p
+    deuce = deuce_probability(p)
+    n = POINTS_TO_WIN
+    # One extra row and column for the states one point past 10
+    table = np.zeros(p.shape + (n + 1, n + 1))
+    table[..., n, :n - 1] = 1.0
+    table[..., n, n - 1] = p + q * deuce  # 11-10: one point up after 10-10
+    table[..., n - 1, n] = p * deuce  # 10-11
+    for a in range(n - 1, -1, -1):
+        for b in range(n - 1, -1, -1):
+            if a == b == n - 1:
+                table[..., a, b] = deuce
+            else:
+                table[..., a, b] = p * table[..., a + 1, b] + q * table[..., a, b + 1]
+    return table[..., :n, :n]
+
+
+def game_probability(table: np.ndarray, a: int, b: int) -> np.ndarray:
+    """
+    Read the chance A wins the game from score ``a``-``b`` off ``game_table``.
+    Past 10-10 only the lead matters: tied plays like 10-10, one up like
+    10-9 and one down like 9-10.
+    """
+    n = POINTS_TO_WIN
+    if max(a, b) >= n and abs(a - b) >= 2:
+        return np.full(table.shape[:-2], 1.0 if a > b else 0.0)
+    if min(a, b) >= n - 1:
+        a, b = n - 1 + min(a - b, 0), n - 1 - max(a - b, 0)
+    return table[..., a, b]
+
+
+def match_table(g) -> np.ndarray:
+    """
+    Chance A wins the match from each games score (i, j), i and j in 0..2,
+    for game-win probabilities ``g``: shape ``g.shape + (3, 3)``.
+    """
+    g = np.asarray(g, dtype=float)
+    n = GAMES_TO_WIN
+    table = np.zeros(g.shape + (n + 1, n + 1))
+    table[..., n, :n] = 1.0
+    for i in range(n - 1, -1, -1):
+        for j in range(n - 1, -1, -1):
+            table[..., i, j] = g * table[..., i + 1, j] + (1 - g) * table[..., i, j + 1]
+    return table[..., :n, :n]
+
+
+def scoreline_table(g) -> np.ndarray:
+    """Probabilities of ``SCORELINES`` for game-win probabilities ``g``: shape ``g.shape + (6,)``."""
+    g = np.asarray(g, dtype=float)
+    h = 1 - g
+    return np.stack([g ** 3, 3 * g ** 3 * h, 6 * g ** 3 * h ** 2,
+                     6 * h ** 3 * g ** 2, 3 * h ** 3 * g, h ** 3], axis=-1)
+
+
+_COLUMNS = ["rally_win", "game_win"] + SCORELINES + ["expected_games"]
+
+
+@lru_cache(maxsize=1)
+def rally_grid() -> Dict[str, np.ndarray]:
+    """
+    Both DPs over ``RALLY_GRID`` rally probabilities, computed once per
+    process: ``match_win`` and a (grid, column) table of ``_COLUMNS``.
+    """
+    p = np.linspace(0.0, 1.0, RALLY_GRID)
+    game_win = game_table(p)[..., 0, 0]
+    match_win = match_table(game_win)[..., 0, 0]
+    # Near p = 0 and 1 the match is decided to machine precision; keep the
+    # interpolation nodes strictly increasing
+    keep = np.concatenate(([True], np.diff(match_win) > 0))
+    p, game_win, match_win = p[keep], game_win[keep], match_win[keep]
+    scorelines = scoreline_table(game_win)
+    columns = np.column_stack((p, game_win, scorelines, scorelines @ _GAMES_PLAYED))
+    return {"match_win": match_win, "columns": columns}
+
+
+def interpolate(proba_a) -> np.ndarray:
+    """``_COLUMNS`` at match-win probabilities ``proba_a``: shape ``proba_a.shape + (9,)``."""
+    grid = rally_grid()
+    x, columns = grid["match_win"], grid["columns"]
+    proba_a = np.clip(np.asarray(proba_a, dtype=float), x[0], x[-1])
+    right = np.clip(np.searchsorted(x, proba_a, side="right"), 1, len(x) - 1)
+    weight = ((proba_a - x[right - 1]) / (x[right] - x[right - 1]))[..., None]
+    return columns[right - 1] * (1 - weight) + columns[right] * weight
+
+
+def scoreline_distribution(proba_a: float) -> Dict[str, object]:
+    """
+    Scoreline probabilities and expected games for a match A wins with
+    probability ``proba_a``, calibrated on the rally-probability grid.
+    """
+    values = dict(zip(_COLUMNS, interpolate(proba_a).tolist()))
+    return {
+        "rally_win_a": round(values["rally_win"], 4),
+        "game_win_a": round(values["game_win"], 3),
+        "scorelines": {name: round(values[name], 3) for name in SCORELINES},
+        "expected_games": round(values["expected_games"], 2),
+    }
@@ -0,0 +1,170 @@
+"""Shared score-string parsing engine.
+
+Every scraper and feature that looks at a score string ("11-8, 11-9, 5-11,
+11-7", "3-1", "11-8 11-9 ...") goes through ``parse_score``, which parses a
+string once into per-game point tuples and caches the result - the same
+score strings repeat across histories, sources and requests.
+``parse_scores`` does the same for a whole Series in one pass.
+"""
+import re
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+GAME_RE = re.compile(r'(\d+)-(\d+)')
+
+# A game decided by this many points or fewer counts as close
+CLOSE_GAME_MARGIN = 3
+
+
+class ParsedScore(NamedTuple):
+    """A score string parsed into per-game points (first-listed player first)."""
+    points_for: Tuple[int, ...]
+    points_against: Tuple[int, ...]
+    games_first: int
+    games_second: int
+    close_games: int
+    close_share: float
+
+    @property
+    def n_games(self) -> int:
+        return len(self.points_for)
+
+    @property
+    def details(self) -> str:
+        """Normalised "11-8, 11-9" rendering of the parsed games."""
+        return ", ".join(f"{a}-{b}" for a, b in zip(self.points_for, self.points_against))
+
+
+_EMPTY = ParsedScore((), (), 0, 0, 0, 0.5)
+
+
+def _close_share(text: str) -> float:
+    """
+    Share of close games, reading the string as ", "-separated games.
+
+    Parts without a dash still count towards the total; malformed games
+    make the whole string neutral (0.5).
+    """
+    try:
+        games = text.split(', ')
+        close_games = 0
+        for game in games:
+            if '-' in game:
+                p1_score, p2_score = map(int, game.split('-'))
+                if abs(p1_score - p2_score) <= CLOSE_GAME_MARGIN:
+                    close_games += 1
+        return close_games / len(games)
+    except ValueError:
+        return 0.5
+
+
+@lru_cache(maxsize=8192)
+def _parse(text: str) -> ParsedScore:
+    games = GAME_RE.findall(text)
+    points_for = tuple(int(a) for a, _ in games)
+    points_against = tuple(int(b) for _, b in games)
+    games_first = sum(1 for a, b in zip(points_for, points_against) if a > b)
+    games_second = sum(1 for a, b in zip(points_for, points_against) if b > a)
+    close_games = sum(1 for a, b in zip(points_for, points_against) if abs(a - b) <= CLOSE_GAME_MARGIN)
+    return ParsedScore(points_for, points_against, games_first, games_second, close_games, _close_share(text))
+
+
+def parse_score(score_text: Any) -> ParsedScore:
+    """Parse a score string once; non-strings and empty strings parse as no games."""
+    if not isinstance(score_text, str) or not score_text:
+        return _EMPTY
+    return _parse(score_text)
+
+
+def games_from_score(score_text: Any, result: str) -> Tuple[int, int]:
+    """
+    (first-listed games, second-listed games) for a score.
+
+    Falls back to a straight-games result when no games can be parsed.
+    """
+    parsed = parse_score(score_text)
+    if parsed.n_games:
+        return parsed.games_first, parsed.games_second
+    return (3, 0) if result == "W" else (0, 3)
+
+
+def winner_oriented_games(score_text: Any, result: str) -> Tuple[int, int]:
+    """
+    (games won, games lost) for a score written winner-first.
+
+    Falls back to a straight-games result when no games can be parsed.
+    """
+    parsed = parse_score(score_text)
+    if parsed.n_games:
+        if result == "W":
+            return parsed.games_first, parsed.games_second
+        return parsed.games_second, parsed.games_first
+    return (3, 0) if result == "W" else (0, 3)
+
+
+def result_from_score(score_text: Any, is_first_player: bool) -> str:
+    """W/L for the first or second listed player; "L" when undecidable."""
+    parsed = parse_score(score_text)
+    if is_first_player:
+        return "W" if parsed.games_first > parsed.games_second else "L"
+    return "W" if parsed.games_second > parsed.games_first else "L"
+
+
+SERIES_COLUMNS = [
+    "games_won",
+    "games_lost",
+    "close_games",
+    "points_won",
+    "points_lost",
+    "n_games",
+    "close_share",
+]
+
+
+def close_shares(scores: pd.Series) -> np.ndarray:
+    """``parse_score(x).close_share`` per row, parsing each distinct string once."""
+    codes, uniques = pd.factorize(scores, use_na_sentinel=False)
+    table = np.array([parse_score(text).close_share for text in uniques], dtype=float)
+    return table[codes]
+
+
+def parse_scores(scores: pd.Series, results: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Vectorized ``parse_score`` over a Series of score strings.
+
+    Each distinct string is parsed once and the per-string summaries are
+    broadcast back with a single take. Scores are read from the first-listed
+    player's side. When ``results`` is given, rows without parseable games
+    fall back to a straight-games result like ``games_from_score``.
+
+    Returns a DataFrame indexed like ``scores`` with ``SERIES_COLUMNS``.
+    """
+    codes, uniques = pd.factorize(scores, use_na_sentinel=False)
+
+    table = np.empty((len(uniques), len(SERIES_COLUMNS)), dtype=float)
+    for i, text in enumerate(uniques):
+        parsed = parse_score(text)
+        table[i] = (
+            parsed.games_first,
+            parsed.games_second,
+            parsed.close_games,
+            sum(parsed.points_for),
+            sum(parsed.points_against),
+            parsed.n_games,
+            parsed.close_share,
+        )
+    values = table[codes]
+
+    if results is not None:
+        no_games = values[:, 5] == 0
+        won = np.asarray(results == "W")
+        values[no_games, 0] = np.where(won[no_games], 3, 0)
+        values[no_games, 1] = np.where(won[no_games], 0, 3)
+
+    frame = pd.DataFrame(values, index=scores.index, columns=SERIES_COLUMNS)
+    int_columns = [c for c in SERIES_COLUMNS if c != "close_share"]
+    frame[int_columns] = frame[int_columns].astype(np.int64)
+    return frame
@@ -6,7 +6,26 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 import httpx
 from bs4 import BeautifulSoup
-import json
+
+try:
+    from . import dates, embedded_json, html_parsing, scores, transport
+except ImportError:
+    # For direct execution
+    import dates
+    import embedded_json
+    import html_parsing
+    import scores
+    import transport
+
+# PSA website typically has match history in tables or structured divs
+_PROFILE_SELECTORS = html_parsing.SelectorCascade([
+    ".matches-table table tbody tr",
+    ".results table tbody tr",
+    ".player-results table tbody tr",
+    "table.tournament-results tbody tr",
+    ".match-history .match-item",
+    "div[class*='match']",  # Fallback for div-based layouts
+])
 
 
 class PSAScraper:
@@ -21,6 +40,12 @@ class PSAScraper:
             "Connection": "keep-alive",
             "Upgrade-Insecure-Requests": "1",
         }
+        self._dates = self._new_date_parser()
+        self._generic_dates = dates.DateParser(dates.GENERIC_DATE_FORMATS, fallback=dates.year_start())
+
+    @staticmethod
+    def _new_date_parser() -> dates.DateParser:
+        return dates.DateParser(dates.PSA_DATE_FORMATS, fallback=dates.day_month_year)
 
     async def search_player(self, player_name: str) -> Optional[Dict]:
         """Enhanced player search on PSA website."""
@@ -28,16 +53,14 @@ class PSAScraper:
 
         search_url = f"{self.base_url}/search"
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout, follow_redirects=True) as client:
+        async with transport.async_client(headers=self.headers, timeout=self.timeout, follow_redirects=True) as client:
             params = {"query": player_name}
             try:
                 response = await client.get(search_url, params=params)
 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-
                     # Look for player links in search results
-                    player_links = soup.find_all('a', href=re.compile(r'/player/'))
+                    player_links = html_parsing.find_player_links(response.text)
                     print(f"   Found {len(player_links)} player links in search results")
 
                     # Try exact match first
@@ -92,7 +115,7 @@ class PSAScraper:
         """Direct player access using known URL slug."""
         player_url = f"{self.base_url}/player/{player_slug}/"
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+        async with transport.async_client(headers=self.headers, timeout=self.timeout) as client:
             try:
                 response = await client.get(player_url)
                 if response.status_code == 200:
@@ -116,11 +139,11 @@ class PSAScraper:
         print(f"   URL: {player_info['url']}")
 
         try:
-            async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout, follow_redirects=True) as client:
+            async with transport.async_client(headers=self.headers, timeout=self.timeout, follow_redirects=True) as client:
                 response = await client.get(player_info['url'])
 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = html_parsing.extract_subtrees(response.text, html_parsing.PSA_PROFILE_XPATH)
 
                     # Extract matches from the page
                     matches = self._extract_matches_from_profile(soup, player_info['name'], months_back)
@@ -147,26 +170,19 @@ class PSAScraper:
         matches = []
         cutoff_date = datetime.now() - timedelta(days=months_back * 30)
 
-        # PSA website typically has match history in tables or structured divs
-        # Look for match sections - common selectors on PSA site
-        selectors = [
-            ".matches-table table tbody tr",
-            ".results table tbody tr",
-            ".player-results table tbody tr",
-            "table.tournament-results tbody tr",
-            ".match-history .match-item",
-            "div[class*='match']",  # Fallback for div-based layouts
-        ]
-
-        for selector in selectors:
-            elements = soup.select(selector)
-            if elements:
-                print(f"   Found {len(elements)} elements with selector: {selector}")
-                for element in elements:
-                    match = self._parse_match_element(element, player_name, cutoff_date)
-                    if match:
-                        matches.append(match)
-                break
+        # One date format per page: detect it once and parse the date column in one go
+        self._dates = self._new_date_parser()
+
+        # Look for match sections - the first selector in cascade order that matches
+        selector, elements = _PROFILE_SELECTORS.select(soup)
+        if elements:
+            print(f"   Found {len(elements)} elements with selector: {selector}")
+            first_cells = [element.find(['td', 'th']) for element in elements if element.name == 'tr']
+            self._dates.parse_column(cell.get_text(strip=True) for cell in first_cells if cell)
+            for element in elements:
+                match = self._parse_match_element(element, player_name, cutoff_date)
+                if match:
+                    matches.append(match)
 
         # Also try to find matches in JSON data (common in modern sites)
         script_matches = self._extract_matches_from_scripts(soup, player_name, cutoff_date)
@@ -307,24 +323,14 @@ class PSAScraper:
             if not script_text:
                 continue
 
-            # Try to find JSON objects in script
-            json_patterns = [
-                r'var\s+matches\s*=\s*(\[.*?\]);',
-                r'const\s+results\s*=\s*(\[.*?\]);',
-                r'data:\s*(\[.*?\]),',
-                r'"matches":\s*(\[.*?\])',
-            ]
-
-            for pattern in json_patterns:
-                matches_data = re.search(pattern, script_text, re.DOTALL)
-                if matches_data:
-                    try:
-                        json_text = matches_data.group(1)
-                        data = json.loads(json_text)
-                        parsed_matches = self._parse_json_matches(data, player_name, cutoff_date)
-                        matches.extend(parsed_matches)
-                    except:
-                        continue
+            # Balanced-bracket scan: var matches = [...], "results": [...], __NEXT_DATA__ etc.
+            match_lists = embedded_json.extract_match_lists(
+                script_text,
+                script_id=script.get('id'),
+                script_type=script.get('type'),
+            )
+            for data in match_lists:
+                matches.extend(self._parse_json_matches(data, player_name, cutoff_date))
 
         return matches
 
@@ -394,37 +400,7 @@ class PSAScraper:
 
     def _parse_psa_date(self, date_text: str) -> Optional[datetime]:
         """Parse PSA website date formats."""
-        try:
-            # Common PSA date formats
-            formats = [
-                "%Y-%m-%d",
-                "%d %b %Y",
-                "%b %d, %Y",
-                "%d/%m/%Y",
-                "%m/%d/%Y",
-                "%d-%m-%Y",
-                "%Y/%m/%d"
-            ]
-
-            # Clean the date string
-            date_clean = re.sub(r'\s+', ' ', date_text.strip())
-
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_clean, fmt)
-                except ValueError:
-                    continue
-
-            # Try to extract date components
-            date_match = re.search(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})', date_text)
-            if date_match:
-                day, month, year = date_match.groups()
-                return datetime(int(year), int(month), int(day))
-
-        except:
-            pass
-
-        return None
+        return self._dates.parse(date_text)
 
     def _parse_psa_players_and_result(self, players_text: str, score_text: str, target_player: str) -> Tuple[Optional[str], str]:
         """Parse players and determine result from PSA format."""
@@ -478,45 +454,19 @@ class PSAScraper:
 
     def _determine_result_from_score(self, score_text: str, is_first_player: bool) -> str:
         """Determine result from score text."""
-        try:
-            games = re.findall(r'(\d+)-(\d+)', score_text)
-            if games:
-                first_player_games = sum(1 for p1, p2 in games if int(p1) > int(p2))
-                second_player_games = sum(1 for p1, p2 in games if int(p2) > int(p1))
-
-                if is_first_player:
-                    return "W" if first_player_games > second_player_games else "L"
-                else:
-                    return "W" if second_player_games > first_player_games else "L"
-        except:
-            pass
-
-        return "L"
+        return scores.result_from_score(score_text, is_first_player)
 
     def _parse_psa_score(self, score_text: str, result: str) -> Tuple[int, int, str]:
         """Parse detailed score information from PSA format."""
-        try:
-            # Handle various PSA score formats
-            if not score_text:
-                return (3, 0, "3-0") if result == "W" else (0, 3, "0-3")
-
-            # Clean score text
-            score_clean = re.sub(r'[^\d\-, ]', '', score_text).strip()
+        # Handle various PSA score formats
+        if not score_text:
+            return (3, 0, "3-0") if result == "W" else (0, 3, "0-3")
 
-            # Parse individual games
-            games = re.findall(r'(\d+)-(\d+)', score_clean)
-            if games:
-                player_games = sum(1 for p1, p2 in games if int(p1) > int(p2))
-                opponent_games = sum(1 for p1, p2 in games if int(p2) > int(p1))
-
-                # Reconstruct score string
-                score_parts = [f"{p1}-{p2}" for p1, p2 in games]
-                score_details = ", ".join(score_parts)
-
-                return player_games, opponent_games, score_details
-
-        except:
-            pass
+        # Clean score text, then parse individual games
+        score_clean = re.sub(r'[^\d\-, ]', '', score_text).strip()
+        parsed = scores.parse_score(score_clean)
+        if parsed.n_games:
+            return parsed.games_first, parsed.games_second, parsed.details
 
         # Fallback
         return (3, 0, "3-0") if result == "W" else (0, 3, "0-3")
@@ -533,14 +483,14 @@ class PSAScraper:
         print(f"   Profile URL: {profile_url}")
 
         try:
-            async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout, follow_redirects=True) as client:
+            async with transport.async_client(headers=self.headers, timeout=self.timeout, follow_redirects=True) as client:
                 # Get the player profile page
                 response = await client.get(profile_url)
                 if response.status_code != 200:
                     print(f"   ✗ Failed to load profile page: {response.status_code}")
                     return pd.DataFrame()
 
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = html_parsing.extract_subtrees(response.text, html_parsing.PSA_PROFILE_XPATH)
 
                 # Use our enhanced parsing methods
                 matches = self._extract_matches_from_profile(soup, player_name, months_back)
@@ -560,63 +510,16 @@ class PSAScraper:
 
     def _parse_date(self, date_text: str) -> Optional[datetime]:
         """Enhanced date parsing with multiple formats (from provided scraper)."""
-        try:
-            # Try different date formats
-            formats = [
-                "%Y-%m-%d",
-                "%d/%m/%Y",
-                "%m/%d/%Y",
-                "%d-%m-%Y",
-                "%b %d, %Y",
-                "%d %b %Y",
-            ]
-
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_text, fmt)
-                except ValueError:
-                    continue
-
-            # Try to extract year and parse
-            year_match = re.search(r'(\d{4})', date_text)
-            if year_match:
-                year = int(year_match.group(1))
-                if 2000 <= year <= 2030:
-                    # Return a rough date
-                    return datetime(year, 1, 1)
-
-        except Exception:
-            pass
-
-        return None
+        # Falls back to a rough 1 January date when only a year is found
+        return self._generic_dates.parse(date_text)
 
     def _extract_games_won(self, score_text: str, result: str) -> int:
         """Extract number of games won from score (from provided scraper)."""
-        try:
-            if '-' in score_text:
-                games = re.findall(r'(\d+)-(\d+)', score_text)
-                if games:
-                    if result == "W":
-                        return sum(1 for p1, p2 in games if int(p1) > int(p2))
-                    else:
-                        return sum(1 for p1, p2 in games if int(p2) > int(p1))
-        except:
-            pass
-        return 3 if result == "W" else 0  # Default assumption
+        return scores.winner_oriented_games(score_text, result)[0]
 
     def _extract_games_lost(self, score_text: str, result: str) -> int:
         """Extract number of games lost from score (from provided scraper)."""
-        try:
-            if '-' in score_text:
-                games = re.findall(r'(\d+)-(\d+)', score_text)
-                if games:
-                    if result == "W":
-                        return sum(1 for p1, p2 in games if int(p2) > int(p1))
-                    else:
-                        return sum(1 for p1, p2 in games if int(p1) > int(p2))
-        except:
-            pass
-        return 0 if result == "W" else 3  # Default assumption
+        return scores.winner_oriented_games(score_text, result)[1]
 
 
 # Global instances for different scraping approaches
@@ -0,0 +1,269 @@
+"""Per-player split statistics by opponent tier, round and month.
+
+``SplitCube`` aggregates each player's matches into cells of
+(month, opponent tier, round) holding wins, losses, games and points. It is
+maintained incrementally: ingesting a history only adds matches not seen
+before. Queries run on per-player prefix sums over months, so a window
+such as "vs top-20 in the last 12 months" or a whole season is two lookups
+and a sum over the (small, fixed) tier x round block.
+
+Opponent tiers are the ``model.TIERS`` bands plus a last "unranked" tier,
+taken from the ``opponent_rank`` column that ``opponents.attach_opponent_ranks``
+adds. The cube persists to ``predict/.cache/splits/cube.npz``.
+"""
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from . import history, scores
+from .model import TIERS, tier_index
+
+SPLITS_DIR = Path(__file__).parent / ".cache" / "splits"
+CUBE_STORE = SPLITS_DIR / "cube.npz"
+
+TIER_LABELS = [f"T{i + 1}" for i in range(len(TIERS))] + ["unranked"]
+ROUNDS = ["R32", "R16", "QF", "SF", "F", "other"]
+STATS = ["wins", "losses", "games_won", "games_lost", "points_won", "points_lost"]
+
+# Seasons run August to July and are named after both years, e.g. "2025-26"
+SEASON_START_MONTH = 8
+
+CELL_SHAPE = (len(TIER_LABELS), len(ROUNDS), len(STATS))
+TOP_20_TIERS = [i for i, (_, high) in enumerate(TIERS) if high <= 20]
+
+
+class SplitRecord(NamedTuple):
+    """Summed statistics of one query."""
+    wins: int
+    losses: int
+    games_won: int
+    games_lost: int
+    points_won: int
+    points_lost: int
+
+    @property
+    def matches(self) -> int:
+        return self.wins + self.losses
+
+    @property
+    def win_rate(self) -> Optional[float]:
+        return self.wins / self.matches if self.matches else None
+
+
+def tier_codes(opponent_rank) -> np.ndarray:
+    """``model.tier_index`` per rank; NaN (unranked) maps to the last tier."""
+    rank = np.asarray(opponent_rank, dtype=float)
+    return np.where(np.isnan(rank), len(TIERS), tier_index(rank))
+
+
+def _round_label(text: str) -> str:
+    text = text.strip().lower()
+    if "quarter" in text or text in ("qf", "qfs"):
+        return "QF"
+    if "semi" in text or text in ("sf", "sfs"):
+        return "SF"
+    if text in ("f", "final", "finals"):
+        return "F"
+    if text in ("r16", "round 2", "round of 16", "2nd round", "second round"):
+        return "R16"
+    if text in ("r32", "round 1", "round of 32", "1st round", "first round"):
+        return "R32"
+    return "other"
+
+
+def round_codes(rounds: pd.Series) -> np.ndarray:
+    """Index into ``ROUNDS`` per row, classifying each distinct round string once."""
+    codes, uniques = pd.factorize(rounds.fillna("").astype(str))
+    table = np.array([ROUNDS.index(_round_label(text)) for text in uniques], dtype=np.int64)
+    return table[codes] if len(uniques) else np.empty(0, dtype=np.int64)
+
+
+def month_index(date_ns: np.ndarray) -> np.ndarray:
+    """Months since year 0 (year * 12 + month - 1) for UTC nanosecond dates."""
+    dates = pd.DatetimeIndex(pd.to_datetime(date_ns, utc=True))
+    return dates.year.to_numpy(dtype=np.int64) * 12 + dates.month.to_numpy(dtype=np.int64) - 1
+
+
+def season_months(season: str) -> range:
+    """The month indices of a season named like "2025-26"."""
+    start = int(season.split("-")[0]) * 12 + SEASON_START_MONTH - 1
+    return range(start, start + 12)
+
+
+def _match_keys(matches: pd.DataFrame, date_ns: np.ndarray) -> List[str]:
+    if "match_id" in matches.columns:
+        ids = matches["match_id"].tolist()
+    else:
+        ids = [None] * len(matches)
+    opponents = matches["opponent"].astype(str).tolist() if "opponent" in matches.columns else [""] * len(matches)
+    score_text = matches["score"].astype(str).tolist() if "score" in matches.columns else [""] * len(matches)
+    keys = []
+    for match_id, when, opponent, score in zip(ids, date_ns.tolist(), opponents, score_text):
+        if match_id is not None and match_id == match_id:
+            keys.append(f"id:{int(match_id) if isinstance(match_id, float) else match_id}")
+        else:
+            keys.append(f"{when}:{opponent}:{score}")
+    return keys
+
+
+class SplitCube:
+    """Incrementally maintained (month, tier, round) aggregates per player."""
+
+    def __init__(self):
+        self._cells: Dict[str, Dict[int, np.ndarray]] = {}
+        self._keys: Dict[str, set] = {}
+        # Per-player prefix sums over sorted months, rebuilt lazily after ingests
+        self._prefix: Dict[str, tuple] = {}
+
+    def __contains__(self, player_id) -> bool:
+        return str(player_id) in self._cells
+
+    @property
+    def players(self) -> List[str]:
+        return list(self._cells)
+
+    def ingest(self, player_id, matches: pd.DataFrame) -> int:
+        """
+        Add a player's matches (date, result, games_won, games_lost, score,
+        round, opponent_rank); returns how many were new.
+        """
+        if matches is None or matches.empty:
+            return 0
+        player_id = str(player_id)
+        date_ns = history.utc_ns(matches["date"])
+        seen = self._keys.setdefault(player_id, set())
+        keys = _match_keys(matches, date_ns)
+        fresh = np.array([key not in seen for key in keys], dtype=bool)
+        fresh &= date_ns != history.NAT_NS
+        # Duplicates within the batch count once
+        first = ~pd.Series(keys).duplicated().to_numpy()
+        fresh &= first
+        if not fresh.any():
+            return 0
+        seen.update(key for key, is_new in zip(keys, fresh) if is_new)
+
+        rows = matches[fresh]
+        won = (rows["result"] == "W").to_numpy()
+        parsed = scores.parse_scores(rows["score"]) if "score" in rows.columns else None
+        values = np.column_stack([
+            won, ~won,
+            rows["games_won"].to_numpy(dtype=float), rows["games_lost"].to_numpy(dtype=float),
+            parsed["points_won"].to_numpy(dtype=float) if parsed is not None else np.zeros(len(rows)),
+            parsed["points_lost"].to_numpy(dtype=float) if parsed is not None else np.zeros(len(rows)),
+        ]).astype(float)
+        values = np.nan_to_num(values)
+
+        months = month_index(date_ns[fresh])
+        rank = rows["opponent_rank"] if "opponent_rank" in rows.columns else np.full(len(rows), np.nan)
+        tiers = tier_codes(rank)
+        round_column = rows["round"] if "round" in rows.columns else pd.Series("", index=rows.index)
+        rounds = round_codes(round_column)
+
+        # One bincount per statistic over (month, tier, round) cells
+        distinct_months, month_codes = np.unique(months, return_inverse=True)
+        cell = (month_codes * CELL_SHAPE[0] + tiers) * CELL_SHAPE[1] + rounds
+        n_cells = len(distinct_months) * CELL_SHAPE[0] * CELL_SHAPE[1]
+        block = np.stack([np.bincount(cell, values[:, s], minlength=n_cells) for s in range(len(STATS))], axis=-1)
+        block = block.reshape(len(distinct_months), *CELL_SHAPE)
+
+        player_cells = self._cells.setdefault(player_id, {})
+        for month, cells in zip(distinct_months.tolist(), block):
+            if month in player_cells:
+                player_cells[month] += cells
+            else:
+                player_cells[month] = cells
+        self._prefix.pop(player_id, None)
+        return int(fresh.sum())
+
+    def _prefix_sums(self, player_id: str):
+        prefix = self._prefix.get(player_id)
+        if prefix is None:
+            cells = self._cells.get(player_id, {})
+            months = np.array(sorted(cells), dtype=np.int64)
+            stacked = np.stack([cells[m] for m in months.tolist()]) if len(months) else np.empty((0, *CELL_SHAPE))
+            cumulative = np.concatenate((np.zeros((1, *CELL_SHAPE)), np.cumsum(stacked, axis=0)))
+            prefix = self._prefix[player_id] = (months, cumulative)
+        return prefix
+
+    def query(
+        self,
+        player_id,
+        start_month: Optional[int] = None,
+        end_month: Optional[int] = None,
+        tiers: Optional[Sequence[int]] = None,
+        rounds: Optional[Sequence[str]] = None,
+    ) -> SplitRecord:
+        """
+        Statistics over months in [start_month, end_month), restricted to tier
+        indices and round labels (all when None).
+        """
+        months, cumulative = self._prefix_sums(str(player_id))
+        start = 0 if start_month is None else int(np.searchsorted(months, start_month, side="left"))
+        end = len(months) if end_month is None else int(np.searchsorted(months, end_month, side="left"))
+        window = cumulative[end] - cumulative[start] if end > start else np.zeros(CELL_SHAPE)
+        if tiers is not None:
+            window = window[list(tiers)]
+        if rounds is not None:
+            window = window[:, [ROUNDS.index(r) for r in rounds]]
+        return SplitRecord(*(int(round(v)) for v in window.sum(axis=(0, 1))))
+
+    def last_months(self, player_id, reference_date, months: int = 12, **kwargs) -> SplitRecord:
+        """The ``months`` full calendar months before ``reference_date``'s month."""
+        reference_month = int(month_index(np.array([history.timestamp_ns(reference_date)]))[0])
+        return self.query(player_id, reference_month - months, reference_month, **kwargs)
+
+    def season(self, player_id, season: str, **kwargs) -> SplitRecord:
+        """A whole season, e.g. ``"2025-26"``."""
+        span = season_months(season)
+        return self.query(player_id, span.start, span.stop, **kwargs)
+
+    def vs_top20(self, player_id, reference_date) -> Dict[str, Optional[float]]:
+        """Record against top-20 opponents over the last 12 months, as a features entry."""
+        record = self.last_months(player_id, reference_date, 12, tiers=TOP_20_TIERS)
+        return {"matches": record.matches, "wins": record.wins, "win_rate": record.win_rate}
+
+    def save(self, path: Path = CUBE_STORE) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        player_ids = self.players
+        rows = [(code, month, cells) for code, pid in enumerate(player_ids)
+                for month, cells in sorted(self._cells[pid].items())]
+        keys = [(code, key) for code, pid in enumerate(player_ids) for key in sorted(self._keys.get(pid, ()))]
+        np.savez(
+            path,
+            player_ids=np.array(player_ids, dtype=str),
+            row_players=np.array([r[0] for r in rows], dtype=np.int64),
+            row_months=np.array([r[1] for r in rows], dtype=np.int64),
+            row_cells=np.array([r[2] for r in rows], dtype=float).reshape(len(rows), *CELL_SHAPE),
+            key_players=np.array([k[0] for k in keys], dtype=np.int64),
+            keys=np.array([k[1] for k in keys], dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path: Path = CUBE_STORE) -> "SplitCube":
+        """Restore a saved cube; an empty cube when nothing was saved."""
+        cube = cls()
+        path = Path(path)
+        if not path.exists():
+            return cube
+        with np.load(path) as store:
+            player_ids = store["player_ids"].tolist()
+            for code, month, cells in zip(store["row_players"].tolist(), store["row_months"].tolist(),
+                                          store["row_cells"]):
+                cube._cells.setdefault(player_ids[code], {})[month] = cells.copy()
+            for code, key in zip(store["key_players"].tolist(), store["keys"].tolist()):
+                cube._keys.setdefault(player_ids[code], set()).add(key)
+        return cube
+
+
+_default_cube: Optional[SplitCube] = None
+
+
+def default_cube() -> SplitCube:
+    """The process-wide cube, loaded from ``CUBE_STORE`` on first use."""
+    global _default_cube
+    if _default_cube is None:
+        _default_cube = SplitCube.load()
+    return _default_cube
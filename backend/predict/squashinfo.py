@@ -7,6 +7,24 @@ from typing import List, Dict, Optional
 import httpx
 from bs4 import BeautifulSoup
 
+try:
+    from . import dates, html_parsing, scores, transport
+except ImportError:
+    # For direct execution
+    import dates
+    import html_parsing
+    import scores
+    import transport
+
+# Try multiple table selectors
+_MATCH_ROW_SELECTORS = html_parsing.SelectorCascade([
+    "table.results tbody tr",
+    "table.matches tbody tr",
+    "table tbody tr",
+    ".results-table tbody tr",
+    ".match-history tbody tr"
+])
+
 
 class SquashInfoEnhanced:
     def __init__(self):
@@ -20,6 +38,11 @@ class SquashInfoEnhanced:
             "Connection": "keep-alive",
             "Upgrade-Insecure-Requests": "1",
         }
+        self._dates = self._new_date_parser()
+
+    @staticmethod
+    def _new_date_parser() -> dates.DateParser:
+        return dates.DateParser(dates.SQUASHINFO_DATE_FORMATS, fallback=dates.year_start(r'\b(20\d{2})\b'))
 
     async def search_player(self, player_name: str) -> Optional[Dict]:
         """Search for player on SquashInfo with multiple approaches."""
@@ -28,14 +51,12 @@ class SquashInfoEnhanced:
         # Try direct player directory
         search_url = f"{self.base_url}/players"
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+        async with transport.async_client(headers=self.headers, timeout=self.timeout) as client:
             try:
                 response = await client.get(search_url)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-
                     # Look for player links
-                    player_links = soup.find_all('a', href=re.compile(r'/player/\d+'))
+                    player_links = html_parsing.find_player_links(response.text, r'/player/\d+')
 
                     for link in player_links:
                         link_text = link.get_text(strip=True)
@@ -57,12 +78,12 @@ class SquashInfoEnhanced:
         """Try to find player via search functionality."""
         search_url = f"{self.base_url}/search"
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+        async with transport.async_client(headers=self.headers, timeout=self.timeout) as client:
             params = {"q": player_name}
             try:
                 response = await client.get(search_url, params=params)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = html_parsing.make_soup(response.text)
 
                     # Look for player results
                     player_results = soup.select('.player-result, .search-result')
@@ -89,11 +110,11 @@ class SquashInfoEnhanced:
         print(f"📊 Getting matches from SquashInfo for {player_info['name']}")
 
         try:
-            async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+            async with transport.async_client(headers=self.headers, timeout=self.timeout) as client:
                 response = await client.get(player_info['url'])
 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = html_parsing.extract_subtrees(response.text, html_parsing.SQUASHINFO_PROFILE_XPATH)
                     matches = self._parse_squashinfo_matches(soup, player_info['name'], months_back)
 
                     if matches:
@@ -117,24 +138,17 @@ class SquashInfoEnhanced:
         matches = []
         cutoff_date = datetime.now() - timedelta(days=months_back * 30)
 
-        # Try multiple table selectors
-        selectors = [
-            "table.results tbody tr",
-            "table.matches tbody tr",
-            "table tbody tr",
-            ".results-table tbody tr",
-            ".match-history tbody tr"
-        ]
-
-        for selector in selectors:
-            rows = soup.select(selector)
-            if rows:
-                print(f"   Found {len(rows)} rows with selector: {selector}")
-                for row in rows:
-                    match = self._parse_squashinfo_row(row, player_name, cutoff_date)
-                    if match:
-                        matches.append(match)
-                break
+        selector, rows = _MATCH_ROW_SELECTORS.select(soup)
+        if rows:
+            print(f"   Found {len(rows)} rows with selector: {selector}")
+            # One date format per page: detect it once and parse the date column in one go
+            self._dates = self._new_date_parser()
+            first_cells = [row.find(['td', 'th']) for row in rows]
+            self._dates.parse_column(cell.get_text(strip=True) for cell in first_cells if cell)
+            for row in rows:
+                match = self._parse_squashinfo_row(row, player_name, cutoff_date)
+                if match:
+                    matches.append(match)
 
         return matches
 
@@ -191,33 +205,8 @@ class SquashInfoEnhanced:
 
     def _parse_date(self, date_text: str) -> Optional[datetime]:
         """Parse various date formats."""
-        try:
-            formats = [
-                "%d %b %Y",
-                "%Y-%m-%d",
-                "%b %d, %Y",
-                "%d/%m/%Y",
-                "%m/%d/%Y",
-                "%d-%m-%Y"
-            ]
-
-            for fmt in formats:
-                try:
-                    return datetime.strptime(date_text, fmt)
-                except ValueError:
-                    continue
-
-            # Try to extract year from text
-            year_match = re.search(r'\b(20\d{2})\b', date_text)
-            if year_match:
-                year = int(year_match.group(1))
-                if 2000 <= year <= 2030:
-                    return datetime(year, 1, 1)
-
-        except:
-            pass
-
-        return None
+        # Falls back to a rough 1 January date when only a year is found
+        return self._dates.parse(date_text)
 
     def _parse_players_and_result(self, players_text: str, result_text: str, target_player: str) -> tuple:
         """Parse player names and determine result."""
@@ -270,33 +259,11 @@ class SquashInfoEnhanced:
 
     def _guess_result_from_score(self, score_text: str, is_first_player: bool) -> str:
         """Guess result from score text."""
-        try:
-            games = re.findall(r'(\d+)-(\d+)', score_text)
-            if games:
-                first_player_wins = sum(1 for p1, p2 in games if int(p1) > int(p2))
-                second_player_wins = sum(1 for p1, p2 in games if int(p2) > int(p1))
-
-                if is_first_player:
-                    return "W" if first_player_wins > second_player_wins else "L"
-                else:
-                    return "W" if second_player_wins > first_player_wins else "L"
-        except:
-            pass
-
-        return "L"
+        return scores.result_from_score(score_text, is_first_player)
 
     def _parse_games_from_score(self, score: str, result: str) -> tuple:
         """Parse games from score string."""
-        try:
-            games = re.findall(r'(\d+)-(\d+)', score)
-            if games:
-                player_games = sum(1 for p1, p2 in games if int(p1) > int(p2))
-                opponent_games = sum(1 for p1, p2 in games if int(p2) > int(p1))
-                return player_games, opponent_games
-        except:
-            pass
-
-        return (3, 0) if result == "W" else (0, 3)
+        return scores.games_from_score(score, result)
 
 
 # Global instance
@@ -5,7 +5,13 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 import json
-import re
+
+try:
+    from . import scores, transport
+except ImportError:
+    # For direct execution
+    import scores
+    import transport
 
 
 class SquashLevelsEnhanced:
@@ -25,7 +31,7 @@ class SquashLevelsEnhanced:
         # Try direct search API first
         search_url = f"{self.base_url}/api/search/players"
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=30.0) as client:
+        async with transport.async_client(headers=self.headers, timeout=30.0) as client:
             params = {"q": player_name, "limit": 10}
             try:
                 response = await client.get(search_url, params=params)
@@ -63,7 +69,7 @@ class SquashLevelsEnhanced:
             f"{self.base_url}/rankings/womens_rankings"
         ]
 
-        async with httpx.AsyncClient(headers=self.headers, timeout=30.0) as client:
+        async with transport.async_client(headers=self.headers, timeout=30.0) as client:
             for url in rankings_urls:
                 try:
                     response = await client.get(url)
@@ -96,7 +102,7 @@ class SquashLevelsEnhanced:
 
         for endpoint in endpoints:
             print(f"   Trying endpoint: {endpoint}")
-            async with httpx.AsyncClient(headers=self.headers, timeout=30.0) as client:
+            async with transport.async_client(headers=self.headers, timeout=30.0) as client:
                 try:
                     response = await client.get(endpoint, params=params)
                     print(f"   Endpoint response: {response.status_code}")
@@ -200,24 +206,9 @@ class SquashLevelsEnhanced:
 
     def _parse_games_from_score(self, score: str, result: str) -> tuple:
         """Parse games from score string with multiple format support."""
-        try:
-            if not score:
-                return (3, 0) if result == "W" else (0, 3)
-
-            # Handle various score formats:
-            # "11-8,11-9,5-11,11-7", "3-1", "11-8 11-9 5-11 11-7"
-            score_clean = score.replace(' ', ',')
-            games = re.findall(r'(\d+)-(\d+)', score_clean)
-
-            if games:
-                player_games = sum(1 for p1, p2 in games if int(p1) > int(p2))
-                opponent_games = sum(1 for p1, p2 in games if int(p2) > int(p1))
-                return player_games, opponent_games
-        except:
-            pass
-
-        # Default based on result
-        return (3, 0) if result == "W" else (0, 3)
+        # Handles "11-8,11-9,5-11,11-7", "3-1", "11-8 11-9 5-11 11-7";
+        # defaults based on result when nothing parses
+        return scores.games_from_score(score, result)
 
 
 # Global instance
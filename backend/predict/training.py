@@ -0,0 +1,148 @@
+"""Offline training of the logistic evidence component (``learned``).
+
+Every stored match gets the backtest's as-of columns (``backtest``: what
+was known before its day, ranks never from a later snapshot, graph Elo as
+/api/predict uses it), turned into ``learned.LEARNED_FEATURES``. Serving
+applies the model to graph Elo matchups only, as it was trained. An L2-regularised logistic regression
+(scikit-learn) is fitted without an intercept, on features scaled to unit
+variance but not centred, so the differences stay antisymmetric.
+
+The latest ``HOLDOUT`` share of matches is held out: the model is fitted on
+the earlier ones and its ``blend`` with the hand-built evidence picked from
+``BLENDS`` by the holdout log loss of the full ``model.predict_batch``.
+The model is then refitted on every match, the scaling folded into the
+weights, and the artifact written with ``learned.save_model``.
+
+Run from backend/:
+    python -m predict.training [--C 1.0] [--holdout 0.2]
+"""
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import backtest, history, learned, model, opponents, ratings
+from .backtest import EPSILON
+from .learned import LearnedModel
+from .opponents import RankingIndex
+from .ratings import EloEngine
+
+HOLDOUT = 0.2
+BLENDS = (0.0, 0.25, 0.5, 0.75, 1.0)
+REGULARISATION = 1.0
+
+
+class TrainingSet:
+    """``model.BATCH_COLUMNS``, ranks and outcomes of the replayed matches, in date order."""
+
+    __slots__ = ("columns", "rank_a", "rank_b", "a_won")
+
+    def __init__(self, columns: Dict[str, np.ndarray], rank_a: np.ndarray, rank_b: np.ndarray, a_won: np.ndarray):
+        self.columns, self.rank_a, self.rank_b, self.a_won = columns, rank_a, rank_b, a_won
+
+    def __len__(self) -> int:
+        return len(self.a_won)
+
+    def take(self, rows: slice) -> "TrainingSet":
+        return TrainingSet({name: values[rows] for name, values in self.columns.items()},
+                           self.rank_a[rows], self.rank_b[rows], self.a_won[rows])
+
+    def features(self) -> np.ndarray:
+        return learned.feature_table(self.columns, self.rank_a, self.rank_b)
+
+
+def training_set(
+    engine: EloEngine,
+    rankings: Optional[RankingIndex] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> TrainingSet:
+    """Every match from ``start`` to ``end`` with its as-of columns."""
+    replay = backtest.replay_log(engine, rankings)
+    first = 0 if start is None else int(np.searchsorted(replay.date_ns, history.timestamp_ns(start)))
+    stop = len(replay) if end is None else int(np.searchsorted(replay.date_ns, history.timestamp_ns(end)))
+    stop = max(stop, first)
+    return TrainingSet(backtest.match_columns(replay, first, stop), replay.rank_a[first:stop],
+                       replay.rank_b[first:stop], replay.a_won[first:stop])
+
+
+def fit_weights(x: np.ndarray, won: np.ndarray, regularisation: float = REGULARISATION) -> Tuple[float, ...]:
+    """Logistic regression weights on the raw features (scaling folded in)."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    pipeline = make_pipeline(StandardScaler(with_mean=False),
+                             LogisticRegression(C=regularisation, fit_intercept=False, max_iter=1000))
+    pipeline.fit(x, won)
+    scaler, regression = pipeline[0], pipeline[-1]
+    return tuple(float(w) for w in regression.coef_[0] / scaler.scale_)
+
+
+def scores(proba: np.ndarray, a_won: np.ndarray) -> Dict[str, float]:
+    """Log loss and Brier score."""
+    p_result = np.clip(np.where(a_won, proba, 1 - proba), EPSILON, 1.0)
+    return {
+        "log_loss": round(float(-np.log(p_result).mean()), 5),
+        "brier": round(float(((proba - a_won) ** 2).mean()), 5),
+    }
+
+
+def train(
+    data: TrainingSet,
+    holdout: float = HOLDOUT,
+    regularisation: float = REGULARISATION,
+) -> Tuple[LearnedModel, Dict[str, Any]]:
+    """
+    Fit on the earlier matches, pick the blend on the latest ``holdout``
+    share, refit on everything. Returns the model and the holdout metrics:
+    the hand-built model (blend 0), the logistic model alone, and each blend.
+    """
+    split = int(len(data) * (1 - holdout))
+    if split == 0 or split == len(data):
+        raise ValueError(f"Cannot hold out {holdout:.0%} of {len(data)} matches")
+    fitted, held = data.take(slice(0, split)), data.take(slice(split, None))
+    weights = fit_weights(fitted.features(), fitted.a_won, regularisation)
+
+    blends = {}
+    for blend in BLENDS:
+        candidate = LearnedModel(weights, blend)
+        proba = model.predict_batch(held.columns, held.rank_a, held.rank_b, learned=candidate)["proba_a"]
+        blends[blend] = scores(proba, held.a_won)
+    best = min(BLENDS, key=lambda b: blends[b]["log_loss"])
+    metrics = {
+        "fitted_matches": split,
+        "holdout_matches": len(held),
+        "hand_built": blends[0.0],
+        "logistic": scores(LearnedModel(weights).probabilities(held.columns, held.rank_a, held.rank_b), held.a_won),
+        "blends": {str(blend): s for blend, s in blends.items()},
+        "blend": best,
+    }
+    return LearnedModel(fit_weights(data.features(), data.a_won, regularisation), best), metrics
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train the logistic evidence component on the stored matches.")
+    parser.add_argument("--C", type=float, default=REGULARISATION, help="inverse L2 regularisation strength")
+    parser.add_argument("--holdout", type=float, default=HOLDOUT, help="share of the latest matches held out")
+    parser.add_argument("--start", type=pd.Timestamp, default=None, help="first match date to train on")
+    parser.add_argument("--end", type=pd.Timestamp, default=None, help="train on matches before this date")
+    parser.add_argument("--out", type=Path, default=learned.ARTIFACT_STORE)
+    args = parser.parse_args(argv)
+
+    data = training_set(ratings.default_engine(), opponents.load_index(), args.start, args.end)
+    trained, metrics = train(data, args.holdout, args.C)
+    print(json.dumps(metrics, indent=2))
+    if trained.blend == 0.0:
+        print("The trained model does not improve the holdout log loss; nothing written")
+        return
+    version = learned.save_model(trained, args.out, C=args.C, matches=len(data), metrics=metrics)
+    print(f"Wrote {args.out} (version {version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Record/replay HTTP transport for the scrapers and API clients.
+
+Every HTTP client in the package is built with ``async_client``, which routes
+requests through the transport activated with ``use_transport`` (or the
+``recording`` / ``replaying`` shortcuts) and through the normal network
+transport otherwise. ``RecordingTransport`` captures responses into a
+versioned fixture corpus under ``predict/fixtures/http/<version>/``;
+``ReplayTransport`` serves them back deterministically, optionally with
+injected latency, so scrapers can be tested and benchmarked offline.
+
+Record new fixtures from backend/:
+    python -m predict.transport record https://psa-api.ptsportsuite.com/results
+    python -m predict.transport record --from-cache https://psa-api.ptsportsuite.com/rankedplayers/male
+    python -m predict.transport list
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+try:
+    from . import cache
+except ImportError:
+    # For direct execution
+    import cache
+
+CORPUS_ROOT = Path(__file__).parent / "fixtures" / "http"
+CORPUS_VERSION = "v1"
+
+# Query parameters left out of fixture keys because they change on every run
+# (e.g. SquashLevels' rolling ``from`` cutoff date)
+VOLATILE_PARAMS = frozenset({"from"})
+
+# Response headers worth keeping; bodies are stored decoded, so encoding and
+# length headers would be wrong on replay
+KEPT_HEADERS = ("content-type", "location")
+
+_BODY_SUFFIXES = {"application/json": ".json", "text/html": ".html"}
+
+_active: ContextVar[Optional[httpx.AsyncBaseTransport]] = ContextVar("active_transport", default=None)
+
+
+def async_client(**kwargs) -> httpx.AsyncClient:
+    """An ``httpx.AsyncClient`` routed through the active transport, if any."""
+    transport = _active.get()
+    if transport is not None:
+        kwargs.setdefault("transport", transport)
+    return httpx.AsyncClient(**kwargs)
+
+
+@contextmanager
+def use_transport(transport: httpx.AsyncBaseTransport) -> Iterator[httpx.AsyncBaseTransport]:
+    """Route every ``async_client`` created in this context through ``transport``."""
+    token = _active.set(transport)
+    try:
+        yield transport
+    finally:
+        _active.reset(token)
+
+
+class Fixture(NamedTuple):
+    """One recorded response."""
+    method: str
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+    origin: str
+
+
+def request_key(method: str, url, ignore_params=VOLATILE_PARAMS) -> str:
+    """Canonical "METHOD url" key with sorted query parameters."""
+    url = httpx.URL(str(url))
+    params = sorted((k, v) for k, v in url.params.multi_items() if k not in ignore_params)
+    base = str(url.copy_with(query=None, fragment=None))
+    return f"{method.upper()} {base}?{urlencode(params)}" if params else f"{method.upper()} {base}"
+
+
+class FixtureCorpus:
+    """
+    A versioned set of recorded responses.
+
+    ``manifest.json`` maps request keys to response metadata; bodies are
+    stored as-is under ``<host>/<hash>.<ext>`` so they stay readable and
+    diffable. Several keys may share one body file.
+    """
+
+    def __init__(self, version: str = CORPUS_VERSION, root: Path = CORPUS_ROOT,
+                 ignore_params=VOLATILE_PARAMS):
+        self.version = version
+        self.path = Path(root) / version
+        self.ignore_params = frozenset(ignore_params)
+        self._bodies: Dict[str, bytes] = {}
+        manifest_file = self.path / "manifest.json"
+        if manifest_file.exists():
+            manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+            self.entries: Dict[str, Dict] = manifest.get("entries", {})
+        else:
+            self.entries = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def key(self, method: str, url) -> str:
+        return request_key(method, url, self.ignore_params)
+
+    def _load(self, key: str, entry: Dict) -> Fixture:
+        body_path = entry["body"]
+        if body_path not in self._bodies:
+            self._bodies[body_path] = (self.path / body_path).read_bytes()
+        method, url = key.split(" ", 1)
+        return Fixture(method, url, entry["status"], entry.get("headers", {}),
+                       self._bodies[body_path], entry.get("origin", "recorded"))
+
+    def lookup(self, method: str, url) -> Optional[Fixture]:
+        """The fixture recorded for a request, or None."""
+        key = self.key(method, url)
+        entry = self.entries.get(key)
+        return self._load(key, entry) if entry is not None else None
+
+    def __iter__(self) -> Iterator[Fixture]:
+        for key, entry in sorted(self.entries.items()):
+            yield self._load(key, entry)
+
+    def add(self, method: str, url, status_code: int, headers: Dict[str, str], body: bytes,
+            origin: str = "recorded", note: Optional[str] = None, body_path: Optional[str] = None) -> str:
+        """Store a response (and its body unless ``body_path`` reuses one); returns its key."""
+        key = self.key(method, url)
+        kept = {name: headers[name] for name in KEPT_HEADERS if name in headers}
+        if body_path is None:
+            content_type = kept.get("content-type", "").split(";")[0].strip()
+            suffix = _BODY_SUFFIXES.get(content_type, ".txt")
+            digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+            body_path = f"{httpx.URL(str(url)).host}/{digest}{suffix}"
+            body_file = self.path / body_path
+            body_file.parent.mkdir(parents=True, exist_ok=True)
+            body_file.write_bytes(body)
+            self._bodies[body_path] = body
+
+        entry = {
+            "status": status_code,
+            "headers": kept,
+            "body": body_path,
+            "origin": origin,
+            "recorded_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        if note:
+            entry["note"] = note
+        self.entries[key] = entry
+        return key
+
+    def save(self) -> None:
+        """Write the manifest."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest = {"version": self.version, "entries": dict(sorted(self.entries.items()))}
+        (self.path / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+
+
+class FixtureMissing(httpx.TransportError):
+    """Raised by a strict ``ReplayTransport`` for a request with no fixture."""
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Serve responses from a fixture corpus.
+
+    Each request waits ``latency`` seconds plus up to ``jitter`` seconds drawn
+    from a seeded generator, so timings are reproducible. Requests without a
+    fixture get a 404 (and are listed in ``misses``), or raise
+    ``FixtureMissing`` when ``strict``.
+    """
+
+    def __init__(self, corpus: Optional[FixtureCorpus] = None, latency: float = 0.0,
+                 jitter: float = 0.0, seed: int = 0, strict: bool = False):
+        self.corpus = corpus if corpus is not None else FixtureCorpus()
+        self.latency = latency
+        self.jitter = jitter
+        self.strict = strict
+        self._rng = random.Random(seed)
+        self.requests: List[str] = []
+        self.misses: List[str] = []
+
+    def _delay(self) -> float:
+        return self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = self.corpus.key(request.method, request.url)
+        self.requests.append(key)
+
+        delay = self._delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        fixture = self.corpus.lookup(request.method, request.url)
+        if fixture is None:
+            self.misses.append(key)
+            if self.strict:
+                raise FixtureMissing(f"No fixture for {key}", request=request)
+            return httpx.Response(404, request=request)
+
+        return httpx.Response(fixture.status_code, headers=fixture.headers,
+                              content=fixture.body, request=request)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Forward requests to ``inner`` (the network by default) and store the responses.
+
+    Call ``corpus.save()`` (done by ``recording``) to persist the manifest.
+    """
+
+    def __init__(self, corpus: Optional[FixtureCorpus] = None,
+                 inner: Optional[httpx.AsyncBaseTransport] = None, origin: str = "recorded"):
+        self.corpus = corpus if corpus is not None else FixtureCorpus()
+        self.inner = inner
+        self.origin = origin
+
+    async def _forward(self, request: httpx.Request) -> httpx.Response:
+        if self.inner is not None:
+            response = await self.inner.handle_async_request(request)
+            await response.aread()
+            return response
+        # A fresh connection pool per request: clients close their transport on exit
+        async with httpx.AsyncHTTPTransport() as network:
+            response = await network.handle_async_request(request)
+            await response.aread()
+            return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._forward(request)
+        # The body is stored decoded, so encoding headers are dropped with it
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        self.corpus.add(request.method, request.url, response.status_code,
+                        headers, response.content, origin=self.origin)
+        return httpx.Response(response.status_code, headers=headers,
+                              content=response.content, request=request)
+
+
+@contextmanager
+def replaying(version: str = CORPUS_VERSION, **kwargs) -> Iterator[ReplayTransport]:
+    """Replay the given corpus version for every client created in this context."""
+    with use_transport(ReplayTransport(FixtureCorpus(version), **kwargs)) as transport:
+        yield transport
+
+
+@contextmanager
+def recording(version: str = CORPUS_VERSION, **kwargs) -> Iterator[RecordingTransport]:
+    """Record every response made in this context into the given corpus version."""
+    transport = RecordingTransport(FixtureCorpus(version), **kwargs)
+    try:
+        with use_transport(transport):
+            yield transport
+    finally:
+        transport.corpus.save()
+
+
+def import_cached(corpus: FixtureCorpus, url: str, params: Optional[Dict] = None) -> Optional[str]:
+    """Copy a response from the 24-hour HTTP cache into the corpus; returns its key."""
+    cache_file = cache.CACHE_DIR / cache._cache_key(url, params)
+    if not cache_file.exists():
+        return None
+    body = cache_file.read_bytes()
+    content_type = "application/json" if body.lstrip()[:1] in (b"[", b"{") else "text/html"
+    request_url = httpx.URL(url, params=params)
+    return corpus.add("GET", request_url, 200, {"content-type": f"{content_type}; charset=utf-8"},
+                      body, origin="http-cache")
+
+
+async def _record(urls: List[str], version: str) -> None:
+    with recording(version):
+        async with async_client(follow_redirects=True, timeout=30.0) as client:
+            for url in urls:
+                response = await client.get(url)
+                print(f"{response.status_code} {url}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the HTTP fixture corpus.")
+    parser.add_argument("--version", default=CORPUS_VERSION, help="corpus version")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="record responses for URLs")
+    record.add_argument("urls", nargs="+")
+    record.add_argument("--from-cache", action="store_true",
+                        help="take bodies from the HTTP cache instead of the network")
+    commands.add_parser("list", help="list recorded requests")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        if args.from_cache:
+            corpus = FixtureCorpus(args.version)
+            for url in args.urls:
+                key = import_cached(corpus, url)
+                print(f"{'imported' if key else 'not cached'} {url}")
+            corpus.save()
+        else:
+            asyncio.run(_record(args.urls, args.version))
+    else:
+        corpus = FixtureCorpus(args.version)
+        for fixture in corpus:
+            print(f"{fixture.status_code} {fixture.origin:<10} {len(fixture.body):>9} B  "
+                  f"{fixture.method} {fixture.url}")
+
+
+if __name__ == "__main__":
+    main()
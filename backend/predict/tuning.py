@@ -0,0 +1,430 @@
+"""Parallel search over the model constants on a walk-forward objective.
+
+Each trial is a ``params.ModelParams`` scored by the log loss (or Brier
+score) of ``model.predict_batch`` over the backtest replay: every match
+predicted from what was known before its day (see ``backtest``).
+
+None of the feature columns depends on the model constants, so
+``tuning_data`` builds them once and a trial only re-scores. Trials are
+scored as /api/predict predicts: with graph Elo, which does not depend on
+the constants. History Elo (``elo_k``, ``elo_half_life_days``) only stands
+in when the graph lacks a player, so those two are tuned separately
+(``tune``): on the matches where a player had no earlier graph match, with
+``elo_diff`` replaced by history Elo. History Elo is a K multiple of
+decayed step sums; the sums are cached for each half-life on
+``HALF_LIFE_GRID`` (trials snap to it) and a trial rescales them by its K.
+The columns are kept under ``TUNING_DIR`` keyed by the data version, so
+later searches over the same data skip the replay.
+
+Strategies: ``grid`` (``GRID_POINTS`` values per searched dimension),
+``random`` (uniform in ``DIMENSIONS``) and ``bayes`` (a Gaussian process
+with expected improvement, proposing one batch per round). Trials run in a
+process pool that receives the cached columns once per worker. The best
+parameters are written with ``params.save_params`` for the service to load
+at startup.
+
+Run from backend/:
+    python -m predict.tuning [--strategy bayes] [--trials 200] [--workers 8]
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from . import backtest, history, model, opponents, pairwise, params, ratings
+from .backtest import EPSILON, N_WORKERS
+from .feature_matrix import BASE_ELO
+from .opponents import RankingIndex
+from .params import ModelParams
+from .ratings import EloEngine
+
+TUNING_DIR = Path(__file__).parent / ".cache" / "tuning"
+
+# Search bounds; the caps and H2H strengths are sorted after sampling, so the
+# caps fall and the strengths rise with the tier gap and H2H evidence
+DIMENSIONS: Dict[str, Tuple[float, float]] = {
+    **{f"underdog_caps.{i}": (0.05, 0.50) for i in range(6)},
+    **{f"h2h_strength.{i}": (0.0, 0.6) for i in range(4)},
+    "form_factor": (0.0, 0.4),
+    "momentum_factor": (0.0, 0.3),
+    "trend_factor": (0.0, 0.3),
+    "evidence_scale": (4.0, 20.0),
+    "elo_k": (8.0, 64.0),
+    "elo_half_life_days": (60.0, 360.0),
+}
+# History Elo constants, tuned on the matches without graph Elo
+ELO_DIMENSIONS = ["elo_k", "elo_half_life_days"]
+MODEL_DIMENSIONS = [d for d in DIMENSIONS if d not in ELO_DIMENSIONS]
+HALF_LIFE_GRID = tuple(float(d) for d in range(60, 361, 30))
+GRID_DIMENSIONS = ["form_factor", "momentum_factor", "trend_factor", "evidence_scale"]
+GRID_POINTS = 3
+N_TRIALS = 200
+BAYES_INITIAL = 16
+BAYES_CANDIDATES = 4096
+OBJECTIVES = ("log_loss", "brier")
+
+
+class Trial(NamedTuple):
+    params: ModelParams
+    scores: Dict[str, float]
+
+
+# ---------------------------------------------------------------------------
+# Cached columns
+# ---------------------------------------------------------------------------
+
+class TuningData(NamedTuple):
+    """Backtest columns that no constant changes, and history Elo step sums per half-life."""
+    columns: Dict[str, np.ndarray]
+    rank_a: np.ndarray
+    rank_b: np.ndarray
+    a_won: np.ndarray
+    elo_sums: Dict[float, Tuple[np.ndarray, np.ndarray]]
+
+    def __len__(self) -> int:
+        return len(self.a_won)
+
+    def graph_rated(self) -> np.ndarray:
+        """Matches where both players had an earlier match in the graph, so graph Elo applies."""
+        return (self.columns["matches_played_a"] > 0) & (self.columns["matches_played_b"] > 0)
+
+    def take(self, rows) -> "TuningData":
+        return TuningData({name: values[rows] for name, values in self.columns.items()},
+                          self.rank_a[rows], self.rank_b[rows], self.a_won[rows],
+                          {h: (sums_a[rows], sums_b[rows]) for h, (sums_a, sums_b) in self.elo_sums.items()})
+
+
+def _data_key(engine: EloEngine, start, end, half_lives) -> str:
+    text = json.dumps([pairwise.data_version(engine), model.BATCH_COLUMNS, str(start), str(end), list(half_lives)])
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+def tuning_data(
+    engine: EloEngine,
+    rankings: Optional[RankingIndex] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cache_dir: Optional[Path] = TUNING_DIR,
+    half_lives: Sequence[float] = HALF_LIFE_GRID,
+) -> TuningData:
+    """
+    Columns of every match from ``start`` to ``end`` (as ``run_backtest``
+    selects them), read from ``cache_dir`` when built before from the same
+    data (None to skip the cache).
+    """
+    half_lives = sorted(set(float(h) for h in half_lives))
+    path = None
+    if cache_dir is not None:
+        path = Path(cache_dir) / f"{_data_key(engine, start, end, half_lives)}.npz"
+        if path.exists():
+            with np.load(path) as store:
+                return TuningData(
+                    {name: store[f"column.{name}"] for name in model.BATCH_COLUMNS},
+                    store["rank_a"], store["rank_b"], store["a_won"],
+                    {h: (store[f"elo.{h}.a"], store[f"elo.{h}.b"]) for h in half_lives},
+                )
+
+    replay = backtest.replay_log(engine, rankings)
+    first = 0 if start is None else int(np.searchsorted(replay.date_ns, history.timestamp_ns(start)))
+    stop = len(replay) if end is None else int(np.searchsorted(replay.date_ns, history.timestamp_ns(end)))
+    stop = max(stop, first)
+    a, b, days = replay.a[first:stop], replay.b[first:stop], replay.day[first:stop]
+    data = TuningData(
+        backtest.match_columns(replay, first, stop),
+        replay.rank_a[first:stop], replay.rank_b[first:stop], replay.a_won[first:stop],
+        {h: (backtest.elo_step_sums(replay, a, days, h), backtest.elo_step_sums(replay, b, days, h))
+         for h in half_lives},
+    )
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"column.{name}": values for name, values in data.columns.items()}
+        for h, (sums_a, sums_b) in data.elo_sums.items():
+            arrays[f"elo.{h}.a"], arrays[f"elo.{h}.b"] = sums_a, sums_b
+        partial = path.with_name(path.name + ".partial")
+        with open(partial, "wb") as f:
+            np.savez(f, rank_a=data.rank_a, rank_b=data.rank_b, a_won=data.a_won, **arrays)
+        partial.replace(path)
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Trials
+# ---------------------------------------------------------------------------
+
+def history_elo(sums: np.ndarray, matches_played: np.ndarray, elo_k: float) -> np.ndarray:
+    """History Elo from ``elo_step_sums``, as ``feature_matrix`` computes it."""
+    return np.where(matches_played > 0, np.clip(BASE_ELO + elo_k * sums, 1000, 2500), BASE_ELO)
+
+
+def score(data: TuningData, trial: ModelParams, fallback: bool = False) -> Dict[str, float]:
+    """
+    Log loss and Brier score of ``trial`` over the cached matches: with
+    graph Elo, or (``fallback``) with history Elo from the trial's K and
+    half-life, as when the graph lacks a player.
+    """
+    columns = dict(data.columns)
+    if fallback:
+        sums_a, sums_b = data.elo_sums[trial.elo_half_life_days]
+        columns["elo_diff"] = (history_elo(sums_a, columns["matches_played_a"], trial.elo_k)
+                               - history_elo(sums_b, columns["matches_played_b"], trial.elo_k))
+    proba = model.predict_batch(columns, data.rank_a, data.rank_b, params=trial)["proba_a"]
+    outcome = data.a_won.astype(float)
+    p_result = np.clip(np.where(data.a_won, proba, 1 - proba), EPSILON, 1.0)
+    return {
+        "log_loss": float(-np.log(p_result).mean()),
+        "brier": float(((proba - outcome) ** 2).mean()),
+    }
+
+
+def to_params(point: Dict[str, float], base: ModelParams = params.DEFAULT_PARAMS) -> ModelParams:
+    """
+    ``base`` with the dimensions in ``point`` replaced: caps sorted falling,
+    H2H strengths rising, the half-life snapped to ``HALF_LIFE_GRID``.
+    """
+    values = base._asdict()
+    for name in ("underdog_caps", "h2h_strength"):
+        values[name] = list(values[name])
+    for dimension, value in point.items():
+        name, _, index = dimension.partition(".")
+        if index:
+            values[name][int(index)] = float(value)
+        else:
+            values[name] = float(value)
+    values["underdog_caps"] = tuple(sorted(values["underdog_caps"], reverse=True))
+    values["h2h_strength"] = tuple(sorted(values["h2h_strength"]))
+    grid = np.asarray(HALF_LIFE_GRID)
+    values["elo_half_life_days"] = float(grid[np.abs(grid - values["elo_half_life_days"]).argmin()])
+    return ModelParams(**values)
+
+
+def to_point(trial: ModelParams, dimensions: Sequence[str]) -> np.ndarray:
+    values = trial._asdict()
+    point = []
+    for dimension in dimensions:
+        name, _, index = dimension.partition(".")
+        point.append(values[name][int(index)] if index else values[name])
+    return np.array(point, dtype=float)
+
+
+# Set in each pool worker by _init_worker
+_worker_data: Optional[TuningData] = None
+_worker_fallback = False
+
+
+def _init_worker(data: TuningData, fallback: bool) -> None:
+    global _worker_data, _worker_fallback
+    _worker_data, _worker_fallback = data, fallback
+
+
+def _score_in_worker(trial: ModelParams) -> Dict[str, float]:
+    return score(_worker_data, trial, _worker_fallback)
+
+
+@contextmanager
+def _evaluator(
+    data: TuningData,
+    workers: int,
+    fallback: bool = False,
+) -> Iterator[Callable[[List[ModelParams]], List[Dict[str, float]]]]:
+    """A function scoring a batch of trials, serially or over one pool for the whole search."""
+    if workers <= 1:
+        yield lambda batch: [score(data, trial, fallback) for trial in batch]
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data, fallback)) as pool:
+        yield lambda batch: list(pool.map(_score_in_worker, batch,
+                                          chunksize=max(1, len(batch) // (4 * workers))))
+
+
+# ---------------------------------------------------------------------------
+# Search
+# ---------------------------------------------------------------------------
+
+def grid_points(dimensions: Sequence[str], points: int = GRID_POINTS) -> List[Dict[str, float]]:
+    axes = [np.linspace(*DIMENSIONS[d], points).tolist() for d in dimensions]
+    return [dict(zip(dimensions, values)) for values in itertools.product(*axes)]
+
+
+def random_points(dimensions: Sequence[str], n: int, rng: np.random.Generator) -> List[Dict[str, float]]:
+    low, high = np.array([DIMENSIONS[d] for d in dimensions]).T
+    return [dict(zip(dimensions, row)) for row in rng.uniform(low, high, (n, len(dimensions)))]
+
+
+def propose(
+    dimensions: Sequence[str],
+    points: np.ndarray,
+    values: np.ndarray,
+    n: int,
+    rng: np.random.Generator,
+) -> List[Dict[str, float]]:
+    """
+    The ``n`` random candidates with the highest expected improvement under
+    a Gaussian process fitted to the scored ``points`` (lower is better).
+    """
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+    low, high = np.array([DIMENSIONS[d] for d in dimensions]).T
+    x = (points - low) / (high - low)
+    y = (values - values.mean()) / (values.std() or 1.0)
+    kernel = ConstantKernel() * Matern(length_scale=np.ones(len(dimensions)), nu=2.5) + WhiteKernel(1e-3)
+    gp = GaussianProcessRegressor(kernel, random_state=int(rng.integers(2 ** 31)))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", ConvergenceWarning)
+        gp.fit(x, y)
+    candidates = rng.random((BAYES_CANDIDATES, len(dimensions)))
+    mean, std = gp.predict(candidates, return_std=True)
+    std = np.maximum(std, 1e-9)
+    gain = y.min() - mean
+    improvement = gain * norm.cdf(gain / std) + std * norm.pdf(gain / std)
+    best = candidates[np.argsort(improvement)[::-1][:n]]
+    return [dict(zip(dimensions, row)) for row in low + best * (high - low)]
+
+
+def search(
+    data: TuningData,
+    strategy: str = "random",
+    n_trials: int = N_TRIALS,
+    dimensions: Optional[Sequence[str]] = None,
+    workers: int = N_WORKERS,
+    objective: str = "log_loss",
+    base: Optional[ModelParams] = None,
+    seed: int = 0,
+    grid_size: int = GRID_POINTS,
+    fallback: bool = False,
+) -> List[Trial]:
+    """
+    Score (see ``score``) ``base`` (the active parameters by default) and
+    the trials of ``strategy`` over ``dimensions`` (by default
+    ``ELO_DIMENSIONS`` for ``fallback`` scoring, else ``GRID_DIMENSIONS`` for a grid and
+    ``MODEL_DIMENSIONS`` otherwise). Grids ignore ``n_trials``. Returns
+    every trial in the order scored, ``base`` first.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {OBJECTIVES}")
+    base = params.ACTIVE if base is None else base
+    if dimensions is None:
+        dimensions = ELO_DIMENSIONS if fallback else GRID_DIMENSIONS if strategy == "grid" else MODEL_DIMENSIONS
+    unknown = set(dimensions) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {sorted(unknown)}")
+    rng = np.random.default_rng(seed)
+    trials: List[Trial] = []
+
+    with _evaluator(data, workers, fallback) as evaluate:
+        def run(batch: List[ModelParams]) -> None:
+            trials.extend(Trial(p, s) for p, s in zip(batch, evaluate(batch)))
+
+        if strategy == "grid":
+            run([base] + [to_params(point, base) for point in grid_points(dimensions, grid_size)])
+        elif strategy == "random":
+            run([base] + [to_params(point, base) for point in random_points(dimensions, n_trials, rng)])
+        elif strategy == "bayes":
+            initial = min(n_trials, max(BAYES_INITIAL, workers))
+            run([base] + [to_params(point, base) for point in random_points(dimensions, initial, rng)])
+            while len(trials) <= n_trials:
+                batch = min(max(workers, 1), n_trials + 1 - len(trials))
+                points = np.array([to_point(t.params, dimensions) for t in trials])
+                values = np.array([t.scores[objective] for t in trials])
+                run([to_params(point, base) for point in propose(dimensions, points, values, batch, rng)])
+        else:
+            raise ValueError(f"Unknown strategy {strategy!r}; expected grid, random or bayes")
+    return trials
+
+
+def best_trial(trials: Sequence[Trial], objective: str = "log_loss") -> Trial:
+    return min(trials, key=lambda t: t.scores[objective])
+
+
+def tune(
+    data: TuningData,
+    strategy: str = "random",
+    n_trials: int = N_TRIALS,
+    dimensions: Optional[Sequence[str]] = None,
+    workers: int = N_WORKERS,
+    objective: str = "log_loss",
+    base: Optional[ModelParams] = None,
+    seed: int = 0,
+    grid_size: int = GRID_POINTS,
+) -> Tuple[List[Trial], List[Trial]]:
+    """
+    The two searches: model constants over every match with graph Elo, then
+    the history Elo constants from the best of those, over the matches
+    without graph Elo. ``dimensions`` (both kinds) default as in ``search``.
+    Returns both trial lists; the second is empty when there is nothing to
+    search or no match lacks graph Elo.
+    """
+    model_dimensions = elo_dimensions = None
+    if dimensions is not None:
+        model_dimensions = [d for d in dimensions if d not in ELO_DIMENSIONS]
+        elo_dimensions = [d for d in dimensions if d in ELO_DIMENSIONS]
+    if model_dimensions == []:
+        base = params.ACTIVE if base is None else base
+        trials = [Trial(base, score(data, base))]
+    else:
+        trials = search(data, strategy, n_trials, model_dimensions, workers, objective, base, seed, grid_size)
+    fallback = data.take(~data.graph_rated())
+    if elo_dimensions == [] or not len(fallback):
+        return trials, []
+    elo_trials = search(fallback, strategy, n_trials, elo_dimensions, workers, objective,
+                        best_trial(trials, objective).params, seed, grid_size, fallback=True)
+    return trials, elo_trials
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Search the model constants on a walk-forward objective.")
+    parser.add_argument("--strategy", choices=["grid", "random", "bayes"], default="random")
+    parser.add_argument("--trials", type=int, default=N_TRIALS)
+    parser.add_argument("--dims", default=None, help="comma-separated dimensions to search")
+    parser.add_argument("--grid-points", type=int, default=GRID_POINTS)
+    parser.add_argument("--objective", choices=OBJECTIVES, default="log_loss")
+    parser.add_argument("--start", type=pd.Timestamp, default=None, help="first match date to score")
+    parser.add_argument("--end", type=pd.Timestamp, default=None, help="score matches before this date")
+    parser.add_argument("--workers", type=int, default=N_WORKERS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=params.PARAMS_STORE)
+    args = parser.parse_args(argv)
+
+    engine = ratings.default_engine()
+    half_lives = set(HALF_LIFE_GRID) | {params.ACTIVE.elo_half_life_days}
+    data = tuning_data(engine, opponents.load_index(), args.start, args.end, half_lives=half_lives)
+    dimensions = args.dims.split(",") if args.dims else None
+    trials, elo_trials = tune(data, args.strategy, args.trials, dimensions, args.workers, args.objective,
+                              seed=args.seed, grid_size=args.grid_points)
+    baseline, best = trials[0], best_trial(trials, args.objective)
+    print(f"{len(trials)} trials over {len(data)} matches; {args.objective} "
+          f"{baseline.scores[args.objective]:.5f} -> {best.scores[args.objective]:.5f}")
+    improved = best.scores[args.objective] < baseline.scores[args.objective]
+    history_scores = {}
+    if elo_trials:
+        elo_best = best_trial(elo_trials, args.objective)
+        print(f"{len(elo_trials)} history Elo trials over {len(data) - int(data.graph_rated().sum())} matches "
+              f"without graph Elo; {args.objective} {elo_trials[0].scores[args.objective]:.5f} -> "
+              f"{elo_best.scores[args.objective]:.5f}")
+        if elo_best.scores[args.objective] < elo_trials[0].scores[args.objective]:
+            # Graph Elo scores do not depend on the history Elo constants
+            best, improved = Trial(elo_best.params, best.scores), True
+            history_scores = {"history_elo_scores": elo_best.scores, "history_elo_baseline": elo_trials[0].scores}
+    if not improved:
+        print("No trial beat the active parameters; nothing written")
+        return
+    version = params.save_params(best.params, args.out, objective=args.objective, scores=best.scores,
+                                 baseline=baseline.scores, strategy=args.strategy,
+                                 trials=len(trials) + len(elo_trials), matches=len(data),
+                                 data_version=pairwise.data_version(engine), **history_scores)
+    print(f"Wrote {args.out} (version {version})")
+    print(json.dumps(best.params._asdict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Tests for the walk-forward backtest: as-of features against the pairwise
+path, metrics against hand computation, and parallel runs against serial.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from predict import backtest, history, opponents, pairwise
+from predict.opponents import RankingIndex
+from predict.ratings import EloEngine, RatedMatch
+from tests.test_pairwise import random_graph
+
+
+def test_as_of_columns_match_pairwise():
+    """Every match's columns equal pair_columns as of the match date; ranks follow the snapshots"""
+    ids = [f"p{i}" for i in range(12)]
+    engine, _ = random_graph(ids, 600, seed=3)
+    rankings = RankingIndex.from_snapshots({
+        date(2024, 6, 1): [{"Id": pid, "Name": pid, "World Ranking": i + 1} for i, pid in enumerate(ids[:8])],
+        date(2025, 1, 1): [{"Id": pid, "Name": pid, "World Ranking": 20 - i} for i, pid in enumerate(ids[2:])],
+    })
+    replay = backtest.replay_log(engine, rankings)
+    columns = backtest.match_columns(replay, 0, len(replay))
+    assert np.all(replay.player_ids[replay.a] < replay.player_ids[replay.b])
+
+    for i in range(0, len(replay), 23):
+        reference = pd.Timestamp(int(replay.date_ns[i]), tz="UTC")
+        pair = [replay.player_ids[replay.a[i]], replay.player_ids[replay.b[i]]]
+        sides = pairwise.player_sides(pair, reference, elo_engine=engine)
+        expected = pairwise.pair_columns(sides, pairwise.graph_h2h(engine, pair, reference), [0], [1])
+        for name, value in expected.items():
+            assert columns[name][i] == pytest.approx(value[0], abs=1e-9, nan_ok=True), name
+        ranks = np.nan_to_num(rankings.ranks_as_of(pair, reference, fallback=False), nan=opponents.MAX_RANK)
+        assert [replay.rank_a[i], replay.rank_b[i]] == ranks.tolist()
+
+
+def test_replay_never_uses_later_rankings():
+    """A match before every snapshot is played at MAX_RANK, not at a rank published after it"""
+    ids = [f"p{i}" for i in range(6)]
+    engine, _ = random_graph(ids, 200, seed=4)
+    snapshot = date(2025, 1, 1)
+    rankings = RankingIndex.from_snapshots({
+        snapshot: [{"Id": pid, "Name": pid, "World Ranking": i + 1} for i, pid in enumerate(ids)],
+    })
+    replay = backtest.replay_log(engine, rankings)
+    before = replay.date_ns < history.timestamp_ns(pd.Timestamp(snapshot, tz="UTC"))
+    assert before.any() and (~before).any()
+    assert np.all(replay.rank_a[before] == opponents.MAX_RANK) and np.all(replay.rank_b[before] == opponents.MAX_RANK)
+    assert np.all(replay.rank_a[~before] <= len(ids))
+    assert np.isnan(rankings.ranks_at(["p0"], [history.timestamp_ns(pd.Timestamp("2024-06-01", tz="UTC"))],
+                                      fallback=False)[0])
+    assert rankings.ranks_at(["p0"], [history.timestamp_ns(pd.Timestamp("2024-06-01", tz="UTC"))])[0] == 1
+
+
+def test_metrics():
+    """Brier, log loss, accuracy, calibration and tier-gap totals; chunks merge by adding"""
+    proba = np.array([0.9, 0.8, 0.3, 0.55, 0.05])
+    won = np.array([True, False, False, True, False])
+    gap = np.array([0, 0, 2, 7, 2])
+    summary = backtest.summarise(backtest.metric_totals(proba, won, gap))
+    assert summary["matches"] == 5
+    assert summary["brier"] == round(np.mean((proba - won) ** 2), 4)
+    assert summary["log_loss"] == round(-np.mean(np.log(np.where(won, proba, 1 - proba))), 4)
+    assert summary["accuracy"] == 0.8
+    assert [b["bin"][0] for b in summary["calibration"]] == [0.0, 0.3, 0.5, 0.8, 0.9]
+    assert summary["by_tier_gap"] == [
+        {"tier_gap": 0, "matches": 2, "accuracy": 0.5, "brier": round((0.01 + 0.64) / 2, 4)},
+        {"tier_gap": 2, "matches": 2, "accuracy": 1.0, "brier": round((0.09 + 0.0025) / 2, 4)},
+        {"tier_gap": 5, "matches": 1, "accuracy": 1.0, "brier": round(0.45 ** 2, 4)},
+    ]
+    parts = [backtest.metric_totals(proba[s], won[s], gap[s]) for s in (slice(0, 2), slice(2, 5))]
+    assert backtest.summarise(backtest.merge_totals(parts)) == summary
+    assert backtest.summarise(backtest.metric_totals(np.empty(0), np.empty(0), np.empty(0)))["matches"] == 0
+
+
+def test_parallel_run_matches_serial(tmp_path):
+    """Date chunks scored by a pool give the serial predictions; later matches never change earlier ones"""
+    ids = [f"p{i}" for i in range(15)]
+    engine, _ = random_graph(ids, 900, seed=5)
+    replay = backtest.replay_log(engine)
+    bounds = backtest.date_chunks(replay.day, 0, len(replay), 100)
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(replay)
+    assert all(replay.day[stop - 1] < replay.day[stop] for _, stop in bounds[:-1])
+
+    serial = backtest.run_backtest(engine, path=tmp_path / "serial.parquet", workers=1, chunk_matches=100)
+    parallel = backtest.run_backtest(engine, path=tmp_path / "parallel.parquet", workers=3, chunk_matches=100)
+    assert serial["matches"] == len(engine)
+    assert {k: v for k, v in serial.items() if k not in ("results", "seconds")} == \
+        {k: v for k, v in parallel.items() if k not in ("results", "seconds")}
+    results = backtest.read_results(parallel["results"])
+    pd.testing.assert_frame_equal(results, backtest.read_results(serial["results"]))
+    assert list(results.columns) == backtest.RESULT_COLUMNS and results["date"].is_monotonic_increasing
+
+    cutoff = results["date"].iloc[len(results) // 2]
+    engine.ingest([RatedMatch("late", history.timestamp_ns(results["date"].iloc[-1]) + 1, "p0", "p1")])
+    earlier = backtest.run_backtest(engine, path=tmp_path / "later.parquet", end=cutoff, workers=1)
+    replayed = backtest.read_results(earlier["results"])
+    pd.testing.assert_frame_equal(replayed, results[results["date"] < cutoff].reset_index(drop=True))
+
+
+def test_elo_step_sums_exact_over_long_logs():
+    """Per-player sums stay exact on a 15-year log with a 60-day half-life"""
+    origin = pd.Timestamp("2010-01-01", tz="UTC")
+    rng = np.random.default_rng(12)
+    graph = []
+    # p0/p1 play across the whole log, p2/p3 only in its first year
+    for k, day in enumerate(range(0, 15 * 365, 3)):
+        pair = ("p0", "p1") if rng.random() < 0.5 else ("p1", "p0")
+        graph.append(RatedMatch(f"long{k}", history.timestamp_ns(origin + pd.Timedelta(days=day)), *pair))
+    for k, day in enumerate(range(1, 365, 5)):
+        pair = ("p2", "p3") if rng.random() < 0.6 else ("p3", "p2")
+        graph.append(RatedMatch(f"early{k}", history.timestamp_ns(origin + pd.Timedelta(days=day)), *pair))
+    engine = EloEngine()
+    engine.ingest(graph)
+    replay = backtest.replay_log(engine)
+
+    for player, offset in (("p2", 250), ("p0", 14 * 365)):
+        code = list(replay.player_ids).index(player)
+        rows = (replay.side_key // replay.span == code) & (replay.side_day < offset)
+        for half_life in (60.0, 180.0):
+            exact = sum(step * 0.5 ** ((offset - day) / half_life)
+                        for step, day in zip(replay.side_step[rows], replay.side_day[rows]))
+            sums = backtest.elo_step_sums(replay, np.array([code]), np.array([replay.day0 + offset]), half_life)
+            assert sums[0] == pytest.approx(exact, rel=1e-9), (player, half_life)
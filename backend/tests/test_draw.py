@@ -0,0 +1,89 @@
+"""
+Tests for the draw simulator: bracket placement and simulated round odds
+against the exact bracket recursion.
+"""
+import numpy as np
+import pytest
+
+from predict import draw
+from predict.ratings import EloEngine
+
+
+def exact_reach(probabilities, slots):
+    """Classic bracket recursion: chance each slot's player reaches each round."""
+    n = len(probabilities)
+    p = np.zeros((n + 1, n + 1))
+    p[:n, :n] = probabilities
+    p[:n, n] = 1.0
+    size = len(slots)
+    reach = [np.eye(n + 1)[slots]]  # (slot, player) indicator
+    block = 1
+    while block < size:
+        current = reach[-1]
+        nxt = np.zeros_like(current)
+        for start in range(0, size, 2 * block):
+            left = current[start:start + block].sum(axis=0)
+            right = current[start + block:start + 2 * block].sum(axis=0)
+            nxt[start] = left * (p @ right) + right * (p @ left)
+        reach.append(nxt)
+        block *= 2
+    return np.stack([r.sum(axis=0)[:n] for r in reach], axis=1)
+
+
+def test_bracket_placement():
+    """Top seeds meet last; byes go to the top seeds of a 48 draw"""
+    positions = draw.seed_positions(64)
+    assert sorted(positions) == list(range(64))
+    assert positions[0] == 0 and positions[1] == 63 and positions[32] == 1
+    assert draw.round_labels(64) == ["R64", "R32", "R16", "QF", "SF", "F", "title"]
+
+    slots = draw.bracket(48)
+    assert len(slots) == 64
+    bye_opponents = slots[np.flatnonzero(slots == 48) ^ 1]
+    assert sorted(bye_opponents) == list(range(16))
+    with pytest.raises(ValueError):
+        draw.bracket(1)
+    with pytest.raises(ValueError):
+        draw.round_labels(256)
+
+
+def test_simulation_matches_exact_recursion():
+    """Monte Carlo round odds agree with the exact recursion for 32 and 48 draws"""
+    rng = np.random.default_rng(7)
+    for n in (32, 48):
+        upper = np.triu(rng.uniform(0.05, 0.95, (n, n)), 1)
+        probabilities = upper + np.tril(1 - upper.T, -1) + np.eye(n) * 0.5
+        reach = draw.simulate_draw(probabilities, 200_000, seed=1)
+        expected = exact_reach(probabilities, draw.bracket(n))
+        assert reach.shape == expected.shape
+        assert np.abs(reach - expected).max() < 0.005
+        assert reach[:, -1].sum() == pytest.approx(1.0)
+    assert np.array_equal(draw.simulate_draw(probabilities, 5_000, seed=3),
+                          draw.simulate_draw(probabilities, 5_000, seed=3))
+
+
+def test_draw_endpoint(monkeypatch):
+    """POST /api/draw returns round odds for every seed"""
+    from fastapi.testclient import TestClient
+    from app import app
+    from predict import ratings, splits
+
+    # Empty stores instead of the persisted ones
+    monkeypatch.setattr(ratings, "default_engine", EloEngine)
+    monkeypatch.setattr(ratings, "current_strengths", lambda engine: None)
+    monkeypatch.setattr(splits, "default_cube", splits.SplitCube)
+
+    players = [f"draw-test-{i}" for i in range(48)]
+    response = TestClient(app).post("/api/draw", json={
+        "players": players, "ranks": list(range(1, 49)), "n_simulations": 5_000, "seed": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["size"] == 64 and body["rounds"][-1] == "title"
+    assert [p["player_id"] for p in body["players"]] == players
+    assert body["players"][0]["reach"]["R32"] == 1.0
+    assert sum(p["reach"]["title"] for p in body["players"]) == pytest.approx(1.0, abs=1e-3)
+
+    bad = TestClient(app).post("/api/draw", json={"players": ["a", "a", "b"]})
+    assert bad.status_code == 400
+    too_many = TestClient(app).post("/api/draw", json={"players": players, "n_simulations": 1_000_000})
+    assert too_many.status_code == 422
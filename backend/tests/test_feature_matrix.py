@@ -0,0 +1,62 @@
+"""
+Tests for the batched feature matrix: every row must equal
+``features.player_features`` for that player.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from predict import features
+from predict.feature_matrix import FEATURE_COLUMNS, feature_matrix, feature_matrix_from_table
+from tests.test_features import make_history
+
+REFERENCE_DATE = datetime(2025, 11, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def flatten(player):
+    """player_features as a flat row in FEATURE_COLUMNS order."""
+    row = {"elo": player["elo"], "elo_quality": player["elo_quality"],
+           **player["form"], **player["fatigue"], **player["trend"]}
+    return [row[column] for column in FEATURE_COLUMNS]
+
+
+def make_histories():
+    histories = {f"p{i}": make_history(n, seed=30 + i) for i, n in enumerate([0, 1, 2, 5, 20, 21, 60, 300])}
+    # Squeezed into the trend window so every period is populated
+    dense = make_history(120, seed=40)
+    dense["date"] = pd.Timestamp(REFERENCE_DATE) - pd.to_timedelta(
+        np.sort(np.random.default_rng(40).integers(0, 12 * 7 * 24, 120)), unit="h")
+    histories["dense"] = dense
+    # Only matches after the reference date
+    histories["future"] = make_history(3, seed=41).assign(date=pd.Timestamp(REFERENCE_DATE) + pd.Timedelta(days=1))
+    return histories
+
+
+def test_feature_matrix_matches_player_features():
+    """One vectorized pass gives the per-player features of every player"""
+    histories = make_histories()
+    matrix = feature_matrix(histories, REFERENCE_DATE)
+    assert list(matrix.columns) == FEATURE_COLUMNS
+    assert list(matrix.index) == list(histories)
+
+    for player_id, hist in histories.items():
+        expected = flatten(features.player_features(hist, REFERENCE_DATE))
+        got = matrix.loc[player_id].tolist()
+        assert np.allclose(got, expected, rtol=1e-12, atol=1e-15, equal_nan=True), player_id
+        # Elo accumulates in the sequential order, so it is exact
+        assert got[0] == expected[0]
+
+
+def test_feature_matrix_from_long_table():
+    """A long table with a player column gives the same matrix; unknown players get neutral rows"""
+    histories = make_histories()
+    table = pd.concat([hist.assign(player_id=player_id) for player_id, hist in histories.items()],
+                      ignore_index=True)
+    # Interleave players; each player's own order is kept
+    table = table.sample(frac=1.0, random_state=0).sort_values(["date"], ascending=False, kind="stable")
+    expected = feature_matrix({pid: table[table.player_id == pid] for pid in histories}, REFERENCE_DATE)
+
+    got = feature_matrix_from_table(table, REFERENCE_DATE, player_ids=list(histories) + ["nobody"])
+    pd.testing.assert_frame_equal(got.loc[list(histories)], expected)
+    assert got.loc["nobody"].tolist() == flatten(features.player_features(None, REFERENCE_DATE))
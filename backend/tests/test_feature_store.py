@@ -0,0 +1,91 @@
+"""
+Tests for the per-player feature store: hits within a day bucket, the
+same-day cutoff, and invalidation when a player's history changes.
+"""
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from predict import features
+from predict.feature_store import FeatureStore, date_bucket
+from tests.test_features import make_h2h, make_history
+
+REFERENCE_DATE = datetime(2025, 11, 1, 15, 45, tzinfo=timezone.utc)
+MIDNIGHT = datetime(2025, 11, 1, tzinfo=timezone.utc)
+
+
+def test_store_hits_within_bucket_and_persists(tmp_path):
+    """Same player, history and day: computed once, also across store instances; the history is kept"""
+    hist = make_history(120, seed=20)
+    store = FeatureStore(tmp_path)
+
+    first = store.player_features("5974", hist, REFERENCE_DATE)
+    again = store.player_features("5974", hist, MIDNIGHT.replace(hour=23))
+    assert (store.misses, store.hits) == (1, 1)
+    assert first == again == features.player_features(hist, MIDNIGHT)
+
+    reopened = FeatureStore(tmp_path)
+    assert reopened.player_features("5974", hist, REFERENCE_DATE) == first
+    assert (reopened.misses, reopened.hits) == (0, 1)
+
+    reopened.player_features("5974", hist, REFERENCE_DATE + pd.Timedelta(days=1))
+    assert reopened.misses == 1
+
+    # The history is kept for offline builds
+    kept = reopened.history("5974")
+    assert kept is not None and reopened.player_features("5974", kept, REFERENCE_DATE) == first
+    assert reopened.history("other") is None
+
+
+def test_store_counts_same_day_matches(tmp_path):
+    """Matches earlier on the reference day count, as on the live path; later ones do not"""
+    same_day = make_history(2, seed=26)
+    same_day["date"] = pd.to_datetime([MIDNIGHT.replace(hour=17), MIDNIGHT.replace(hour=9)], utc=True)
+    hist = pd.concat([same_day, make_history(60, seed=27)], ignore_index=True)
+    store = FeatureStore(tmp_path)
+
+    stored = store.player_features("5974", hist, REFERENCE_DATE)
+    live = features.player_features(hist, REFERENCE_DATE)
+    assert stored["form"] == live["form"] != features.player_features(hist, MIDNIGHT)["form"]
+    assert stored["fatigue"] == live["fatigue"]
+    assert store.player_features(None, hist, REFERENCE_DATE) == stored
+
+    later = store.player_features("5974", hist, MIDNIGHT.replace(hour=18))
+    assert store.misses == 2
+    assert later["form"] == features.player_features(hist, MIDNIGHT.replace(hour=18))["form"] != stored["form"]
+    assert store.player_features("5974", hist, MIDNIGHT.replace(hour=16)) == stored
+    assert store.hits == 1
+
+
+def test_store_invalidates_on_history_change(tmp_path):
+    """A new match changes the history version and recomputes the player"""
+    hist = make_history(60, seed=21)
+    store = FeatureStore(tmp_path, max_buckets=2)
+    for days in (3, 2, 1):
+        store.player_features("5974", hist, REFERENCE_DATE - pd.Timedelta(days=days))
+    assert len(store._load("5974")["buckets"]) == 2
+
+    newer = pd.concat([make_history(1, seed=22), hist], ignore_index=True)
+    store.player_features("5974", newer, REFERENCE_DATE)
+    assert store.misses == 4
+    assert list(store._load("5974")["buckets"]) == [date_bucket(REFERENCE_DATE).strftime("%Y-%m-%d")]
+
+    store.invalidate("5974")
+    store.player_features("5974", newer, REFERENCE_DATE)
+    assert store.misses == 5
+
+
+def test_extract_all_features_with_store(tmp_path):
+    """With a store, per-player features are those of the day bucket; H2H is per request"""
+    hist_a, hist_b = make_history(80, seed=23), make_history(50, seed=24)
+    h2h_df = make_h2h(5, seed=25)
+    store = FeatureStore(tmp_path)
+
+    stored = features.extract_all_features(hist_a, hist_b, h2h_df, 1, 9, "A", REFERENCE_DATE,
+                                           player_a_id=1, player_b_id=2, feature_store=store)
+    at_midnight = features.extract_all_features(hist_a, hist_b, h2h_df, 1, 9, "A", MIDNIGHT)
+    direct = features.extract_all_features(hist_a, hist_b, h2h_df, 1, 9, "A", REFERENCE_DATE)
+
+    assert stored["h2h"] == direct["h2h"]
+    for key in ("elo_a", "elo_b", "form_a", "form_b", "fatigue_a", "trend_b"):
+        assert stored[key] == at_midnight[key]
@@ -0,0 +1,246 @@
+"""
+Tests for the array-based feature implementations: each must reproduce the
+row-by-row computation exactly.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from predict import features
+from predict.history import MatchHistory
+
+REFERENCE_DATE = datetime(2025, 11, 1, 12, 30, tzinfo=timezone.utc)
+
+
+def make_history(n, seed=0, tz=timezone.utc):
+    """Random history, most recent first, with some awkward rows mixed in."""
+    rng = np.random.default_rng(seed)
+    offsets = np.sort(rng.integers(-3 * 86400, 730 * 86400, n))
+    dates = pd.to_datetime(REFERENCE_DATE.timestamp() - offsets, unit="s")
+    dates = dates.tz_localize(timezone.utc).tz_convert(tz) if tz else dates
+    games_won = rng.integers(0, 4, n)
+    games_lost = rng.integers(0, 4, n)
+    score_choices = ["11-8, 11-9, 5-11, 11-7", "11-3, 11-4, 11-2", "12-14, 11-9, 9-11, 11-13",
+                     "3-1", "", None, "11-9, w/o"]
+    hist = pd.DataFrame({
+        "date": dates,
+        "result": np.where(games_won > games_lost, "W", "L"),
+        "games_won": games_won,
+        "games_lost": games_lost,
+        "score": [score_choices[i] for i in rng.integers(0, len(score_choices), n)],
+    })
+    return hist
+
+
+def reference_elo(hist, reference_date, base_elo=1500):
+    """The sequential per-row Elo update."""
+    elo = base_elo
+    quality = []
+    for _, match in hist.iterrows():
+        match_date = match['date']
+        if match_date.tzinfo is None:
+            match_date = match_date.replace(tzinfo=timezone.utc)
+        weight = 0.5 ** ((reference_date - match_date).days / 180)
+        strength = features.estimate_opponent_strength(match)
+        quality.append(strength * weight)
+        adjusted_K = 32 * (1 + 0.5 * strength)
+        if match['result'] == 'W':
+            elo += adjusted_K * weight
+        else:
+            elo -= adjusted_K * weight * 0.5
+    return float(max(1000, min(2500, elo))), float(np.mean(quality))
+
+
+def test_enhanced_elo_matches_sequential_updates():
+    """Vectorized Elo is bit-identical to the row-by-row loop"""
+    for n, seed in [(1, 0), (20, 1), (150, 2), (2000, 3)]:
+        hist = make_history(n, seed)
+        assert features.calculate_enhanced_elo(hist, REFERENCE_DATE) == reference_elo(hist, REFERENCE_DATE)
+
+
+def test_enhanced_elo_naive_and_foreign_timezones():
+    """Naive dates read as UTC; other zones compare as instants"""
+    for tz in (None, timezone.utc, "Asia/Kolkata"):
+        hist = make_history(60, seed=4, tz=tz)
+        assert features.calculate_enhanced_elo(hist, REFERENCE_DATE) == reference_elo(hist, REFERENCE_DATE)
+
+
+def test_opponent_strengths_match_scalar():
+    """Row-wise strengths equal estimate_opponent_strength, including 0-0 and missing scores"""
+    hist = make_history(200, seed=5)
+    hist.loc[:4, ["games_won", "games_lost"]] = 0
+    expected = [features.estimate_opponent_strength(row) for _, row in hist.iterrows()]
+    assert features.opponent_strengths(hist).tolist() == expected
+
+
+def reference_quality_win_rate(hist, n_matches=20):
+    """The per-row quality-adjusted win rate."""
+    quality_scores = []
+    for _, match in hist.head(n_matches).iterrows():
+        strength = features.estimate_opponent_strength(match)
+        quality_scores.append(1.0 * (1 + strength) if match['result'] == 'W' else 0.0)
+    return float(np.mean(quality_scores) / 1.5)
+
+
+def reference_trend(hist, reference_date, weeks=12):
+    """Six boolean period masks and np.polyfit."""
+    cutoff = reference_date - pd.Timedelta(weeks=weeks)
+    recent = hist[hist['date'] >= cutoff]
+    if len(recent) < 3:
+        return {"trend": 0.0, "consistency": 0.5}
+    periods = []
+    for i in range(weeks // 2):
+        start = cutoff + pd.Timedelta(weeks=i * 2)
+        in_period = recent[(recent['date'] >= start) & (recent['date'] < start + pd.Timedelta(weeks=2))]
+        if len(in_period) > 0:
+            periods.append((in_period['result'] == 'W').mean())
+    if len(periods) < 2:
+        return {"trend": 0.0, "consistency": 0.5}
+    y = np.array(periods)
+    return {"trend": float(np.polyfit(np.arange(len(y)), y, 1)[0]),
+            "consistency": max(0.0, min(1.0, 1.0 - float(np.var(y))))}
+
+
+def test_enhanced_form_matches_row_loop():
+    """Quality-adjusted win rate is identical to the iterrows version"""
+    for n, seed in [(1, 0), (7, 1), (20, 2), (150, 3)]:
+        hist = make_history(n, seed)
+        form = features.calculate_enhanced_form(hist, n_matches=20)
+        assert form["quality_adjusted_win_rate"] == reference_quality_win_rate(hist)
+
+
+def test_performance_trend_matches_polyfit():
+    """Bucketed win rates and consistency are identical; the closed-form slope agrees with polyfit"""
+    checked = 0
+    for seed in range(40):
+        hist = make_history(400, seed)
+        expected = reference_trend(hist, REFERENCE_DATE)
+        got = features.calculate_performance_trend(hist, REFERENCE_DATE, weeks=12)
+        assert got["consistency"] == expected["consistency"]
+        assert abs(got["trend"] - expected["trend"]) < 1e-12
+        checked += expected["trend"] != 0.0
+    assert checked > 20
+
+
+def reference_fatigue(hist, reference_date):
+    """Date-column copy and two comparisons."""
+    dates = hist['date'].copy()
+    if dates.dt.tz is None:
+        dates = dates.dt.tz_localize(timezone.utc)
+    return {"matches_last_14d": int((dates >= reference_date - pd.Timedelta(days=14)).sum()),
+            "matches_last_30d": int((dates >= reference_date - pd.Timedelta(days=30)).sum())}
+
+
+def reference_h2h(h2h_df, reference_date):
+    """The DataFrame H2H statistics."""
+    if h2h_df['date'].dt.tz is None:
+        h2h_df = h2h_df.copy()
+        h2h_df['date'] = h2h_df['date'].dt.tz_localize(timezone.utc)
+    n_matches = len(h2h_df)
+    recent = h2h_df[h2h_df['date'] >= reference_date - pd.Timedelta(days=730)]
+    n_effective = float((0.5 ** ((reference_date - recent['date']).dt.days / 365)).sum()) if len(recent) else 0.0
+    game_diffs = (h2h_df['games_won'] - h2h_df['games_lost']) * h2h_df['winner'].apply(lambda x: 1 if x == 'A' else -1)
+    return {
+        "n_matches": n_matches,
+        "n_effective": n_effective,
+        "a_win_rate": float((h2h_df['winner'] == 'A').sum() / n_matches),
+        "avg_game_diff_a": float(game_diffs.mean()),
+        "days_since_last": int((reference_date - h2h_df['date'].max()).days),
+    }
+
+
+def make_h2h(n, seed, tz=timezone.utc):
+    h2h = make_history(n, seed, tz=tz)
+    h2h["winner"] = np.where(h2h["result"] == "W", "A", "B")
+    return h2h
+
+
+def test_fatigue_and_h2h_match_dataframe_versions():
+    """Array fatigue and H2H equal the DataFrame computations"""
+    for tz in (None, timezone.utc):
+        hist = make_history(150, seed=6, tz=tz)
+        assert features.calculate_fatigue(hist, REFERENCE_DATE) == reference_fatigue(hist, REFERENCE_DATE)
+        h2h_df = make_h2h(12, seed=7, tz=tz)
+        assert features.calculate_h2h(h2h_df, "A", REFERENCE_DATE) == reference_h2h(h2h_df, REFERENCE_DATE)
+
+
+def test_extract_all_features_accepts_match_history():
+    """Pre-converted MatchHistory inputs give the same features as DataFrames"""
+    hist_a, hist_b = make_history(150, seed=8, tz=None), make_history(40, seed=9)
+    h2h_df = make_h2h(6, seed=10)
+
+    from_frames = features.extract_all_features(hist_a, hist_b, h2h_df, 3, 40, "A", REFERENCE_DATE)
+    from_arrays = features.extract_all_features(
+        MatchHistory.from_frame(hist_a), MatchHistory.from_frame(hist_b),
+        MatchHistory.from_frame(h2h_df, won_column="winner", won_value="A"),
+        3, 40, "A", REFERENCE_DATE,
+    )
+    assert from_frames == from_arrays
+    assert from_frames["form_a"]["matches_played"] == 20
+    assert from_frames["h2h"]["n_matches"] == 6
+
+
+def test_extract_all_features_empty_histories():
+    """Empty or missing histories fall back to neutral features"""
+    empty = pd.DataFrame(columns=["date", "result", "games_won", "games_lost", "score"])
+    result = features.extract_all_features(empty, make_history(5, seed=11), None, 10, 20, "A", REFERENCE_DATE)
+    assert result["elo_a"] == 1500.0
+    assert result["form_a"]["win_rate"] == 0.5
+    assert result["h2h"]["days_since_last"] == 9999
+
+
+def test_extract_all_features_ignores_later_matches():
+    """Matches on or after the reference date do not leak into the features"""
+    hist_a, hist_b = make_history(80, seed=12), make_history(80, seed=13)
+    h2h_df = make_h2h(8, seed=14)
+    past = REFERENCE_DATE - pd.Timedelta(days=200)
+
+    full = features.extract_all_features(hist_a, hist_b, h2h_df, 3, 40, "A", past)
+    truncated = features.extract_all_features(
+        hist_a[hist_a["date"] < past], hist_b[hist_b["date"] < past], h2h_df[h2h_df["date"] < past],
+        3, 40, "A", past)
+    assert full == truncated
+
+
+def test_as_of_features_match_direct_computation():
+    """Prefix-sum as-of features equal the functions run on the truncated history"""
+    hist = make_history(400, seed=15)
+    # Date-only matches, as most sources report them
+    hist["date"] = hist["date"].dt.floor("D")
+    as_of = features.AsOfFeatures(hist)
+    arrays = MatchHistory.from_frame(hist)
+
+    for days_back in (-5, 0, 3, 40, 180, 400, 800):
+        moment = REFERENCE_DATE - pd.Timedelta(days=days_back)
+        before = arrays.before(moment)
+
+        elo, quality = features.calculate_enhanced_elo(before, moment) if len(before) else (1500.0, 0.0)
+        got_elo, got_quality = as_of.elo(moment)
+        assert np.isclose(got_elo, elo, rtol=1e-12) and np.isclose(got_quality, quality, rtol=1e-12)
+
+        expected_form = features.calculate_enhanced_form(before, n_matches=20)
+        got_form = as_of.form(moment)
+        assert np.isclose(got_form.pop("avg_game_diff"), expected_form.pop("avg_game_diff"), rtol=1e-12)
+        assert np.isclose(got_form.pop("quality_adjusted_win_rate"),
+                          expected_form.pop("quality_adjusted_win_rate"), rtol=1e-12)
+        assert got_form == expected_form
+
+        assert as_of.trend(moment) == features.calculate_performance_trend(before, moment)
+        assert as_of.fatigue(moment) == features.calculate_fatigue(before, moment)
+
+
+def test_as_of_elo_stays_exact_over_long_histories(monkeypatch):
+    """Decayed prefix sums are re-based, so decades of matches with a short half-life neither overflow nor drift"""
+    hist = make_history(600, seed=16)
+    hist["date"] = (REFERENCE_DATE - pd.to_timedelta(np.linspace(0, 20 * 365, 600).round(), unit="D")).floor("D")
+    arrays = MatchHistory.from_frame(hist)
+    for half_life in (60, 5):
+        monkeypatch.setattr(features, "ELO_HALF_LIFE_DAYS", half_life)
+        as_of = features.AsOfFeatures(hist)
+        for days_back in (1, 30, 3000, 7000):
+            moment = REFERENCE_DATE - pd.Timedelta(days=days_back)
+            before = arrays.before(moment)
+            elo, quality = features.calculate_enhanced_elo(before, moment)
+            got_elo, got_quality = as_of.elo(moment)
+            assert np.isclose(got_elo, elo, rtol=1e-12) and np.isclose(got_quality, quality, rtol=1e-12)
@@ -0,0 +1,124 @@
+"""
+Tests for the trained logistic evidence component: the versioned artifact,
+scalar against batch scoring, the blend in the model, and offline training.
+"""
+import json
+
+import numpy as np
+import pytest
+
+from predict import history, learned, model, training
+from predict.learned import LearnedModel
+from predict.ratings import EloEngine, RatedMatch
+from tests.test_features import REFERENCE_DATE
+from tests.test_model import random_matchup
+
+OTHER_MODEL = LearnedModel((0.004, 0.8, 0.5, 1.2, 0.3, 0.2, 0.35, -0.05, 0.02), blend=0.4)
+
+
+def with_fatigue(rng, features):
+    if rng.random() < 0.7:
+        for side in ("fatigue_a", "fatigue_b"):
+            recent = int(rng.integers(0, 5))
+            features[side] = {"matches_last_14d": recent, "matches_last_30d": recent + int(rng.integers(0, 5))}
+    return features
+
+
+def skill_graph(n_players, n_matches, seed=0):
+    """Matches won with probability logistic in a latent skill gap."""
+    rng = np.random.default_rng(seed)
+    skill = rng.normal(0, 1.2, n_players)
+    reference_ns = history.timestamp_ns(REFERENCE_DATE)
+    graph = []
+    for k in range(n_matches):
+        a, b = rng.choice(n_players, 2, replace=False)
+        if rng.random() > 1 / (1 + np.exp(skill[b] - skill[a])):
+            a, b = b, a
+        graph.append(RatedMatch(f"s{seed}-{k}", int(reference_ns - rng.integers(1, 900) * history.NS_PER_DAY),
+                                f"p{a}", f"p{b}"))
+    engine = EloEngine()
+    engine.ingest(graph)
+    return engine
+
+
+def test_artifact_round_trip(tmp_path):
+    """Saved models load back under their version; tampered or other-feature artifacts raise"""
+    path = tmp_path / "logistic.json"
+    assert learned.load_model(path) is None
+    version = learned.save_model(OTHER_MODEL, path, C=1.0)
+    assert version == OTHER_MODEL.version != OTHER_MODEL._replace(blend=0.5).version
+    assert learned.load_model(path) == OTHER_MODEL
+
+    record = json.loads(path.read_text())
+    path.write_text(json.dumps(dict(record, blend=0.9)))
+    with pytest.raises(ValueError):
+        learned.load_model(path)
+    path.write_text(json.dumps(dict(record, features=record["features"][:-1])))
+    with pytest.raises(ValueError):
+        learned.load_model(path)
+
+
+def test_scalar_probability_matches_batch():
+    """probability on feature dicts equals probabilities on their batch columns; swapping sides flips it"""
+    rng = np.random.default_rng(3)
+    matchups = [with_fatigue(rng, random_matchup(rng)) for _ in range(300)]
+    rank_a = rng.integers(1, 400, len(matchups))
+    rank_b = rng.integers(1, 400, len(matchups))
+    batch = OTHER_MODEL.probabilities(model.batch_columns(matchups), rank_a, rank_b)
+    for i, features in enumerate(matchups):
+        assert OTHER_MODEL.probability(features, int(rank_a[i]), int(rank_b[i])) == pytest.approx(batch[i]), i
+
+    swapped = [{
+        "elo_diff": -f["elo_diff"], "form_a": f["form_b"], "form_b": f["form_a"],
+        "trend_a": f.get("trend_b", {}), "trend_b": f.get("trend_a", {}),
+        "fatigue_a": f.get("fatigue_b"), "fatigue_b": f.get("fatigue_a"),
+        "h2h": dict(f["h2h"], a_win_rate=1 - f["h2h"]["a_win_rate"]),
+    } for f in matchups]
+    flipped = OTHER_MODEL.probabilities(model.batch_columns(swapped), rank_b, rank_a)
+    assert np.allclose(batch + flipped, 1.0)
+
+    # Extreme Elo gaps saturate rather than overflow
+    assert OTHER_MODEL.probability(dict(matchups[0], elo_diff=-1e6), 1, 1) == 0.0
+    assert OTHER_MODEL.probability(dict(matchups[0], elo_diff=1e6), 1, 1) == 1.0
+
+
+def test_predict_match_blends_learned_model(monkeypatch):
+    """predict_match with a loaded model equals predict_batch given it, graph Elo matchups only; blend 0 is hand-built"""
+    rng = np.random.default_rng(5)
+    matchups = [with_fatigue(rng, random_matchup(rng)) for _ in range(300)]
+    graph = rng.random(len(matchups)) < 0.8
+    for features, source in zip(matchups, np.where(graph, "graph", "history")):
+        features["elo_source"] = source
+    rank_a = rng.choice([1, 3, 6, 18, 40, 90, 150, 250], len(matchups))
+    rank_b = rng.integers(1, 400, len(matchups))
+    columns = model.batch_columns(matchups)
+    monkeypatch.setattr(model, "LEARNED", None)
+    plain = model.predict_batch(columns, rank_a, rank_b)["proba_a"]
+    assert np.array_equal(model.predict_batch(columns, rank_a, rank_b,
+                                              learned=OTHER_MODEL._replace(blend=0.0))["proba_a"], plain)
+    batch = model.predict_batch(columns, rank_a, rank_b, learned=OTHER_MODEL, graph_elo=graph)["proba_a"]
+    assert not np.allclose(batch[graph], plain[graph])
+    # History Elo fallbacks keep the hand-built evidence
+    assert np.array_equal(batch[~graph], plain[~graph])
+
+    monkeypatch.setattr(model, "LEARNED", OTHER_MODEL)
+    for i, features in enumerate(matchups):
+        assert model.predict_match(features, int(rank_a[i]), int(rank_b[i]))["proba"]["A"] == round(batch[i], 3), i
+
+
+def test_training_learns_skill(tmp_path):
+    """On matches decided by a latent skill the fit puts weight on Elo and beats a coin flip out of sample"""
+    data = training.training_set(skill_graph(30, 4000, seed=2))
+    assert len(data) == 4000
+    trained, metrics = training.train(data, holdout=0.25)
+    assert metrics["fitted_matches"] == 3000 and metrics["holdout_matches"] == 1000
+    assert trained.weights[learned.LEARNED_FEATURES.index("elo_diff")] > 0
+    assert metrics["logistic"]["log_loss"] < np.log(2)
+    assert metrics["blend"] in training.BLENDS
+    assert metrics["blends"][str(metrics["blend"])]["log_loss"] <= metrics["hand_built"]["log_loss"]
+
+    path = tmp_path / "logistic.json"
+    learned.save_model(trained, path, metrics=metrics)
+    assert learned.load_model(path) == trained
+    with pytest.raises(ValueError):
+        training.train(data, holdout=0.0)
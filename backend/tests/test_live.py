@@ -0,0 +1,104 @@
+"""
+Tests for in-play probabilities: state tables against the pre-match
+prediction and the game DP, score normalisation, and the registry fed by the
+stand-in feed.
+"""
+import asyncio
+
+import pytest
+
+from predict import live, scoreline
+
+
+def test_state_table_consistent_with_scoreline():
+    """0-0 reproduces the prediction; mid-game states follow the game DP"""
+    table = live.state_table(0.62)
+    assert table[0, 0, 0, 0] == pytest.approx(0.62, abs=1e-5)
+
+    game = scoreline.game_table(float(scoreline.interpolate(0.62)[0]))
+    match = scoreline.match_table(game[0, 0])
+    g = game[4, 7]
+    assert table[1, 2, 4, 7] == pytest.approx(g * match[2, 2])
+    assert table[0, 1, 4, 7] == pytest.approx(g * match[1, 1] + (1 - g) * match[0, 2])
+
+    # Past 10-10 only the lead counts; a finished game moves the games score
+    assert live.match_probability(table, 1, 1, 15, 15) == table[1, 1, 10, 10]
+    assert live.match_probability(table, 1, 1, 13, 14) == table[1, 1, 9, 10]
+    assert live.normalise_state(1, 1, 11, 7) == (2, 1, 0, 0)
+    assert live.normalise_state(2, 1, 12, 14) == (2, 2, 0, 0)
+    assert live.match_probability(table, *live.normalise_state(2, 1, 11, 9)) == 1.0
+    for bad in [(0, 0, 12, 8), (3, 0, 1, 0), (0, 0, -1, 0), (3, 3, 0, 0)]:
+        with pytest.raises(ValueError):
+            live.normalise_state(*bad)
+
+
+def test_registry_follows_stand_in_feed():
+    """Every feed message gets an update; decided matches end at 0 or 1 and leave"""
+    predictions = {f"m{i}": p for i, p in enumerate([0.15, 0.5, 0.62, 0.9])}
+    registry = live.LiveMatches()
+
+    async def replay():
+        return [registry.handle(message) async for message in live.feed_messages(predictions, seed=3)]
+
+    replies = asyncio.run(replay())
+    assert all(reply["type"] == "update" for reply in replies)
+    assert [r["proba"]["A"] for r in replies[:4]] == list(predictions.values())
+    final = [r for r in replies if r["finished"]]
+    assert sorted(r["match_id"] for r in final) == sorted(predictions)
+    assert all(r["proba"]["A"] in (0.0, 1.0) and max(r["games"]) == 3 for r in final)
+    assert len(registry) == 0
+
+    assert registry.handle({"type": "score", "match_id": "m0", "games": [0, 0], "points": [1, 0]})["type"] == "error"
+    registry.handle({"type": "start", "match_id": "x", "prediction": {"proba": {"A": 0.5, "B": 0.5}}})
+    assert registry.handle({"type": "score", "match_id": "x", "games": [0, 0]})["type"] == "error"
+    assert registry.handle({"type": "score", "match_id": "x", "games": [0, 0], "points": [3, 0]})["proba"]["A"] > 0.5
+
+
+def test_websocket_endpoint():
+    """Start and score messages round-trip over /api/live"""
+    from fastapi.testclient import TestClient
+    from app import app
+
+    with TestClient(app).websocket_connect("/api/live") as ws:
+        ws.send_json({"type": "start", "match_id": "ws1", "prediction": {"proba": {"A": 0.7, "B": 0.3}}})
+        assert ws.receive_json()["proba"] == {"A": 0.7, "B": 0.3}
+        ws.send_json({"type": "score", "match_id": "ws1", "games": [0, 2], "points": [3, 9]})
+        reply = ws.receive_json()
+        assert reply["proba"]["A"] < 0.3 and not reply["finished"]
+        ws.send_json({"type": "end", "match_id": "ws1"})
+        assert ws.receive_json() == {"type": "ended", "match_id": "ws1"}
+
+
+def test_websocket_matches_are_per_connection():
+    """A socket cannot score a match started on another one"""
+    from fastapi.testclient import TestClient
+    from app import app
+
+    client = TestClient(app)
+    with client.websocket_connect("/api/live") as first, client.websocket_connect("/api/live") as second:
+        first.send_json({"type": "start", "match_id": "m1", "prediction": {"proba": {"A": 0.7, "B": 0.3}}})
+        assert first.receive_json()["type"] == "update"
+        second.send_json({"type": "score", "match_id": "m1", "games": [0, 0], "points": [3, 0]})
+        assert second.receive_json()["type"] == "error"
+        first.send_json({"type": "score", "match_id": "m1", "games": [0, 0], "points": [3, 0]})
+        assert first.receive_json()["type"] == "update"
+
+
+def test_registry_caps_and_expires_matches(monkeypatch):
+    """A full registry refuses new matches until idle ones pass the TTL"""
+    clock = [1000.0]
+    monkeypatch.setattr(live.time, "monotonic", lambda: clock[0])
+    registry = live.LiveMatches(max_matches=2, ttl_seconds=60.0)
+    start = {"type": "start", "prediction": {"proba": {"A": 0.5, "B": 0.5}}}
+    for match_id in ("a", "b"):
+        assert registry.handle(dict(start, match_id=match_id))["type"] == "update"
+    assert registry.handle(dict(start, match_id="c"))["type"] == "error"
+    assert registry.handle(dict(start, match_id="a"))["type"] == "update"
+
+    clock[0] += 30
+    assert registry.handle({"type": "score", "match_id": "a", "games": [0, 0], "points": [1, 0]})["type"] == "update"
+    clock[0] += 45
+    assert registry.handle({"type": "score", "match_id": "b", "games": [0, 0], "points": [1, 0]})["type"] == "error"
+    assert "b" not in registry.matches
+    assert registry.handle(dict(start, match_id="c"))["type"] == "update"
+    assert sorted(registry.matches) == ["a", "c"]
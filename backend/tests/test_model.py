@@ -11,6 +11,7 @@ Critical tests to verify:
 
 import pytest
 from datetime import datetime
+import numpy as np
 import pandas as pd
 from predict import model, features
 
@@ -182,6 +183,89 @@ def test_explanation_generation():
         assert len(driver["note"]) > 10
 
 
+def random_matchup(rng):
+    """Feature dict with optional blocks present or missing at random."""
+    h2h_n = int(rng.choice([0, 1, 2, 3, 5, 8]))
+    features = {
+        "elo_diff": float(rng.normal(0, 250)),
+        "form_a": {"win_rate": rng.random(), "matches_played": int(rng.integers(0, 25))},
+        "form_b": {"win_rate": rng.random(), "matches_played": int(rng.integers(0, 25))},
+        "h2h": {"n_matches": h2h_n, "n_effective": h2h_n * rng.random(),
+                "a_win_rate": float(rng.choice([0.0, 0.2, 0.5, 0.8, 1.0]))},
+    }
+    if rng.random() < 0.5:
+        features["form_a"].update(quality_adjusted_win_rate=rng.random(), recent_momentum=rng.random() - 0.5)
+        features["trend_a"] = {"trend": rng.normal(0, 0.1)}
+    if rng.random() < 0.5:
+        features["strength"] = {"diff": float(rng.normal(0, 200)), "deviation": float(rng.uniform(20, 300))}
+    if rng.random() < 0.5:
+        features["vs_top20_a"] = {"matches": int(rng.integers(0, 20)), "win_rate": rng.random()}
+        features["vs_top20_b"] = {"matches": 0, "wins": 0, "win_rate": None}
+    return features
+
+
+def test_predict_batch_matches_scalar():
+    """The vectorized predictor reproduces predict_match on every matchup"""
+    rng = np.random.default_rng(7)
+    matchups = [random_matchup(rng) for _ in range(400)]
+    rank_a = rng.choice([0, 1, 3, 5, 6, 18, 40, 90, 150, 180, 250, 600], len(matchups))
+    rank_b = np.where(rng.random(len(matchups)) < 0.1, rank_a, rng.integers(1, 400, len(matchups)))
+
+    batch = model.predict_batch(model.batch_columns(matchups), rank_a, rank_b)
+    for i, features in enumerate(matchups):
+        scalar = model.predict_match(features, int(rank_a[i]), int(rank_b[i]))
+        assert round(batch["proba_a"][i], 3) == scalar["proba"]["A"], i
+        assert ("A" if batch["winner_a"][i] else "B") == scalar["winner"]
+    assert model.tier_index([0, 1, 5, 6, 9999, 10000]).tolist() == [5, 0, 0, 1, 5, 5]
+
+    # Rank 0 falls in the lowest tier: as a favourite it gets the no-gap prior, never a negative cap index
+    caps = model.PARAMS.underdog_caps
+    assert model.ranking_prior(0, 3) == (1 - caps[0], caps[0])
+    assert model.ranking_prior(3, 0) == (caps[0], 1 - caps[0])
+
+
+def test_override_conditions_batch_matches_scalar():
+    """The batch override conditions agree with the scalar ones, incl. a favourite A losing the H2H"""
+    rng = np.random.default_rng(9)
+    matchups = [random_matchup(rng) for _ in range(400)]
+    for features in matchups:
+        if rng.random() < 0.5:
+            features["h2h"].update(n_matches=int(rng.integers(5, 9)), a_win_rate=float(rng.choice([0.1, 0.3, 0.7, 0.9])))
+    rank_a = rng.integers(1, 400, len(matchups))
+    rank_b = rng.integers(1, 400, len(matchups))
+    columns = model.batch_columns(matchups)
+
+    batch = model.batch_override_conditions(columns, rank_a, rank_b)
+    scalar = [model.check_override_conditions(f, int(rank_a[i]), int(rank_b[i]), 0) for i, f in enumerate(matchups)]
+    assert batch.tolist() == scalar
+
+    # Favourite A dominated in the H2H: with an Elo lead for B that is two conditions
+    favourite = {"elo_diff": -200.0, "h2h": {"n_matches": 6, "n_effective": 4.0, "a_win_rate": 0.2},
+                 "form_a": {"win_rate": 0.5, "matches_played": 10}, "form_b": {"win_rate": 0.5, "matches_played": 10}}
+    assert model.check_override_conditions(favourite, 3, 60, 3)
+    assert model.batch_override_conditions(model.batch_columns([favourite]), [3], [60]).tolist() == [True]
+
+
+def test_beta_ci_exact_and_thread_safe():
+    """Exact quantiles agree with heavy sampling; nothing touches the global RNG"""
+    state = np.random.get_state()[1].copy()
+    features = random_matchup(np.random.default_rng(8))
+    model.predict_match(features, 10, 40, seed=1)
+    model.bootstrap_ci(0.7, 0.3, n_bootstrap=500, seed=42)
+    assert (np.random.get_state()[1] == state).all()
+
+    samples = np.random.default_rng(0).beta(35, 15, size=400_000)
+    ci_a, ci_b = model.beta_ci(0.7)
+    assert np.allclose(ci_a, np.percentile(samples, [2.5, 97.5]), atol=2e-3)
+    assert ci_b == [round(1 - ci_a[1], 3), round(1 - ci_a[0], 3)]
+    assert model.bootstrap_ci(0.7, 0.3, seed=3) == model.bootstrap_ci(0.7, 0.3, seed=3)
+
+    p_a = np.random.default_rng(9).random(300)
+    batch_a, batch_b = model.beta_intervals(p_a)
+    for i, p in enumerate(p_a):
+        assert (batch_a[i].tolist(), batch_b[i].tolist()) == model.beta_ci(p)
+
+
 if __name__ == "__main__":
     # Run critical test
     print("Running critical test: Hapers vs Farag")
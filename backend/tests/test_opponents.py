@@ -0,0 +1,131 @@
+"""
+Tests for the opponent-rank join and strength-of-schedule columns.
+"""
+import json
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predict import opponents
+from predict.opponents import RankingIndex
+
+PSA_CACHE = Path(opponents.__file__).parent / ".cache" / "psa"
+API_RESULTS = Path(opponents.__file__).parent / "psa_matches_2778.json"
+
+
+def ranked(*players):
+    return [{"Id": pid, "Name": name, "World Ranking": rank, "Total Points": 1000.0 / rank}
+            for pid, name, rank in players]
+
+
+def two_snapshots():
+    return RankingIndex.from_snapshots({
+        date(2025, 3, 1): ranked(("1", "Ali Farag", 2), ("2", "Nour El Sherbini", 1), ("3", "Joel Makin", 6)),
+        date(2025, 6, 1): ranked(("1", "Ali Farag", 4), ("2", "Nour El Sherbini", 1)),
+    })
+
+
+def test_as_of_join_uses_rank_in_force_on_match_date():
+    """Each match sees the latest snapshot on or before its date; earlier matches fall back"""
+    matches = pd.DataFrame({
+        "date": pd.to_datetime(["2025-07-01", "2025-06-01", "2025-04-01", "2025-01-01", "2025-07-01", None]),
+        "opponent": ["Ali Farag", "ali farag", "Ali Farag", "Ali Farag", "Joel Makin", "Ali Farag"],
+        "opponent_id": [None, None, 1, 1.0, None, None],
+    })
+    out = opponents.attach_opponent_ranks(matches, two_snapshots())
+    assert out["opponent_rank"].tolist() == [4, 4, 2, 2, 6, 2]
+    assert out["rank_as_of"].tolist() == [True, True, True, False, True, False]
+    assert out["opponent_quality"].iloc[1] == opponents.rank_quality(4)
+
+
+def test_resolution_prefers_ids_and_normalises_names():
+    """A ranked id wins over the name; accents and case are ignored; unknowns stay unranked"""
+    index = two_snapshots()
+    ids = pd.Series([2, None, None, 99])
+    names = pd.Series(["Ali Farag", "Nóur el Sherbini ", "Someone Else", None])
+    assert index.resolve(ids, names).tolist() == ["2", "2", None, None]
+
+    matches = pd.DataFrame({"date": pd.to_datetime(["2025-07-01"] * 4), "opponent": names, "opponent_id": ids})
+    out = opponents.attach_opponent_ranks(matches, index)
+    assert out["opponent_rank"].iloc[:2].tolist() == [1, 1]
+    assert out["opponent_rank"].iloc[2:].isna().all()
+    assert out["opponent_quality"].iloc[2:].isna().all()
+
+
+def reference_schedule(matches, reference_date, n_matches=20):
+    """Per-player loop over each history's recent ranked matches."""
+    rows = {}
+    for player_id, hist in matches.groupby("player_id", sort=False):
+        hist = hist[hist["date"] < reference_date].head(n_matches)
+        hist = hist[hist["opponent_rank"].notna()]
+        quality = opponents.rank_quality(hist["opponent_rank"])
+        won = (hist["result"] == "W").to_numpy()
+        rows[player_id] = [
+            hist["opponent_rank"].mean(),
+            quality.mean() if len(hist) else np.nan,
+            (quality * won).sum() / quality.sum() if quality.sum() > 0 else 0.5,
+            len(hist),
+        ]
+    return rows
+
+
+def recorded_match_table():
+    """Both sides of every match in the recorded /results dump, most recent first."""
+    rows = []
+    for match in json.loads(API_RESULTS.read_text()):
+        p1, p2 = match["players"]
+        for me, other in ((p1, p2), (p2, p1)):
+            rows.append({"date": pd.Timestamp(match["date"]), "player_id": str(me["id"]),
+                         "opponent": other.get("name"), "opponent_id": other["id"],
+                         "result": "W" if me["games"] > other["games"] else "L"})
+    return pd.DataFrame(rows).sort_values("date", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def test_recorded_rankings_and_schedule_matrix():
+    """The recorded rankings rank nearly every recorded opponent; the matrix matches a per-player loop"""
+    records = []
+    for key in ("df086d", "79c797"):
+        records += json.loads(next(PSA_CACHE.glob(f"{key}*")).read_text())
+    index = RankingIndex.from_ranked_players(records, date(2025, 10, 1))
+
+    table = opponents.attach_opponent_ranks(recorded_match_table(), index)
+    assert table["opponent_rank"].notna().mean() > 0.9
+
+    reference_date = pd.Timestamp("2025-10-24", tz="UTC")
+    matrix = opponents.schedule_matrix(table, reference_date, n_matches=2)
+    expected = reference_schedule(table, reference_date, n_matches=2)
+    assert set(matrix.index) == set(expected)
+    for player_id, row in expected.items():
+        assert np.allclose(matrix.loc[player_id].tolist(), row, equal_nan=True), player_id
+
+
+def test_snapshots_persist(tmp_path, monkeypatch):
+    """Stored daily snapshots load back as one ranking history, parsed once until one changes"""
+    monkeypatch.setattr(opponents, "RANKINGS_DIR", tmp_path)
+    opponents.store_snapshot(ranked(("1", "Ali Farag", 2)), "male", date(2025, 3, 1))
+    opponents.store_snapshot(ranked(("1", "Ali Farag", 4)), "male", date(2025, 6, 1))
+    opponents.store_snapshot(ranked(("2", "Nour El Sherbini", 1)), "female", date(2025, 6, 1))
+
+    index = opponents.load_index(tmp_path)
+    assert len(index) == 3
+    matches = pd.DataFrame({"date": pd.to_datetime(["2025-04-01", "2025-07-01"]), "opponent": ["Ali Farag"] * 2})
+    assert opponents.attach_opponent_ranks(matches, index)["opponent_rank"].tolist() == [2, 4]
+    assert index.ranks_as_of(["1", 2, "9"], pd.Timestamp("2025-05-01", tz="UTC")).tolist()[:2] == [2, 1]
+    assert np.isnan(index.ranks_as_of(["9"], pd.Timestamp("2025-05-01", tz="UTC"))[0])
+
+    # Storing the same records again leaves the file untouched
+    path = tmp_path / "female-2025-06-01.json"
+    before = path.stat().st_mtime_ns
+    version = opponents.snapshot_version(tmp_path)
+    opponents.store_snapshot(ranked(("2", "Nour El Sherbini", 1)), "female", date(2025, 6, 1))
+    assert path.stat().st_mtime_ns == before
+    assert opponents.load_index(tmp_path) is index
+    assert opponents.snapshot_version(tmp_path) == version
+
+    # A changed snapshot drops the cached index and version
+    opponents.store_snapshot(ranked(("2", "Nour El Sherbini", 2)), "female", date(2025, 6, 1))
+    reloaded = opponents.load_index(tmp_path)
+    assert reloaded is not index and reloaded.ranks_as_of(["2"], pd.Timestamp("2025-07-01", tz="UTC"))[0] == 2
+    assert opponents.snapshot_version(tmp_path) != version
@@ -0,0 +1,171 @@
+"""
+Tests for pairwise predictions: the matrix against the scalar pipeline, and
+the precomputed top-N matrix (lookups, explanations, persistence, versions).
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from predict import feature_store, features, history, model, opponents, pairwise, ratings, splits
+from predict.feature_matrix import feature_matrix
+from predict.feature_store import FeatureStore
+from predict.ratings import EloEngine, RatedMatch, StrengthTable
+from tests.test_features import REFERENCE_DATE, make_history
+
+
+def random_graph(player_ids, n_matches, seed=0):
+    rng = np.random.default_rng(seed)
+    reference_ns = history.timestamp_ns(REFERENCE_DATE)
+    graph = []
+    for k in range(n_matches):
+        a, b = rng.choice(len(player_ids), 2, replace=False)
+        graph.append(RatedMatch(f"m{seed}-{k}", int(reference_ns - rng.integers(1, 900) * history.NS_PER_DAY),
+                                player_ids[a], player_ids[b]))
+    engine = EloEngine()
+    engine.ingest(graph)
+    return engine, graph
+
+
+def test_pairwise_matrix_matches_predict_match():
+    """Each entry equals predict_match on the pair's features, incl. graph Elo, strengths and H2H"""
+    ids = [f"p{i}" for i in range(5)]
+    ranks = [3, 12, 40, 41, 150]
+    histories = {pid: make_history(30 + 10 * i, seed=60 + i) for i, pid in enumerate(ids)}
+    # "p5" is outside the set
+    engine, graph = random_graph(ids + ["p5"], 120, seed=8)
+    reference_ns = history.timestamp_ns(REFERENCE_DATE)
+    strengths = StrengthTable.fit(engine, REFERENCE_DATE - pd.Timedelta(days=1))
+    strengths.fitted_at_ns = reference_ns - 1
+
+    matrix = pairwise.pairwise_probabilities(ids, ranks, REFERENCE_DATE, feature_matrix(histories, REFERENCE_DATE),
+                                             elo_engine=engine, strengths=strengths)
+    assert np.allclose(matrix + matrix.T, 1.0)
+    for i in range(5):
+        for j in range(i + 1, 5):
+            pair = [m for m in graph if {m.winner_id, m.loser_id} == {ids[i], ids[j]}
+                    and m.date_ns >= reference_ns - pairwise.H2H_DAYS * history.NS_PER_DAY]
+            h2h_df = pd.DataFrame({
+                "date": pd.to_datetime([m.date_ns for m in pair], utc=True),
+                "winner": ["A" if m.winner_id == ids[i] else "B" for m in pair],
+                "games_won": np.nan, "games_lost": np.nan,
+            })
+            feats = features.extract_all_features(
+                histories[ids[i]], histories[ids[j]], h2h_df, ranks[i], ranks[j], "A", REFERENCE_DATE,
+                elo_engine=engine, player_a_id=ids[i], player_b_id=ids[j], strengths=strengths)
+            expected = model.predict_match(feats, ranks[i], ranks[j])["proba"]["A"]
+            assert matrix[i, j] == pytest.approx(expected, abs=5e-4)
+
+
+def store_rankings(monkeypatch, tmp_path):
+    monkeypatch.setattr(opponents, "RANKINGS_DIR", tmp_path)
+    for gender, prefix in (("male", "m"), ("female", "f")):
+        records = [{"Id": f"{prefix}{i}", "Name": f"{prefix} {i}", "World Ranking": i + 1,
+                    "Total Points": 1000 - i} for i in range(8)]
+        opponents.store_snapshot(records, gender, date(2025, 10, 1))
+
+
+def test_top_matrix_lookups_and_versions(tmp_path, monkeypatch):
+    """Lookups match pairwise_probabilities; stale versions and cross-gender pairs are never served"""
+    store_rankings(monkeypatch, tmp_path)
+    monkeypatch.setattr(pairwise, "TOP_N", 6)
+    players = pairwise.top_ranked(6)
+    assert players.groupby("gender").size().to_dict() == {"female": 6, "male": 6}
+    ids = players["player_id"].tolist()
+    engine, _ = random_graph(ids + ["m7"], 150, seed=9)
+
+    matrix = pairwise.PairwiseMatrix.build(players, REFERENCE_DATE, pairwise.data_version(engine), elo_engine=engine)
+    full = pairwise.pairwise_probabilities(ids, players["rank"].tolist(), REFERENCE_DATE, elo_engine=engine)
+    assert matrix.proba.dtype == np.float32
+    assert matrix.lookup("m0", "m3") == pytest.approx(full[0, 3], abs=1e-6)
+    assert matrix.lookup("f2", "f1") == pytest.approx(full[8, 7], abs=1e-6)
+    assert matrix.lookup("m0", "f0") is None and matrix.lookup("m0", "m7") is None
+
+    # The lazily built prediction matches predict_match's rounding and explanation
+    prediction = matrix.prediction("m4", "m1")
+    p_a = float(matrix.proba[4, 1])
+    assert prediction["proba"] == {"A": round(p_a, 3), "B": round(1 - p_a, 3)}
+    tier_gap = abs(model.get_tier(5) - model.get_tier(2))
+    assert prediction["explain"] == model.generate_explanation(matrix.pair_features(4, 1), 5, 2, p_a, tier_gap)
+    assert matrix.pair_features(4, 1)["h2h"]["n_matches"] == int(
+        pairwise.graph_h2h(engine, ids, REFERENCE_DATE)["n_matches"][4, 1])
+
+    matrix.save(tmp_path / "matrix.npz")
+    restored = pairwise.PairwiseMatrix.load(tmp_path / "matrix.npz")
+    assert restored.version == matrix.version and len(restored) == 12
+    assert restored.prediction("m4", "m1") == prediction
+    assert restored.ranking("f0") == {"rank": 1, "points": 1000, "snapshot": "2025-10-01"}
+
+    # New matches or a changed ranking snapshot make the stored matrix stale
+    monkeypatch.setattr(pairwise, "_current", restored)
+    assert pairwise.current_matrix(engine) is restored
+    engine.ingest([RatedMatch("new", history.timestamp_ns(REFERENCE_DATE), "m0", "m1")])
+    assert pairwise.current_matrix(engine) is None
+    restored.version = pairwise.data_version(engine)
+    assert pairwise.current_matrix(engine) is restored
+    opponents.store_snapshot([{"Id": "m0", "Name": "m 0", "World Ranking": 2, "Total Points": 1}],
+                             "male", date(2025, 10, 2))
+    assert pairwise.current_matrix(engine) is None
+
+
+def test_rebuilt_matrix_matches_predict_path(tmp_path, monkeypatch):
+    """The production rebuild serves what /api/predict computes from the fetched histories, for fetched players only"""
+    store_rankings(monkeypatch, tmp_path)
+    monkeypatch.setattr(pairwise, "TOP_N", 6)
+    monkeypatch.setattr(pairwise, "_current", None)
+    store = FeatureStore(tmp_path / "features")
+    monkeypatch.setattr(feature_store, "_default_store", store)
+    monkeypatch.setattr(splits, "default_cube", splits.SplitCube)
+    monkeypatch.setattr(ratings, "current_strengths", lambda engine: None)
+    ids = [f"m{i}" for i in range(6)]
+    engine, graph = random_graph(ids, 150, seed=10)
+    monkeypatch.setattr(ratings, "default_engine", lambda: engine)
+
+    # /api/predict has fetched m0-m3 (with game scores the graph lacks)
+    fetched = {pid: make_history(40 + 5 * i, seed=70 + i) for i, pid in enumerate(ids[:4])}
+    reference_ns = history.timestamp_ns(REFERENCE_DATE)
+
+    def predict_path(a, b):
+        pair = [m for m in graph if {m.winner_id, m.loser_id} == {a, b}
+                and m.date_ns >= reference_ns - pairwise.H2H_DAYS * history.NS_PER_DAY]
+        h2h_df = pd.DataFrame({
+            "date": pd.to_datetime([m.date_ns for m in pair], utc=True),
+            "winner": ["A" if m.winner_id == a else "B" for m in pair],
+            "games_won": np.nan, "games_lost": np.nan,
+        })
+        rank_a, rank_b = int(a[1:]) + 1, int(b[1:]) + 1
+        feats = features.extract_all_features(
+            fetched[a], fetched[b], h2h_df, rank_a, rank_b, "A", REFERENCE_DATE, elo_engine=engine,
+            player_a_id=a, player_b_id=b, feature_store=store)
+        return model.predict_match(feats, rank_a, rank_b)["proba"]["A"]
+
+    expected = {(a, b): predict_path(a, b) for a in ids[:4] for b in ids[:4] if a != b}
+    matrix = pairwise.rebuild(tmp_path / "matrix.npz", reference_date=REFERENCE_DATE)
+    assert sorted(matrix.players["player_id"]) == ids[:4]
+    for (a, b), proba in expected.items():
+        assert matrix.lookup(a, b) == pytest.approx(proba, abs=5e-4), (a, b)
+    assert matrix.lookup("m0", "m4") is None
+
+    # A matrix is only served on the day it was built for
+    assert matrix.version == pairwise.data_version(engine, reference_date=REFERENCE_DATE)
+    assert matrix.version != pairwise.data_version(engine, reference_date=REFERENCE_DATE + pd.Timedelta(days=1))
+
+
+def test_matrix_hits_refresh_the_rebuild_stores(tmp_path, monkeypatch):
+    """Histories and rankings fetched after a matrix hit reach the stores a rebuild reads, once"""
+    from app import refresh_stores
+
+    store_rankings(monkeypatch, tmp_path)
+    store = FeatureStore(tmp_path / "features")
+    monkeypatch.setattr(feature_store, "_default_store", store)
+    monkeypatch.setattr(ratings, "default_engine", EloEngine)
+    cube = splits.SplitCube()
+    monkeypatch.setattr(cube, "save", lambda: splits.SplitCube.save(cube, tmp_path / "cube.npz"))
+    monkeypatch.setattr(splits, "default_cube", lambda: cube)
+
+    histories = {pid: make_history(30, seed=seed).assign(opponent="m 2") for seed, pid in enumerate(["m0", "m1"])}
+    ranked = {"male": [{"Id": "m0", "Name": "m 0", "World Ranking": 1, "Total Points": 1000}], "female": []}
+    assert refresh_stores(histories, ranked)
+    assert store.history("m0") is not None and (tmp_path / "cube.npz").exists()
+    assert not refresh_stores(histories, ranked)
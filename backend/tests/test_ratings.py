@@ -0,0 +1,204 @@
+"""
+Tests for the match-graph ratings: incremental Elo must agree with a full
+chronological replay, the Bradley-Terry fit must solve its score equations,
+and lookups/persistence must round-trip.
+"""
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from predict import features, model, ratings
+from predict.ratings import EloEngine, RatedMatch, StrengthTable
+
+API_RESULTS = Path(ratings.__file__).parent / "psa_matches_2778.json"
+DAY_NS = 86_400_000_000_000
+
+
+def random_matches(n, n_players=12, seed=0):
+    """Matches on distinct days between random pairs of players."""
+    rng = np.random.default_rng(seed)
+    matches = []
+    for i in range(n):
+        a, b = rng.choice(n_players, size=2, replace=False)
+        matches.append(RatedMatch(f"id:{i}", int(i * DAY_NS), f"p{a}", f"p{b}"))
+    return matches
+
+
+def reference_ratings(matches, k=ratings.K_FACTOR):
+    """Plain dict Elo over the matches in date order."""
+    elo = {}
+    for match in sorted(matches, key=lambda m: (m.date_ns, m.key)):
+        r_w = elo.get(match.winner_id, ratings.BASE_RATING)
+        r_l = elo.get(match.loser_id, ratings.BASE_RATING)
+        delta = k * (1 - 1 / (1 + 10 ** ((r_l - r_w) / 400)))
+        elo[match.winner_id], elo[match.loser_id] = r_w + delta, r_l - delta
+    return elo
+
+
+def test_incremental_matches_full_replay():
+    """Ingesting in chronological batches gives the same ratings as one pass"""
+    matches = random_matches(300)
+    engine = EloEngine()
+    for start in range(0, 300, 50):
+        engine.ingest(matches[start:start + 50])
+
+    expected = reference_ratings(matches)
+    assert {pid: engine.rating(pid) for pid in expected} == expected
+    assert len(engine) == 300
+
+
+def test_out_of_order_batch_and_duplicates():
+    """Late-arriving matches are replayed into place; repeated keys are ignored"""
+    matches = random_matches(200, seed=1)
+    engine = EloEngine()
+    engine.ingest(matches[100:])
+    assert engine.ingest(matches[:120]) == 100
+    assert engine.ingest(matches) == 0
+
+    expected = reference_ratings(matches)
+    assert {pid: engine.rating(pid) for pid in expected} == expected
+
+
+def test_late_matches_queue_without_replay(tmp_path):
+    """With replay=False late matches wait for replay_pending, survive a save and then land in place"""
+    matches = random_matches(200, seed=4)
+    engine = EloEngine()
+    engine.ingest(matches[100:150])
+    before = engine.top(12)
+    assert engine.ingest(matches[:120] + matches[150:], replay=False) == 150
+    assert engine.pending == 100 and len(engine) == 100
+    assert engine.ingest(matches[:100], replay=False) == 0
+    assert engine.copy().top(12) != before
+
+    engine.save(tmp_path / "elo.npz")
+    restored = EloEngine.load(tmp_path / "elo.npz")
+    assert restored.pending == 100 and restored.ingest(matches) == 0
+    for graph in (engine, restored):
+        assert graph.replay_pending() == 100 and graph.pending == 0
+        expected = reference_ratings(matches)
+        assert {pid: graph.rating(pid) for pid in expected} == expected
+
+
+def test_rating_as_of_uses_earlier_matches_only():
+    """As-of lookups see matches strictly before the date"""
+    engine = EloEngine()
+    engine.ingest([RatedMatch("id:1", 10 * DAY_NS, "a", "b"), RatedMatch("id:2", 20 * DAY_NS, "a", "c")])
+
+    assert engine.rating("a", as_of=pd.Timestamp(10 * DAY_NS, tz="UTC")) == ratings.BASE_RATING
+    after_first = engine.rating("a", as_of=pd.Timestamp(15 * DAY_NS, tz="UTC"))
+    assert after_first == ratings.BASE_RATING + 16.0
+    assert engine.rating("a", as_of=pd.Timestamp(21 * DAY_NS, tz="UTC")) == engine.rating("a")
+    assert engine.rating("unknown") is None
+    assert engine.snapshots("a")["rating"].tolist() == [after_first, engine.rating("a")]
+
+
+def test_save_load_roundtrip(tmp_path):
+    """A saved engine restores ratings, trails and keeps ingesting incrementally"""
+    matches = random_matches(120, seed=2)
+    engine = EloEngine()
+    engine.ingest(matches[:80])
+    engine.save(tmp_path / "elo.npz")
+
+    restored = EloEngine.load(tmp_path / "elo.npz")
+    assert restored.top(12) == engine.top(12)
+    assert restored.snapshots("p3").equals(engine.snapshots("p3"))
+    assert restored.ingest(matches[:80]) == 0
+
+    restored.ingest(matches[80:])
+    engine.ingest(matches[80:])
+    assert restored.top(12) == engine.top(12)
+    assert len(EloEngine.load(tmp_path / "missing.npz")) == 0
+
+
+def test_ingest_recorded_api_results():
+    """The recorded /results dump becomes a graph and feeds extract_all_features"""
+    results = json.loads(API_RESULTS.read_text())
+    matches = ratings.matches_from_api_results(results)
+    engine = EloEngine()
+    assert engine.ingest(matches) == len(matches) > 0
+    assert abs(sum(engine.rating(pid) for pid, _ in engine.top(engine.n_players))
+               - ratings.BASE_RATING * engine.n_players) < 1e-6
+
+    winner, loser = matches[-1].winner_id, matches[-1].loser_id
+    hist = pd.DataFrame({"date": pd.to_datetime(["2025-01-01"]), "result": ["W"],
+                         "games_won": [3], "games_lost": [1], "score": ["3-1"]})
+    result = features.extract_all_features(
+        hist, hist, None, 1, 2, "A", datetime.now(timezone.utc),
+        elo_engine=engine, player_a_id=winner, player_b_id=int(loser))
+    assert result["elo_source"] == "graph"
+    assert result["elo_a"] == engine.rating(winner)
+    assert result["elo_diff"] == engine.rating(winner) - engine.rating(loser)
+
+
+def simulated_results(n_players, n_matches, seed=0):
+    """Winner/loser indices drawn from known log-strengths."""
+    rng = np.random.default_rng(seed)
+    true_strength = rng.normal(0, 1, n_players)
+    a = rng.integers(0, n_players, n_matches)
+    b = (a + rng.integers(1, n_players, n_matches)) % n_players
+    a_wins = rng.random(n_matches) < 1 / (1 + np.exp(true_strength[b] - true_strength[a]))
+    return true_strength, np.where(a_wins, a, b), np.where(a_wins, b, a)
+
+
+def test_bradley_terry_solves_score_equations():
+    """At the fit, expected wins (real and virtual games) equal observed wins"""
+    true_strength, winners, losers = simulated_results(200, 20_000)
+    weights = np.random.default_rng(1).uniform(0.2, 1.0, len(winners))
+    fit = ratings.fit_bradley_terry(winners, losers, 200, weights, tol=1e-10)
+
+    gamma = np.exp(fit.strength)
+    p_winner = gamma[winners] / (gamma[winners] + gamma[losers])
+    expected = (np.bincount(winners, weights * p_winner, minlength=200)
+                + np.bincount(losers, weights * (1 - p_winner), minlength=200)
+                + ratings.BT_PRIOR_GAMES * gamma / (gamma + 1))
+    observed = np.bincount(winners, weights, minlength=200) + ratings.BT_PRIOR_GAMES / 2
+    assert np.allclose(expected, observed, rtol=1e-8)
+    assert np.corrcoef(fit.strength, true_strength)[0, 1] > 0.95
+    assert np.all(fit.std_error > 0)
+
+
+def test_strength_table_fit_and_roundtrip(tmp_path):
+    """Fitting from an engine gives Elo-scale ratings that persist and feed the model"""
+    engine = EloEngine()
+    engine.ingest(random_matches(400, seed=3))
+    table = StrengthTable.fit(engine)
+    assert table.n_matches == 400 and len(table) == engine.n_players
+
+    table.save(tmp_path / "bt.npz")
+    assert [path.name for path in tmp_path.iterdir()] == ["bt.npz"]
+    restored = StrengthTable.load(tmp_path / "bt.npz")
+    assert restored.rating("p1") == table.rating("p1")
+    assert StrengthTable.load(tmp_path / "missing.npz") is None
+
+    strength = table.difference("p1", "p2")
+    assert strength["deviation"] > 0
+    assert table.difference("p1", "nobody") is None
+
+    base = {"elo_diff": 0.0,
+            "form_a": {"win_rate": 0.5}, "form_b": {"win_rate": 0.5}}
+    assert model.evidence_probability({**base, "strength": None}) == 0.5
+    favoured = model.evidence_probability({**base, "strength": {"diff": 200.0, "deviation": 50.0}})
+    uncertain = model.evidence_probability({**base, "strength": {"diff": 200.0, "deviation": 400.0}})
+    assert 0.5 < uncertain < favoured
+
+
+def test_current_strengths_serves_last_fit(tmp_path, monkeypatch):
+    """A grown graph gets the last fit back at once and a background refit; the refit catches up"""
+    engine = EloEngine()
+    engine.ingest(random_matches(200, seed=5))
+    stale = StrengthTable.fit(engine)
+    engine.ingest(random_matches(260, seed=5)[200:])
+    scheduled = []
+    monkeypatch.setattr(ratings, "_default_strengths", stale)
+    monkeypatch.setattr(ratings, "refit_in_background", scheduled.append)
+
+    assert ratings.current_strengths(engine) is stale
+    assert scheduled == [engine]
+
+    fresh = ratings.refit_strengths(engine, tmp_path / "bt.npz")
+    assert fresh.n_matches == 260 and ratings.current_strengths(engine) is fresh
+    assert scheduled == [engine]
+    assert StrengthTable.load(tmp_path / "bt.npz").rating("p1") == fresh.rating("p1")
@@ -0,0 +1,57 @@
+"""
+Tests for the history bootstrap: replicate features against materialised
+resampled histories, and the shape of the resulting interval.
+"""
+import numpy as np
+import pytest
+
+from predict import features, history, resample
+from predict.features import _as_h2h_history
+from tests.test_features import REFERENCE_DATE, make_h2h, make_history
+
+
+def test_replicates_match_resampled_histories():
+    """Each replicate's features equal player_features/calculate_h2h on its drawn rows"""
+    hist = history.as_history(make_history(90, seed=40)).before(REFERENCE_DATE)
+    h2h = _as_h2h_history(make_h2h(7, seed=41)).before(REFERENCE_DATE)
+    rng = np.random.default_rng(0)
+    draws = resample.resample_draws(rng, len(hist), 50)
+    h2h_draws = resample.resample_draws(rng, len(h2h), 50)
+
+    side = resample.player_replicates(hist, REFERENCE_DATE, draws)
+    pairs = resample.h2h_replicates(h2h, REFERENCE_DATE, h2h_draws)
+    for r in range(len(draws)):
+        expected = features.player_features(hist.take(draws[r]), REFERENCE_DATE)
+        assert side["elo"][r] == pytest.approx(expected["elo"])
+        assert side["quality_adjusted_win_rate"][r] == pytest.approx(expected["form"]["quality_adjusted_win_rate"])
+        assert side["win_rate"][r] == pytest.approx(expected["form"]["win_rate"])
+        assert side["recent_momentum"][r] == pytest.approx(expected["form"]["recent_momentum"])
+        assert side["trend"][r] == pytest.approx(expected["trend"]["trend"])
+
+        expected_h2h = features.calculate_h2h(h2h.take(h2h_draws[r]), "A", REFERENCE_DATE)
+        assert pairs["n_effective"][r] == pytest.approx(expected_h2h["n_effective"])
+        assert pairs["a_win_rate"][r] == pytest.approx(expected_h2h["a_win_rate"])
+
+    identity = resample.player_replicates(hist, REFERENCE_DATE, np.arange(len(hist))[None])
+    assert identity["elo"][0] == pytest.approx(features.player_features(hist, REFERENCE_DATE)["elo"])
+
+
+def test_interval_reflects_available_data():
+    """Deterministic per seed and mirrored for B; no history means no spread"""
+    hist_a, hist_b = make_history(60, seed=42), make_history(45, seed=43)
+    h2h_df = make_h2h(4, seed=44)
+    feats = features.extract_all_features(hist_a, hist_b, h2h_df, 30, 30, "A", REFERENCE_DATE)
+    interval = resample.bootstrap_interval(hist_a, hist_b, h2h_df, feats, 30, 30, REFERENCE_DATE, seed=5)
+    assert interval == resample.bootstrap_interval(hist_a, hist_b, h2h_df, feats, 30, 30, REFERENCE_DATE, seed=5)
+    assert interval["B"] == [round(1 - interval["A"][1], 3), round(1 - interval["A"][0], 3)]
+    assert interval["A"][1] - interval["A"][0] > 0.05
+
+    # Index matrices are reused, not redrawn, and never written to
+    draws = resample.cached_draws(60, resample.N_REPLICATES, 5, 0)
+    assert resample.cached_draws(60, resample.N_REPLICATES, 5, 0) is draws and not draws.flags.writeable
+
+    empty = make_history(0)
+    feats = features.extract_all_features(empty, empty, None, 30, 30, "A", REFERENCE_DATE)
+    samples = resample.bootstrap_probabilities(empty, empty, None, feats, 30, 30, REFERENCE_DATE)
+    assert len(samples) == resample.N_REPLICATES
+    assert np.ptp(samples) == 0
@@ -0,0 +1,50 @@
+"""
+Tests for the PAR-11 scoreline engine: the game DP against the closed form,
+scores past 10-10, and calibration of the interpolated distribution.
+"""
+from math import comb
+
+import numpy as np
+import pytest
+
+from predict import scoreline
+from predict.schemas import ScorelineDistribution
+
+
+def closed_form_game(p):
+    """Win to 11 before the opponent reaches 10, or from 10-10 by two clear."""
+    q = 1 - p
+    return (sum(comb(10 + k, k) * p ** 11 * q ** k for k in range(10))
+            + comb(20, 10) * p ** 10 * q ** 10 * p * p / (p * p + q * q))
+
+
+def test_game_dp_matches_closed_form():
+    """Game-win chances from 0-0 and from extended deuce scores"""
+    p = np.array([0.3, 0.5, 0.52, 0.6, 0.75])
+    table = scoreline.game_table(p)
+    assert np.allclose(table[:, 0, 0], [closed_form_game(x) for x in p], rtol=1e-12)
+
+    deuce = scoreline.deuce_probability(p)
+    assert np.allclose(scoreline.game_probability(table, 10, 10), deuce)
+    assert np.allclose(scoreline.game_probability(table, 14, 14), deuce)
+    assert np.allclose(scoreline.game_probability(table, 13, 12), p + (1 - p) * deuce)
+    assert np.allclose(scoreline.game_probability(table, 11, 12), p * deuce)
+    assert (scoreline.game_probability(table, 11, 9) == 1).all()
+    assert (scoreline.game_probability(table, 12, 14) == 0).all()
+
+
+def test_distribution_is_calibrated_to_match_probability():
+    """A's scorelines add up to the prediction; all six to one"""
+    for proba in (0.08, 0.35, 0.5, 0.52, 0.81, 0.97):
+        values = scoreline.interpolate(proba)
+        scorelines = values[2:8]
+        assert scorelines[:3].sum() == pytest.approx(proba, abs=1e-6)
+        assert scorelines.sum() == pytest.approx(1.0)
+        rally, game = values[:2]
+        assert scoreline.match_table(scoreline.game_table(rally)[0, 0])[0, 0] == pytest.approx(proba, abs=1e-5)
+        assert game == pytest.approx(closed_form_game(rally), abs=1e-5)
+
+    even = ScorelineDistribution(**scoreline.scoreline_distribution(0.5))
+    assert even.rally_win_a == 0.5
+    assert even.scorelines["3-0"] == even.scorelines["0-3"] == 0.125
+    assert even.expected_games == pytest.approx(4.12, abs=0.01)
@@ -0,0 +1,48 @@
+"""Tests for the shared score-string parsing engine."""
+
+import pandas as pd
+from predict import scores
+from predict.scraper import PSAScraper
+
+
+def test_parse_score_per_game_points():
+    """A score string is parsed into per-game points and game counts."""
+    parsed = scores.parse_score("11-8, 11-9, 5-11, 11-7")
+
+    assert parsed.points_for == (11, 11, 5, 11)
+    assert parsed.points_against == (8, 9, 11, 7)
+    assert (parsed.games_first, parsed.games_second) == (3, 1)
+    assert parsed.close_games == 2
+    assert parsed.details == "11-8, 11-9, 5-11, 11-7"
+
+
+def test_fallbacks_without_games():
+    """Unparseable scores fall back to straight games based on the result."""
+    assert scores.games_from_score("", "W") == (3, 0)
+    assert scores.games_from_score(None, "L") == (0, 3)
+    assert scores.result_from_score("walkover", is_first_player=True) == "L"
+    assert scores.parse_score(float("nan")).close_share == 0.5
+
+
+def test_winner_oriented_games_match_scraper_helpers():
+    """Games won/lost helpers read a winner-first score from one parse."""
+    scraper = PSAScraper()
+
+    assert scraper._extract_games_won("11-5, 9-11, 11-3", "W") == 2
+    assert scraper._extract_games_lost("11-5, 9-11, 11-3", "W") == 1
+    assert scraper._extract_games_won("11-5, 9-11, 11-3", "L") == 1
+    assert scraper._extract_games_lost("11-5, 9-11, 11-3", "L") == 2
+
+
+def test_parse_scores_vectorized_matches_scalar():
+    """The Series path agrees with the scalar parser row by row."""
+    series = pd.Series(["11-8, 9-11, 11-2", "3-0", None, "", "11-8, 9-11, 11-2"])
+    results = pd.Series(["W", "W", "L", "W", "L"])
+    frame = scores.parse_scores(series, results)
+
+    for i, (text, result) in enumerate(zip(series, results)):
+        parsed = scores.parse_score(text)
+        assert (frame.loc[i, "games_won"], frame.loc[i, "games_lost"]) == scores.games_from_score(text, result)
+        assert frame.loc[i, "close_games"] == parsed.close_games
+        assert frame.loc[i, "points_won"] == sum(parsed.points_for)
+        assert frame.loc[i, "close_share"] == parsed.close_share
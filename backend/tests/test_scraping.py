@@ -0,0 +1,118 @@
+"""
+Offline tests for the scraper parsing helpers.
+
+These run against inline HTML snippets only - no network access.
+"""
+import json
+from datetime import datetime
+
+import pandas as pd
+from predict import dates, embedded_json, html_parsing
+
+
+PROFILE_PAGE = """
+<html><head><script>var unrelated = 1;</script></head>
+<body>
+  <nav><a href="/">Home</a><div class="menu">Menu</div></nav>
+  <div class="matches-table">
+    <table><tbody>
+      <tr><td>2025-03-01</td><td>Open</td><td>QF</td><td>A vs B</td><td>11-5, 11-6, 11-7</td></tr>
+      <tr><td>2025-02-01</td><td>Open</td><td>SF</td><td>A vs C</td><td>5-11, 6-11, 7-11</td></tr>
+    </tbody></table>
+  </div>
+  <footer>Footer</footer>
+</body></html>
+"""
+
+
+def test_extract_subtrees_keeps_only_results():
+    """Only the results container survives targeted extraction."""
+    soup = html_parsing.extract_subtrees(PROFILE_PAGE, html_parsing.PSA_PROFILE_XPATH)
+
+    assert len(soup.select(".matches-table table tbody tr")) == 2
+    assert soup.find("nav") is None
+    assert soup.find("footer") is None
+
+
+def test_selector_cascade_keeps_order():
+    """Selectors are tried in order; a page only the fallback matches does not promote it."""
+    cascade = html_parsing.SelectorCascade([".missing tr", ".matches-table tbody tr", "tr"])
+
+    other = html_parsing.make_soup("<table><tr><td>x</td></tr></table>")
+    selector, rows = cascade.select(other)
+    assert selector == "tr"
+
+    selector, rows = cascade.select(html_parsing.make_soup(PROFILE_PAGE))
+    assert selector == ".matches-table tbody tr"
+    assert len(rows) == 2
+
+
+def test_find_player_links():
+    """Player links are found without building the whole page tree."""
+    page = '<div><a href="/player/ali-farag/">Ali Farag</a><a href="/news/">News</a></div>'
+    links = html_parsing.find_player_links(page)
+
+    assert [link.get_text(strip=True) for link in links] == ["Ali Farag"]
+
+
+MATCH_RECORD = {
+    "date": "2025-03-01",
+    "round": "Final];",
+    "players": [{"name": "A", "id": 1}, {"name": "B", "id": 2}],
+    "winnerId": 1,
+    "score": "11-5, 11-6, 11-7",
+}
+
+
+def test_embedded_json_not_cut_at_bracket_in_string():
+    """A "];" inside a string literal does not truncate the payload."""
+    script = (
+        "function f(a){return [a[0], {x: 'y];'}]}\n"
+        f"var matches = {json.dumps([MATCH_RECORD])};\n"
+        "var other = [1, 2];"
+    )
+    lists = embedded_json.extract_match_lists(script)
+
+    assert lists == [[MATCH_RECORD]]
+
+
+def test_embedded_json_nested_in_js_object():
+    """A JSON array under a non-JSON JS object literal is still found."""
+    script = f"window.config = {{debug: true, results: {json.dumps([MATCH_RECORD])}}};"
+
+    assert embedded_json.extract_match_lists(script) == [[MATCH_RECORD]]
+
+
+def test_embedded_json_next_data_payload():
+    """Framework payload scripts are decoded whole and walked for match lists."""
+    payload = {"props": {"pageProps": {"player": {"recent": [MATCH_RECORD]}}}}
+    lists = embedded_json.extract_match_lists(
+        json.dumps(payload), script_id="__NEXT_DATA__", script_type="application/json"
+    )
+
+    assert lists == [[MATCH_RECORD]]
+
+
+def test_date_parser_detects_format_once_per_column():
+    """The column format is detected once; bad rows become NaT."""
+    parser = dates.DateParser(dates.PSA_DATE_FORMATS, fallback=dates.day_month_year)
+    column = parser.parse_column(["01 Mar 2025", "15 Feb 2025", "not a date", None, "01 Mar 2025"])
+
+    assert parser.format == "%d %b %Y"
+    assert column.iloc[0] == pd.Timestamp("2025-03-01")
+    assert column.iloc[4] == pd.Timestamp("2025-03-01")
+    assert column.isna().tolist() == [False, False, True, True, False]
+
+    # Row-level lookups after the column pass are cache hits
+    assert parser.parse("15 Feb 2025") == datetime(2025, 2, 15)
+    assert parser.parse("not a date") is None
+
+
+def test_date_parser_fallbacks():
+    """Fallbacks cover dates embedded in text and bare years."""
+    psa = dates.DateParser(dates.PSA_DATE_FORMATS, fallback=dates.day_month_year)
+    assert psa.parse("Played 3/4/2025 (QF)") == datetime(2025, 4, 3)
+
+    rough = dates.DateParser(dates.GENERIC_DATE_FORMATS, fallback=dates.year_start())
+    assert rough.parse("Season 2024") == datetime(2024, 1, 1)
+    assert rough.parse("Season 1999") is None
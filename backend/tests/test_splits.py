@@ -0,0 +1,96 @@
+"""
+Tests for the split-statistics cube: window queries against a direct filter,
+incremental ingest, persistence and the top-20 override condition.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from predict import model, splits
+from predict.splits import SplitCube
+from tests.test_features import make_history
+
+REFERENCE_DATE = datetime(2025, 11, 1, 15, 45, tzinfo=timezone.utc)
+
+
+def ranked_history(n, seed=0):
+    """A history with opponent ranks (some unranked), rounds and match ids."""
+    rng = np.random.default_rng(seed)
+    hist = make_history(n, seed=seed)
+    rank = rng.integers(1, 300, n).astype(float)
+    rank[rng.random(n) < 0.1] = np.nan
+    hist["opponent_rank"] = rank
+    hist["round"] = rng.choice(["Round 1", "Round 2", "Quarter final", "Semi final", "Final", "Qualifying"], n)
+    hist["match_id"] = np.arange(n) + 1000 * seed
+    return hist
+
+
+def direct_record(hist, start, end, max_rank=None):
+    """Wins, losses and games over [start, end) by filtering the rows."""
+    rows = hist[(hist["date"] >= start) & (hist["date"] < end)]
+    if max_rank is not None:
+        rows = rows[rows["opponent_rank"] <= max_rank]
+    won = rows["result"] == "W"
+    return int(won.sum()), int((~won).sum()), int(rows["games_won"].sum()), int(rows["games_lost"].sum())
+
+
+def test_window_queries_match_direct_filter():
+    """Last 12 months vs top-20 and a whole season agree with filtering the history"""
+    hist = ranked_history(300, seed=30)
+    cube = SplitCube()
+    assert cube.ingest("5974", hist) == 300
+
+    record = cube.last_months("5974", REFERENCE_DATE, 12, tiers=splits.TOP_20_TIERS)
+    expected = direct_record(hist, pd.Timestamp("2024-11-01", tz="UTC"), pd.Timestamp("2025-11-01", tz="UTC"), 20)
+    assert tuple(record)[:4] == expected
+    assert cube.vs_top20("5974", REFERENCE_DATE)["matches"] == expected[0] + expected[1]
+
+    season = cube.season("5974", "2024-25")
+    assert tuple(season)[:4] == direct_record(
+        hist, pd.Timestamp("2024-08-01", tz="UTC"), pd.Timestamp("2025-08-01", tz="UTC"))
+
+    finals = cube.query("5974", rounds=["F"])
+    assert finals.matches == (hist["round"] == "Final").sum()
+    assert sum(cube.query("5974", tiers=[t]).matches for t in range(len(splits.TIER_LABELS))) == 300
+
+
+def test_incremental_ingest_and_persistence(tmp_path):
+    """Re-ingesting a longer history only adds the new matches; a saved cube loads back"""
+    hist = ranked_history(120, seed=31)
+    incremental = SplitCube()
+    assert incremental.ingest("5974", hist.iloc[40:]) == 80
+    incremental.query("5974")
+    assert incremental.ingest("5974", hist) == 40
+    assert incremental.ingest("5974", hist) == 0
+
+    whole = SplitCube()
+    whole.ingest("5974", hist)
+    assert incremental.query("5974") == whole.query("5974")
+    assert incremental.query("5974").points_won > 0
+
+    path = tmp_path / "cube.npz"
+    incremental.save(path)
+    loaded = SplitCube.load(path)
+    assert loaded.season("5974", "2024-25") == incremental.season("5974", "2024-25")
+    assert loaded.ingest("5974", hist) == 0
+    assert SplitCube.load(tmp_path / "missing.npz").players == []
+
+
+def test_tier_codes_match_get_tier():
+    """Vectorized tiers agree with model.get_tier; unranked is its own tier"""
+    ranks = np.array([1, 5, 6, 20, 21, 50, 51, 100, 101, 200, 201, 9999, 12000])
+    assert splits.tier_codes(ranks).tolist() == [model.get_tier(int(r)) for r in ranks]
+    assert splits.tier_codes([np.nan]).tolist() == [len(model.TIERS)]
+
+
+def test_top20_record_enables_override():
+    """Elo lead plus a strong record vs top-20 lifts the underdog cap"""
+    features = {"elo_diff": 200, "h2h": {"n_matches": 0, "a_win_rate": 0.5}}
+    assert not model.check_override_conditions(features, 150, 3, 4)
+
+    features["vs_top20_a"] = {"matches": 12, "wins": 9, "win_rate": 0.75}
+    assert model.check_override_conditions(features, 150, 3, 4)
+
+    features["vs_top20_a"] = {"matches": 8, "wins": 8, "win_rate": 1.0}
+    assert not model.check_override_conditions(features, 150, 3, 4)
@@ -0,0 +1,100 @@
+"""
+Tests for the record/replay HTTP transport and the offline fixture corpus
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from predict import fetch, rankings, transport
+from predict.squashlevels import get_squashlevels_match_history
+
+
+def test_request_key_is_canonical():
+    """Query order and volatile params do not change the fixture key"""
+    a = transport.request_key("get", "https://x.test/api?q=Paul+Coll&limit=10&from=2024-01-01")
+    b = transport.request_key("GET", "https://x.test/api?limit=10&q=Paul%20Coll")
+    assert a == b == "GET https://x.test/api?limit=10&q=Paul+Coll"
+
+
+def test_record_then_replay_roundtrip(tmp_path):
+    """Recorded responses are replayed byte for byte, offline"""
+    def live(request):
+        return httpx.Response(200, json={"path": request.url.path}, headers={"x-drop": "1"})
+
+    async def fetch(url):
+        async with transport.async_client() as client:
+            response = await client.get(url)
+            return response.status_code, response.json()
+
+    corpus = transport.FixtureCorpus("v-test", root=tmp_path)
+    with transport.use_transport(transport.RecordingTransport(corpus, inner=httpx.MockTransport(live))):
+        recorded = asyncio.run(fetch("https://x.test/players/1"))
+    corpus.save()
+
+    with transport.use_transport(transport.ReplayTransport(
+            transport.FixtureCorpus("v-test", root=tmp_path), strict=True)):
+        replayed = asyncio.run(fetch("https://x.test/players/1"))
+
+    assert recorded == replayed == (200, {"path": "/players/1"})
+    fixture = transport.FixtureCorpus("v-test", root=tmp_path).lookup("GET", "https://x.test/players/1")
+    assert "x-drop" not in fixture.headers
+
+
+def test_replay_misses():
+    """Unknown requests get a 404, or raise when strict"""
+    async def status(url):
+        async with transport.async_client() as client:
+            return (await client.get(url)).status_code
+
+    with transport.replaying() as replay:
+        assert asyncio.run(status("https://nowhere.test/")) == 404
+    assert replay.misses == ["GET https://nowhere.test/"]
+
+    with transport.replaying(strict=True):
+        with pytest.raises(transport.FixtureMissing):
+            asyncio.run(status("https://nowhere.test/"))
+
+
+def test_injected_latency_is_seeded():
+    """Same seed, same delays"""
+    first = transport.ReplayTransport(latency=0.05, jitter=0.02, seed=7)
+    second = transport.ReplayTransport(latency=0.05, jitter=0.02, seed=7)
+    delays = [first._delay() for _ in range(5)]
+    assert delays == [second._delay() for _ in range(5)]
+    assert all(0.05 <= d <= 0.07 for d in delays)
+
+
+def test_scrapers_run_offline_on_corpus():
+    """Rankings and a scraper source work end to end from the shipped corpus"""
+    with transport.replaying(strict=True):
+        players = asyncio.run(rankings.get_all_ranked_players("male", use_cache=False))
+        history = asyncio.run(get_squashlevels_match_history("Paul Coll", months_back=600))
+
+    assert len(players) > 100
+    assert len(history) == 56
+    assert set(history["result"]) <= {"W", "L"}
+
+
+def test_scraped_sources_are_opt_in(monkeypatch):
+    """Without PSA_SCRAPED_SOURCES the extended history comes from the PSA API alone"""
+    with transport.replaying(strict=True) as replay:
+        history = asyncio.run(fetch.get_extended_match_history("Paul Coll", "2778", use_cache=False))
+    assert {key.split("/")[2] for key in replay.requests} == {"psa-api.ptsportsuite.com"}
+    assert set(history["source"]) == {"psa_api"}
+
+    monkeypatch.setattr(fetch, "SCRAPED_SOURCES", True)
+    with transport.replaying() as replay:
+        asyncio.run(fetch.get_extended_match_history("Paul Coll", "2778", use_cache=False, months_back=600))
+    assert "www.squashlevels.com" in {key.split("/")[2] for key in replay.requests}
+
+
+def test_ranked_players_are_cached_per_gender(monkeypatch):
+    """Repeat lookups reuse the in-process rankings until use_cache is off"""
+    monkeypatch.setattr(rankings, "_ranked", {})
+    with transport.replaying(strict=True) as replay:
+        first = asyncio.run(rankings.get_all_ranked_players("male"))
+        again = asyncio.run(rankings.get_all_ranked_players("male"))
+        assert again is first and len(replay.requests) == 1
+        asyncio.run(rankings.get_all_ranked_players("male", use_cache=False))
+    assert len(replay.requests) == 2
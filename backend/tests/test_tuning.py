@@ -0,0 +1,127 @@
+"""
+Tests for the tunable constants: the versioned parameter file, the model
+under other parameters, and the search over cached backtest columns.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from predict import backtest, model, pairwise, params, tuning
+from predict.feature_matrix import feature_matrix_from_table
+from predict.params import ModelParams
+from tests.test_model import random_matchup
+from tests.test_pairwise import random_graph
+
+OTHER_PARAMS = ModelParams(underdog_caps=(0.48, 0.41, 0.3, 0.2, 0.12, 0.05), h2h_strength=(0.0, 0.15, 0.25, 0.4),
+                           form_factor=0.3, momentum_factor=0.05, trend_factor=0.2, evidence_scale=6.0,
+                           elo_k=20.0, elo_half_life_days=90.0)
+
+
+def test_params_file_round_trip(tmp_path):
+    """Saved parameters load back under their version; tampered or malformed files raise"""
+    path = tmp_path / "model_params.json"
+    assert params.load_params(path) == params.DEFAULT_PARAMS
+    version = params.save_params(OTHER_PARAMS, path, objective="log_loss")
+    assert version == params.params_version(OTHER_PARAMS) != params.params_version(params.DEFAULT_PARAMS)
+    assert params.load_params(path) == OTHER_PARAMS
+
+    record = json.loads(path.read_text())
+    record["params"]["form_factor"] = 0.2
+    path.write_text(json.dumps(record))
+    with pytest.raises(ValueError):
+        params.load_params(path)
+    with pytest.raises(ValueError):
+        params.from_dict({"h2h_strength": [0.1, 0.2]})
+    with pytest.raises(ValueError):
+        params.from_dict({"form": 0.1})
+
+
+def test_predict_match_follows_params(monkeypatch):
+    """predict_match under active parameters equals predict_batch given them"""
+    rng = np.random.default_rng(11)
+    matchups = [random_matchup(rng) for _ in range(300)]
+    rank_a = rng.choice([1, 3, 6, 18, 40, 90, 150, 250], len(matchups))
+    rank_b = rng.integers(1, 400, len(matchups))
+    columns = model.batch_columns(matchups)
+    batch = model.predict_batch(columns, rank_a, rank_b, params=OTHER_PARAMS)["proba_a"]
+    assert not np.allclose(batch, model.predict_batch(columns, rank_a, rank_b)["proba_a"])
+
+    monkeypatch.setattr(model, "PARAMS", OTHER_PARAMS)
+    for i, features in enumerate(matchups):
+        assert model.predict_match(features, int(rank_a[i]), int(rank_b[i]))["proba"]["A"] == round(batch[i], 3), i
+
+
+def test_cached_columns_rescore_like_backtest(tmp_path):
+    """History Elo rebuilt from the cached sums equals feature_matrix's on the graph; the cache reloads as built"""
+    engine, _ = random_graph([f"p{i}" for i in range(12)], 800, seed=4)
+    data = tuning.tuning_data(engine, cache_dir=tmp_path)
+    replay = backtest.replay_log(engine)
+    sums_a, _ = data.elo_sums[params.DEFAULT_PARAMS.elo_half_life_days]
+    elo_a = tuning.history_elo(sums_a, data.columns["matches_played_a"], params.DEFAULT_PARAMS.elo_k)
+    for i in range(0, len(replay), 37):
+        player = replay.player_ids[replay.a[i]]
+        reference = pd.Timestamp(int(replay.date_ns[i]), tz="UTC")
+        table = pairwise.graph_match_table(engine, [player], reference)
+        expected = feature_matrix_from_table(table, reference, player_ids=[player])["elo"].iloc[0]
+        assert elo_a[i] == pytest.approx(expected, abs=1e-9), i
+
+    cached = tuning.tuning_data(engine, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    assert tuning.score(cached, OTHER_PARAMS) == tuning.score(data, OTHER_PARAMS)
+    # Trials are scored with graph Elo, as the backtest (and /api/predict) use it
+    scores = tuning.score(data, params.DEFAULT_PARAMS)
+    proba = model.predict_batch(data.columns, data.rank_a, data.rank_b)["proba_a"]
+    assert scores["brier"] == pytest.approx(np.mean((proba - data.a_won) ** 2))
+    assert tuning.score(data, params.DEFAULT_PARAMS._replace(elo_k=20.0)) == scores
+
+    fallback = tuning.score(data, params.DEFAULT_PARAMS, fallback=True)
+    columns = dict(data.columns, elo_diff=tuning.history_elo(sums_a, data.columns["matches_played_a"], 32.0)
+                   - tuning.history_elo(data.elo_sums[180.0][1], data.columns["matches_played_b"], 32.0))
+    proba = model.predict_batch(columns, data.rank_a, data.rank_b)["proba_a"]
+    assert fallback["brier"] == pytest.approx(np.mean((proba - data.a_won) ** 2))
+
+
+def test_search_strategies():
+    """Grid, random and Bayesian searches score the baseline first; a pool gives the serial scores"""
+    engine, _ = random_graph([f"p{i}" for i in range(16)], 1500, seed=6)
+    data = tuning.tuning_data(engine, cache_dir=None)
+
+    grid = tuning.search(data, "grid", dimensions=["form_factor", "elo_half_life_days"], workers=1,
+                         base=params.DEFAULT_PARAMS)
+    assert len(grid) == 1 + tuning.GRID_POINTS ** 2 and grid[0].params == params.DEFAULT_PARAMS
+    assert {t.params.elo_half_life_days for t in grid[1:]} == {60.0, 210.0, 360.0}
+
+    serial = tuning.search(data, "random", n_trials=12, workers=1, base=params.DEFAULT_PARAMS, seed=2)
+    parallel = tuning.search(data, "random", n_trials=12, workers=2, base=params.DEFAULT_PARAMS, seed=2)
+    assert serial == parallel
+    assert all(list(t.params.underdog_caps) == sorted(t.params.underdog_caps, reverse=True) for t in serial)
+
+    bayes = tuning.search(data, "bayes", n_trials=24, workers=2, base=params.DEFAULT_PARAMS, seed=3)
+    assert len(bayes) == 25
+    best = tuning.best_trial(bayes)
+    assert best.scores["log_loss"] <= bayes[0].scores["log_loss"]
+    with pytest.raises(ValueError):
+        tuning.search(data, "annealing", base=params.DEFAULT_PARAMS)
+
+
+def test_tune_searches_history_elo_without_graph_elo():
+    """Model constants are searched with graph Elo; K and the half-life only on matches lacking it"""
+    engine, _ = random_graph([f"p{i}" for i in range(16)], 1500, seed=6)
+    data = tuning.tuning_data(engine, cache_dir=None)
+    rated = data.graph_rated()
+    assert rated.any() and not rated.all()
+
+    trials, elo_trials = tuning.tune(data, "random", n_trials=6, workers=1, base=params.DEFAULT_PARAMS, seed=4)
+    assert len(trials) == len(elo_trials) == 7
+    assert all(t.params.elo_k == params.DEFAULT_PARAMS.elo_k for t in trials)
+    best = tuning.best_trial(trials)
+    assert elo_trials[0].params == best.params
+    assert {t.params._replace(elo_k=0.0, elo_half_life_days=0.0) for t in elo_trials} == {
+        best.params._replace(elo_k=0.0, elo_half_life_days=0.0)}
+    assert elo_trials[0].scores == tuning.score(data.take(~rated), best.params, fallback=True)
+
+    only_model, none = tuning.tune(data, "random", n_trials=3, dimensions=["form_factor"], workers=1,
+                                   base=params.DEFAULT_PARAMS)
+    assert len(only_model) == 4 and none == []
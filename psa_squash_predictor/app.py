@@ -262,23 +262,29 @@ def scrape_player_matches(player: Player, limit: Optional[int] = None) -> List[M
         raise RuntimeError(f"Could not locate Results/Matches section on PSA page for {player.name}.")
 
     matches: List[Match] = []
-    # Parse rows
+    rows = []
     for tr in results_section.select("tbody tr") or results_section.select("tr"):
         tds = tr.find_all("td")
         if len(tds) < 3:
             continue
-        cells = [td.get_text(" ", strip=True) for td in tds]
+        rows.append((tr, [td.get_text(" ", strip=True) for td in tds]))
+
+    # Date candidates are the first two cells. Parse each column in one call
+    # (each cell in its own format, as rows may mix them; distinct strings
+    # cached) and let the second column fill rows where the first is not a
+    # date (NaT).
+    first_col = pd.to_datetime(pd.Series([cells[0] for _, cells in rows], dtype=object),
+                               errors="coerce", format="mixed", cache=True)
+    second_col = pd.to_datetime(pd.Series([cells[1] for _, cells in rows], dtype=object),
+                                errors="coerce", format="mixed", cache=True)
+    row_dates = first_col.fillna(second_col)
+
+    # Parse rows
+    for (tr, cells), row_date in zip(rows, row_dates):
         row_text = " | ".join(cells)
         # Heuristic mapping
         # Try to identify fields by keywords/positions
-        date_obj = None
-        # date candidates
-        for c in cells[:2]:
-            try:
-                date_obj = pd.to_datetime(c, errors="raise").to_pydatetime()
-                break
-            except Exception:
-                continue
+        date_obj = row_date.to_pydatetime() if pd.notna(row_date) else None
         opponent = None
         opp_a = tr.find("a", href=re.compile(PLAYER_PATH_HINT))
         if opp_a: